@@ -0,0 +1,210 @@
+"""
+Content-addressed cache for per-well curve analysis results.
+
+Entries are keyed on a hash of the raw well content (cycles, RFU, test code,
+fluorophore) plus the analyzer version, so re-uploading the same CFX export
+skips curve fitting and anomaly detection for every unchanged well.
+
+Two tiers:
+    - in-process LRU (QPCR_CACHE_SIZE entries, 0 disables the cache)
+    - optional on-disk tier (QPCR_CACHE_DIR), trimmed oldest-first once it
+      grows past QPCR_CACHE_DISK_MB
+"""
+
+import copy
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from log_utils import get_logger
+
+logger = get_logger("analysis_cache")
+
+DEFAULT_MEMORY_ENTRIES = int(os.environ.get('QPCR_CACHE_SIZE', '4096'))
+DEFAULT_DISK_DIR = os.environ.get('QPCR_CACHE_DIR') or None
+DEFAULT_DISK_MAX_BYTES = int(float(os.environ.get('QPCR_CACHE_DISK_MB', '256')) * 1024 * 1024)
+
+
+def make_well_key(cycles, rfu, test_code, fluorophore, version):
+    """Stable content hash for one well's analysis inputs."""
+    h = hashlib.sha256()
+    h.update(str(version).encode())
+    h.update(b'\0')
+    h.update(str(test_code or '').encode())
+    h.update(b'\0')
+    h.update(str(fluorophore or '').encode())
+    h.update(b'\0')
+    h.update(np.asarray(cycles, dtype=np.float64).tobytes())
+    h.update(b'\0')
+    h.update(np.asarray(rfu, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+class AnalysisResultCache:
+    """Thread-safe two-tier (memory LRU + disk) cache of analysis dicts."""
+
+    def __init__(self, max_entries=DEFAULT_MEMORY_ENTRIES, disk_dir=DEFAULT_DISK_DIR,
+                 disk_max_bytes=DEFAULT_DISK_MAX_BYTES):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None  # computed lazily on first disk write
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+        if self.disk_dir:
+            try:
+                os.makedirs(self.disk_dir, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"Analysis cache disk tier disabled ({self.disk_dir}): {e}")
+                self.disk_dir = None
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, key):
+        """Return a private copy of the cached result, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(value)
+
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, value)
+        return copy.deepcopy(value)
+
+    def put(self, key, value):
+        """Store a copy of ``value`` under ``key`` in both tiers."""
+        if not self.enabled:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._remember(key, value)
+        self._disk_put(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'disk_enabled': bool(self.disk_dir),
+                'disk_bytes': self._disk_bytes or 0,
+                'disk_max_bytes': self.disk_max_bytes if self.disk_dir else 0,
+                'disk_evictions': self.disk_evictions,
+            }
+
+    # --- internals -------------------------------------------------------
+
+    def _remember(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path, None)  # refresh recency for eviction
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable analysis cache entry {key}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _disk_put(self, key, value):
+        if not self.disk_dir:
+            return
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            # Write-then-rename so concurrent readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, self._disk_path(key))
+        except Exception as e:
+            logger.warning(f"Could not write analysis cache entry {key}: {e}")
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += len(payload)
+            if self._disk_bytes > self.disk_max_bytes:
+                self._trim_disk()
+
+    def _scan_disk_bytes(self):
+        total = 0
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.pkl'):
+                total += entry.stat().st_size
+        return total
+
+    def _trim_disk(self):
+        """Delete least recently used files until the tier is at 90% of its budget."""
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.pkl'):
+                st = entry.stat()
+                files.append((st.st_mtime, st.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = int(self.disk_max_bytes * 0.9)
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.disk_evictions += 1
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+
+# Process-wide instance used by qpcr_analyzer
+analysis_cache = AnalysisResultCache()
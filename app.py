@@ -6,12 +6,13 @@ from log_utils import configure_root_logger, get_logger
 # Configure logging as early as possible
 configure_root_logger()
 app_logger = get_logger("app")
+import hashlib
 import re
 import traceback
 import logging
 import time
-import pymysql
 import mysql.connector
+import mysql_pool
 from logging.handlers import RotatingFileHandler
 import numpy as np
 from datetime import datetime
@@ -19,14 +20,25 @@ from decimal import Decimal
 from urllib.parse import unquote
 from dotenv import load_dotenv
 from qpcr_analyzer import process_csv_data, validate_csv_structure
+from cfx_ingest import CFXParseError, parse_amplification_csv, parse_summary_csv
+from well_persistence import save_well_rows, well_row
+from pipeline_metrics import metrics, record, request_timing, span
+from well_trace import trace_session, tracer
+from pathogen_registry import get_pathogen_target
+from pathogen_targets import get_pathogen_mapping
+from session_history import (
+    InvalidCursor, decode_cursor, fetch_session_page, fetch_session_wells, parse_page_size
+)
 from models import db, AnalysisSession, WellResult, ExperimentStatistics, ChannelCompletionStatus
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.exc import OperationalError, IntegrityError, DatabaseError
 from threshold_backend import create_threshold_routes
+from threshold_recalc import invalidate_session as invalidate_recalc_context
+from session_response_cache import bump_session_version, session_content_token, session_responses
 from cqj_calcj_utils import calculate_calcj_with_controls
 from ml_config_manager import MLConfigManager
 from fda_compliance_manager import FDAComplianceManager
-from mysql_unified_compliance_manager import MySQLUnifiedComplianceManager
+from mysql_unified_compliance_manager import MySQLUnifiedComplianceManager, evidence_dedup_key
 from database_management_api import db_mgmt_bp
 # Temporarily disable enhanced compliance API due to corruption
 # from enhanced_compliance_api import compliance_api
@@ -78,109 +90,6 @@ def is_sample_well(sample_name):
     
     return not is_control_sample(sample_name)
 
-def safe_json_dumps(value, default=None):
-    """Helper function to safely serialize to JSON, avoiding double-encoding"""
-    if value is None:
-        return None
-    # If already a string, assume it's already JSON-encoded
-    if isinstance(value, str):
-        try:
-            # Validate it's valid JSON
-            json.loads(value)
-            return value
-        except (json.JSONDecodeError, TypeError):
-            # If not valid JSON, treat as a raw string and encode it
-            return json.dumps(value)
-    # Otherwise, serialize the object/list to JSON
-    return json.dumps(value if value is not None else default)
-
-def get_pathogen_mapping():
-    """Centralized pathogen mapping that matches pathogen_library.js"""
-    return {
-        "Lacto": {
-            "Cy5": "Lactobacillus jenseni",
-            "FAM": "Lactobacillus gasseri", 
-            "HEX": "Lactobacillus iners",
-            "Texas Red": "Lactobacillus crispatus"
-        },
-        "Calb": {
-            "HEX": "Candida albicans"
-        },
-        "Ctrach": {
-            "FAM": "Chlamydia trachomatis"
-        },
-        "Ngon": {
-            "HEX": "Neisseria gonhorrea"
-        },
-        "Tvag": {
-            "FAM": "Trichomonas vaginalis"
-        },
-        "Cglab": {
-            "FAM": "Candida glabrata"
-        },
-        "Cpara": {
-            "FAM": "Candida parapsilosis"
-        },
-        "Ctrop": {
-            "FAM": "Candida tropicalis"
-        },
-        "Gvag": {
-            "FAM": "Gardnerella vaginalis"
-        },
-        "BVAB2": {
-            "FAM": "BVAB2"
-        },
-        "CHVIC": {
-            "FAM": "CHVIC"
-        },
-        "AtopVag": {
-            "FAM": "Atopobium vaginae"
-        },
-        "Megasphaera": {
-            "FAM": "Megasphaera1",
-            "HEX": "Megasphaera2"
-        },
-        "BVPanelPCR1": {
-            "FAM": "Bacteroides fragilis",
-            "HEX": "Mobiluncus curtisii",
-            "Texas Red": "Streptococcus anginosus",
-            "Cy5": "Sneathia sanguinegens"
-        },
-        "BVPanelPCR2": {
-            "FAM": "Atopobium vaginae",
-            "HEX": "Mobiluncus mulieris",
-            "Texas Red": "Megasphaera type 2",
-            "Cy5": "Megasphaera type 1"
-        },
-        "BVPanelPCR3": {
-            "FAM": "Gardnerella vaginalis",
-            "HEX": "Lactobacillus acidophilus",
-            "Texas Red": "Prevotella bivia",
-            "Cy5": "Bifidobacterium breve"
-        },
-        "BVPanelPCR4": {
-            "FAM": "Gardnerella vaginalis",
-            "HEX": "Lactobacillus acidophilus",
-            "Texas Red": "Prevotella bivia",
-            "Cy5": "Bifidobacterium breve"
-        },
-        "BVAB": {
-            "FAM": "BVAB2",
-            "HEX": "BVAB1", 
-            "Cy5": "BVAB3"
-        },
-        "Mgen": {
-            "FAM": "Mycoplasma genitalium"
-        },
-        "Upar": {
-            "FAM": "Ureaplasma parvum"
-        },
-        "Uure": {
-            "FAM": "Ureaplasma urealyticum"
-        }
-        # Add more mappings as needed from pathogen_library.js
-    }
-
 def extract_test_code_from_filename(filename):
     """Extract test_code from experiment filename"""
     if not filename:
@@ -201,16 +110,6 @@ def extract_test_code_from_filename(filename):
         
     return test_code
 
-def get_pathogen_target(test_code, fluorophore):
-    """Get pathogen target for a given test code and fluorophore"""
-    pathogen_mapping = get_pathogen_mapping()
-    
-    if test_code in pathogen_mapping:
-        return pathogen_mapping[test_code].get(fluorophore, fluorophore)
-    
-    # Fallback to fluorophore name if no mapping found
-    return fluorophore
-
 def get_classification_group(classification):
     """
     Group classifications for expert correction accuracy calculation.
@@ -569,7 +468,6 @@ def save_individual_channel_session(filename, results, fluorophore, summary):
         if existing_session:
             # Update existing session
             session = existing_session
-            WellResult.query.filter_by(session_id=session.id).delete()
             session.total_wells = total_wells
             session.good_curves = positive_wells
             session.success_rate = success_rate
@@ -642,6 +540,7 @@ def save_individual_channel_session(filename, results, fluorophore, summary):
             print(f"Warning: Unexpected individual_results type: {type(individual_results)}")
             results_items = []
         
+        well_rows = []
         for well_key, well_data in results_items:
             # Ensure well_data is a dictionary
             if not isinstance(well_data, dict):
@@ -657,101 +556,22 @@ def save_individual_channel_session(filename, results, fluorophore, summary):
                 app.logger.info(f"[CONTROL SAVE] Control well {well_key}: sample='{sample_name}', coord='{coordinate}', fluor='{fluorophore}'")
                 
             try:
-                well_result = WellResult()
-                well_result.session_id = session.id
-                well_result.well_id = str(well_key)
-                well_result.is_good_scurve = bool(well_data.get('is_good_scurve', False))
-                well_result.r2_score = float(well_data.get('r2_score', 0)) if well_data.get('r2_score') is not None else None
-                well_result.rmse = float(well_data.get('rmse', 0)) if well_data.get('rmse') is not None else None
-                well_result.amplitude = float(well_data.get('amplitude', 0)) if well_data.get('amplitude') is not None else None
-                well_result.steepness = float(well_data.get('steepness', 0)) if well_data.get('steepness') is not None else None
-                well_result.midpoint = float(well_data.get('midpoint', 0)) if well_data.get('midpoint') is not None else None
-                well_result.baseline = float(well_data.get('baseline', 0)) if well_data.get('baseline') is not None else None
-                well_result.data_points = int(well_data.get('data_points', 0)) if well_data.get('data_points') is not None else None
-                well_result.cycle_range = float(well_data.get('cycle_range', 0)) if well_data.get('cycle_range') is not None else None
-                # JSON/text fields - ensure they are converted to JSON strings for database storage
-                
-                well_result.fit_parameters = safe_json_dumps(well_data.get('fit_parameters'), [])
-                well_result.parameter_errors = safe_json_dumps(well_data.get('parameter_errors'), [])
-                well_result.fitted_curve = safe_json_dumps(well_data.get('fitted_curve'), [])
-                well_result.anomalies = safe_json_dumps(well_data.get('anomalies'), [])
-                # Persist raw data; gracefully fallback to alternate keys
-                raw_cycles_val = well_data.get('raw_cycles') or well_data.get('cycles') or well_data.get('x_data')
-                raw_rfu_val = well_data.get('raw_rfu') or well_data.get('rfu') or well_data.get('y_data')
-                well_result.raw_cycles = safe_json_dumps(raw_cycles_val, [])
-                well_result.raw_rfu = safe_json_dumps(raw_rfu_val, [])
-                well_result.sample_name = str(well_data.get('sample_name', '')) if well_data.get('sample_name') else None
-                cq_value_raw = well_data.get('cq_value')
-                well_result.cq_value = float(cq_value_raw) if cq_value_raw is not None and cq_value_raw != '' else None
-                
-                # Set fluorophore if present - prioritize function parameter over well data
-                well_fluorophore = well_data.get('fluorophore', '')
-                final_fluorophore = fluorophore if fluorophore else well_fluorophore
-                well_result.fluorophore = str(final_fluorophore) if final_fluorophore else None
-                
-                # Debug fluorophore assignment for control wells
-                if well_result.sample_name and any(control in well_result.sample_name.upper() for control in ['H1', 'H2', 'H3', 'H4', 'M1', 'M2', 'M3', 'M4', 'L1', 'L2', 'L3', 'L4', 'NTC']):
-                    print(f"[CONTROL FLUOR] {well_key}: sample='{well_result.sample_name}', final_fluorophore='{final_fluorophore}' (param={fluorophore}, data={well_fluorophore})")
-                    app.logger.info(f"[CONTROL FLUOR] {well_key}: sample='{well_result.sample_name}', final_fluorophore='{final_fluorophore}' (param={fluorophore}, data={well_fluorophore})")
-                
-                # Set threshold_value if present
-
-                threshold_value = well_data.get('threshold_value')
-                if threshold_value is not None:
-                    try:
-                        well_result.threshold_value = float(threshold_value)
-                    except (ValueError, TypeError):
-                        well_result.threshold_value = None
-                else:
-                    well_result.threshold_value = None
-
-                # Set per-channel thresholds if present
-                well_result.thresholds = safe_json_dumps(well_data.get('thresholds'), {})
-                
-                # Set curve_classification if present, else default to {'class': 'N/A'}
-                curve_classification = well_data.get('curve_classification')
-                if curve_classification is None:
-                    # Default to N/A if not present
-                    curve_classification = {'class': 'N/A'}
-                # Ensure it's a JSON string for DB
-                well_result.curve_classification = safe_json_dumps(curve_classification, {'class': 'N/A'})
-                
-                # --- Save CQ-J and Calc-J fields if present ---
-                # Store per-channel CQJ/CalcJ dicts (e.g., {'FAM': 31.6}, {'FAM': 2.0e2})
-                try:
-                    well_result.cqj = safe_json_dumps(well_data.get('cqj'), {})
-                except Exception as e:
-                    print(f"[DB WARN] Failed to save CQJ for {well_key}: {e}")
-                    well_result.cqj = safe_json_dumps({}, {})
-
-                try:
-                    well_result.calcj = safe_json_dumps(well_data.get('calcj'), {})
-                except Exception as e:
-                    print(f"[DB WARN] Failed to save CalcJ for {well_key}: {e}")
-                    well_result.calcj = safe_json_dumps({}, {})
-
-                # Set test_code extracted from filename
-                well_result.test_code = test_code
-                print(f"🔧 [CRITICAL DEBUG] Setting test_code='{test_code}' for well {well_key} in save_individual_channel_session()")
-                app.logger.info(f"🔧 [CRITICAL DEBUG] Setting test_code='{test_code}' for well {well_key} in save_individual_channel_session()")
-                
-                db.session.add(well_result)
-                db.session.flush()  # Force write to DB after each well
-                well_count += 1
-                if well_count % 50 == 0:
-                    db.session.commit()
-                print(f"[DB DEBUG] Saved well {well_key}: {well_result.to_dict()}")
-                app.logger.info(f"[DB DEBUG] Saved well {well_key}: {well_result.to_dict()}")
+                well_rows.append(well_row(well_key, well_data, test_code, fluorophore))
             except Exception as e:
                 print(f"Error saving well {well_key}: {e}")
                 app.logger.error(f"Error saving well {well_key}: {e}")
                 continue
         
-        # Final commit
+        print(f"🔧 [CRITICAL DEBUG] Setting test_code='{test_code}' for {len(well_rows)} wells in save_individual_channel_session()")
+        app.logger.info(f"🔧 [CRITICAL DEBUG] Setting test_code='{test_code}' for {len(well_rows)} wells in save_individual_channel_session()")
+        save_stats = save_well_rows(session.id, well_rows)
+        well_count = len(well_rows)
+        print(f"[DB DEBUG] Bulk well save: {save_stats}")
+        app.logger.info(f"[DB DEBUG] Bulk well save: {save_stats}")
+        
         # Final commit
         try:
             db.session.commit()
-            db.session.flush()
             print(f"[DB DEBUG] Final commit done for {well_count} wells.")
             app.logger.info(f"[DB DEBUG] Final commit done for {well_count} wells.")
             
@@ -931,9 +751,9 @@ if database_url and database_url.startswith("mysql"):
         app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
             "pool_recycle": 300,
             "pool_pre_ping": True,
-            "pool_size": 10,
-            "max_overflow": 20,
-            "pool_timeout": 30,
+            "pool_size": mysql_pool.POOL_SIZE,
+            "max_overflow": mysql_pool.POOL_MAX_OVERFLOW,
+            "pool_timeout": mysql_pool.POOL_TIMEOUT,
             "connect_args": {
                 "autocommit": True
             }
@@ -991,6 +811,8 @@ def get_mysql_config():
 with app.app_context():
     try:
         db.create_all()
+        from ml_validation_tracker import ml_tracker
+        ml_tracker.prediction_writer.ensure_table()
         print("✅ MySQL database tables initialized successfully")
     except Exception as e:
         print(f"❌ Critical: MySQL database initialization failed: {e}")
@@ -1030,7 +852,10 @@ print("MySQL database tables initialized")
 # Initialize ML configuration manager with MySQL - NO SQLITE ALLOWED
 try:
     from ml_config_manager import MLConfigManager
+    import ml_config_manager as ml_config_module
     ml_config_manager = MLConfigManager(use_mysql=True, mysql_config=mysql_config)
+    # Share this instance (and its config snapshot) with get_ml_config_manager() callers
+    ml_config_module.ml_config_manager = ml_config_manager
     print("✅ ML Configuration Manager initialized with MySQL (SQLite permanently deprecated)")
     print(f"🔍 DEBUG: ml_config_manager type: {type(ml_config_manager)}")
     print(f"🔍 DEBUG: ml_config_manager is None: {ml_config_manager is None}")
@@ -1267,13 +1092,15 @@ def serve_config(filename):
 
 @app.route('/analyze', methods=['POST'])
 @require_permission(Permissions.RUN_BASIC_ANALYSIS)
+@request_timing('analyze_request')
 def analyze_data():
     """Endpoint to analyze qPCR data and save results to database"""
     try:
         print(f"[ANALYZE] Starting analysis request")
         
         # Get JSON data from request
-        request_data = request.get_json()
+        with span('payload_parse'):
+            request_data = request.get_json()
         filename = request.headers.get('X-Filename', 'unknown.csv')
         fluorophore = request.headers.get('X-Fluorophore', 'Unknown')
         
@@ -1317,6 +1144,69 @@ def analyze_data():
             samples_data = None
             print(f"[ANALYZE] Using legacy format - data length: {len(data)}")
         
+        return _analyze_wells_payload(data, samples_data, filename, fluorophore)
+        
+    except Exception as e:
+        print(f"[ANALYZE ERROR] Server error: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'error': f'Server error: {str(e)}',
+            'success': False
+        }), 500
+
+
+@app.route('/analyze/upload', methods=['POST'])
+@require_permission(Permissions.RUN_BASIC_ANALYSIS)
+@request_timing('analyze_request')
+def analyze_upload():
+    """
+    Analyze the original CFX export files instead of a client-parsed JSON payload.
+
+    multipart/form-data: 'amplification' file (required) and 'summary' file (optional),
+    plain or gzip; 'filename'/'fluorophore' form fields or the X-Filename/X-Fluorophore headers.
+    Any other body is read as a streamed amplification CSV (optionally gzip).
+    """
+    try:
+        if request.files:
+            amplification_file = request.files.get('amplification')
+            if amplification_file is None:
+                return jsonify({'error': "Missing 'amplification' file", 'success': False}), 400
+            summary_file = request.files.get('summary')
+            filename = (request.form.get('filename') or request.headers.get('X-Filename')
+                        or amplification_file.filename or 'unknown.csv')
+            fluorophore = request.form.get('fluorophore') or request.headers.get('X-Fluorophore', 'Unknown')
+            with span('payload_parse'):
+                plate = parse_amplification_csv(amplification_file.stream)
+                samples_data = parse_summary_csv(summary_file.stream) if summary_file else None
+        else:
+            filename = request.headers.get('X-Filename', 'unknown.csv')
+            fluorophore = request.headers.get('X-Fluorophore', 'Unknown')
+            with span('payload_parse'):
+                plate = parse_amplification_csv(request.stream)
+            samples_data = None
+    except CFXParseError as e:
+        print(f"[ANALYZE-UPLOAD ERROR] {e}")
+        return jsonify({'error': str(e), 'success': False}), 400
+
+    with span('payload_parse'):
+        data = plate.to_wells()
+    print(f"[ANALYZE-UPLOAD] Parsed {len(data)} wells x {len(plate.cycles)} cycles from {filename} ({fluorophore})")
+    if not data:
+        return jsonify({'error': 'No data provided', 'success': False}), 400
+    return _analyze_wells_payload(data, samples_data, filename, fluorophore, validated=True)
+
+
+def _analyze_wells_payload(data, samples_data, filename, fluorophore, validated=False):
+    """
+    Analyze one channel's wells and save the session (shared by /analyze and /analyze/upload).
+
+    Args:
+        data: {well_id: {'cycles': [...], 'rfu': [...], ...}}
+        samples_data: samples summary as CSV text or a parsed DataFrame, or None
+        validated: skip validate_csv_structure for data built by cfx_ingest
+    """
+    try:
         # CRITICAL FIX: Extract test_code from filename and add to each well's data
         # This ensures CalcJ calculation has access to pathogen-specific logic
         test_code = extract_test_code_from_filename(filename)
@@ -1340,8 +1230,9 @@ def analyze_data():
         print(f"[ANALYZE] Added per-well context to {wells_updated} wells (test_code + fluorophore='{fluorophore}')")
         
         print(f"[ANALYZE] Starting validation...")
-        # Validate data structure
-        errors, warnings = validate_csv_structure(data)
+        # Validate data structure (uploads parsed server-side are well-formed by construction)
+        with span('validate'):
+            errors, warnings = validate_csv_structure(data) if not validated else ([], [])
         
         if errors:
             print(f"[ANALYZE ERROR] Validation failed: {errors}")
@@ -1355,11 +1246,16 @@ def analyze_data():
         print(f"[ANALYZE] Validation passed, starting processing...")
         # Process the data with SQL integration if samples data available
         try:
-            if samples_data:
+            stage_started = time.perf_counter()
+            # Per-well debug traces are keyed by filename until the session is saved
+            trace_channel = 'Texas Red' if fluorophore == 'TexasRed' else fluorophore
+            if samples_data is not None and len(samples_data) > 0:
                 print(f"[ANALYZE-SQL] Starting SQL integration with samples_data length: {len(samples_data)}")
-                print(f"[ANALYZE-SQL] Samples data preview: {samples_data[:200]}...")
+                if isinstance(samples_data, str):
+                    print(f"[ANALYZE-SQL] Samples data preview: {samples_data[:200]}...")
                 from sql_integration import process_with_sql_integration
-                results = process_with_sql_integration(data, samples_data, fluorophore)
+                with trace_session(filename, trace_channel):
+                    results = process_with_sql_integration(data, samples_data, fluorophore, validated=True)
                 print(f"[ANALYZE-SQL] SQL-based analysis completed for {len(data)} wells with {fluorophore}")
                 print(f"[ANALYZE-SQL] Results success: {results.get('success', 'Unknown')}")
                 print(f"[ANALYZE-SQL] Results keys: {list(results.keys()) if isinstance(results, dict) else 'Not a dict'}")
@@ -1369,7 +1265,8 @@ def analyze_data():
                     print(f"[ANALYZE-SQL] No individual_results in SQL response")
             else:
                 print(f"[ANALYZE-STANDARD] No samples data, using standard analysis")
-                results = process_csv_data(data)
+                with trace_session(filename, trace_channel):
+                    results = process_csv_data(data)
                 print(f"[ANALYZE-STANDARD] Standard analysis completed for {len(data)} wells")
                 print(f"[ANALYZE-STANDARD] Results success: {results.get('success', 'Unknown')}")
                 print(f"[ANALYZE-STANDARD] Results keys: {list(results.keys()) if isinstance(results, dict) else 'Not a dict'}")
@@ -1378,6 +1275,8 @@ def analyze_data():
                 else:
                     print(f"[ANALYZE-STANDARD] No individual_results in standard response")
             
+            record('analysis', time.perf_counter() - stage_started)
+            
             # Inject fluorophore information and ensure proper well_id structure for fresh load
             if 'individual_results' in results and fluorophore != 'Unknown':
                 print(f"[FRESH LOAD] Processing individual_results for {fluorophore}")
@@ -1443,6 +1342,7 @@ def analyze_data():
             print(f"[ANALYZE] Analysis completed successfully")
             
             # Track file processing compliance (before analysis)
+            stage_started = time.perf_counter()
             file_metadata = {
                 'filename': filename,
                 'fluorophore': fluorophore,
@@ -1496,6 +1396,7 @@ def analyze_data():
                 }
                 track_compliance_automatically('CONTROL_ANALYZED', control_metadata)
                 print(f"✓ Tracked {len(control_wells)} control wells for compliance")
+            record('compliance_tracking', time.perf_counter() - stage_started)
                     
         except Exception as analysis_error:
             print(f"Analysis processing error: {analysis_error}")
@@ -1536,7 +1437,6 @@ def analyze_data():
             }
         
         # Save individual channel analyses to database for channel tracking
-        fluorophore = request.headers.get('X-Fluorophore', 'Unknown')
         is_individual_channel = fluorophore in ['Cy5', 'FAM', 'HEX', 'Texas Red']
         
         print(f"[ANALYZE] Database save - fluorophore: {fluorophore}, is_individual: {is_individual_channel}")
@@ -1544,7 +1444,8 @@ def analyze_data():
         if is_individual_channel:
             # Save individual channel session with complete filename
             try:
-                database_saved = save_individual_channel_session(filename, results, fluorophore, summary)
+                with span('save_session'):
+                    database_saved = save_individual_channel_session(filename, results, fluorophore, summary)
                 print(f"Individual {fluorophore} channel saved to database: {database_saved}")
             except Exception as save_error:
                 print(f"Failed to save individual {fluorophore} channel: {save_error}")
@@ -1578,6 +1479,7 @@ def analyze_data():
         print(f"[ANALYZE] Preparing JSON response...")
         
         # Track ML analysis run for validation dashboard
+        stage_started = time.perf_counter()
         try:
             from ml_validation_tracker import ml_tracker
             
@@ -1641,6 +1543,8 @@ def analyze_data():
             print(f"⚠️ Could not track analysis run: {track_error}")
             # Don't fail the request if tracking fails
         
+        record('ml_run_tracking', time.perf_counter() - stage_started)
+        
         # Ensure all numpy data types are converted to Python types for JSON serialization
         try:
             import json
@@ -1695,104 +1599,80 @@ def analyze_data():
 
 @app.route('/sessions', methods=['GET'])
 def get_sessions():
-    """Get all analysis sessions using MySQL directly"""
+    """
+    Paginated session history (newest first).
+
+    Query params:
+        limit   - sessions per page (default QPCR_SESSIONS_PAGE_SIZE, capped)
+        cursor  - next_cursor from the previous page
+        wells   - 'summary' (default) attaches per-well summary fields without
+                  curve arrays; 'none' returns session rows only
+    Curve arrays are loaded per session from /sessions/<id>/wells.
+    """
+    try:
+        limit = parse_page_size(request.args.get('limit'))
+        after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        include_wells = request.args.get('wells', 'summary') != 'none'
+    except (ValueError, InvalidCursor) as e:
+        return jsonify({'error': str(e)}), 400
+
     try:
         mysql_config = get_mysql_config()
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
-        
-        # Get all sessions ordered by upload timestamp descending
-        cursor.execute("""
-            SELECT 
-                id, filename, upload_timestamp, total_wells, good_curves, 
-                success_rate, cycle_count, cycle_min, cycle_max, pathogen_breakdown
-            FROM analysis_sessions 
-            ORDER BY upload_timestamp DESC
-        """)
-        sessions = cursor.fetchall()
-        
-        sessions_data = []
-        for session in sessions:
-            # Get well results for this session
-            cursor.execute("""
-                SELECT 
-                    well_id, sample_name, fluorophore, amplitude, is_good_scurve,
-                    r2_score, steepness, midpoint, baseline, cq_value,
-                    raw_cycles, raw_rfu, fitted_curve, fit_parameters, 
-                    parameter_errors, anomalies, curve_classification,
-                    threshold_value, thresholds, cqj, calcj
-                FROM well_results 
-                WHERE session_id = %s
-            """, (session['id'],))
-            well_results = cursor.fetchall()
-            
-            # Convert well results to dict format
-            individual_results = {}
-            well_results_list = []
-            
-            for well in well_results:
-                well_dict = dict(well)
-                well_id = well_dict['well_id']
-                
-                # Extract coordinate from well_id if not present
-                if '_' in well_id:
-                    base_coordinate = well_id.split('_')[0]
-                else:
-                    base_coordinate = well_id
-                well_dict['coordinate'] = base_coordinate
-                
-                # Parse JSON fields that might be stored as strings
-                json_fields = ['raw_cycles', 'raw_rfu', 'fitted_curve', 'fit_parameters', 'parameter_errors', 'anomalies', 'curve_classification', 'thresholds', 'cqj', 'calcj']
-                for field in json_fields:
-                    if field in well_dict and well_dict[field] is not None:
-                        if isinstance(well_dict[field], str):
-                            try:
-                                well_dict[field] = json.loads(well_dict[field])
-                            except (json.JSONDecodeError, TypeError):
-                                if field in ['anomalies']:
-                                    well_dict[field] = []
-                                elif field in ['raw_cycles', 'raw_rfu', 'fitted_curve', 'fit_parameters', 'parameter_errors']:
-                                    well_dict[field] = []
-                                elif field in ['curve_classification', 'thresholds', 'cqj', 'calcj']:
-                                    well_dict[field] = {}
-                
-                individual_results[well_id] = well_dict
-                well_results_list.append(well_dict)
-            
-            # Build session dict
-            session_dict = {
-                'id': session['id'],
-                'filename': session['filename'],
-                'display_name': session['filename'],  # Add display_name for frontend compatibility
-                'upload_timestamp': session['upload_timestamp'].isoformat() if session['upload_timestamp'] else None,
-                'total_wells': session['total_wells'] or 0,
-                'good_curves': session['good_curves'] or 0,
-                'success_rate': session['success_rate'] or 0.0,
-                'cycle_count': session['cycle_count'] or 0,
-                'cycle_min': session['cycle_min'] or 0,
-                'cycle_max': session['cycle_max'] or 0,
-                'pathogen_breakdown': session['pathogen_breakdown'] or '',
-                'individual_results': individual_results,
-                'well_results': well_results_list  # Add for frontend compatibility
-            }
-            
-            sessions_data.append(session_dict)
-        
+
+        sessions_data, next_cursor = fetch_session_page(cursor, limit, after, include_wells)
+        cursor.execute("SELECT COUNT(*) AS total FROM analysis_sessions")
+        total = cursor.fetchone()['total']
+
         cursor.close()
         conn.close()
-        
+
         return jsonify({
             'sessions': sessions_data,
-            'total': len(sessions)
+            'total': total,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         })
         
     except Exception as e:
         app.logger.error(f"Error fetching sessions with MySQL: {e}")
         return jsonify({'error': f'Database error: {str(e)}'}), 500
 
+@app.route('/sessions/<int:session_id>/wells', methods=['GET'])
+def get_session_wells(session_id):
+    """Wells of one session including curve arrays (raw_cycles, raw_rfu, fitted_curve)"""
+    token = session_content_token(session_id)
+    cached = session_responses.lookup('wells', session_id, token)
+    if cached is not None:
+        return cached
+    try:
+        mysql_config = get_mysql_config()
+        conn = mysql_pool.connect(**mysql_config)
+        cursor = conn.cursor(dictionary=True)
+
+        wells = fetch_session_wells(cursor, session_id)
+
+        cursor.close()
+        conn.close()
+
+        return session_responses.respond('wells', session_id, token, {
+            'session_id': session_id,
+            'individual_results': {well['well_id']: well for well in wells},
+            'well_results': wells
+        })
+
+    except Exception as e:
+        app.logger.error(f"Error fetching wells for session {session_id}: {e}")
+        return jsonify({'error': f'Database error: {str(e)}'}), 500
+
 @app.route('/sessions/<int:session_id>', methods=['GET'])
 def get_session_details(session_id):
-    """Get detailed results for a specific session"""
+    """Get detailed results for a specific session (ETag/If-None-Match aware, see session_response_cache)"""
+    token = session_content_token(session_id)
+    cached = session_responses.lookup('detail', session_id, token)
+    if cached is not None:
+        return cached
     try:
         session = AnalysisSession.query.get_or_404(session_id)
         wells = WellResult.query.filter_by(session_id=session_id).all()
@@ -1802,15 +1682,18 @@ def get_session_details(session_id):
         app.logger.info(f"[HISTORY LOAD] Loading session {session_id}: {session.filename}")
         app.logger.info(f"[HISTORY LOAD] Found {len(wells)} wells in database")
         
+        # One to_dict() per well: 'wells' gets it as is, individual_results a normalized copy
+        well_dicts = [well.to_dict() for well in wells]
+        
         # Robustly handle both dict and list for wells
         if isinstance(wells, dict):
             results_dict = wells
         else:
             results_dict = {}
             control_wells_found = 0
-            for well in wells:
-                well_dict = well.to_dict() if hasattr(well, 'to_dict') else well
-                if isinstance(well_dict, dict) and 'well_id' in well_dict:
+            for base_dict in well_dicts:
+                well_dict = dict(base_dict)
+                if 'well_id' in well_dict:
                     # Ensure well_dict has all necessary fields for control grid
                     well_id = well_dict['well_id']
                     
@@ -1850,9 +1733,9 @@ def get_session_details(session_id):
             print(f"[HISTORY LOAD] Found {control_wells_found} control wells in loaded session")
             print(f"[HISTORY LOAD] Sample well structure: {list(results_dict.keys())[:3] if results_dict else 'None'}")
             
-        return jsonify({
+        return session_responses.respond('detail', session_id, token, {
             'session': session.to_dict(),
-            'wells': [well.to_dict() for well in wells],
+            'wells': well_dicts,
             'individual_results': results_dict
         })
     except Exception as e:
@@ -2044,10 +1927,7 @@ def save_combined_session():
         existing_session = AnalysisSession.query.filter_by(filename=display_name).first()
         
         if existing_session:
-            # Delete existing well results for this session
-            WellResult.query.filter_by(session_id=existing_session.id).delete()
-            
-            # Update existing session with new data
+            # Update existing session with new data (well rows are upserted below)
             session = existing_session
             session.total_wells = total_non_control_wells
             session.good_curves = positive_wells
@@ -2074,80 +1954,24 @@ def save_combined_session():
         db.session.flush()
         
         # Save well results
-        well_count = 0
+        well_rows = []
         for well_key, well_data in individual_results.items():
+            # Validate well_data structure
+            if not isinstance(well_data, dict):
+                print(f"Warning: well_data for {well_key} is not a dict: {type(well_data)}")
+                continue
             try:
-                # Validate well_data structure
-                if not isinstance(well_data, dict):
-                    print(f"Warning: well_data for {well_key} is not a dict: {type(well_data)}")
-                    continue
-                well_result = WellResult()
-                well_result.session_id = session.id
-                well_result.well_id = str(well_key)
-                well_result.is_good_scurve = bool(well_data.get('is_good_scurve', False))
-                well_result.r2_score = float(well_data.get('r2_score', 0)) if well_data.get('r2_score') is not None else None
-                well_result.rmse = float(well_data.get('rmse', 0)) if well_data.get('rmse') is not None else None
-                well_result.amplitude = float(well_data.get('amplitude', 0)) if well_data.get('amplitude') is not None else None
-                well_result.steepness = float(well_data.get('steepness', 0)) if well_data.get('steepness') is not None else None
-                well_result.midpoint = float(well_data.get('midpoint', 0)) if well_data.get('midpoint') is not None else None
-                well_result.baseline = float(well_data.get('baseline', 0)) if well_data.get('baseline') is not None else None
-                well_result.data_points = int(well_data.get('data_points', 0)) if well_data.get('data_points') is not None else None
-                well_result.cycle_range = float(well_data.get('cycle_range', 0)) if well_data.get('cycle_range') is not None else None
-
-                # JSON/text fields - ensure they are converted to JSON strings for database storage
-                well_result.fit_parameters = safe_json_dumps(well_data.get('fit_parameters'), [])
-                well_result.parameter_errors = safe_json_dumps(well_data.get('parameter_errors'), [])
-                well_result.fitted_curve = safe_json_dumps(well_data.get('fitted_curve'), [])
-                well_result.anomalies = safe_json_dumps(well_data.get('anomalies'), [])
-                # Persist raw data; gracefully fallback to alternate keys
-                raw_cycles_val = well_data.get('raw_cycles') or well_data.get('cycles') or well_data.get('x_data')
-                raw_rfu_val = well_data.get('raw_rfu') or well_data.get('rfu') or well_data.get('y_data')
-                well_result.raw_cycles = safe_json_dumps(raw_cycles_val, [])
-                well_result.raw_rfu = safe_json_dumps(raw_rfu_val, [])
-
-                well_result.sample_name = str(well_data.get('sample_name', '')) if well_data.get('sample_name') else None
-                well_result.cq_value = float(well_data.get('cq_value', 0)) if well_data.get('cq_value') is not None else None
-                well_result.fluorophore = str(well_data.get('fluorophore', '')) if well_data.get('fluorophore') else None
-
-                # Set threshold_value if present
-                threshold_value = well_data.get('threshold_value')
-                if threshold_value is not None:
-                    try:
-                        well_result.threshold_value = float(threshold_value)
-                    except (ValueError, TypeError):
-                        well_result.threshold_value = None
-                else:
-                    well_result.threshold_value = None
-
-                # Set per-channel thresholds if present
-                well_result.thresholds = safe_json_dumps(well_data.get('thresholds'), {})
-                
-                # Set curve_classification if present, else default to {'class': 'N/A'}
-                curve_classification = well_data.get('curve_classification')
-                if curve_classification is None:
-                    # Default to N/A if not present
-                    curve_classification = {'class': 'N/A'}
-                # Ensure it's a JSON string for DB
-                well_result.curve_classification = safe_json_dumps(curve_classification, {'class': 'N/A'})
-
-                # --- Save CQ-J and Calc-J fields if present ---
-
-                well_result.cqj = safe_json_dumps(well_data.get('cqj'), {})
-                well_result.calcj = safe_json_dumps(well_data.get('calcj'), {})
-
-                # Set test_code extracted from filename
-                well_result.test_code = test_code
-                print(f"🔧 [CRITICAL DEBUG] Setting test_code='{test_code}' for well {well_key} in save_combined_session()")
-                app.logger.info(f"🔧 [CRITICAL DEBUG] Setting test_code='{test_code}' for well {well_key} in save_combined_session()")
-
-                db.session.add(well_result)
-                well_count += 1
-                if well_count % 50 == 0:
-                    db.session.commit()
+                well_rows.append(well_row(well_key, well_data, test_code))
             except Exception as well_error:
                 print(f"Error saving well {well_key}: {well_error}")
                 continue
         
+        print(f"🔧 [CRITICAL DEBUG] Setting test_code='{test_code}' for {len(well_rows)} wells in save_combined_session()")
+        app.logger.info(f"🔧 [CRITICAL DEBUG] Setting test_code='{test_code}' for {len(well_rows)} wells in save_combined_session()")
+        save_stats = save_well_rows(session.id, well_rows)
+        well_count = len(well_rows)
+        print(f"[DB DEBUG] Bulk well save (combined): {save_stats}")
+        
         try:
             db.session.commit()
         except Exception as commit_error:
@@ -2162,6 +1986,7 @@ def save_combined_session():
             ml_tracker.update_session_id(old_session_id=display_name, new_session_id=session.id)
         except Exception as ml_update_error:
             print(f"Warning: Could not update ML tracking session_id: {ml_update_error}")
+        tracer.rename_session(display_name, str(session.id))
 
         # Check if ML training is paused for this session
         training_paused = False
@@ -2241,7 +2066,7 @@ def update_session_results(session_id):
         mysql_config = get_mysql_config()
         
         import mysql.connector
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor()
         
         try:
@@ -2314,7 +2139,9 @@ def update_session_results(session_id):
                 else:
                     app.logger.info(f"✅ Pending confirmation already exists for session {session_id}")
             
+            bump_session_version(session_id, cursor)
             conn.commit()
+            invalidate_recalc_context(session_id)  # curves/sample names may have changed in place
             app.logger.info(f"✅ Session {session_id} updated successfully with MySQL")
             
             return jsonify({
@@ -2345,7 +2172,7 @@ def delete_session(session_id):
                 'password': os.environ.get('MYSQL_PASSWORD', 'qpcr_password'),
                 'database': os.environ.get('MYSQL_DATABASE', 'qpcr_analysis')
             }
-            conn_chk = mysql.connector.connect(**mysql_config)
+            conn_chk = mysql_pool.connect(**mysql_config)
             cur_chk = conn_chk.cursor()
             # Prefer confirmation_status if present, else fall back to is_confirmed when available
             cur_chk.execute("SHOW COLUMNS FROM analysis_sessions LIKE 'confirmation_status'")
@@ -2444,7 +2271,7 @@ def delete_experiment_by_pattern(experiment_pattern):
                 'password': os.environ.get('MYSQL_PASSWORD', 'qpcr_password'),
                 'database': os.environ.get('MYSQL_DATABASE', 'qpcr_analysis')
             }
-            conn_chk = mysql.connector.connect(**mysql_config)
+            conn_chk = mysql_pool.connect(**mysql_config)
             cur_chk = conn_chk.cursor()
             cur_chk.execute("SHOW COLUMNS FROM analysis_sessions LIKE 'confirmation_status'")
             has_conf_status = cur_chk.fetchone() is not None
@@ -2595,7 +2422,7 @@ def admin_delete_confirmed_session():
             'password': os.environ.get('MYSQL_PASSWORD', 'qpcr_password'),
             'database': os.environ.get('MYSQL_DATABASE', 'qpcr_analysis')
         }
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor()
         try:
             # Verify confirmed status
@@ -2755,6 +2582,23 @@ def health_check():
             # Don't fail health check due to database issues
             response_data['database'] = f'warning: {str(db_error)}'
         
+        # Curve analysis result cache counters
+        try:
+            from analysis_cache import analysis_cache
+            response_data['analysis_cache'] = analysis_cache.stats()
+        except Exception as cache_error:
+            response_data['analysis_cache'] = f'warning: {str(cache_error)}'
+
+        # Session detail response cache (hits, 304s, bytes held)
+        response_data['session_responses'] = session_responses.stats()
+
+        # Shared connection pool usage (in use, waits, timeouts)
+        try:
+            response_data['db_pool'] = mysql_pool.pool_stats()
+            response_data['db_pool']['flask_sqlalchemy'] = db.engine.pool.status()
+        except Exception as pool_error:
+            response_data['db_pool'] = f'warning: {str(pool_error)}'
+
         # Add timing information
         response_data['response_time_ms'] = round((time.time() - start_time) * 1000, 2)
         
@@ -2780,6 +2624,19 @@ def ping():
         'timestamp': datetime.utcnow().isoformat()
     }), 200
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Analysis pipeline stage timings in Prometheus text format"""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/wells/<path:well_key>/trace', methods=['GET'])
+def get_well_trace(well_key):
+    """Per-well debug trace for the curve modal (QPCR_WELL_TRACE=1); ?session= narrows to one analysis"""
+    if not tracer.enabled:
+        return jsonify({'success': False, 'enabled': False, 'error': 'Well tracing is disabled (set QPCR_WELL_TRACE=1)'}), 404
+    traces = tracer.lookup(well_key, request.args.get('session'))
+    return jsonify({'success': True, 'enabled': True, 'well_key': well_key, 'traces': traces})
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
@@ -2815,15 +2672,23 @@ def simple_delete_session(session_id):
 # ===== ML CURVE CLASSIFIER ENDPOINTS =====
 
 try:
-    from ml_curve_classifier import ml_classifier
+    from ml_curve_classifier import SKLEARN_AVAILABLE, ml_classifier, preload as preload_ml_classifier
+    if not SKLEARN_AVAILABLE:
+        raise ImportError("scikit-learn is not installed")
     ML_AVAILABLE = True
-    
+
+    # The classifier loads on first use. QPCR_ML_PRELOAD=1 loads it while the app is imported,
+    # which under `gunicorn --preload` is the master, so workers fork with the model shared.
+    ML_PRELOAD = os.environ.get('QPCR_ML_PRELOAD', '0') == '1'
+
     # Track ML model loading compliance
-    if ml_classifier and hasattr(ml_classifier, 'model_trained') and ml_classifier.model_trained:
-        model_stats = ml_classifier.get_model_stats()
+    def track_model_load_compliance(classifier):
+        if not classifier.model_trained:
+            return
+        model_stats = classifier.get_model_stats()
         ml_startup_metadata = {
-            'model_loaded_at_startup': True,
-            'training_samples': len(ml_classifier.training_data) if hasattr(ml_classifier, 'training_data') else 0,
+            'model_loaded_at_startup': ML_PRELOAD,
+            'training_samples': len(classifier.training_data) if hasattr(classifier, 'training_data') else 0,
             'model_accuracy': model_stats.get('accuracy', 0.0),
             'model_version': model_stats.get('version', 'startup_load'),
             'pathogen_models': len(model_stats.get('pathogen_breakdown', {})),
@@ -2840,6 +2705,10 @@ try:
         # Schedule for after app initialization
         import threading
         threading.Timer(2.0, track_startup_compliance).start()
+
+    ml_classifier.when_loaded(track_model_load_compliance)
+    if ML_PRELOAD:
+        preload_ml_classifier()
         
 except ImportError:
     print("ML classifier not available - scikit-learn may not be installed")
@@ -2975,6 +2844,7 @@ def ml_analyze_curve():
                     })
                     
                     well_result.curve_classification = json.dumps(current_classification)
+                    bump_session_version(well_result.session_id)
                     db.session.commit()
                     
                     print(f"[ML PREDICTION] Updated well {well_id_full} with ML prediction: {prediction['classification']} ({prediction['confidence']:.1%} confidence)")
@@ -3065,7 +2935,8 @@ def ml_submit_feedback():
         enhanced_metrics['fluorophore'] = channel
         
         # Add training sample with pathogen context and sample identification
-        ml_classifier.add_training_sample(
+        # (retraining it triggers runs in the background, see retrain_queue)
+        retrain_jobs = ml_classifier.add_training_sample(
             rfu_data, cycles, enhanced_metrics, 
             expert_classification, well_id, pathogen
         )
@@ -3082,7 +2953,7 @@ def ml_submit_feedback():
                 'charset': 'utf8mb4'
             }
 
-            conn = mysql.connector.connect(**mysql_config)
+            conn = mysql_pool.connect(**mysql_config)
             cursor = conn.cursor(dictionary=True)
 
             original_prediction = enhanced_metrics.get('original_prediction', existing_metrics.get('classification', 'Unknown'))
@@ -3191,6 +3062,7 @@ def ml_submit_feedback():
                         })
                     )
                     db.session.add(well_result)
+                    bump_session_version(well_result.session_id)
                     db.session.commit()
                     print(f"[ML FEEDBACK] Created new WellResult for expert feedback: {well_id}")
                 
@@ -3223,6 +3095,7 @@ def ml_submit_feedback():
                     # Also update the main classification field
                     well_result.classification = expert_classification
                     
+                    bump_session_version(well_result.session_id)
                     db.session.commit()
                     
                     print(f"[ML FEEDBACK] ✅ FORCE SAVED expert feedback to database: {original_class} -> {expert_classification} for {well_id}")
@@ -3280,6 +3153,7 @@ def ml_submit_feedback():
             'message': 'Feedback submitted successfully',
             'training_samples': total_samples,
             'pathogen': pathogen,
+            'retrain_jobs': retrain_jobs or [],
             'training_breakdown': {
                 'total_samples': total_samples,
                 'general_pcr_samples': general_samples,
@@ -3413,6 +3287,7 @@ def update_session_state():
         
         # Always update the last modified timestamp
         session.upload_timestamp = datetime.utcnow()
+        bump_session_version(session_id)
         
         # Commit all changes
         db.session.commit()
@@ -3498,7 +3373,7 @@ def ml_feedback_stats():
             'autocommit': True
         }
         
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
         
         # Get feedback statistics from ml_expert_decisions table
@@ -3675,6 +3550,21 @@ def ml_retrain():
         print(f"ML retrain error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/ml-retrain-jobs', methods=['GET'])
+def ml_retrain_jobs():
+    """Queued, running and recently finished background retrain jobs"""
+    from retrain_queue import retrain_queue
+    return jsonify({'success': True, **retrain_queue.snapshot()})
+
+@app.route('/api/ml-retrain-jobs/<job_id>', methods=['GET'])
+def ml_retrain_job(job_id):
+    """Status of one retrain job (as returned in retrain_jobs by /api/ml-submit-feedback)"""
+    from retrain_queue import retrain_queue
+    job = retrain_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown retrain job {job_id}'}), 404
+    return jsonify({'success': True, 'job': job})
+
 @app.route('/api/ml-stats', methods=['GET'])
 def ml_stats():
     """Get ML model statistics"""
@@ -3867,6 +3757,7 @@ def update_well_classification():
                 })
                 
                 well_result.curve_classification = json.dumps(current_classification)
+                bump_session_version(well_result.session_id)
                 db.session.commit()
                 
                 print(f"[EXPERT FEEDBACK] Updated well {well_id} classification: {current_classification.get('original_classification', 'Unknown')} -> {new_classification}")
@@ -3887,7 +3778,7 @@ def update_well_classification():
                             'charset': 'utf8mb4'
                         }
 
-                        conn = mysql.connector.connect(**mysql_config)
+                        conn = mysql_pool.connect(**mysql_config)
                         cursor = conn.cursor(dictionary=True)
 
                         # Upsert policy: one expert decision row per (session_id, well_id). Update if exists, else insert.
@@ -4047,7 +3938,7 @@ def ml_validation_dashboard_api():
             }
             
             import mysql.connector
-            conn = mysql.connector.connect(**mysql_config)
+            conn = mysql_pool.connect(**mysql_config)
             cursor = conn.cursor(dictionary=True)
             
             # Get pending runs from the analysis runs table
@@ -4687,7 +4578,7 @@ def get_auth_audit_log():
         }
 
         import mysql.connector
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
 
         cursor.execute(
@@ -4770,7 +4661,7 @@ def get_ml_model_versions():
         }
 
         import mysql.connector
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
 
         # Basic presence check
@@ -4854,15 +4745,13 @@ def check_ml_enabled(pathogen_code, fluorophore):
 def get_enabled_pathogens():
     """Get list of all enabled pathogen configurations for UI filtering"""
     try:
-        # Import the ML config manager locally to ensure it's available
-        from ml_config_manager import MLConfigManager
-        import os
-        
-        # Create a fresh instance using MySQL
-        local_ml_config_manager = MLConfigManager(use_mysql=True, mysql_config=mysql_config)
+        global ml_config_manager
+        if ml_config_manager is None:
+            from ml_config_manager import MLConfigManager
+            ml_config_manager = MLConfigManager(use_mysql=True, mysql_config=mysql_config)
         
-        # Get all pathogen configs where ML is enabled
-        enabled_configs = local_ml_config_manager.get_enabled_pathogen_configs()
+        # Get all pathogen configs where ML is enabled (served from the config snapshot)
+        enabled_configs = ml_config_manager.get_enabled_pathogen_configs()
         
         # Format for frontend use
         enabled_pathogens = {}
@@ -5413,7 +5302,7 @@ def mysql_admin_status():
         import mysql.connector
         
         # Test connection using the global mysql_config
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor()
         
         # Get database info
@@ -5448,7 +5337,7 @@ def mysql_admin_get_tables():
     try:
         import mysql.connector
         
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
         
         # Get table information (schema metadata; TABLE_ROWS is approximate for InnoDB)
@@ -5529,7 +5418,7 @@ def mysql_admin_execute_query():
         
         import mysql.connector
         
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
         
         # Execute single statement
@@ -5577,7 +5466,7 @@ def mysql_admin_get_table_info(table_name):
     try:
         import mysql.connector
         
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
         
         # Get table structure
@@ -5678,7 +5567,7 @@ def get_ml_validation_dashboard_data():
                 'charset': 'utf8mb4'
             }
             
-            conn = mysql.connector.connect(**mysql_config)
+            conn = mysql_pool.connect(**mysql_config)
             cursor = conn.cursor(dictionary=True)
             
             # Get pending runs from the analysis runs table
@@ -5728,7 +5617,7 @@ def get_ml_validation_dashboard_data():
         expert_decision_accuracy = 0.0
         try:
             # Create a new connection for confirmed runs stats
-            conn2 = mysql.connector.connect(**mysql_config)
+            conn2 = mysql_pool.connect(**mysql_config)
             cursor2 = conn2.cursor()
             cursor2.execute("""
                 SELECT COUNT(*) as count, AVG(accuracy_percentage) as avg_acc
@@ -5782,7 +5671,7 @@ def get_ml_validation_dashboard_data():
         # Count unique pathogen models from confirmed runs
         unique_pathogens = 0
         try:
-            conn3 = mysql.connector.connect(**mysql_config)
+            conn3 = mysql_pool.connect(**mysql_config)
             cursor_pathogen = conn3.cursor()
             cursor_pathogen.execute("""
                 SELECT COUNT(DISTINCT SUBSTRING_INDEX(pathogen_codes, ',', 1)) as pathogen_count
@@ -5800,7 +5689,7 @@ def get_ml_validation_dashboard_data():
         # Get confirmed runs from sessions table with correct accuracy calculation
         confirmed_runs = []
         try:
-            conn4 = mysql.connector.connect(**mysql_config)
+            conn4 = mysql_pool.connect(**mysql_config)
             cursor4 = conn4.cursor(dictionary=True)
             
             # Get confirmed sessions with ML accuracy data
@@ -7260,7 +7149,7 @@ def seed_encryption_evidence_quick():
         # Connect to MySQL
         import mysql.connector
         mysql_config = get_mysql_config()
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
 
         # Ensure table exists; try to self-heal if missing
@@ -7282,19 +7171,22 @@ def seed_encryption_evidence_quick():
             },
             'timestamp': _dt.utcnow().isoformat()
         }
+        evidence_hash = hashlib.sha256(_json.dumps(evidence_data, sort_keys=True).encode()).hexdigest()
 
         cursor.execute(
             """
             INSERT INTO compliance_evidence
-                (requirement_id, evidence_type, evidence_data, validation_status, created_at)
+                (requirement_id, evidence_type, evidence_data, validation_status, created_at, dedup_key)
             VALUES
-                (%s, %s, %s, %s, NOW())
+                (%s, %s, %s, %s, NOW(), %s)
+            ON DUPLICATE KEY UPDATE id = id
             """,
             (
                 requirement,
                 'encryption_evidence',
                 _json.dumps(evidence_data),
-                'validated'
+                'validated',
+                evidence_dedup_key(requirement, evidence_data, evidence_hash)
             )
         )
         conn.commit()
@@ -7317,7 +7209,7 @@ def get_encryption_evidence_for_compliance():
         # MySQL connection
         import mysql.connector
         mysql_config = get_mysql_config()
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
         
         # Ensure base table exists; self-heal if missing
@@ -7420,7 +7312,7 @@ def get_encryption_evidence_for_requirement(requirement_code):
         # MySQL connection
         import mysql.connector
         mysql_config = get_mysql_config()
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
 
         # Ensure base table exists; self-heal if missing
@@ -7746,7 +7638,7 @@ def get_ml_runs_pending():
         mysql_config = get_mysql_config()
         
         import mysql.connector
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
         
         # Get pending runs from the analysis runs table
@@ -7891,7 +7783,7 @@ def get_ml_run_by_id(run_id):
         mysql_config = get_mysql_config()
         
         import mysql.connector
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
         
         # Get the specific run from database
@@ -7959,7 +7851,7 @@ def update_ml_run(run_id):
         }
         
         import mysql.connector
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor()
         
         # Build update query dynamically based on provided fields
@@ -8067,7 +7959,7 @@ def confirm_ml_run():
             }
             
             import mysql.connector
-            conn = mysql.connector.connect(**mysql_config)
+            conn = mysql_pool.connect(**mysql_config)
             cursor = conn.cursor()
             
             cursor.execute("""
@@ -8111,7 +8003,7 @@ def confirm_analysis_session():
         mysql_config = get_mysql_config()
         
         import mysql.connector
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor()
         
         # Check for pending_confirmations table first (new structure)
@@ -8363,7 +8255,7 @@ def get_pending_sessions():
         app.logger.info(f"✓ Connector config prepared: {connector_config['host']}:{connector_config['port']}")
         
         app.logger.info("Attempting mysql.connector connection for pending sessions")
-        conn = mysql.connector.connect(**connector_config)
+        conn = mysql_pool.connect(**connector_config)
         app.logger.info("✓ Database connection established")
         cursor = conn.cursor(dictionary=True)
         app.logger.info("✓ Database cursor created")
@@ -8502,7 +8394,7 @@ def get_confirmed_sessions():
         app.logger.info(f"✓ Connector config prepared: {connector_config['host']}:{connector_config['port']}")
         
         app.logger.info("Attempting mysql.connector connection for confirmed sessions")
-        conn = mysql.connector.connect(**connector_config)
+        conn = mysql_pool.connect(**connector_config)
         app.logger.info("✓ Database connection established")
         cursor = conn.cursor(dictionary=True)
         app.logger.info("✓ Database cursor created")
@@ -8693,7 +8585,7 @@ def get_confirmed_sessions():
 def fix_railway_tracking_status():
     """Update compliance_requirements_tracking table to populate Currently Tracking overview section"""
     try:
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
         
         if not mysql_configured:
             return jsonify({'error': 'MySQL not configured'}), 503
@@ -8706,7 +8598,7 @@ def fix_railway_tracking_status():
         else:
             db_url = f"mysql+pymysql://{mysql_config['user']}:{mysql_config['password']}@{mysql_config['host']}:{mysql_config['port']}/{mysql_config['database']}?charset=utf8mb4"
         
-        engine = create_engine(db_url)
+        engine = mysql_pool.get_engine(db_url)
         results = []
         
         with engine.connect() as conn:
@@ -8802,7 +8694,7 @@ def fix_railway_tracking_status():
 def fix_railway_requirement_status():
     """Update unified_compliance_requirements status to show in Currently Tracking section"""
     try:
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
         
         if not mysql_configured:
             return jsonify({'error': 'MySQL not configured'}), 503
@@ -8815,7 +8707,7 @@ def fix_railway_requirement_status():
         else:
             db_url = f"mysql+pymysql://{mysql_config['user']}:{mysql_config['password']}@{mysql_config['host']}:{mysql_config['port']}/{mysql_config['database']}?charset=utf8mb4"
         
-        engine = create_engine(db_url)
+        engine = mysql_pool.get_engine(db_url)
         results = []
         
         with engine.connect() as conn:
@@ -8925,7 +8817,7 @@ def fix_railway_requirement_status():
 def fix_railway_evidence_schema_fix():
     """Fix compliance_evidence table schema by adding missing columns"""
     try:
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
         
         if not mysql_configured:
             return jsonify({'error': 'MySQL not configured'}), 503
@@ -8938,7 +8830,7 @@ def fix_railway_evidence_schema_fix():
         else:
             db_url = f"mysql+pymysql://{mysql_config['user']}:{mysql_config['password']}@{mysql_config['host']}:{mysql_config['port']}/{mysql_config['database']}?charset=utf8mb4"
         
-        engine = create_engine(db_url)
+        engine = mysql_pool.get_engine(db_url)
         results = []
         
         with engine.connect() as conn:
@@ -8991,7 +8883,7 @@ def fix_railway_evidence_schema_fix():
 def fix_railway_encryption_evidence_seed():
     """Seed minimal encryption evidence rows for CFR_11_10_B/D/E to unblock dashboard routes"""
     try:
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
 
         if not mysql_configured:
             return jsonify({'error': 'MySQL not configured'}), 503
@@ -9004,7 +8896,7 @@ def fix_railway_encryption_evidence_seed():
         else:
             db_url = f"mysql+pymysql://{mysql_config['user']}:{mysql_config['password']}@{mysql_config['host']}:{mysql_config['port']}/{mysql_config['database']}?charset=utf8mb4"
 
-        engine = create_engine(db_url)
+        engine = mysql_pool.get_engine(db_url)
         results = []
 
         with engine.connect() as conn:
@@ -9051,19 +8943,22 @@ def fix_railway_encryption_evidence_seed():
                         'validation_results': {'encryption_functional': True},
                         'notes': 'Seeded evidence to unblock dashboard after DB reset'
                     }
+                    payload_hash = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
                     conn.execute(text(
                         """
                         INSERT INTO compliance_evidence
-                            (requirement_id, evidence_type, evidence_description, evidence_data, validation_status, created_at)
+                            (requirement_id, evidence_type, evidence_description, evidence_data, validation_status, created_at, dedup_key)
                         VALUES
-                            (:req, :etype, :desc, :edata, :vstatus, NOW())
+                            (:req, :etype, :desc, :edata, :vstatus, NOW(), :dedup_key)
+                        ON DUPLICATE KEY UPDATE id = id
                         """
                     ), {
                         'req': req,
                         'etype': 'encryption_controls',
                         'desc': 'Seeded encryption/security compliance evidence',
                         'edata': json.dumps(payload),
-                        'vstatus': 'validated'
+                        'vstatus': 'validated',
+                        'dedup_key': evidence_dedup_key(req, payload, payload_hash)
                     })
                     conn.commit()
                     inserted += 1
@@ -9107,7 +9002,7 @@ def fix_railway_encryption_evidence_seed():
 def fix_railway_evidence_records():
     """Create proper evidence records in compliance_evidence table"""
     try:
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
         
         if not mysql_configured:
             return jsonify({'error': 'MySQL not configured'}), 503
@@ -9120,7 +9015,7 @@ def fix_railway_evidence_records():
         else:
             db_url = f"mysql+pymysql://{mysql_config['user']}:{mysql_config['password']}@{mysql_config['host']}:{mysql_config['port']}/{mysql_config['database']}?charset=utf8mb4"
         
-        engine = create_engine(db_url)
+        engine = mysql_pool.get_engine(db_url)
         results = []
         
         with engine.connect() as conn:
@@ -9206,10 +9101,13 @@ def fix_railway_evidence_records():
                         
                         for evidence in evidence_records:
                             try:
+                                evidence_hash = hashlib.sha256(json.dumps(evidence, sort_keys=True).encode()).hexdigest()
+                                evidence['dedup_key'] = evidence_dedup_key(evidence['requirement_id'], evidence, evidence_hash)
                                 conn.execute(text("""
                                     INSERT INTO compliance_evidence 
-                                    (requirement_id, evidence_type, evidence_description, file_path, session_id, created_at)
-                                    VALUES (:requirement_id, :evidence_type, :evidence_description, :file_path, :session_id, NOW())
+                                    (requirement_id, evidence_type, evidence_description, file_path, session_id, created_at, dedup_key)
+                                    VALUES (:requirement_id, :evidence_type, :evidence_description, :file_path, :session_id, NOW(), :dedup_key)
+                                    ON DUPLICATE KEY UPDATE id = id
                                 """), evidence)
                                 
                                 conn.commit()
@@ -9251,7 +9149,7 @@ def fix_railway_evidence_records():
 def fix_railway_validation_status():
     """Fix validation_status column size in unified_compliance_events"""
     try:
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
         
         if not mysql_configured:
             return jsonify({'error': 'MySQL not configured'}), 503
@@ -9264,7 +9162,7 @@ def fix_railway_validation_status():
         else:
             db_url = f"mysql+pymysql://{mysql_config['user']}:{mysql_config['password']}@{mysql_config['host']}:{mysql_config['port']}/{mysql_config['database']}?charset=utf8mb4"
         
-        engine = create_engine(db_url)
+        engine = mysql_pool.get_engine(db_url)
         results = []
         
         with engine.connect() as conn:
@@ -9305,7 +9203,7 @@ def fix_railway_validation_status():
 def fix_railway_evidence_trigger():
     """Trigger evidence generation for confirmed sessions in Railway"""
     try:
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
         
         if not mysql_configured:
             return jsonify({'error': 'MySQL not configured'}), 503
@@ -9318,7 +9216,7 @@ def fix_railway_evidence_trigger():
         else:
             db_url = f"mysql+pymysql://{mysql_config['user']}:{mysql_config['password']}@{mysql_config['host']}:{mysql_config['port']}/{mysql_config['database']}?charset=utf8mb4"
         
-        engine = create_engine(db_url)
+        engine = mysql_pool.get_engine(db_url)
         results = []
         
         with engine.connect() as conn:
@@ -9457,7 +9355,7 @@ def fix_railway_evidence_trigger():
 def fix_railway_evidence_schema():
     """Fix Railway database schema for evidence tracking and ML accuracy"""
     try:
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
         
         if not mysql_configured:
             return jsonify({'error': 'MySQL not configured'}), 503
@@ -9470,7 +9368,7 @@ def fix_railway_evidence_schema():
         else:
             db_url = f"mysql+pymysql://{mysql_config['user']}:{mysql_config['password']}@{mysql_config['host']}:{mysql_config['port']}/{mysql_config['database']}?charset=utf8mb4"
         
-        engine = create_engine(db_url)
+        engine = mysql_pool.get_engine(db_url)
         results = []
         
         with engine.connect() as conn:
@@ -9597,7 +9495,7 @@ def fix_railway_schema():
     """Fix Railway database schema by adding missing columns"""
     try:
         # Use SQLAlchemy to add missing columns safely
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
         
         if not mysql_configured:
             return jsonify({'error': 'MySQL not configured'}), 503
@@ -9610,7 +9508,7 @@ def fix_railway_schema():
         else:
             db_url = f"mysql+pymysql://{mysql_config['user']}:{mysql_config['password']}@{mysql_config['host']}:{mysql_config['port']}/{mysql_config['database']}?charset=utf8mb4"
         
-        engine = create_engine(db_url)
+        engine = mysql_pool.get_engine(db_url)
         results = []
         
         with engine.connect() as conn:
@@ -9665,7 +9563,7 @@ def test_railway_mysql():
             return jsonify({'error': 'MySQL not configured', 'mysql_configured': False}), 503
         
         # Use SQLAlchemy engine instead of mysql.connector
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
         
         # Build connection URL
         if mysql_config.get('url'):
@@ -9677,7 +9575,7 @@ def test_railway_mysql():
             # Build URL from components
             db_url = f"mysql+pymysql://{mysql_config['user']}:{mysql_config['password']}@{mysql_config['host']}:{mysql_config['port']}/{mysql_config['database']}?charset=utf8mb4"
         
-        engine = create_engine(db_url)
+        engine = mysql_pool.get_engine(db_url)
         
         # Test basic connection
         with engine.connect() as conn:
@@ -9753,7 +9651,7 @@ def debug_sessions_status():
             'autocommit': True
         }
         
-        conn = mysql.connector.connect(**connector_config)
+        conn = mysql_pool.connect(**connector_config)
         status['database_connection'] = 'SUCCESS'
         
         # Test 4: Table check
@@ -9815,7 +9713,7 @@ def debug_sessions():
             'autocommit': True
         }
         
-        conn = mysql.connector.connect(**connector_config)
+        conn = mysql_pool.connect(**connector_config)
         cursor = conn.cursor(dictionary=True)
         
         # Test 4: Check if table exists
@@ -9866,7 +9764,7 @@ def debug_expert_decisions():
         }
         
         import mysql.connector
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
         
         # Check total expert decisions
@@ -9958,7 +9856,7 @@ def delete_pending_session():
         }
         
         import mysql.connector
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor()
         
         # Check for pending_confirmations table (new structure)
@@ -10080,7 +9978,7 @@ def delete_pending_ml_run():
         }
         
         # Use pymysql for the deletion
-        conn = pymysql.connect(**mysql_config)
+        conn = mysql_pool.connect_pymysql(**mysql_config)
         cursor = conn.cursor()
         
         try:
@@ -10342,7 +10240,7 @@ def get_channel_completion_status(experiment_pattern):
     """Get completion status for all channels of an experiment"""
     try:
         mysql_config = get_mysql_config()
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
         
         cursor.execute("""
@@ -10401,7 +10299,7 @@ def poll_channel_completion():
             return jsonify({'error': 'experiment_pattern required'}), 400
             
         mysql_config = get_mysql_config()
-        conn = mysql.connector.connect(**mysql_config)
+        conn = mysql_pool.connect(**mysql_config)
         cursor = conn.cursor(dictionary=True)
         
         # Get status for required fluorophores
@@ -10542,7 +10440,10 @@ if __name__ == '__main__':
                         """,
                         inserts
                     )
+                    # Other workers' config snapshots reload on the version change
+                    ml_config_manager._bump_config_version(_cur)
                     _conn.commit()
+                    ml_config_manager._config_cache.invalidate()
                     print(f"✅ Auto-populated ML pathogen configs: {len(inserts)} pairs")
             _cur.close()
             _conn.close()
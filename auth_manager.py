@@ -7,7 +7,7 @@ import hashlib
 import secrets
 import datetime
 from typing import Dict, List, Optional, Tuple
-import mysql.connector
+import mysql_pool
 from mysql.connector import Error
 import os
 import logging
@@ -126,7 +126,7 @@ class AuthManager:
     def _get_db_connection(self):
         """Get database connection"""
         try:
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             return connection
         except Error as e:
             logger.error(f"Database connection error: {e}")
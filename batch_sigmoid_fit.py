@@ -0,0 +1,246 @@
+"""
+Vectorized 4-parameter sigmoid fitting for whole plates.
+
+Fits every well of a plate in one stacked (n_wells x n_cycles) NumPy problem
+using a bounded Levenberg-Marquardt iteration over the same model, starting
+guesses and bounds that analyze_curve_quality() passes to scipy's curve_fit.
+
+Tolerance contract (checked against curve_fit(method='trf') on converged wells):
+    - fit_parameters agree to within 1e-3 relative (baseline B to within
+      1e-3 of the well's RFU range)
+    - r2_score agrees to within 1e-6 absolute
+    - parameter_errors agree to within 1e-2 relative
+Wells that do not converge, end up pinned to a bound, produce a singular
+Jacobian or have poorly determined shape parameters are left out of the
+convergence mask and must be refit per well.
+"""
+
+import numpy as np
+
+DEFAULT_MAX_ITER = 200
+DEFAULT_FTOL = 1e-12
+DEFAULT_XTOL = 1e-10
+# Wells whose L/k/x0 standard errors exceed this fraction of the value are
+# handed back to curve_fit
+MAX_SHAPE_REL_ERROR = 0.5
+_EXP_CLIP = 500.0
+_N_PARAMS = 4
+
+
+def initial_guess_and_bounds(cycles, rfu):
+    """
+    Starting point and bounds for a stack of curves sharing one cycle axis.
+    Mirrors the per-well logic in qpcr_analyzer.analyze_curve_quality().
+
+    Returns:
+        (p0, lower, upper): arrays of shape (n_wells, 4)
+    """
+    rfu_min = np.min(rfu, axis=1)
+    rfu_max = np.max(rfu, axis=1)
+    rfu_range = rfu_max - rfu_min
+    n = rfu.shape[0]
+
+    p0 = np.empty((n, _N_PARAMS))
+    p0[:, 0] = rfu_range * 1.1
+    p0[:, 1] = 0.5
+    p0[:, 2] = cycles[len(cycles) // 2]
+    p0[:, 3] = rfu_min
+
+    lower = np.empty((n, _N_PARAMS))
+    lower[:, 0] = rfu_range * 0.1
+    lower[:, 1] = 0.01
+    lower[:, 2] = np.min(cycles)
+    lower[:, 3] = rfu_min - rfu_range * 0.1
+
+    upper = np.empty((n, _N_PARAMS))
+    upper[:, 0] = rfu_range * 5
+    upper[:, 1] = 10
+    upper[:, 2] = np.max(cycles)
+    upper[:, 3] = rfu_max
+
+    return p0, lower, upper
+
+
+def _model_and_jacobian(x, params):
+    """Evaluate the sigmoid and its Jacobian for every well at once."""
+    L = params[:, 0:1]
+    k = params[:, 1:2]
+    x0 = params[:, 2:3]
+    B = params[:, 3:4]
+
+    dx = x[np.newaxis, :] - x0
+    e = np.exp(np.clip(-k * dx, -_EXP_CLIP, _EXP_CLIP))
+    s = 1.0 / (1.0 + e)
+    es2 = e * s * s
+
+    model = L * s + B
+    jac = np.empty(model.shape + (_N_PARAMS,))
+    jac[..., 0] = s
+    jac[..., 1] = L * dx * es2
+    jac[..., 2] = -L * k * es2
+    jac[..., 3] = 1.0
+    return model, jac
+
+
+def fit_sigmoid_batch(cycles, rfu, p0=None, bounds=None, max_iter=DEFAULT_MAX_ITER,
+                      ftol=DEFAULT_FTOL, xtol=DEFAULT_XTOL):
+    """
+    Fit sigmoid(x, L, k, x0, B) to every row of ``rfu``.
+
+    Args:
+        cycles: 1-D array of cycle numbers shared by all wells (n_cycles,)
+        rfu: 2-D array of RFU values (n_wells, n_cycles)
+        p0: optional starting parameters (n_wells, 4)
+        bounds: optional (lower, upper) tuple of (n_wells, 4) arrays
+        max_iter: maximum Levenberg-Marquardt iterations
+        ftol, xtol: relative cost / step tolerances for convergence
+
+    Returns:
+        dict of arrays:
+            'popt' (n, 4), 'pcov' (n, 4, 4), 'perr' (n, 4),
+            'fitted' (n, m), 'residuals' (n, m), 'r2' (n,), 'rmse' (n,),
+            'converged' (n,) bool mask, 'iterations' (n,)
+    """
+    x = np.asarray(cycles, dtype=float)
+    y = np.atleast_2d(np.asarray(rfu, dtype=float))
+    n, m = y.shape
+
+    default_p0, lower, upper = initial_guess_and_bounds(x, y)
+    if p0 is None:
+        p0 = default_p0
+    if bounds is not None:
+        lower, upper = (np.asarray(b, dtype=float) for b in bounds)
+
+    params = np.clip(np.asarray(p0, dtype=float).copy(), lower, upper)
+    lam = np.full(n, 1e-3)
+    active = np.ones(n, dtype=bool)
+    converged = np.zeros(n, dtype=bool)
+    iterations = np.zeros(n, dtype=int)
+    eye = np.eye(_N_PARAMS)
+
+    model, jac = _model_and_jacobian(x, params)
+    resid = y - model
+    cost = np.einsum('ij,ij->i', resid, resid)
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        J = jac[idx]
+        r = resid[idx]
+
+        jtj = np.einsum('nmi,nmj->nij', J, J)
+        g = np.einsum('nmi,nm->ni', J, r)
+        diag = np.einsum('nii->ni', jtj)
+        damped = jtj + lam[idx, None, None] * (diag[:, :, None] * eye)
+        try:
+            step = np.linalg.solve(damped, g[..., None])[..., 0]
+        except np.linalg.LinAlgError:
+            step = np.stack([np.linalg.lstsq(a, b, rcond=None)[0] for a, b in zip(damped, g)])
+
+        trial = np.clip(params[idx] + step, lower[idx], upper[idx])
+        trial_model, trial_jac = _model_and_jacobian(x, trial)
+        trial_resid = y[idx] - trial_model
+        trial_cost = np.einsum('ij,ij->i', trial_resid, trial_resid)
+
+        finite = np.isfinite(trial_cost)
+        improved = finite & (trial_cost < cost[idx])
+        iterations[idx] += 1
+
+        # Convergence: cost or step has stopped changing in relative terms
+        delta_cost = np.abs(cost[idx] - np.where(finite, trial_cost, cost[idx]))
+        actual_step = np.abs(trial - params[idx])
+        small_cost = delta_cost <= ftol * np.maximum(cost[idx], 1e-300)
+        small_step = np.all(actual_step <= xtol * (np.abs(params[idx]) + xtol), axis=1)
+        done = finite & (small_cost | small_step)
+
+        acc = idx[improved]
+        params[acc] = trial[improved]
+        model[acc] = trial_model[improved]
+        jac[acc] = trial_jac[improved]
+        resid[acc] = trial_resid[improved]
+        cost[acc] = trial_cost[improved]
+        lam[acc] = np.maximum(lam[acc] / 10.0, 1e-12)
+        rej = idx[~improved]
+        lam[rej] = lam[rej] * 10.0
+
+        fin = idx[done]
+        converged[fin] = True
+        active[fin] = False
+        # Damping has blown up without progress: the well is stuck
+        active[lam > 1e16] = False
+
+    # Covariance the same way curve_fit does it: pinv(J^T J) scaled by s^2
+    jtj = np.einsum('nmi,nmj->nij', jac, jac)
+    dof = max(m - _N_PARAMS, 1)
+    with np.errstate(all='ignore'):
+        pcov = np.linalg.pinv(jtj) * (cost / dof)[:, None, None]
+        perr = np.sqrt(np.abs(np.einsum('nii->ni', pcov)))
+
+        ss_tot = np.sum((y - y.mean(axis=1, keepdims=True)) ** 2, axis=1)
+        r2 = np.where(ss_tot > 0, 1.0 - cost / np.where(ss_tot > 0, ss_tot, 1.0), 0.0)
+        rmse = np.sqrt(cost / m)
+
+    # Parameters pinned on a bound are where TRF and projected LM may disagree,
+    # and a rank-deficient Jacobian means curve_fit would report inf errors.
+    span = upper - lower
+    at_bound = np.any((params - lower <= 1e-9 * span) | (upper - params <= 1e-9 * span), axis=1)
+    rank_ok = np.linalg.matrix_rank(jtj) == _N_PARAMS
+    # Poorly determined shape parameters (flat or noise-only wells) have several
+    # local minima, so the one found here need not be the one TRF finds.
+    with np.errstate(all='ignore'):
+        shape_rel_err = perr[:, :3] / np.abs(params[:, :3])
+    well_determined = np.all(shape_rel_err < MAX_SHAPE_REL_ERROR, axis=1)
+    converged &= (~at_bound & rank_ok & well_determined
+                  & np.all(np.isfinite(params), axis=1) & np.isfinite(cost))
+
+    return {
+        'popt': params,
+        'pcov': pcov,
+        'perr': perr,
+        'fitted': model,
+        'residuals': resid,
+        'r2': r2,
+        'rmse': rmse,
+        'converged': converged,
+        'iterations': iterations,
+    }
+
+
+def fit_wells_batch(data_dict, **fit_kwargs):
+    """
+    Fit all wells of a plate, grouping wells that share an identical cycle axis.
+
+    Args:
+        data_dict: {well_id: {'cycles': [...], 'rfu': [...], ...}} as passed to
+            qpcr_analyzer.batch_analyze_wells()
+
+    Returns:
+        {well_id: (popt, pcov)} for wells whose batched fit converged. Wells
+        that are missing from the result should be fit with curve_fit.
+    """
+    groups = {}
+    for well_id, data in data_dict.items():
+        try:
+            cycles = np.asarray(data['cycles'], dtype=float)
+            rfu = np.asarray(data['rfu'], dtype=float)
+        except (KeyError, TypeError, ValueError):
+            continue
+        if cycles.ndim != 1 or cycles.shape != rfu.shape:
+            continue
+        valid = np.isfinite(cycles) & np.isfinite(rfu)
+        cycles = cycles[valid]
+        rfu = rfu[valid]
+        if len(cycles) < 5 or np.max(rfu) == np.min(rfu):
+            continue
+        groups.setdefault(cycles.tobytes(), (cycles, [], []))
+        _, ids, rows = groups[cycles.tobytes()]
+        ids.append(well_id)
+        rows.append(rfu)
+
+    fits = {}
+    for cycles, ids, rows in groups.values():
+        result = fit_sigmoid_batch(cycles, np.vstack(rows), **fit_kwargs)
+        for i in np.flatnonzero(result['converged']):
+            fits[ids[i]] = (result['popt'][i].copy(), result['pcov'][i].copy())
+    return fits
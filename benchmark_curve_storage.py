@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Compare JSON and packed (curve_codec) storage of well curve arrays.
+
+    python benchmark_curve_storage.py [--wells 384] [--cycles 40] [--repeat 5]
+
+Reports bytes per well and the time to decode a plate of rows back into
+lists, the work /sessions/<id>/wells and WellResult.to_dict() do per well.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from curve_codec import CURVE_FIELDS, decode_curve_columns, pack_curves
+
+
+def synthetic_wells(n_wells, n_cycles, seed=0):
+    rng = np.random.default_rng(seed)
+    cycles = np.arange(1, n_cycles + 1, dtype=float)
+    wells = []
+    for _ in range(n_wells):
+        amplitude = rng.uniform(500, 5000)
+        midpoint = rng.uniform(18, 35)
+        fitted = amplitude / (1 + np.exp(-0.6 * (cycles - midpoint))) + rng.uniform(50, 150)
+        raw = fitted + rng.normal(0, 15, n_cycles)
+        wells.append({'raw_cycles': cycles.tolist(), 'raw_rfu': raw.tolist(), 'fitted_curve': fitted.tolist()})
+    return wells
+
+
+def _best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(n_wells=384, n_cycles=40, repeat=5):
+    wells = synthetic_wells(n_wells, n_cycles)
+    json_rows = [{field: json.dumps(w[field]) for field in CURVE_FIELDS} for w in wells]
+    packed_rows = [pack_curves(w) for w in wells]
+    empty = dict.fromkeys(CURVE_FIELDS)
+
+    json_bytes = sum(len(v) for row in json_rows for v in row.values())
+    packed_bytes = sum(len(blob) for blob in packed_rows)
+    json_time = _best_of(repeat, lambda: [decode_curve_columns(row, None) for row in json_rows])
+    packed_time = _best_of(repeat, lambda: [decode_curve_columns(empty, blob) for blob in packed_rows])
+
+    max_error = max(
+        abs(a - b) / max(abs(a), 1e-12)
+        for w, blob in zip(wells, packed_rows)
+        for field, values in decode_curve_columns(empty, blob).items()
+        for a, b in zip(w[field], values))
+
+    return {
+        'wells': n_wells,
+        'cycles': n_cycles,
+        'json_bytes_per_well': json_bytes / n_wells,
+        'packed_bytes_per_well': packed_bytes / n_wells,
+        'json_decode_ms': json_time * 1000,
+        'packed_decode_ms': packed_time * 1000,
+        'max_relative_error': max_error,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--wells', type=int, default=384)
+    parser.add_argument('--cycles', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    r = run(args.wells, args.cycles, args.repeat)
+    print(f"📊 {r['wells']} wells x {r['cycles']} cycles")
+    print(f"   JSON:   {r['json_bytes_per_well']:8.0f} bytes/well  {r['json_decode_ms']:8.2f} ms/plate")
+    print(f"   packed: {r['packed_bytes_per_well']:8.0f} bytes/well  {r['packed_decode_ms']:8.2f} ms/plate")
+    print(f"   size ratio {r['json_bytes_per_well'] / r['packed_bytes_per_well']:.1f}x, "
+          f"max float32 relative error {r['max_relative_error']:.2e}")
+
+
+if __name__ == '__main__':
+    main()
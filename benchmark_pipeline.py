@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Benchmark the qPCR analysis pipeline on synthetic plates (see synthetic_plate.py).
+
+    python benchmark_pipeline.py [--wells 96 384] [--channels 1 4] [--repeat 3] [--seed 0]
+                                 [--output bench.json] [--baseline baseline.json] [--tolerance 0.25]
+                                 [--route]
+
+Stages, each timed --repeat times on the same seeded plate:
+
+    analyze_curve_quality/<wells>w          every well of one channel
+    batch_analyze_wells/<wells>w<ch>ch      one call per channel, like /analyze
+    calculate_cqj/<wells>w                  scalar CQJ for every well
+    calculate_calcj_with_controls/<wells>w  the control-based CalcJ pass
+    retrain_model/<n>samples                RandomForest fit on synthetic expert feedback
+    predict_classification/<wells>w         single-well ML path, every well
+    analyze_route/<wells>w<ch>ch            POST /analyze per channel via the Flask test client
+
+The analysis cache is disabled (cold analysis on every repeat) and the first
+pass runs serially unless --workers is given. retrain_model writes its model
+files into a temporary directory, never over the repo's .pkl files.
+
+The /analyze stage imports app.py, which requires MySQL: point DATABASE_URL at
+a throwaway local database (e.g. a MySQL container) and pass --route. The
+benchmark signs in as the local BACKDOOR_USERNAME/BACKDOOR_PASSWORD account
+and every request saves a session. Without --route the stage is listed under
+"skipped".
+
+Results are written as JSON (--output). With --baseline, stages present in
+both files are compared on their fastest repeat and the exit status is 1 when
+any stage is slower than baseline * (1 + tolerance), so CI can gate on it.
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from synthetic_plate import CURVE_KINDS, generate_plate
+
+SCHEMA_VERSION = 1
+# Expert labels used for the synthetic feedback the retrain stage learns from
+EXPERT_LABELS = {
+    'H': 'STRONG_POSITIVE', 'M': 'POSITIVE', 'L': 'POSITIVE', 'NTC': 'NEGATIVE',
+    'positive': 'POSITIVE', 'late': 'WEAK_POSITIVE', 'noisy': 'INDETERMINATE', 'negative': 'NEGATIVE',
+}
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Swallow the pipeline's console output so it is neither timed against the terminal nor mixed into the report."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _measure(repeat, fn, setup=None, items=1):
+    """Run setup() (untimed) and fn(setup result) ``repeat`` times; returns a result dict."""
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        with _quiet():
+            started = time.perf_counter()
+            fn(state)
+            times.append(time.perf_counter() - started)
+    best = min(times)
+    return {
+        'min_s': best,
+        'median_s': statistics.median(times),
+        'repeat': repeat,
+        'items': items,
+        'per_item_ms': best * 1000 / items,
+    }
+
+
+def analyzer_input(plate, channel):
+    """One channel's wells as /analyze hands them to the analyzer: test code, channel and sample sheet attached."""
+    from cfx_ingest import parse_summary_csv
+    from sql_integration import attach_sample_sheet, sample_sheet
+
+    data = plate.analysis_data(channel)
+    for well in data.values():
+        well['test_code'] = plate.test_code
+        well['fluorophore'] = channel
+    sheet = sample_sheet(parse_summary_csv(plate.summary_csv().encode()), channel)
+    attach_sample_sheet(data, sheet, channel)
+    return data
+
+
+def _ml_metrics(analysis, channel):
+    metrics = dict(analysis)
+    metrics['cqj'] = (analysis.get('cqj') or {}).get(channel)
+    metrics['calcj'] = (analysis.get('calcj') or {}).get(channel)
+    return metrics
+
+
+def bench_plate_stages(wells, repeat, seed, workers, results):
+    """Per-well stages on a single-channel plate."""
+    from cqj_calcj_utils import calculate_calcj_with_controls, calculate_cqj
+    from qpcr_analyzer import analyze_curve_quality, batch_analyze_wells
+
+    plate = generate_plate(wells, 1, seed=seed)
+    channel = plate.channels[0]
+    data = analyzer_input(plate, channel)
+
+    results[f'analyze_curve_quality/{wells}w'] = _measure(
+        repeat,
+        lambda _: [analyze_curve_quality(well_id, well, 'benchmark', plate.test_code) for well_id, well in data.items()],
+        items=wells)
+
+    with _quiet():
+        analyzed = batch_analyze_wells(copy.deepcopy(data), parallel_workers=workers)['individual_results']
+
+    cqj_inputs = [(dict(analysis, well_id=well_id), analysis.get('threshold_value'))
+                  for well_id, analysis in analyzed.items() if analysis.get('threshold_value') is not None]
+    results[f'calculate_cqj/{wells}w'] = _measure(
+        repeat, lambda _: [calculate_cqj(well, threshold) for well, threshold in cqj_inputs], items=len(cqj_inputs))
+
+    all_wells = {well_id: {'well_id': well_id, 'sample_name': data[well_id].get('sample_name', ''),
+                           'cqj_value': (analysis.get('cqj') or {}).get(channel),
+                           'channel': channel, 'fluorophore': channel, 'test_code': plate.test_code}
+                 for well_id, analysis in analyzed.items()}
+    calcj_wells = [well for well in all_wells.values() if well['cqj_value'] is not None]
+    results[f'calculate_calcj_with_controls/{wells}w'] = _measure(
+        repeat,
+        lambda _: [calculate_calcj_with_controls(well, analyzed[well['well_id']]['threshold_value'], all_wells,
+                                                 plate.test_code, channel) for well in calcj_wells],
+        items=max(len(calcj_wells), 1))
+    return plate, analyzed
+
+
+def bench_batch(wells, channels, repeat, seed, workers, results):
+    """batch_analyze_wells once per channel of the plate, as one multi-channel upload does."""
+    from qpcr_analyzer import batch_analyze_wells
+
+    plate = generate_plate(wells, channels, seed=seed)
+    inputs = {channel: analyzer_input(plate, channel) for channel in plate.channels}
+    results[f'batch_analyze_wells/{wells}w{channels}ch'] = _measure(
+        repeat,
+        lambda per_channel: [batch_analyze_wells(data, parallel_workers=workers) for data in per_channel.values()],
+        setup=lambda: copy.deepcopy(inputs),
+        items=wells * channels)
+
+
+def training_samples(plates_analyzed):
+    """Synthetic expert feedback in the layout add_training_sample stores."""
+    from ml_curve_classifier import MLCurveClassifier
+
+    extractor = MLCurveClassifier()
+    samples = []
+    for plate, analyzed in plates_analyzed:
+        channel = plate.channels[0]
+        for well_id, analysis in analyzed.items():
+            if 'error' in analysis:
+                continue
+            with _quiet():
+                features = extractor.extract_advanced_features(
+                    analysis['raw_rfu'], analysis['raw_cycles'], _ml_metrics(analysis, channel))
+            samples.append({
+                'well_id': well_id,
+                'sample_identifier': f"{plate.samples[well_id]}||{plate.test_code}||{channel}",
+                'sample_name': plate.samples[well_id],
+                'channel': channel,
+                'pathogen': plate.test_code,
+                'features': features,
+                'expert_classification': EXPERT_LABELS[plate.kinds[channel][well_id]],
+            })
+    return samples
+
+
+def bench_ml(plates_analyzed, repeat, results):
+    """retrain_model on synthetic feedback, then predict_classification with the trained model."""
+    from ml_curve_classifier import MLCurveClassifier
+
+    samples = training_samples(plates_analyzed)
+    classifier = MLCurveClassifier()
+    workdir = tempfile.mkdtemp(prefix='qpcr_bench_')
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)  # save_model() writes ml_curve_classifier.pkl into the working directory
+
+        def retrain(_):
+            classifier.training_data = list(samples)
+            if not classifier.retrain_model():
+                raise RuntimeError("retrain_model refused the synthetic training set")
+
+        results[f'retrain_model/{len(samples)}samples'] = _measure(repeat, retrain, items=len(samples))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for plate, analyzed in plates_analyzed:
+        channel = plate.channels[0]
+        wells = [(analysis['raw_rfu'], analysis['raw_cycles'], _ml_metrics(analysis, channel))
+                 for analysis in analyzed.values() if 'error' not in analysis]
+        results[f'predict_classification/{len(plate.wells)}w'] = _measure(
+            repeat,
+            lambda _: [classifier.predict_classification(rfu, cycles, metrics, plate.test_code)
+                       for rfu, cycles, metrics in wells],
+            items=len(wells))
+
+
+def bench_route(wells_options, channel_options, repeat, seed, results):
+    """POST /analyze through the Flask test client, one request per channel."""
+    with _quiet():
+        from app import app
+        from unified_auth_manager import UnifiedAuthManager
+
+        auth = UnifiedAuthManager()
+        login = auth.authenticate_user(auth.backdoor_username, auth.backdoor_password)
+    if not login:
+        raise RuntimeError("Could not sign in with the BACKDOOR_USERNAME/BACKDOOR_PASSWORD account")
+
+    client = app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session['session_id'] = login['session_id']
+
+    def post_plate(plate):
+        summary = plate.summary_csv()
+        for channel in plate.channels:
+            response = client.post('/analyze', json={'analysis_data': plate.analysis_data(channel),
+                                                     'samples_data': summary},
+                                   headers={'X-Filename': plate.filename(channel), 'X-Fluorophore': channel})
+            if response.status_code != 200:
+                raise RuntimeError(f"/analyze returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+    for wells in wells_options:
+        for channels in channel_options:
+            plate = generate_plate(wells, channels, seed=seed)
+            results[f'analyze_route/{wells}w{channels}ch'] = _measure(
+                repeat, lambda _: post_plate(plate), items=wells * channels)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(wells_options=(96,), channel_options=(1,), repeat=3, seed=0, workers=1, route=False):
+    """Run every stage and return the report dict that --output writes."""
+    results = {}
+    skipped = {}
+    plates_analyzed = []
+    for wells in wells_options:
+        plates_analyzed.append(bench_plate_stages(wells, repeat, seed, workers, results))
+        for channels in channel_options:
+            bench_batch(wells, channels, repeat, seed, workers, results)
+    bench_ml(plates_analyzed, repeat, results)
+
+    if route:
+        bench_route(wells_options, channel_options, repeat, seed, results)
+    else:
+        skipped['analyze_route'] = "needs MySQL: set DATABASE_URL to a throwaway database and pass --route"
+
+    return {
+        'schema': SCHEMA_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'wells': list(wells_options), 'channels': list(channel_options), 'repeat': repeat,
+                   'seed': seed, 'workers': workers, 'curve_kinds': list(CURVE_KINDS)},
+        'results': results,
+        'skipped': skipped,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Compare the fastest repeat of every stage present in both reports.
+
+    Returns:
+        [(stage, baseline_s, current_s, ratio, regressed), ...] sorted by stage
+    """
+    rows = []
+    for stage, result in sorted(report['results'].items()):
+        previous = baseline.get('results', {}).get(stage)
+        if not previous or not previous.get('min_s'):
+            continue
+        ratio = result['min_s'] / previous['min_s']
+        rows.append((stage, previous['min_s'], result['min_s'], ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--wells', type=int, nargs='+', default=[96], choices=[96, 384])
+    parser.add_argument('--channels', type=int, nargs='+', default=[1], choices=[1, 2, 3, 4])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1, help='parallel_workers for batch_analyze_wells')
+    parser.add_argument('--route', action='store_true', help='also benchmark POST /analyze (needs MySQL)')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--baseline', help='JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown vs. baseline (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    # Cold analysis on every repeat; set before the analyzer modules are imported
+    os.environ['QPCR_CACHE_SIZE'] = '0'
+    os.environ.pop('QPCR_CACHE_DIR', None)
+
+    report = run(args.wells, args.channels, args.repeat, args.seed, args.workers, args.route)
+
+    print(f"📊 Pipeline benchmark (best of {args.repeat}, seed {args.seed})")
+    for stage, result in report['results'].items():
+        print(f"   {stage:45s} {result['min_s'] * 1000:10.1f} ms  {result['per_item_ms']:8.3f} ms/item")
+    for stage, reason in report['skipped'].items():
+        print(f"   {stage:45s} skipped: {reason}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.tolerance)
+        print(f"📈 Against {args.baseline} (tolerance {args.tolerance:.0%})")
+        for stage, before, after, ratio, regressed in rows:
+            print(f"   {'❌' if regressed else '✅'} {stage:43s} {before * 1000:10.1f} -> {after * 1000:10.1f} ms  x{ratio:.2f}")
+        if any(row[4] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Server-side parsing of CFX Manager exports for /analyze/upload.
+
+The browser used to parse the "Quantification Amplification Results" CSV
+itself and post every well's cycles/rfu lists as JSON, plus the samples
+summary re-serialized as a CSV string. Uploading the original files (plain
+or gzip) is several times smaller, and pandas' C reader turns the wide
+amplification table (Cycle column + one column per well) straight into
+NumPy arrays.
+
+Limits:
+    QPCR_UPLOAD_MAX_BYTES  maximum size of one file after decompression (default 50 MB)
+"""
+
+import gzip
+import io
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+UPLOAD_MAX_BYTES = int(os.environ.get('QPCR_UPLOAD_MAX_BYTES', str(50 * 1024 * 1024)))
+
+# Same well header pattern as prepareAnalysisData() in static/script.js
+WELL_HEADER = re.compile(r'^[A-P](0?[1-9]|1[0-9]|2[0-4])$')
+_GZIP_MAGIC = b'\x1f\x8b'
+_CHUNK = 1024 * 1024
+
+
+class CFXParseError(ValueError):
+    """The uploaded file is not a usable CFX export."""
+
+
+def _read_limited(stream, limit):
+    chunks = []
+    total = 0
+    while True:
+        chunk = stream.read(_CHUNK)
+        if not chunk:
+            return b''.join(chunks)
+        total += len(chunk)
+        if total > limit:
+            raise CFXParseError(f"Upload exceeds {limit} bytes")
+        chunks.append(chunk)
+
+
+def read_upload(source, limit=None):
+    """
+    Bytes of an uploaded CSV from bytes or a binary stream, gunzipped if needed.
+
+    The size limit applies to the decompressed content as well.
+    """
+    limit = UPLOAD_MAX_BYTES if limit is None else limit
+    raw = bytes(source) if isinstance(source, (bytes, bytearray)) else _read_limited(source, limit)
+    if len(raw) > limit:
+        raise CFXParseError(f"Upload exceeds {limit} bytes")
+    if raw[:2] == _GZIP_MAGIC:
+        try:
+            raw = _read_limited(gzip.GzipFile(fileobj=io.BytesIO(raw)), limit)
+        except (OSError, EOFError) as e:
+            raise CFXParseError(f"Invalid gzip upload: {e}")
+    return raw
+
+
+class AmplificationPlate:
+    """One channel of a CFX amplification export as arrays."""
+
+    def __init__(self, cycles, wells, rfu):
+        self.cycles = cycles  # (n_cycles,) float64
+        self.wells = wells    # well ids in column order
+        self.rfu = rfu        # (n_cycles, n_wells) float64, NaN where a value is missing
+
+    def to_wells(self):
+        """{well_id: {'cycles': [...], 'rfu': [...]}} with incomplete rows dropped per well."""
+        wells = {}
+        cycle_ok = ~np.isnan(self.cycles)
+        for index, well_id in enumerate(self.wells):
+            column = self.rfu[:, index]
+            keep = cycle_ok & ~np.isnan(column)
+            if keep.any():
+                wells[well_id] = {'cycles': self.cycles[keep].tolist(), 'rfu': column[keep].tolist()}
+        return wells
+
+
+def _numeric(column):
+    """Column as float64; non-numeric cells (only in mixed-type columns) become NaN."""
+    if column.dtype.kind not in 'fiub':
+        column = pd.to_numeric(column, errors='coerce')
+    return column.to_numpy(dtype=float)
+
+
+def parse_amplification_csv(source):
+    """Parse a "Quantification Amplification Results" CSV (bytes or stream) into an AmplificationPlate."""
+    raw = read_upload(source)
+    try:
+        # round_trip parses each value to the same double as float()/parseFloat()
+        frame = pd.read_csv(io.BytesIO(raw), engine='c', float_precision='round_trip', skipinitialspace=True)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise CFXParseError(f"Unreadable amplification CSV: {e}")
+
+    headers = [str(column).strip() for column in frame.columns]
+    cycle_index = next((i for i, header in enumerate(headers) if 'cycle' in header.lower()), None)
+    if cycle_index is None:
+        raise CFXParseError("Could not find Cycle column")
+    well_indexes = [i for i, header in enumerate(headers) if WELL_HEADER.match(header)]
+    if not well_indexes:
+        raise CFXParseError("Could not find any well columns")
+
+    cycles = _numeric(frame.iloc[:, cycle_index])
+    rfu = np.column_stack([_numeric(frame.iloc[:, i]) for i in well_indexes]) if len(frame) else \
+        np.empty((0, len(well_indexes)))
+    return AmplificationPlate(cycles, [headers[i] for i in well_indexes], rfu)
+
+
+def parse_summary_csv(source):
+    """Parse a "Quantification Summary" CSV into the DataFrame sql_integration expects."""
+    raw = read_upload(source)
+    try:
+        frame = pd.read_csv(io.BytesIO(raw), engine='c')
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+        raise CFXParseError(f"Unreadable samples summary CSV: {e}")
+    if len(frame.columns) < 3:
+        raise CFXParseError("Samples summary needs at least Well and Fluor columns")
+    return frame
@@ -7,7 +7,9 @@ import json
 import os
 from typing import Dict, Any, Optional
 
-def load_concentration_controls() -> Dict[str, Any]:
+CONTROLS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'concentration_controls.json')
+
+def load_concentration_controls(config_path: str = CONTROLS_PATH) -> Dict[str, Any]:
     """
     Load concentration controls from the centralized JSON config file.
     
@@ -15,10 +17,6 @@ def load_concentration_controls() -> Dict[str, Any]:
         Dict containing concentration control values organized by test_code -> channel -> control_type -> value
     """
     try:
-        # Get the directory where this script is located
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        config_path = os.path.join(script_dir, 'config', 'concentration_controls.json')
-        
         with open(config_path, 'r') as f:
             config = json.load(f)
             
@@ -46,8 +44,8 @@ def get_control_value(test_code: str, channel: str, control_type: str) -> Option
     Returns:
         Concentration value or None if not found
     """
-    controls = load_concentration_controls()
-    return controls.get(test_code, {}).get(channel, {}).get(control_type)
+    from pathogen_registry import get_control_concentrations
+    return get_control_concentrations(test_code, channel).get(control_type)
 
 def get_test_controls(test_code: str, channel: str) -> Dict[str, float]:
     """
@@ -60,8 +58,8 @@ def get_test_controls(test_code: str, channel: str) -> Dict[str, float]:
     Returns:
         Dict with keys 'H', 'M', 'L' and their concentration values
     """
-    controls = load_concentration_controls()
-    return controls.get(test_code, {}).get(channel, {})
+    from pathogen_registry import get_control_concentrations
+    return dict(get_control_concentrations(test_code, channel))
 
 # For backward compatibility, expose the controls dictionary directly
 CONCENTRATION_CONTROLS = load_concentration_controls()
@@ -5,58 +5,9 @@ CQJ/CalcJ calculation utilities for qPCR analysis
 from typing import List, Optional, Dict, Any
 import numpy as np
 
-# Import centralized concentration controls
-try:
-    from config_loader import CONCENTRATION_CONTROLS
-except ImportError:
-    print("[CONFIG-WARNING] Could not import centralized config, using fallback values")
-    # Fallback values if config loader fails - MUST match config/concentration_controls.json
-    CONCENTRATION_CONTROLS = {
-        # Lacto has special lower concentrations
-        'Lacto': {
-            'Cy5': {'H': 1e6, 'M': 1e4, 'L': 1e2}, 'FAM': {'H': 1e6, 'M': 1e4, 'L': 1e2},
-            'HEX': {'H': 1e6, 'M': 1e4, 'L': 1e2}, 'TexasRed': {'H': 1e6, 'M': 1e4, 'L': 1e2}
-        },
-        # Standard concentrations (1e7, 1e5, 1e3)
-        'Calb': {'HEX': {'H': 1e7, 'M': 1e5, 'L': 1e3}}, 
-        'Ctrach': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}},
-        'Ngon': {'HEX': {'H': 1e7, 'M': 1e5, 'L': 1e3}}, 
-        'Tvag': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}},
-        'Cglab': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}}, 
-        'Cpara': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}},
-        'Ctrop': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}}, 
-        'Gvag': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}},
-        'BVAB2': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}}, 
-        'CHVIC': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}},
-        'AtopVag': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}}, 
-        'Megasphaera': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}, 'HEX': {'H': 1e7, 'M': 1e5, 'L': 1e3}},
-        'Efaecalis': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}}, 
-        'Saureus': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}},
-        'Ecoli': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}}, 
-        'AtopVagNY': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}},
-        'BVAB2NY': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}}, 
-        'GvagNY': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}},
-        'MegasphaeraNY': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}, 'HEX': {'H': 1e7, 'M': 1e5, 'L': 1e3}},
-        'LactoNY': {'Cy5': {'H': 1e7, 'M': 1e5, 'L': 1e3}, 'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}, 'HEX': {'H': 1e7, 'M': 1e5, 'L': 1e3}, 'TexasRed': {'H': 1e7, 'M': 1e5, 'L': 1e3}},
-        'RNaseP': {'HEX': {'H': 1e7, 'M': 1e5, 'L': 1e3}},
-        'Mgen': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}},
-        # BVPanel tests have higher concentrations (1e8, 1e6, 1e4)
-        'BVPanelPCR3': {
-            'FAM': {'H': 1e8, 'M': 1e6, 'L': 1e4}, 'HEX': {'H': 1e8, 'M': 1e6, 'L': 1e4},
-            'TexasRed': {'H': 1e8, 'M': 1e6, 'L': 1e4}, 'Cy5': {'H': 1e8, 'M': 1e6, 'L': 1e4}
-        },
-        'BVPanelPCR2': {
-            'FAM': {'H': 1e8, 'M': 1e6, 'L': 1e4}, 'HEX': {'H': 1e8, 'M': 1e6, 'L': 1e4},
-            'TexasRed': {'H': 1e8, 'M': 1e6, 'L': 1e4}, 'Cy5': {'H': 1e8, 'M': 1e6, 'L': 1e4}
-        },
-        'BVPanelPCR1': {
-            'FAM': {'H': 1e8, 'M': 1e6, 'L': 1e4}, 'HEX': {'H': 1e8, 'M': 1e6, 'L': 1e4},
-            'TexasRed': {'H': 1e8, 'M': 1e6, 'L': 1e4}, 'Cy5': {'H': 1e8, 'M': 1e6, 'L': 1e4}
-        },
-        'BVAB': {
-            'FAM': {'H': 1e8, 'M': 1e6, 'L': 1e4}, 'HEX': {'H': 1e8, 'M': 1e6, 'L': 1e4}, 'Cy5': {'H': 1e8, 'M': 1e6, 'L': 1e4}
-        }
-    }
+from pathogen_registry import get_control_concentrations
+from pipeline_metrics import timed
+from well_trace import trace, tracer
 
 def calculate_cqj_simple(rfu: List[float], cycles: List[float], threshold: float) -> Optional[float]:
     """
@@ -100,6 +51,8 @@ def calculate_cqj(well, threshold):
     """
     raw_rfu = well.get('raw_rfu')
     raw_cycles = well.get('raw_cycles')
+    # Try multiple ways to get well identifier; None traces under the enclosing well_scope
+    well_id = well.get('well_id') or well.get('wellKey') or well.get('well_key')
     if not raw_rfu or not raw_cycles or len(raw_rfu) != len(raw_cycles):
         return None
     
@@ -108,14 +61,9 @@ def calculate_cqj(well, threshold):
     
     # Ensure we have enough data points after skipping early cycles
     if len(raw_rfu) <= start_index:
-        # Try multiple ways to get well identifier: well_id, wellKey, or fallback
-        well_id = well.get('well_id') or well.get('wellKey') or well.get('well_key') or 'UNKNOWN'
-        print(f"[CQJ-DEBUG] Well {well_id}: Insufficient data after skipping first 5 cycles")
+        trace('cqj', "Insufficient data after skipping first 5 cycles", well=well_id)
         return None
     
-    # Find all valid threshold crossings, ignoring early crossings before cycle 5
-    well_id = well.get('well_id') or well.get('wellKey') or well.get('well_key') or 'UNKNOWN'
-    
     # Look for the first valid positive threshold crossing starting from cycle 5
     for i in range(start_index, len(raw_rfu)):
         if raw_rfu[i] >= threshold:
@@ -133,11 +81,13 @@ def calculate_cqj(well, threshold):
                         interpolated = x1
                     else:
                         interpolated = x0 + (threshold - y0) * (x1 - x0) / (y1 - y0)
-                    print(f"[CQJ-DEBUG] Well {well_id}: CQJ={interpolated:.2f} (threshold crossing at cycle 5, from {y0:.2f} to {y1:.2f})")
+                    trace('cqj', "CQJ={cqj:.2f} (threshold crossing at cycle 5, from {y0:.2f} to {y1:.2f})",
+                          well=well_id, cqj=interpolated, y0=y0, y1=y1)
                     return interpolated
                 else:
                     # Cycle 5 already above threshold and previous cycle was also above - skip this
-                    print(f"[CQJ-DEBUG] Well {well_id}: Cycle 5 already above threshold ({raw_rfu[i]} >= {threshold}), but previous cycle was also above - continuing search")
+                    trace('cqj', "Cycle 5 already above threshold ({rfu} >= {threshold}), but previous cycle was also above - continuing search",
+                          well=well_id, rfu=raw_rfu[i], threshold=threshold)
                     continue
             else:
                 # Normal threshold crossing after cycle 5
@@ -149,13 +99,109 @@ def calculate_cqj(well, threshold):
                     interpolated = x1
                 else:
                     interpolated = x0 + (threshold - y0) * (x1 - x0) / (y1 - y0)
-                print(f"[CQJ-DEBUG] Well {well_id}: CQJ={interpolated:.2f} (threshold crossing between cycles {x0}-{x1})")
+                trace('cqj', "CQJ={cqj:.2f} (threshold crossing between cycles {x0}-{x1})",
+                      well=well_id, cqj=interpolated, x0=x0, x1=x1)
                 return interpolated
     
-    well_id = well.get('well_id') or well.get('wellKey') or well.get('well_key') or 'UNKNOWN'
-    print(f"[CQJ-DEBUG] Well {well_id}: No threshold crossing found (max RFU: {max(raw_rfu) if raw_rfu else 'N/A'})")
+    if tracer.enabled:
+        trace('cqj', "No threshold crossing found (max RFU: {max_rfu})", well=well_id, max_rfu=max(raw_rfu))
     return None  # never crossed
 
+def stack_curves(rfu_lists, cycle_lists):
+    """
+    Pack per-well RFU/cycle lists into NaN-padded (wells x cycles) matrices.
+
+    Returns:
+        (rfu, cycles, lengths) - lengths is 0 for wells calculate_cqj would reject
+        (missing data or mismatched RFU/cycle counts)
+    """
+    n_wells = len(rfu_lists)
+    width = max((len(r) for r in rfu_lists if r is not None), default=0)
+    rfu = np.full((n_wells, width), np.nan)
+    cycles = np.full((n_wells, width), np.nan)
+    lengths = np.zeros(n_wells, dtype=int)
+    for row, (well_rfu, well_cycles) in enumerate(zip(rfu_lists, cycle_lists)):
+        if well_rfu is None or well_cycles is None or len(well_rfu) == 0 or len(well_rfu) != len(well_cycles):
+            continue
+        try:
+            # None entries become NaN and never count as a crossing
+            rfu[row, :len(well_rfu)] = np.asarray(well_rfu, dtype=float)
+            cycles[row, :len(well_cycles)] = np.asarray(well_cycles, dtype=float)
+        except (TypeError, ValueError):
+            rfu[row] = cycles[row] = np.nan
+            continue
+        lengths[row] = len(well_rfu)
+    return rfu, cycles, lengths
+
+
+def calculate_cqj_matrix(rfu, cycles, threshold, lengths=None):
+    """
+    calculate_cqj for every row of a (wells x cycles) matrix in one pass.
+
+    Same rules: crossings before cycle index 5 are ignored, and a crossing at
+    index 5 only counts if index 4 was below threshold.
+
+    Args:
+        rfu, cycles: 2-D arrays (see stack_curves)
+        threshold: scalar or one threshold per well
+        lengths: real cycle count per row (default: the full width)
+
+    Returns:
+        float array of CQJ values, NaN where calculate_cqj returns None
+    """
+    start_index = 5
+    rfu = np.asarray(rfu, dtype=float)
+    cycles = np.asarray(cycles, dtype=float)
+    n_wells, width = rfu.shape
+    cqj = np.full(n_wells, np.nan)
+    if width <= start_index:
+        return cqj
+
+    threshold = np.broadcast_to(np.asarray(threshold, dtype=float), (n_wells,))
+    if lengths is None:
+        lengths = np.full(n_wells, width)
+    thr = threshold[:, None]
+
+    with np.errstate(invalid='ignore'):
+        crossed = rfu >= thr
+    crossed[:, :start_index] = False
+    crossed &= np.arange(width)[None, :] < np.asarray(lengths)[:, None]
+    # At cycle 5 the previous cycle must still be below threshold (baseline noise otherwise)
+    with np.errstate(invalid='ignore'):
+        crossed[:, start_index] &= rfu[:, start_index - 1] < threshold
+
+    first = crossed.argmax(axis=1)
+    found = crossed[np.arange(n_wells), first]
+    rows = np.nonzero(found)[0]
+    i = first[rows]
+    x0, x1 = cycles[rows, i - 1], cycles[rows, i]
+    y0, y1 = rfu[rows, i - 1], rfu[rows, i]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        interpolated = x0 + (threshold[rows] - y0) * (x1 - x0) / (y1 - y0)
+    cqj[rows] = np.where(y1 == y0, x1, interpolated)
+    return cqj
+
+
+@timed('cqj_batch')
+def calculate_cqj_batch(wells, thresholds):
+    """
+    calculate_cqj for a list of wells in one vectorized pass.
+
+    Args:
+        wells: well dicts with raw_rfu / raw_cycles, as for calculate_cqj
+        thresholds: one threshold per well (None where no threshold is known)
+
+    Returns:
+        list of CQJ values, None where calculate_cqj returns None or the threshold is None
+    """
+    if not wells:
+        return []
+    rfu, cycles, lengths = stack_curves([w.get('raw_rfu') for w in wells],
+                                        [w.get('raw_cycles') for w in wells])
+    threshold = np.array([np.nan if t is None else t for t in thresholds], dtype=float)
+    values = calculate_cqj_matrix(rfu, cycles, threshold, lengths)
+    return [None if np.isnan(v) else float(v) for v in values]
+
 def determine_control_type_python(well_id, well_data):
     """
     Python version of determineControlType function from JavaScript
@@ -169,46 +215,36 @@ def determine_control_type_python(well_id, well_data):
     
     # Check for NTC first
     if 'NTC' in sample_name or 'NTC' in upper_sample_name:
-        print(f"[CONTROL-DETECT-PY] Found NTC control: {well_id} (sample: {sample_name})")
         return 'NTC'
     
     # Method 1: Look for H-, M-, L- patterns (most reliable)
     if 'H-' in sample_name:
-        print(f"[CONTROL-DETECT-PY] Found H control: {well_id} (H- pattern in: {sample_name})")
         return 'H'
     if 'M-' in sample_name:
-        print(f"[CONTROL-DETECT-PY] Found M control: {well_id} (M- pattern in: {sample_name})")
         return 'M'
     if 'L-' in sample_name:
-        print(f"[CONTROL-DETECT-PY] Found L control: {well_id} (L- pattern in: {sample_name})")
         return 'L'
     
     # Method 2: Look for explicit concentration indicators
     if any(conc in upper_sample_name for conc in ['1E7', '10E7', '1E+7']):
-        print(f"[CONTROL-DETECT-PY] Found H control by concentration: {well_id} (sample: {sample_name})")
         return 'H'
     if any(conc in upper_sample_name for conc in ['1E5', '10E5', '1E+5']):
-        print(f"[CONTROL-DETECT-PY] Found M control by concentration: {well_id} (sample: {sample_name})")
         return 'M'
     if any(conc in upper_sample_name for conc in ['1E3', '10E3', '1E+3']):
-        print(f"[CONTROL-DETECT-PY] Found L control by concentration: {well_id} (sample: {sample_name})")
         return 'L'
     
     # Method 3: Look for explicit control words (only if very clear)
     if any(ctrl in upper_sample_name for ctrl in ['HIGH CONTROL', 'POSITIVE CONTROL']):
-        print(f"[CONTROL-DETECT-PY] Found H control by explicit name: {well_id} (sample: {sample_name})")
         return 'H'
     if any(ctrl in upper_sample_name for ctrl in ['MEDIUM CONTROL', 'MED CONTROL']):
-        print(f"[CONTROL-DETECT-PY] Found M control by explicit name: {well_id} (sample: {sample_name})")
         return 'M'
     if 'LOW CONTROL' in upper_sample_name:
-        print(f"[CONTROL-DETECT-PY] Found L control by explicit name: {well_id} (sample: {sample_name})")
         return 'L'
     
     # DO NOT classify as control well - be very conservative
-    print(f"[CONTROL-DETECT-PY] Sample well (not control): {well_id} (sample: {sample_name})")
     return None
 
+@timed('calcj', scope='well')
 def calculate_calcj_with_controls(well_data, threshold, all_well_results, test_code, channel):
     """
     Calculate CalcJ using H/M/L control-based standard curve.
@@ -235,33 +271,36 @@ def calculate_calcj_with_controls(well_data, threshold, all_well_results, test_c
     current_well_control_type = determine_control_type_python(well_id, well_data)
     if current_well_control_type and current_well_control_type in ['H', 'M', 'L']:
         # Get fixed value from centralized configuration
-        conc_values = CONCENTRATION_CONTROLS.get(test_code, {}).get(channel, {})
+        conc_values = get_control_concentrations(test_code, channel)
         fixed_value = conc_values.get(current_well_control_type)
         if fixed_value:
-            print(f"[CALCJ-DEBUG] Control well {well_id} ({current_well_control_type}) getting FIXED value from config: {fixed_value}")
+            trace('calcj', "Control well ({control_type}) getting FIXED value from config: {value}",
+                  well=well_id, control_type=current_well_control_type, value=fixed_value)
             return {
                 'calcj_value': fixed_value, 
                 'method': f'fixed_{current_well_control_type.lower()}_control_backend_centralized'
             }
         else:
-            print(f"[CALCJ-DEBUG] Control well {well_id} ({current_well_control_type}) has no concentration value in config")
+            trace('calcj', "Control well ({control_type}) has no concentration value in config",
+                  well=well_id, control_type=current_well_control_type)
             return {'calcj_value': None, 'method': 'missing_control_config'}
     
     # Get CQJ value for current well - skip if no threshold crossing
     current_cqj = well_data.get('cqj_value')
     if current_cqj is None:
-        print(f"[CALCJ-DEBUG] Well {well_id}: No CQJ value, skipping CalcJ calculation")
+        trace('calcj', "No CQJ value, skipping CalcJ calculation", well=well_id)
         return {'calcj_value': None, 'method': 'no_cqj_value'}
     
     # Get concentration values for this test/channel
-    conc_values = CONCENTRATION_CONTROLS.get(test_code, {}).get(channel, {})
+    conc_values = get_control_concentrations(test_code, channel)
     if not conc_values:
-        print(f"[CALCJ-DEBUG] Well {well_id}: No concentration controls found for {test_code}/{channel}, CalcJ unavailable")
+        trace('calcj', "No concentration controls found for {test_code}/{channel}, CalcJ unavailable",
+              well=well_id, test_code=test_code, channel=channel)
         return {'calcj_value': None, 'method': 'no_controls_available'}
     
     # Find H/M/L control wells - improved detection with outlier handling
     control_cqj = {'H': [], 'M': [], 'L': []}
-    print(f"[CALCJ-DEBUG] Well {well_id}: Searching for controls in {len(all_well_results)} wells")
+    trace('calcj', "Searching for controls in {count} wells", well=well_id, count=len(all_well_results))
     
     # Scan all wells for controls matching this test code
     for well_key, well in all_well_results.items():
@@ -274,8 +313,28 @@ def calculate_calcj_with_controls(well_data, threshold, all_well_results, test_c
         # Only include controls that have valid CQJ values
         if control_type and control_type in ['H', 'M', 'L'] and well.get('cqj_value') is not None:
             control_cqj[control_type].append(well.get('cqj_value'))
-            print(f"[CALCJ-DEBUG] Found {control_type} control: {well_key} (CQJ: {well.get('cqj_value')})")
+            trace('calcj', "Found {control_type} control: {control_well} (CQJ: {cqj})",
+                  well=well_id, control_type=control_type, control_well=well_key, cqj=well.get('cqj_value'))
     
+    curve = control_standard_curve(control_cqj, conc_values, test_code, well_id)
+    return calcj_from_standard_curve(curve, current_cqj, well_id)
+
+
+def control_standard_curve(control_cqj, conc_values, test_code, well_id='UNKNOWN'):
+    """
+    Build the log-linear standard curve from control CQJ values.
+
+    Args:
+        control_cqj: {'H': [cqj, ...], 'M': [...], 'L': [...]} for the channel's control wells
+        conc_values: {'H': conc, 'M': conc, 'L': conc} for the test/channel
+        test_code: The test code (used in the method name)
+        well_id: Well the curve is built for (debug output only)
+
+    Returns:
+        dict with slope, intercept and method, or with calcj_value None and the failure method
+    """
+    import math
+
     # Calculate average CQJ for each control level with outlier detection
     avg_control_cqj = {}
     for control_type, cqj_list in control_cqj.items():
@@ -283,7 +342,7 @@ def calculate_calcj_with_controls(well_data, threshold, all_well_results, test_c
             if len(cqj_list) == 1:
                 # Only one control, use it
                 avg_control_cqj[control_type] = cqj_list[0]
-                print(f"[CALCJ-DEBUG] Single {control_type} control: {cqj_list[0]}")
+                trace('calcj', "Single {control_type} control: {cqj}", well=well_id, control_type=control_type, cqj=cqj_list[0])
             else:
                 # Multiple controls - remove outliers (>5 cycles from median)
                 sorted_cqj = sorted(cqj_list)
@@ -291,18 +350,20 @@ def calculate_calcj_with_controls(well_data, threshold, all_well_results, test_c
                 filtered_cqj = [cqj for cqj in cqj_list if abs(cqj - median) <= 5.0]
                 
                 if len(filtered_cqj) < len(cqj_list):
-                    print(f"[CALCJ-DEBUG] Removed {len(cqj_list) - len(filtered_cqj)} outliers from {control_type} controls")
+                    trace('calcj', "Removed {count} outliers from {control_type} controls",
+                          well=well_id, count=len(cqj_list) - len(filtered_cqj), control_type=control_type)
                 
                 if filtered_cqj:
                     avg_control_cqj[control_type] = sum(filtered_cqj) / len(filtered_cqj)
-                    print(f"[CALCJ-DEBUG] {control_type} control average CQJ: {avg_control_cqj[control_type]:.2f} (n={len(filtered_cqj)})")
+                    trace('calcj', "{control_type} control average CQJ: {cqj:.2f} (n={count})", well=well_id,
+                          control_type=control_type, cqj=avg_control_cqj[control_type], count=len(filtered_cqj))
     
     # We need at least 1 control with valid CQJ values
     if len(avg_control_cqj) < 1:
-        print(f"[CALCJ-DEBUG] Well {well_id}: No controls found with CQJ, CalcJ unavailable")
+        trace('calcj', "No controls found with CQJ, CalcJ unavailable", well=well_id)
         return {'calcj_value': None, 'method': 'insufficient_controls'}
     
-    print(f"[CALCJ-DEBUG] Well {well_id}: Found {len(avg_control_cqj)} control(s) with valid CQJ values")
+    trace('calcj', "Found {count} control(s) with valid CQJ values", well=well_id, count=len(avg_control_cqj))
     
     # Create standard curve using best available control combination
     # Prioritize H and L for maximum curve spread
@@ -325,44 +386,59 @@ def calculate_calcj_with_controls(well_data, threshold, all_well_results, test_c
         l_val = conc_values.get('L', 1e3)
         method = f'standard_curve_m_l_{test_code.lower()}'
     else:
-        print(f"[CALCJ-DEBUG] Well {well_id}: Unable to create standard curve")
+        trace('calcj', "Unable to create standard curve", well=well_id)
         return {'calcj_value': None, 'method': 'insufficient_control_combination'}
     
+    # Validate that we have reasonable control data
+    if abs(h_cqj - l_cqj) < 0.5:
+        trace('calcj', "Controls too close together (H:{h_cqj}, L:{l_cqj})", well=well_id, h_cqj=h_cqj, l_cqj=l_cqj)
+        return {'calcj_value': None, 'method': 'controls_too_close'}
+    
+    if h_val <= 0 or l_val <= 0:
+        trace('calcj', "Invalid concentration values", well=well_id)
+        return {'calcj_value': None, 'method': 'invalid_concentration_values'}
+    
+    # Log-linear interpolation using control values
+    log_h = math.log10(h_val)
+    log_l = math.log10(l_val)
+    
+    # Calculate slope and intercept of standard curve
+    slope = (log_h - log_l) / (h_cqj - l_cqj)
+    intercept = log_h - slope * h_cqj
+    return {'slope': slope, 'intercept': intercept, 'method': method}
+
+
+def calcj_from_standard_curve(curve, current_cqj, well_id='UNKNOWN'):
+    """
+    Apply a curve from control_standard_curve() to one well's CQJ.
+
+    Returns:
+        dict with calcj_value and method used
+    """
+    import math
+    
+    if 'slope' not in curve:
+        return {'calcj_value': None, 'method': curve['method']}
+    slope, intercept, method = curve['slope'], curve['intercept'], curve['method']
+    
     # Calculate CalcJ using log-linear standard curve
     try:
-        # Validate that we have reasonable control data
-        if abs(h_cqj - l_cqj) < 0.5:
-            print(f"[CALCJ-DEBUG] Well {well_id}: Controls too close together (H:{h_cqj}, L:{l_cqj})")
-            return {'calcj_value': None, 'method': 'controls_too_close'}
-        
-        if h_val <= 0 or l_val <= 0:
-            print(f"[CALCJ-DEBUG] Well {well_id}: Invalid concentration values")
-            return {'calcj_value': None, 'method': 'invalid_concentration_values'}
-        
-        # Log-linear interpolation using control values
-        log_h = math.log10(h_val)
-        log_l = math.log10(l_val)
-        
-        # Calculate slope and intercept of standard curve
-        slope = (log_h - log_l) / (h_cqj - l_cqj)
-        intercept = log_h - slope * h_cqj
-        
         # Calculate concentration for current CQJ
         log_conc = slope * current_cqj + intercept
         calcj_value = math.pow(10, log_conc)
         
         # Sanity checks: result should be within reasonable range
         if not math.isfinite(calcj_value) or calcj_value < 0 or calcj_value > 1e12:
-            print(f"[CALCJ-DEBUG] Well {well_id}: CalcJ result out of range: {calcj_value}")
+            trace('calcj', "CalcJ result out of range: {calcj}", well=well_id, calcj=calcj_value)
             return {'calcj_value': None, 'method': 'unreasonable_result'}
         
-        print(f"[CALCJ-DEBUG] Well {well_id}: Control-based CalcJ = {calcj_value:.2e} (CQJ: {current_cqj})")
-        print(f"[CALCJ-DEBUG] Standard curve: slope={slope:.4f}, intercept={intercept:.4f}")
+        trace('calcj', "Control-based CalcJ = {calcj:.2e} (CQJ: {cqj}); standard curve: slope={slope:.4f}, intercept={intercept:.4f}",
+              well=well_id, calcj=calcj_value, cqj=current_cqj, slope=slope, intercept=intercept)
         
         return {'calcj_value': calcj_value, 'method': method}
         
     except Exception as e:
-        print(f"[CALCJ-DEBUG] Well {well_id}: Error calculating CalcJ: {e}")
+        trace('calcj', "Error calculating CalcJ: {error}", well=well_id, error=e)
         return {'calcj_value': None, 'method': 'calculation_error'}
 
 
@@ -24,6 +24,7 @@ SNR_CUTOFFS = {
 }
 
 from log_utils import get_logger
+from well_trace import trace
 
 logger = get_logger("curve_classification")
 
@@ -54,7 +55,8 @@ def classify_curve(r2, steepness, snr, midpoint, baseline=100, amplitude=None, c
     Everything else = EDGE CASE for ML review
     """
     
-    print(f"[CLASSIFY_DEBUG] Input: amp={amplitude}, r2={r2}, steep={steepness}, snr={snr}, cq={cq_value}")
+    trace('classify', "Input: amp={amplitude}, r2={r2}, steep={steepness}, snr={snr}, cq={cq}",
+          amplitude=amplitude, r2=r2, steepness=steepness, snr=snr, cq=cq_value)
     
     # Validate inputs
     if amplitude is None:
@@ -74,12 +76,14 @@ def classify_curve(r2, steepness, snr, midpoint, baseline=100, amplitude=None, c
     if baseline < -100:  # Very negative baseline
         # The actual signal level is amplitude + baseline
         actual_signal_level = amplitude + baseline
-        print(f"[BASELINE_DEBUG] Negative baseline detected: baseline={baseline}, raw_amp={amplitude}, actual_signal={actual_signal_level}")
+        trace('classify', "Negative baseline detected: baseline={baseline}, raw_amp={amplitude}, actual_signal={signal}",
+              baseline=baseline, amplitude=amplitude, signal=actual_signal_level)
         
         # If actual signal is very low, treat as low amplitude
         if actual_signal_level < 50:
             baseline_corrected_amplitude = actual_signal_level
-            print(f"[BASELINE_DEBUG] Corrected amplitude from {amplitude} to {baseline_corrected_amplitude}")
+            trace('classify', "Corrected amplitude from {amplitude} to {corrected}",
+                  amplitude=amplitude, corrected=baseline_corrected_amplitude)
     
     # Use corrected amplitude for classification
     amplitude = baseline_corrected_amplitude
@@ -214,7 +218,8 @@ def classify_curve(r2, steepness, snr, midpoint, baseline=100, amplitude=None, c
         }
     
     elif confident_negative:
-        print(f"[CLASSIFY_DEBUG] CONFIDENT_NEGATIVE triggered: amp<200={amplitude < 200}, r2<0.70={r2 < 0.70}, steep<0.1={steepness < 0.1}, snr<1.5={snr < 1.5}")
+        trace('classify', "CONFIDENT_NEGATIVE triggered: amp<200={low_amp}, r2<0.70={low_r2}, steep<0.1={flat}, snr<1.5={noisy}",
+              low_amp=amplitude < 200, low_r2=r2 < 0.70, flat=steepness < 0.1, noisy=snr < 1.5)
         return {
             'classification': 'NEGATIVE',
             'confidence': 0.90,
@@ -285,15 +290,18 @@ def classify_curve(r2, steepness, snr, midpoint, baseline=100, amplitude=None, c
         # WEAK_POSITIVE requires valid CQJ crossing
         if amplitude >= 300 and r2 >= 0.75 and has_valid_cqj:
             classification = "WEAK_POSITIVE"
-            print(f"[DEBUG] Edge case WEAK_POSITIVE: amp={amplitude}, r2={r2}, has_cqj={has_valid_cqj}")
+            trace('classify', "Edge case WEAK_POSITIVE: amp={amplitude}, r2={r2}, has_cqj={has_cqj}",
+                  amplitude=amplitude, r2=r2, has_cqj=has_valid_cqj)
         # INDETERMINATE requires good S-curve characteristics (good R² and steepness)
         elif r2 >= 0.80 and steepness >= 0.15:
             classification = "INDETERMINATE"
-            print(f"[DEBUG] Edge case INDETERMINATE (good curve): r2={r2}, steepness={steepness}")
+            trace('classify', "Edge case INDETERMINATE (good curve): r2={r2}, steepness={steepness}",
+                  r2=r2, steepness=steepness)
         # Poor curves without CQJ or quality should be NEGATIVE
         else:
             classification = "NEGATIVE"
-            print(f"[DEBUG] Edge case NEGATIVE: amp={amplitude}, r2={r2}, steepness={steepness}, has_cqj={has_valid_cqj}")
+            trace('classify', "Edge case NEGATIVE: amp={amplitude}, r2={r2}, steepness={steepness}, has_cqj={has_cqj}",
+                  amplitude=amplitude, r2=r2, steepness=steepness, has_cqj=has_valid_cqj)
             
         return {
             'classification': classification,
@@ -0,0 +1,138 @@
+"""
+Packed float32 encoding for per-well curve arrays (well_results.curve_data).
+
+With QPCR_CURVE_STORAGE=packed, raw_cycles, raw_rfu and fitted_curve are
+stored together in one versioned BLOB instead of three JSON text columns.
+Rows written in either format stay readable; WellResult decodes whichever
+is present.
+
+Format v1 (little-endian):
+    b'QC' | version:uint8 | n_arrays:uint8 |
+    n_arrays * (field_id:uint8 | length:uint32 | length * float32)
+
+Missing values (None/NaN) round-trip as None. float32 keeps ~7 significant
+digits, which is well beyond CFX export precision for RFU and cycle values.
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+CURVE_STORAGE = os.environ.get('QPCR_CURVE_STORAGE', 'json').lower()  # 'json' | 'packed'
+
+CURVE_FIELDS = ('raw_cycles', 'raw_rfu', 'fitted_curve')
+
+_MAGIC = b'QC'
+_VERSION = 1
+_HEADER = struct.Struct('<2sBB')
+_ENTRY = struct.Struct('<BI')
+_FLOAT32 = np.dtype('<f4')
+
+
+class CurveCodecError(ValueError):
+    """Raised for a curve_data blob that cannot be decoded."""
+
+
+def packed_storage_enabled():
+    return CURVE_STORAGE == 'packed'
+
+
+def _as_float_array(values):
+    if values is None:
+        return np.empty(0, dtype=_FLOAT32)
+    if isinstance(values, (bytes, str)):
+        values = json.loads(values) if values else []
+    try:
+        return np.asarray(values, dtype=float).astype(_FLOAT32).ravel()
+    except (TypeError, ValueError):
+        # Lists with None entries
+        return np.array([np.nan if v is None else v for v in values], dtype=float).astype(_FLOAT32)
+
+
+def pack_curves(curves):
+    """
+    Encode ``{field: values}`` for the CURVE_FIELDS present in ``curves``.
+    Values may be lists, arrays or JSON strings; missing fields are skipped.
+    """
+    present = [(i, name) for i, name in enumerate(CURVE_FIELDS) if curves.get(name) is not None]
+    parts = [_HEADER.pack(_MAGIC, _VERSION, len(present))]
+    for field_id, name in present:
+        arr = _as_float_array(curves[name])
+        parts.append(_ENTRY.pack(field_id, len(arr)))
+        parts.append(arr.tobytes())
+    return b''.join(parts)
+
+
+def unpack_curves(blob):
+    """Decode a curve_data blob into ``{field: list of floats}``."""
+    if not blob:
+        return {}
+    blob = bytes(blob)
+    try:
+        magic, version, count = _HEADER.unpack_from(blob, 0)
+    except struct.error as e:
+        raise CurveCodecError('curve_data blob is truncated') from e
+    if magic != _MAGIC:
+        raise CurveCodecError('curve_data blob has an unknown format')
+    if version != _VERSION:
+        raise CurveCodecError(f'Unsupported curve_data version {version}')
+
+    curves = {}
+    offset = _HEADER.size
+    for _ in range(count):
+        try:
+            field_id, length = _ENTRY.unpack_from(blob, offset)
+        except struct.error as e:
+            raise CurveCodecError('curve_data blob is truncated') from e
+        offset += _ENTRY.size
+        end = offset + length * _FLOAT32.itemsize
+        if end > len(blob) or field_id >= len(CURVE_FIELDS):
+            raise CurveCodecError('curve_data blob is corrupt')
+        arr = np.frombuffer(blob, dtype=_FLOAT32, count=length, offset=offset)
+        offset = end
+        values = arr.astype(float).tolist()
+        if np.isnan(arr).any():
+            values = [None if v != v else v for v in values]
+        curves[CURVE_FIELDS[field_id]] = values
+    return curves
+
+
+def encode_curve_columns(raw_cycles, raw_rfu, fitted_curve, dumps=json.dumps):
+    """well_results column values for the curve arrays, packed or as JSON per QPCR_CURVE_STORAGE"""
+    if packed_storage_enabled():
+        columns = dict.fromkeys(CURVE_FIELDS)
+        columns['curve_data'] = pack_curves({'raw_cycles': raw_cycles, 'raw_rfu': raw_rfu,
+                                             'fitted_curve': fitted_curve})
+        return columns
+    return {'raw_cycles': dumps(raw_cycles), 'raw_rfu': dumps(raw_rfu),
+            'fitted_curve': dumps(fitted_curve), 'curve_data': None}
+
+
+def decode_curve_columns(json_columns, curve_data):
+    """
+    Resolve the curve arrays of one well_results row.
+
+    A non-NULL JSON column wins over the packed blob, so rows updated field by
+    field through the JSON columns stay correct; anything else comes from
+    curve_data. Unparseable values decode to [].
+    """
+    packed = None
+    curves = {}
+    for field in CURVE_FIELDS:
+        val = json_columns.get(field)
+        if val is None:
+            if packed is None:
+                try:
+                    packed = unpack_curves(curve_data) if curve_data else {}
+                except CurveCodecError:
+                    packed = {}
+            curves[field] = packed.get(field, [])
+            continue
+        try:
+            parsed = json.loads(val) if isinstance(val, (str, bytes)) else val
+            curves[field] = parsed if isinstance(parsed, list) else []
+        except Exception:
+            curves[field] = []
+    return curves
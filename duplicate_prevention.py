@@ -17,7 +17,7 @@ Usage:
         # Log the evidence
 """
 
-import mysql.connector
+import mysql_pool
 import os
 import hashlib
 from datetime import datetime, timedelta
@@ -30,7 +30,7 @@ def get_mysql_connection():
         'password': os.environ.get('MYSQL_PASSWORD', 'qpcr_password'),
         'database': os.environ.get('MYSQL_DATABASE', 'qpcr_analysis')
     }
-    return mysql.connector.connect(**mysql_config)
+    return mysql_pool.connect(**mysql_config)
 
 def extract_base_filename(filename):
     """Extract base filename by removing channel-specific suffixes"""
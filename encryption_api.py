@@ -13,7 +13,8 @@ except Exception as _enc_err:
     DataEncryption = None  # type: ignore
     FieldEncryption = None  # type: ignore
     ENCRYPTION_IMPORT_ERROR = _enc_err
-import mysql.connector
+import mysql_pool
+from mysql_unified_compliance_manager import evidence_dedup_key
 import os
 import json
 import hashlib
@@ -45,7 +46,7 @@ def get_mysql_connection():
         if host == 'localhost':
             host = '127.0.0.1'
         port = int(os.environ.get('MYSQL_PORT', 3306))
-        return mysql.connector.connect(
+        return mysql_pool.connect(
             host=host,
             port=port,
             user=os.environ.get('MYSQL_USER', 'qpcr_user'), 
@@ -228,17 +229,20 @@ def log_encryption_event():
         if conn:
             try:
                 cursor = conn.cursor()
+                evidence_hash = hashlib.sha256(json.dumps(event_data, sort_keys=True).encode()).hexdigest()
                 cursor.execute("""
                     INSERT INTO compliance_evidence 
-                    (requirement_id, evidence_type, evidence_data, evidence_hash, validation_status, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s)
+                    (requirement_id, evidence_type, evidence_data, evidence_hash, validation_status, created_at, dedup_key)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE id = id
                 """, (
                     'ENCRYPTION_21CFR11',
                     'system_event',
                     json.dumps(event_data),
-                    hashlib.sha256(json.dumps(event_data, sort_keys=True).encode()).hexdigest(),
+                    evidence_hash,
                     'validated',
-                    datetime.now()
+                    datetime.now(),
+                    evidence_dedup_key('ENCRYPTION_21CFR11', event_data, evidence_hash)
                 ))
                 conn.commit()
                 cursor.close()
@@ -456,7 +456,7 @@ def test_field_encryption_quick():
 def test_database_ssl_quick():
     """Quick database SSL test"""
     try:
-        import mysql.connector
+        import mysql_pool
         
         config = {
             'host': os.environ.get('MYSQL_HOST', 'localhost'),
@@ -465,7 +465,7 @@ def test_database_ssl_quick():
             'database': os.environ.get('MYSQL_DATABASE', 'qpcr_analysis')
         }
         
-        connection = mysql.connector.connect(**config)
+        connection = mysql_pool.connect(**config)
         cursor = connection.cursor()
         cursor.execute("SHOW STATUS LIKE 'Ssl_cipher'")
         result = cursor.fetchone()
@@ -10,7 +10,7 @@ import datetime
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-import mysql.connector
+import mysql_pool
 import ssl
 import socket
 import base64
@@ -221,7 +221,7 @@ class EncryptionEvidenceGenerator:
             }
             
             # Test connection
-            connection = mysql.connector.connect(**mysql_config)
+            connection = mysql_pool.connect(**mysql_config)
             cursor = connection.cursor()
             
             # Check SSL status
@@ -444,7 +444,6 @@ class EncryptionEvidenceGenerator:
         
         # Test 3: Database Connection Encryption
         try:
-            import mysql.connector
             mysql_config = {
                 'host': os.environ.get('MYSQL_HOST', 'localhost'),
                 'user': os.environ.get('MYSQL_USER', 'qpcr_user'),
@@ -453,7 +452,7 @@ class EncryptionEvidenceGenerator:
                 'ssl_disabled': False
             }
             
-            connection = mysql.connector.connect(**mysql_config)
+            connection = mysql_pool.connect(**mysql_config)
             cursor = connection.cursor()
             cursor.execute("SHOW STATUS LIKE 'Ssl_cipher'")
             ssl_result = cursor.fetchone()
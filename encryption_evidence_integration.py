@@ -5,11 +5,12 @@ Integrates inspector-level encryption evidence with the unified compliance dashb
 """
 
 import json
-import mysql.connector
+import mysql_pool
 import os
 import hashlib
 from datetime import datetime
 from inspector_encryption_evidence import InspectorEncryptionEvidence
+from mysql_unified_compliance_manager import evidence_dedup_key
 
 class EncryptionEvidenceIntegration:
     def __init__(self):
@@ -25,7 +26,7 @@ class EncryptionEvidenceIntegration:
     def get_mysql_connection(self):
         """Get MySQL connection"""
         try:
-            return mysql.connector.connect(**self.mysql_config)
+            return mysql_pool.connect(**self.mysql_config)
         except Exception as e:
             print(f"MySQL connection failed: {e}")
             return None
@@ -130,8 +131,8 @@ class EncryptionEvidenceIntegration:
                 # Insert into compliance_evidence table
                 cursor.execute("""
                     INSERT INTO compliance_evidence 
-                    (requirement_id, evidence_type, evidence_data, evidence_hash, validation_status, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s)
+                    (requirement_id, evidence_type, evidence_data, evidence_hash, validation_status, created_at, dedup_key)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
                     ON DUPLICATE KEY UPDATE
                     evidence_data = VALUES(evidence_data),
                     evidence_hash = VALUES(evidence_hash),
@@ -142,7 +143,8 @@ class EncryptionEvidenceIntegration:
                     json.dumps(evidence_data),
                     evidence_hash,
                     'validated',  # Encryption evidence is automatically validated
-                    datetime.now()
+                    datetime.now(),
+                    evidence_dedup_key(req_id, evidence_data, evidence_hash)
                 ))
                 
                 inserted_count += 1
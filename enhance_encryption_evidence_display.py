@@ -4,11 +4,13 @@ Enhancement script to improve encryption evidence display in compliance dashboar
 This script updates the evidence descriptions from generic 'N/A' to detailed technical descriptions
 """
 
+import hashlib
 import json
 import mysql.connector
 import os
 from datetime import datetime
 from encryption_evidence_generator import EncryptionEvidenceGenerator
+from mysql_unified_compliance_manager import evidence_dedup_key
 
 def get_mysql_connection():
     """Get MySQL database connection"""
@@ -215,11 +217,14 @@ def update_evidence_descriptions():
             else:
                 description = f"{evidence_type} completed successfully"
             
+            evidence = {'evidence_type': evidence_type, 'description': description}
+            evidence_hash = hashlib.sha256(json.dumps(evidence, sort_keys=True).encode()).hexdigest()
             cursor.execute("""
                 INSERT INTO compliance_evidence 
-                (requirement_code, evidence_type, description, status, created_at, details)
-                VALUES (%s, %s, %s, 'verified', NOW(), '{"source": "encryption_evidence_generator", "enhanced": true}')
-            """, (req_code, evidence_type, description))
+                (requirement_code, evidence_type, description, status, created_at, details, dedup_key)
+                VALUES (%s, %s, %s, 'verified', NOW(), '{"source": "encryption_evidence_generator", "enhanced": true}', %s)
+                ON DUPLICATE KEY UPDATE id = id
+            """, (req_code, evidence_type, description, evidence_dedup_key(req_code, evidence, evidence_hash)))
             
             updated_count += 1
             print(f"✅ Created new evidence record: {req_code} - {evidence_type}")
@@ -17,6 +17,8 @@ from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import ssl
 
+from mysql_unified_compliance_manager import evidence_dedup_key
+
 class EnhancedEncryptionEvidence:
     def __init__(self):
         self.mysql_config = {
@@ -343,15 +345,18 @@ class EnhancedEncryptionEvidence:
                     print(f"✅ Updated evidence for {requirement_id}")
                 else:
                     # Insert new evidence
+                    evidence_hash = enhanced_evidence['audit_information']['evidence_hash']
                     cursor.execute("""
                         INSERT INTO compliance_evidence 
-                        (requirement_id, evidence_type, evidence_data, evidence_hash, validation_status, created_at)
-                        VALUES (%s, %s, %s, %s, 'validated', NOW())
+                        (requirement_id, evidence_type, evidence_data, evidence_hash, validation_status, created_at, dedup_key)
+                        VALUES (%s, %s, %s, %s, 'validated', NOW(), %s)
+                        ON DUPLICATE KEY UPDATE id = id
                     """, (
                         requirement_id,
                         evidence_type,
                         json.dumps(enhanced_evidence),
-                        enhanced_evidence['audit_information']['evidence_hash']
+                        evidence_hash,
+                        evidence_dedup_key(requirement_id, enhanced_evidence, evidence_hash)
                     ))
                     print(f"✅ Created enhanced evidence for {requirement_id}")
                 
@@ -9,7 +9,7 @@ import hashlib
 import datetime
 from typing import Dict, List, Optional, Any
 import logging
-import mysql.connector
+import mysql_pool
 from mysql.connector import Error
 
 class FDAComplianceManager:
@@ -26,7 +26,7 @@ class FDAComplianceManager:
     
     def get_db_connection(self):
         """Get MySQL database connection with proper settings"""
-        return mysql.connector.connect(**self.mysql_config)
+        return mysql_pool.connect(**self.mysql_config)
     
     def _init_mysql_schema(self):
         """Initialize MySQL database schema for FDA compliance"""
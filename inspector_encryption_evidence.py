@@ -11,7 +11,7 @@ import hashlib
 import uuid
 from datetime import datetime, timedelta
 from data_encryption import DataEncryption, FieldEncryption
-import mysql.connector
+import mysql_pool
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -26,7 +26,7 @@ class InspectorEncryptionEvidence:
     def get_mysql_connection(self):
         """Get MySQL connection for evidence verification"""
         try:
-            return mysql.connector.connect(
+            return mysql_pool.connect(
                 host=os.environ.get('MYSQL_HOST', 'localhost'),
                 user=os.environ.get('MYSQL_USER', 'qpcr_user'),
                 password=os.environ.get('MYSQL_PASSWORD', 'qpcr_password'),
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Convert existing well_results rows between JSON and packed curve storage.
+
+    python migrate_curve_storage.py              # JSON columns -> curve_data
+    python migrate_curve_storage.py --reverse    # curve_data -> JSON columns
+    python migrate_curve_storage.py --dry-run    # report sizes, write nothing
+
+Rows are processed in id order, one committed batch at a time, so the
+migration can be interrupted and re-run. Run mysql_schema_ensure.py first
+so that well_results.curve_data exists.
+"""
+
+import argparse
+import json
+import os
+
+import mysql_pool
+from curve_codec import CURVE_FIELDS, decode_curve_columns, pack_curves
+
+
+def get_mysql_config():
+    return {
+        'host': os.environ.get('MYSQL_HOST', 'localhost'),
+        'port': int(os.environ.get('MYSQL_PORT', 3306)),
+        'user': os.environ.get('MYSQL_USER', 'qpcr_user'),
+        'password': os.environ.get('MYSQL_PASSWORD', 'qpcr_password'),
+        'database': os.environ.get('MYSQL_DATABASE', 'qpcr_analysis'),
+    }
+
+
+def _select_batch(cursor, after_id, batch_size, reverse):
+    # Rows still in the source format
+    source = 'curve_data IS NOT NULL' if reverse else 'curve_data IS NULL AND raw_rfu IS NOT NULL'
+    cursor.execute(
+        f"SELECT id, {', '.join(CURVE_FIELDS)}, curve_data FROM well_results "
+        f"WHERE id > %s AND {source} ORDER BY id LIMIT %s",
+        (after_id, batch_size))
+    return cursor.fetchall()
+
+
+def _to_packed(row):
+    curves = decode_curve_columns(row, row['curve_data'])
+    blob = pack_curves(curves)
+    old_size = sum(len(row[field] or '') for field in CURVE_FIELDS)
+    return (blob, row['id']), old_size, len(blob)
+
+
+def _to_json(row):
+    curves = decode_curve_columns(row, row['curve_data'])
+    values = tuple(json.dumps(curves[field]) for field in CURVE_FIELDS)
+    new_size = sum(len(v) for v in values)
+    return values + (row['id'],), len(row['curve_data']), new_size
+
+
+def migrate(batch_size=500, reverse=False, dry_run=False):
+    """Returns (rows, bytes_before, bytes_after) over the curve columns."""
+    conn = mysql_pool.connect(**get_mysql_config())
+    cursor = conn.cursor(dictionary=True)
+    if reverse:
+        convert = _to_json
+        update_sql = (f"UPDATE well_results SET {', '.join(f'{f} = %s' for f in CURVE_FIELDS)}, "
+                      f"curve_data = NULL WHERE id = %s")
+    else:
+        convert = _to_packed
+        update_sql = (f"UPDATE well_results SET curve_data = %s, "
+                      f"{', '.join(f'{f} = NULL' for f in CURVE_FIELDS)} WHERE id = %s")
+
+    rows = before = after = 0
+    last_id = 0
+    try:
+        while True:
+            batch = _select_batch(cursor, last_id, batch_size, reverse)
+            if not batch:
+                break
+            updates = []
+            for row in batch:
+                params, old_size, new_size = convert(row)
+                updates.append(params)
+                before += old_size
+                after += new_size
+            if not dry_run:
+                cursor.executemany(update_sql, updates)
+                conn.commit()
+            rows += len(batch)
+            last_id = batch[-1]['id']
+            print(f"🔄 {rows} rows converted (through id {last_id})")
+    finally:
+        cursor.close()
+        conn.close()
+    return rows, before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--reverse', action='store_true', help='convert packed rows back to JSON columns')
+    parser.add_argument('--dry-run', action='store_true', help='report the size change without writing')
+    args = parser.parse_args()
+
+    rows, before, after = migrate(args.batch_size, args.reverse, args.dry_run)
+    label = 'Would convert' if args.dry_run else 'Converted'
+    print(f"✅ {label} {rows} rows: {before:,} -> {after:,} bytes of curve data")
+
+
+if __name__ == '__main__':
+    main()
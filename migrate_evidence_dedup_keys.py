@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Backfill of compliance_evidence.dedup_key for rows written before the column existed.
+
+MySQLUnifiedComplianceManager adds the column (with its UNIQUE key) when it
+starts against an older database but leaves existing rows to this script.
+Only rows without a key are visited, so an interrupted run is finished by
+running it again, and a later run keys rows whose duplicates have since been
+deleted:
+
+    python migrate_evidence_dedup_keys.py [--batch-size 1000]
+
+Rows are keyed oldest first; later duplicates of the same requirement + file +
+fluorophore (or evidence hash) keep a NULL key and no longer block new evidence.
+"""
+
+import argparse
+import logging
+import os
+
+import mysql_pool
+from mysql_unified_compliance_manager import backfill_evidence_dedup_keys, ensure_evidence_dedup_key
+
+
+def get_mysql_config():
+    return {
+        'host': os.environ.get('MYSQL_HOST', 'localhost'),
+        'port': int(os.environ.get('MYSQL_PORT', 3306)),
+        'user': os.environ.get('MYSQL_USER', 'qpcr_user'),
+        'password': os.environ.get('MYSQL_PASSWORD', 'qpcr_password'),
+        'database': os.environ.get('MYSQL_DATABASE', 'qpcr_analysis'),
+        'charset': 'utf8mb4',
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    conn = mysql_pool.connect(**get_mysql_config())
+    try:
+        if ensure_evidence_dedup_key(conn):
+            print("✅ Added compliance_evidence.dedup_key")
+        keyed, duplicates = backfill_evidence_dedup_keys(conn, args.batch_size)
+        print(f"✅ Keyed {keyed} evidence rows; {duplicates} duplicates left without a key")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
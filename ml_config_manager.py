@@ -2,19 +2,134 @@
 ML Configuration Management
 Handles pathogen-specific ML settings and safe data operations
 Uses MySQL exclusively - NO SQLITE
+
+Reads are served from an in-memory MLConfigSnapshot of ml_pathogen_config and
+ml_system_config instead of a SELECT per lookup. Every write bumps the counter
+in ml_config_version in the same transaction; each process polls that one row
+(at most every QPCR_ML_CONFIG_POLL_SECONDS, default 1) and reloads the
+snapshot when it has moved, so writes made by other workers show up too.
 """
 
 import pymysql
+import mysql_pool
 import json
-import re
 import os
 import shutil
+import threading
+import time
 from datetime import datetime
 from flask import request, jsonify
 import logging
+from pathogen_registry import get_pathogen_library
 
 logger = logging.getLogger(__name__)
 
+CONFIG_POLL_SECONDS = float(os.environ.get('QPCR_ML_CONFIG_POLL_SECONDS', '1'))
+
+
+def _convert_config_value(value, data_type):
+    """Convert a stored ml_system_config value according to its data_type"""
+    if data_type == 'integer':
+        return int(value)
+    elif data_type == 'float':
+        return float(value)
+    elif data_type == 'boolean':
+        return value.lower() in ('true', '1', 'yes')
+    elif data_type == 'json':
+        return json.loads(value)
+    else:
+        return value
+
+
+class MLConfigSnapshot:
+    """All pathogen/fluorophore rows and system config keys as of one config version"""
+
+    def __init__(self, version, pathogen_rows, system_rows):
+        self.version = version
+        self.pathogen_rows = tuple(pathogen_rows)  # ordered by pathogen_code, fluorophore
+        self._by_key = {}
+        self._by_pathogen = {}
+        for row in self.pathogen_rows:
+            self._by_key[(row['pathogen_code'], row['fluorophore'])] = row
+            self._by_pathogen.setdefault(row['pathogen_code'], []).append(row)
+        self._system = {row['config_key']: (row['config_value'], row['data_type']) for row in system_rows}
+
+    def pathogen_configs(self, pathogen_code, fluorophore=None):
+        """Copies of the rows for a pathogen (one fluorophore, or all of them)"""
+        if fluorophore:
+            row = self._by_key.get((pathogen_code, fluorophore))
+            return [dict(row)] if row else []
+        return [dict(row) for row in self._by_pathogen.get(pathogen_code, ())]
+
+    def is_ml_enabled(self, pathogen_code, fluorophore=None):
+        if fluorophore:
+            row = self._by_key.get((pathogen_code, fluorophore))
+        else:
+            rows = self._by_pathogen.get(pathogen_code)
+            row = rows[0] if rows else None
+        return row.get('ml_enabled', False) if row else False
+
+    def all_configs(self):
+        return [dict(row) for row in self.pathogen_rows]
+
+    def enabled_configs(self):
+        return [dict(row) for row in self.pathogen_rows if row.get('ml_enabled')]
+
+    def system_value(self, config_key, default_value=None):
+        if config_key not in self._system:
+            return default_value
+        value, data_type = self._system[config_key]
+        return _convert_config_value(value, data_type)
+
+
+class VersionedSnapshotCache:
+    """
+    Holds the current snapshot and decides when to reload it.
+
+    ``load()`` builds a snapshot (reading the version before the rows) and
+    ``read_version()`` returns the current version. The version is checked at
+    most once per ``poll_seconds``; if it fails, the snapshot in hand is kept.
+    """
+
+    def __init__(self, load, read_version, poll_seconds=CONFIG_POLL_SECONDS, clock=time.monotonic):
+        self.load = load
+        self.read_version = read_version
+        self.poll_seconds = poll_seconds
+        self.clock = clock
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fresh(self, snapshot):
+        return snapshot is not None and self.clock() - self._checked_at < self.poll_seconds
+
+    def get(self):
+        snapshot = self._snapshot
+        if self._fresh(snapshot):
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if self._fresh(snapshot):
+                return snapshot
+            try:
+                if snapshot is not None and self.read_version() == snapshot.version:
+                    self._checked_at = self.clock()
+                    return snapshot
+                self._snapshot = self.load()
+                logger.info(f"🔄 ML config snapshot loaded (version {self._snapshot.version})")
+            except Exception as e:
+                if snapshot is None:
+                    raise
+                logger.error(f"❌ ML config refresh failed, keeping version {snapshot.version}: {e}")
+            self._checked_at = self.clock()
+            return self._snapshot
+
+    def invalidate(self):
+        """Drop the snapshot so the next lookup reloads it (used after this process writes)"""
+        with self._lock:
+            self._snapshot = None
+
+
 class MLConfigManager:
     def __init__(self, use_mysql=True, mysql_config=None, db_path=None):
         """
@@ -33,13 +148,14 @@ class MLConfigManager:
         
         self.mysql_config = mysql_config
         self.use_mysql = True
+        self._config_cache = VersionedSnapshotCache(self._load_snapshot, self._poll_config_version)
         logger.info("✅ ML Config Manager initialized with MySQL (SQLite deprecated)")
         self.init_tables()
     
     def get_db_connection(self):
         """Get MySQL database connection with proper settings"""
         try:
-            connection = pymysql.connect(
+            connection = mysql_pool.connect_pymysql(
                 host=self.mysql_config['host'],
                 port=self.mysql_config.get('port', 3306),
                 user=self.mysql_config['user'],
@@ -107,6 +223,14 @@ class MLConfigManager:
                         ) ENGINE=InnoDB
                     """)
                     
+                    # Single-row change counter behind the in-memory config snapshot
+                    cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS ml_config_version (
+                            id TINYINT PRIMARY KEY,
+                            version BIGINT NOT NULL DEFAULT 0
+                        ) ENGINE=InnoDB
+                    """)
+                    
                     conn.commit()
                     logger.info("✅ ML configuration tables initialized in MySQL")
                     
@@ -121,70 +245,56 @@ class MLConfigManager:
             logger.error("🔧 Make sure MySQL is running and tables can be created")
             raise
     
+    def _read_config_version(self, cursor):
+        cursor.execute("SELECT version FROM ml_config_version WHERE id = 1")
+        result = cursor.fetchone()
+        return result['version'] if result else 0
+    
+    def _bump_config_version(self, cursor):
+        """Advance the config version; call inside the transaction that changes the config"""
+        cursor.execute("""
+            INSERT INTO ml_config_version (id, version) VALUES (1, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+        """)
+    
+    def _poll_config_version(self):
+        conn = self.get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                return self._read_config_version(cursor)
+        finally:
+            conn.close()
+    
+    def _load_snapshot(self):
+        conn = self.get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                # Version first: a write landing between the reads only causes an extra reload
+                version = self._read_config_version(cursor)
+                cursor.execute("SELECT * FROM ml_pathogen_config ORDER BY pathogen_code, fluorophore")
+                pathogen_rows = cursor.fetchall()
+                cursor.execute("SELECT config_key, config_value, data_type FROM ml_system_config")
+                system_rows = cursor.fetchall()
+            return MLConfigSnapshot(version, pathogen_rows, system_rows)
+        finally:
+            conn.close()
+    
+    def config_snapshot(self):
+        """Current MLConfigSnapshot (reloaded when the config version has changed)"""
+        return self._config_cache.get()
+    
     def get_pathogen_ml_config(self, pathogen_code, fluorophore=None):
         """Get ML configuration for specific pathogen/fluorophore"""
         try:
-            conn = self.get_db_connection()
-            try:
-                with conn.cursor() as cursor:
-                    if fluorophore:
-                        cursor.execute(
-                            "SELECT * FROM ml_pathogen_config WHERE pathogen_code = %s AND fluorophore = %s",
-                            (pathogen_code, fluorophore)
-                        )
-                    else:
-                        cursor.execute(
-                            "SELECT * FROM ml_pathogen_config WHERE pathogen_code = %s",
-                            (pathogen_code,)
-                        )
-                    
-                    results = cursor.fetchall()
-                    return results
-            finally:
-                conn.close()
-                
+            return self.config_snapshot().pathogen_configs(pathogen_code, fluorophore)
         except Exception as e:
             logger.error(f"❌ Failed to get pathogen ML config: {e}")
             return []
     
-    def is_ml_enabled_for_pathogen(self, pathogen_code, fluorophore=None):
-        """Check if ML is enabled for specific pathogen/fluorophore"""
-        try:
-            conn = self.get_db_connection()
-            try:
-                with conn.cursor() as cursor:
-                    if fluorophore:
-                        cursor.execute(
-                            "SELECT ml_enabled FROM ml_pathogen_config WHERE pathogen_code = %s AND fluorophore = %s",
-                            (pathogen_code, fluorophore)
-                        )
-                    else:
-                        cursor.execute(
-                            "SELECT ml_enabled FROM ml_pathogen_config WHERE pathogen_code = %s",
-                            (pathogen_code,)
-                        )
-                    
-                    result = cursor.fetchone()
-                    return bool(result and result[0]) if result else False
-            finally:
-                conn.close()
-                
-        except Exception as e:
-            logger.error(f"❌ Failed to check ML enabled status: {e}")
-            return False
-    
     def get_all_pathogen_configs(self):
         """Get all pathogen ML configurations"""
         try:
-            conn = self.get_db_connection()
-            try:
-                with conn.cursor() as cursor:
-                    cursor.execute("SELECT * FROM ml_pathogen_config ORDER BY pathogen_code, fluorophore")
-                    results = cursor.fetchall()
-                    return results
-            finally:
-                conn.close()
-                
+            return self.config_snapshot().all_configs()
         except Exception as e:
             logger.error(f"❌ Failed to get all pathogen ML configs: {e}")
             return []
@@ -192,12 +302,8 @@ class MLConfigManager:
     def is_ml_enabled_for_pathogen(self, pathogen_code, fluorophore):
         """Check if ML is enabled for a specific pathogen/fluorophore combination"""
         try:
-            config = self.get_pathogen_ml_config(pathogen_code, fluorophore)
-            if config:
-                return config[0].get('ml_enabled', False)
-            else:
-                # Default to False if no config found
-                return False
+            # Default to False if no config found
+            return self.config_snapshot().is_ml_enabled(pathogen_code, fluorophore)
         except Exception as e:
             logger.error(f"❌ Failed to check ML enabled status for {pathogen_code}/{fluorophore}: {e}")
             return False
@@ -231,8 +337,10 @@ class MLConfigManager:
                         cursor, 'toggle_ml', pathogen_code, fluorophore,
                         str(old_state), str(enabled), user_info
                     )
+                    self._bump_config_version(cursor)
                     
                     conn.commit()
+                    self._config_cache.invalidate()
                     logger.info(f"✅ ML {'enabled' if enabled else 'disabled'} for {pathogen_code}/{fluorophore}")
                     return True
                     
@@ -258,7 +366,7 @@ class MLConfigManager:
     
     def populate_from_pathogen_library(self):
         """Populate or upsert ML config rows from static/pathogen_library.js (MySQL only).
-        - Reads the canonical JS library, strips comments, parses object, and inserts missing (pathogen_code, fluorophore) pairs.
+        - Reads the canonical JS library (parsed once by pathogen_registry) and inserts missing (pathogen_code, fluorophore) pairs.
         - Idempotent: uses ON DUPLICATE KEY UPDATE to avoid duplicates; won't flip ml_enabled flags.
         """
         try:
@@ -267,15 +375,7 @@ class MLConfigManager:
                 default_enabled = bool(self.get_system_config('ml_default_enabled', False))
             except Exception:
                 default_enabled = False
-            # Discover repository root and JS path (works in dev container and prod)
-            repo_root = os.path.dirname(os.path.abspath(__file__))
-            js_path = os.path.join(repo_root, 'static', 'pathogen_library.js')
-            if not os.path.exists(js_path):
-                # Fallback: try parent (when file layout differs)
-                alt = os.path.join(os.getcwd(), 'static', 'pathogen_library.js')
-                js_path = alt if os.path.exists(alt) else js_path
-
-            library = self._load_pathogen_library(js_path)
+            library = get_pathogen_library()
             if not library:
                 logger.warning("⚠️ PATHOGEN_LIBRARY could not be loaded; skipping auto-population.")
                 return
@@ -286,8 +386,6 @@ class MLConfigManager:
                 inserted = 0
                 with conn.cursor() as cursor:
                     for pathogen_code, channels in library.items():
-                        if not isinstance(channels, dict):
-                            continue
                         for fluorophore, target in channels.items():
                             if not fluorophore or fluorophore == 'Unknown':
                                 continue
@@ -307,7 +405,11 @@ class MLConfigManager:
                             except Exception as ie:
                                 # Continue on individual insert errors
                                 logger.debug(f"Skip/dup for {pathogen_code}/{fluorophore}: {ie}")
+                    if inserted:
+                        self._bump_config_version(cursor)
                     conn.commit()
+                if inserted:
+                    self._config_cache.invalidate()
                 logger.info(f"✅ ML pathogen config synced from pathogen_library.js (upserts applied)")
             finally:
                 conn.close()
@@ -347,7 +449,9 @@ class MLConfigManager:
                         f"enabled={enabled}; affected={affected}",
                         {"user_id": request.headers.get('X-User-ID') or 'admin'} if 'request' in globals() else None
                     )
+                    self._bump_config_version(cursor)
                     conn.commit()
+                    self._config_cache.invalidate()
                     return affected
             finally:
                 conn.close()
@@ -355,72 +459,10 @@ class MLConfigManager:
             logger.error(f"❌ Bulk toggle ML failed: {e}")
             return 0
 
-    def _load_pathogen_library(self, js_path: str):
-        """Load PATHOGEN_LIBRARY object from a JS file by stripping comments and JSON-parsing."""
-        try:
-            if not js_path or not os.path.exists(js_path):
-                return None
-            with open(js_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Remove /* ... */ block comments
-            content = re.sub(r"/\*.*?\*/", "", content, flags=re.DOTALL)
-            # Remove // line comments (not robust for // inside strings; acceptable for our file)
-            content = re.sub(r"(^|\s)//.*$", "", content, flags=re.MULTILINE)
-
-            # Extract the object literal assigned to PATHOGEN_LIBRARY
-            m = re.search(r"const\s+PATHOGEN_LIBRARY\s*=\s*({[\s\S]*?});", content)
-            if not m:
-                return None
-            obj_text = m.group(1)
-
-            # JSON parse (keys/values are already quoted in our JS)
-            data = json.loads(obj_text)
-            # Normalize keys (ensure strings)
-            norm = {}
-            for k, v in data.items():
-                try:
-                    norm[str(k)] = v
-                except Exception:
-                    norm[k] = v
-            return norm
-        except Exception as e:
-            logger.debug(f"PATHOGEN_LIBRARY parse error: {e}")
-            return None
-    
     def get_system_config(self, config_key, default_value=None):
         """Get system-wide ML configuration"""
         try:
-            conn = self.get_db_connection()
-            try:
-                with conn.cursor() as cursor:
-                    cursor.execute(
-                        "SELECT config_value, data_type FROM ml_system_config WHERE config_key = %s",
-                        (config_key,)
-                    )
-                    result = cursor.fetchone()
-                    
-                    if result:
-                        value = result['config_value']
-                        data_type = result['data_type']
-                        
-                        # Convert value based on data type
-                        if data_type == 'integer':
-                            return int(value)
-                        elif data_type == 'float':
-                            return float(value)
-                        elif data_type == 'boolean':
-                            return value.lower() in ('true', '1', 'yes')
-                        elif data_type == 'json':
-                            return json.loads(value)
-                        else:
-                            return value
-                    
-                    return default_value
-                    
-            finally:
-                conn.close()
-                
+            return self.config_snapshot().system_value(config_key, default_value)
         except Exception as e:
             logger.error(f"❌ Failed to get system config: {e}")
             return default_value
@@ -447,8 +489,10 @@ class MLConfigManager:
                         description = VALUES(description),
                         updated_at = CURRENT_TIMESTAMP
                     """, (config_key, value_str, data_type, description))
+                    self._bump_config_version(cursor)
                     
                     conn.commit()
+                    self._config_cache.invalidate()
                     logger.info(f"✅ Set system config: {config_key} = {config_value}")
                     return True
                     
@@ -515,7 +559,9 @@ class MLConfigManager:
                         )
                         message = "All training data reset"
 
+                    self._bump_config_version(cursor)
                     conn.commit()
+                    self._config_cache.invalidate()
                     logger.info(f"✅ {message}")
                     return True, backup_path
 
@@ -561,19 +607,7 @@ class MLConfigManager:
     def get_enabled_pathogen_configs(self):
         """Return all pathogen/fluorophore configs where ml_enabled is TRUE."""
         try:
-            conn = self.get_db_connection()
-            try:
-                with conn.cursor() as cursor:
-                    cursor.execute(
-                        """
-                        SELECT * FROM ml_pathogen_config
-                        WHERE ml_enabled = TRUE
-                        ORDER BY pathogen_code, fluorophore
-                        """
-                    )
-                    return cursor.fetchall()
-            finally:
-                conn.close()
+            return self.config_snapshot().enabled_configs()
         except Exception as e:
             logger.error(f"❌ Failed to get enabled pathogen configs: {e}")
             return []
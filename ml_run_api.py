@@ -73,8 +73,9 @@ def confirm_run():
             return jsonify({'error': 'Missing required fields: run_log_id, confirmed_by, is_confirmed'}), 400
         
         # Get the run_id from the log_id using MySQL
-        from sqlalchemy import create_engine, text
+        from sqlalchemy import text
         import os
+        import mysql_pool
         
         database_url = os.environ.get("DATABASE_URL")
         if database_url:
@@ -94,7 +95,7 @@ def confirm_run():
             mysql_database = os.environ.get("MYSQL_DATABASE", "qpcr_analysis")
             database_url = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{mysql_database}?charset=utf8mb4"
         
-        engine = create_engine(database_url)
+        engine = mysql_pool.get_engine(database_url)
         
         with engine.connect() as conn:
             result = conn.execute(text('SELECT run_id FROM ml_run_logs WHERE id = :log_id'), {'log_id': data['run_log_id']})
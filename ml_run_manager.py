@@ -6,8 +6,9 @@ Handles the workflow: Log Runs → Confirm Runs → Record Accuracy
 import os
 from datetime import datetime
 import json
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
+import mysql_pool
 
 class MLRunManager:
     def __init__(self):
@@ -30,7 +31,7 @@ class MLRunManager:
             mysql_database = os.environ.get("MYSQL_DATABASE", "qpcr_analysis")
             self.database_url = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{mysql_database}?charset=utf8mb4"
         
-        self.engine = create_engine(self.database_url)
+        self.engine = mysql_pool.get_engine(self.database_url)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
         self.init_tables()
     
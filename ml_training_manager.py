@@ -3,7 +3,7 @@ ML Training Pause/Resume Management
 Allows QC and Research users to pause ML training during exploratory sessions
 """
 
-import mysql.connector
+import mysql_pool
 import os
 import json
 import datetime
@@ -25,7 +25,7 @@ class MLTrainingManager:
     def _initialize_training_state_table(self):
         """Initialize the ML training state tracking table"""
         try:
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor()
             
             cursor.execute("""
@@ -76,7 +76,7 @@ class MLTrainingManager:
             bool: True if successfully paused, False otherwise
         """
         try:
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor()
             
             if scope == 'global':
@@ -156,7 +156,7 @@ class MLTrainingManager:
             bool: True if successfully resumed, False otherwise
         """
         try:
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor()
             
             if scope == 'global':
@@ -225,7 +225,7 @@ class MLTrainingManager:
             bool: True if training is paused (globally, pathogen-specific, or for session), False otherwise
         """
         try:
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor()
             
             # Check for global pause first (highest priority)
@@ -286,7 +286,7 @@ class MLTrainingManager:
             Dict with training state details or None
         """
         try:
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor(dictionary=True)
             
             # Check for global pause first
@@ -329,7 +329,7 @@ class MLTrainingManager:
             Dict with global training state or None
         """
         try:
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor(dictionary=True)
             
             cursor.execute("""
@@ -357,7 +357,7 @@ class MLTrainingManager:
             hours_old: Remove states older than this many hours
         """
         try:
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor()
             
             cursor.execute("""
@@ -6,9 +6,196 @@ Tracks pathogen-specific models, expert decisions, and teaching progress
 
 import os
 import json
+import atexit
+import queue
+import threading
+import time
 from datetime import datetime, timedelta
 import logging
-from sqlalchemy import create_engine, text
+import mysql_pool
+from sqlalchemy import text
+
+# Prediction audit rows are buffered and written by a background thread
+PREDICTION_BATCH_SIZE = int(os.environ.get('QPCR_PREDICTION_BATCH_SIZE', '200'))
+PREDICTION_FLUSH_SECONDS = float(os.environ.get('QPCR_PREDICTION_FLUSH_SECONDS', '2.0'))
+PREDICTION_QUEUE_SIZE = int(os.environ.get('QPCR_PREDICTION_QUEUE_SIZE', '10000'))
+PREDICTION_ASYNC = os.environ.get('QPCR_PREDICTION_ASYNC', '1').lower() not in ('0', 'false', 'no')
+
+PREDICTION_TRACKING_DDL = """
+    CREATE TABLE IF NOT EXISTS ml_prediction_tracking (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        performance_id INT,
+        well_id VARCHAR(255),
+        pathogen_code VARCHAR(255),
+        ml_prediction VARCHAR(255),
+        ml_confidence DECIMAL(5,3),
+        model_version_used VARCHAR(255),
+        feature_data TEXT,
+        prediction_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        final_classification VARCHAR(255),
+        INDEX idx_pathogen (pathogen_code),
+        INDEX idx_timestamp (prediction_timestamp)
+    )
+"""
+
+# pymysql rewrites executemany() of this statement into multi-row INSERTs
+PREDICTION_TRACKING_INSERT = """
+    INSERT INTO ml_prediction_tracking
+    (performance_id, well_id, pathogen_code, ml_prediction, ml_confidence,
+     model_version_used, feature_data, prediction_timestamp, final_classification)
+    VALUES (:performance_id, :well_id, :pathogen_code, :ml_prediction,
+            :ml_confidence, :model_version_used, :feature_data, :prediction_timestamp,
+            :final_classification)
+"""
+
+
+class PredictionTrackingWriter:
+    """
+    Bounded-queue batch writer for ml_prediction_tracking.
+
+    Rows are queued by track_model_prediction and written by a daemon thread
+    once PREDICTION_BATCH_SIZE rows are waiting or PREDICTION_FLUSH_SECONDS have
+    passed. The table DDL runs at app startup (ensure_table), and remaining rows
+    are flushed at interpreter exit. If the queue is full the caller writes its
+    row inline instead of dropping it; failed batches are retried on the next
+    flush.
+    """
+
+    _STOP = object()
+
+    def __init__(self, engine, batch_size=PREDICTION_BATCH_SIZE, flush_interval=PREDICTION_FLUSH_SECONDS,
+                 max_queue=PREDICTION_QUEUE_SIZE):
+        self.engine = engine
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.logger = logging.getLogger(__name__)
+        self.rows_written = 0
+        self.batches_written = 0
+        self.inline_writes = 0
+        self.rows_dropped = 0
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._retry = []
+        self._table_ready = False
+
+    def submit(self, row):
+        """Queue one prediction row for writing."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Writer cannot keep up: write this row now rather than lose it
+            self.inline_writes += 1
+            self._write([row])
+
+    def flush(self):
+        """Write every queued row now (used by pool workers and at shutdown)."""
+        if self._pid != os.getpid():
+            return
+        rows = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not self._STOP:
+                rows.append(row)
+        if rows or self._retry:
+            self._write(rows)
+
+    def close(self, timeout=10.0):
+        """Stop the writer thread and flush what is left (registered with atexit)."""
+        if self._pid != os.getpid():
+            return
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            try:
+                self._queue.put(self._STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            thread.join(timeout)
+        self._thread = None
+        self.flush()
+
+    def ensure_table(self):
+        """Create ml_prediction_tracking now; app startup calls this with the other tables."""
+        with self.engine.begin() as conn:
+            self._ensure_table(conn)
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'pending_retry': len(self._retry),
+            'rows_written': self.rows_written,
+            'batches_written': self.batches_written,
+            'inline_writes': self.inline_writes,
+            'rows_dropped': self.rows_dropped,
+        }
+
+    # --- internals -------------------------------------------------------
+
+    def _ensure_started(self):
+        if self._pid != os.getpid():
+            # Forked child (analysis pool worker): the parent's thread and queue are not ours
+            self._reset()
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='ml-prediction-writer', daemon=True)
+                self._thread.start()
+
+    def _ensure_table(self, conn):
+        # Processes that skipped app startup (scripts) create the table on their first write
+        if not self._table_ready:
+            conn.execute(text(PREDICTION_TRACKING_DDL))
+            self._table_ready = True
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is self._STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            if batch or self._retry:
+                self._write(batch)
+
+    def _write(self, rows):
+        with self._write_lock:
+            rows = self._retry + list(rows)
+            self._retry = []
+            if not rows:
+                return
+            try:
+                with self.engine.begin() as conn:
+                    self._ensure_table(conn)
+                    conn.execute(text(PREDICTION_TRACKING_INSERT), rows)
+                self.rows_written += len(rows)
+                self.batches_written += 1
+            except Exception as e:
+                self.logger.error(f"Error tracking predictions ({len(rows)} rows): {e}")
+                keep = rows[-self.max_queue:]
+                self.rows_dropped += len(rows) - len(keep)
+                self._retry = keep
+
 
 class MLValidationTracker:
     def __init__(self):
@@ -31,8 +218,10 @@ class MLValidationTracker:
             mysql_database = os.environ.get("MYSQL_DATABASE", "qpcr_analysis")
             self.database_url = f"mysql+pymysql://{mysql_user}:{mysql_password}@{mysql_host}:{mysql_port}/{mysql_database}?charset=utf8mb4"
         
-        self.engine = create_engine(self.database_url)
+        self.engine = mysql_pool.get_engine(self.database_url)
         self.logger = logging.getLogger(__name__)
+        self.prediction_writer = PredictionTrackingWriter(self.engine)
+        atexit.register(self.prediction_writer.close)
     
     def track_expert_decision(self, well_id, original_prediction, expert_correction, 
                             pathogen, confidence, features_used, user_id='expert'):
@@ -130,49 +319,26 @@ class MLValidationTracker:
     
     def track_model_prediction(self, well_id, pathogen, prediction, confidence, 
                              features_used, model_version, user_id='system'):
-        """Track ML model predictions for audit trail"""
-        with self.engine.connect() as conn:
-            try:
-                # Create table if it doesn't exist
-                conn.execute(text("""
-                    CREATE TABLE IF NOT EXISTS ml_prediction_tracking (
-                        id INT AUTO_INCREMENT PRIMARY KEY,
-                        performance_id INT,
-                        well_id VARCHAR(255),
-                        pathogen_code VARCHAR(255),
-                        ml_prediction VARCHAR(255),
-                        ml_confidence DECIMAL(5,3),
-                        model_version_used VARCHAR(255),
-                        feature_data TEXT,
-                        prediction_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        final_classification VARCHAR(255),
-                        INDEX idx_pathogen (pathogen_code),
-                        INDEX idx_timestamp (prediction_timestamp)
-                    )
-                """))
-                
-                conn.execute(text("""
-                    INSERT INTO ml_prediction_tracking 
-                    (performance_id, well_id, pathogen_code, ml_prediction, ml_confidence, 
-                     model_version_used, feature_data, final_classification)
-                    VALUES (:performance_id, :well_id, :pathogen_code, :ml_prediction, 
-                            :ml_confidence, :model_version_used, :feature_data, :final_classification)
-                """), {
-                    'performance_id': 1,  # using 1 as default
-                    'well_id': well_id,
-                    'pathogen_code': pathogen,
-                    'ml_prediction': prediction,
-                    'ml_confidence': confidence,
-                    'model_version_used': model_version,
-                    'feature_data': json.dumps(features_used),
-                    'final_classification': prediction
-                })
-                
-                conn.commit()
-                
-            except Exception as e:
-                self.logger.error(f"Error tracking prediction: {e}")
-                raise
+        """Track ML model predictions for audit trail (buffered, see PredictionTrackingWriter)"""
+        row = {
+            'performance_id': 1,  # using 1 as default
+            'well_id': well_id,
+            'pathogen_code': pathogen,
+            'ml_prediction': prediction,
+            'ml_confidence': confidence,
+            'model_version_used': model_version,
+            'feature_data': json.dumps(features_used),
+            'prediction_timestamp': datetime.now(),
+            'final_classification': prediction
+        }
+        if PREDICTION_ASYNC:
+            self.prediction_writer.submit(row)
+        else:
+            self.prediction_writer._write([row])
+
+    def flush_predictions(self):
+        """Write any buffered prediction rows now."""
+        self.prediction_writer.flush()
     
     def track_training_event(self, pathogen, training_samples, accuracy, 
                            model_version, trigger_reason, user_id='system'):
@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import json
+from curve_codec import CURVE_FIELDS, decode_curve_columns, encode_curve_columns
 
 db = SQLAlchemy()
 
@@ -62,6 +63,9 @@ class WellResult(db.Model):
     anomalies = db.Column(db.Text)  # JSON string
     raw_cycles = db.Column(db.Text)  # JSON string
     raw_rfu = db.Column(db.Text)  # JSON string
+    # Packed float32 raw_cycles/raw_rfu/fitted_curve (curve_codec); used instead of
+    # the three JSON columns above when QPCR_CURVE_STORAGE=packed
+    curve_data = db.Column(db.LargeBinary)
     cq_value = db.Column(db.Float)  # Integrated Cq value
     sample_name = db.Column(db.String(255))  # Integrated sample name
     # Per-channel threshold values (JSON string: {"FAM": 1500, "HEX": 1200, ...})
@@ -73,6 +77,15 @@ class WellResult(db.Model):
     calcj = db.Column(db.Text)  # JSON string: {"FAM": 1.2e5, "HEX": 9.8e3, ...}
     test_code = db.Column(db.String(50))  # Pathogen test code (e.g., 'Mgen', 'Ctrach', 'Ngon')
 
+    def set_curve_arrays(self, raw_cycles, raw_rfu, fitted_curve, dumps=json.dumps):
+        """Store the curve arrays packed or as JSON, depending on QPCR_CURVE_STORAGE"""
+        for column, value in encode_curve_columns(raw_cycles, raw_rfu, fitted_curve, dumps).items():
+            setattr(self, column, value)
+
+    def curve_arrays(self):
+        """raw_cycles, raw_rfu and fitted_curve as lists, whichever format the row uses"""
+        return decode_curve_columns({field: getattr(self, field) for field in CURVE_FIELDS}, self.curve_data)
+
     def to_dict(self):
         # Get fluorophore from dedicated column first
         fluorophore = self.fluorophore or 'Unknown'
@@ -106,6 +119,7 @@ class WellResult(db.Model):
                 return parsed if isinstance(parsed, dict) else {}
             except Exception:
                 return {}
+        curves = self.curve_arrays()
         return {
             'id': self.id,
             'session_id': self.session_id,
@@ -122,10 +136,10 @@ class WellResult(db.Model):
             'cycle_range': self.cycle_range,
             'fit_parameters': parse_json_object(self.fit_parameters),
             'parameter_errors': parse_json_object(self.parameter_errors),
-            'fitted_curve': parse_json_array(self.fitted_curve),
+            'fitted_curve': curves['fitted_curve'],
             'anomalies': parse_json_array(self.anomalies),
-            'raw_cycles': parse_json_array(self.raw_cycles),
-            'raw_rfu': parse_json_array(self.raw_rfu),
+            'raw_cycles': curves['raw_cycles'],
+            'raw_rfu': curves['raw_rfu'],
             'cq_value': self.cq_value,
             'sample_name': self.sample_name,
             'threshold_value': self.threshold_value,  # Legacy single-channel
@@ -138,7 +152,7 @@ class WellResult(db.Model):
     @classmethod
     def from_analysis_result(cls, session_id, well_id, analysis_result, raw_data):
         """Create WellResult from analysis output"""
-        return cls(
+        well_result = cls(
             session_id=session_id,
             well_id=well_id,
             is_good_scurve=analysis_result.get('is_good_scurve', False),
@@ -152,10 +166,7 @@ class WellResult(db.Model):
             cycle_range=analysis_result.get('cycle_range'),
             fit_parameters=json.dumps(analysis_result.get('fit_parameters', [])),
             parameter_errors=json.dumps(analysis_result.get('parameter_errors', [])),
-            fitted_curve=json.dumps(analysis_result.get('fitted_curve', [])),
             anomalies=json.dumps(analysis_result.get('anomalies', [])),
-            raw_cycles=json.dumps(raw_data.get('cycles', [])),
-            raw_rfu=json.dumps(raw_data.get('rfu', [])),
             cq_value=raw_data.get('cq'),
             sample_name=raw_data.get('sample_name'),
             curve_classification=json.dumps(analysis_result.get('curve_classification', {})),  # New field
@@ -164,6 +175,18 @@ class WellResult(db.Model):
             cqj=json.dumps(analysis_result.get('cqj', {})),
             calcj=json.dumps(analysis_result.get('calcj', {})),
         )
+        well_result.set_curve_arrays(raw_data.get('cycles', []), raw_data.get('rfu', []),
+                                     analysis_result.get('fitted_curve', []))
+        return well_result
+
+
+class SessionContentVersion(db.Model):
+    """Change counter per analysis session; keys cached /sessions/<id> responses (session_response_cache)"""
+    __tablename__ = 'session_content_versions'
+    
+    # No foreign key: a deleted session's row is harmless and needs no cleanup
+    session_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
 
 
 class ExperimentStatistics(db.Model):
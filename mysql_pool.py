@@ -0,0 +1,395 @@
+"""
+Process-wide pooled MySQL connections.
+
+Managers and endpoints used to open a fresh connection per call with
+mysql.connector.connect(**mysql_config), pymysql.connect(...) or a new
+SQLAlchemy create_engine(url). They now draw from shared pools instead:
+
+    conn = mysql_pool.connect(**mysql_config)          # mysql.connector
+    conn = mysql_pool.connect_pymysql(**mysql_config)  # pymysql
+    engine = mysql_pool.get_engine(database_url)       # SQLAlchemy
+
+connect()/connect_pymysql() return a proxy that behaves like the driver
+connection; close() (or leaving a ``with`` block) hands it back to the pool
+after rolling back any open transaction. One pool exists per distinct
+connection config, so callers keep passing the config from get_mysql_config().
+
+Sizing (shared by all pools, including the SQLAlchemy engines):
+    QPCR_DB_POOL_SIZE          idle connections kept per pool (default 10)
+    QPCR_DB_POOL_MAX_OVERFLOW  extra connections opened under load (default 20)
+    QPCR_DB_POOL_TIMEOUT       seconds to wait for a free connection (default 30)
+    QPCR_DB_POOL_PING_SECONDS  ping connections idle longer than this on checkout (default 30)
+    QPCR_DB_POOL_RECYCLE       replace connections older than this, in seconds (default 3600)
+"""
+
+import atexit
+import os
+import threading
+import time
+import weakref
+from collections import deque
+
+from log_utils import get_logger
+
+logger = get_logger("mysql_pool")
+
+POOL_SIZE = int(os.environ.get('QPCR_DB_POOL_SIZE', '10'))
+POOL_MAX_OVERFLOW = int(os.environ.get('QPCR_DB_POOL_MAX_OVERFLOW', '20'))
+POOL_TIMEOUT = float(os.environ.get('QPCR_DB_POOL_TIMEOUT', '30'))
+POOL_PING_SECONDS = float(os.environ.get('QPCR_DB_POOL_PING_SECONDS', '30'))
+POOL_RECYCLE = float(os.environ.get('QPCR_DB_POOL_RECYCLE', '3600'))
+
+
+class PoolTimeoutError(Exception):
+    """No connection became free within the pool timeout."""
+
+
+def _mysql_connector_connect(**kwargs):
+    import mysql.connector
+    return mysql.connector.connect(**kwargs)
+
+
+def _pymysql_connect(**kwargs):
+    import pymysql
+    return pymysql.connect(**kwargs)
+
+
+def _in_transaction(raw):
+    # mysql.connector tracks this locally; pymysql does not refresh its status
+    # flags after result sets, so any non-autocommit pymysql connection may hold
+    # an open transaction (and a stale REPEATABLE READ snapshot)
+    if hasattr(raw, 'in_transaction'):
+        return raw.in_transaction
+    return not raw.get_autocommit()
+
+
+def _ping(raw):
+    raw.ping(reconnect=False)
+
+
+def _reset(raw, autocommit, autocommit_changed):
+    """Make a returned connection safe for the next borrower."""
+    if getattr(raw, 'unread_result', False):
+        raw.consume_results()
+    if _in_transaction(raw):
+        raw.rollback()
+    if hasattr(raw, 'get_autocommit'):
+        # pymysql: autocommit() is a method and the current mode is known locally
+        if raw.get_autocommit() != autocommit:
+            raw.autocommit(autocommit)
+    elif autocommit_changed:
+        raw.autocommit = autocommit
+
+
+def _close_quietly(raw):
+    try:
+        raw.close()
+    except Exception:
+        pass
+
+
+class PooledConnection:
+    """Driver connection borrowed from a ConnectionPool; close() returns it."""
+
+    def __init__(self, pool, raw):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_raw', raw)
+        object.__setattr__(self, '_autocommit_changed', False)
+        # Connections dropped without close() still go back to the pool
+        finalizer = weakref.finalize(self, pool._checkin, raw, True, True)
+        finalizer.atexit = False
+        object.__setattr__(self, '_finalizer', finalizer)
+
+    def __getattr__(self, name):
+        raw = self._raw
+        if raw is None:
+            # Common cleanup idioms keep working after close()
+            if name == 'is_connected':
+                return lambda: False
+            if name == 'open':
+                return False
+            raise AttributeError(f"Connection already returned to the pool (accessing {name})")
+        return getattr(raw, name)
+
+    def __setattr__(self, name, value):
+        if name == 'autocommit':
+            object.__setattr__(self, '_autocommit_changed', True)
+        setattr(self._raw, name, value)
+
+    def close(self):
+        raw = self._raw
+        if raw is None:
+            return
+        self._finalizer.detach()
+        object.__setattr__(self, '_raw', None)
+        self._pool._checkin(raw, self._autocommit_changed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections for one connection config.
+
+    Keeps up to ``size`` idle connections and opens at most ``size + max_overflow``
+    at once; further checkouts wait up to ``timeout`` seconds. Connections idle
+    longer than ``ping_after`` are pinged before being handed out.
+    """
+
+    def __init__(self, connect_kwargs, connect_fn=_mysql_connector_connect, size=POOL_SIZE,
+                 max_overflow=POOL_MAX_OVERFLOW, timeout=POOL_TIMEOUT, ping_after=POOL_PING_SECONDS,
+                 recycle=POOL_RECYCLE, name=None):
+        self.connect_kwargs = dict(connect_kwargs)
+        self.connect_fn = connect_fn
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.recycle = recycle
+        self.name = name or self._describe(self.connect_kwargs)
+        self.autocommit = bool(self.connect_kwargs.get('autocommit', False))
+
+        self._idle = deque()  # (raw, created_at, returned_at)
+        self._created = {}    # id(raw) -> created_at, for every open connection
+        self._connecting = 0  # slots reserved by checkouts that are still connecting
+        self._cond = threading.Condition()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self.health_check_failures = 0
+        self.connects = 0
+        self.discarded = 0
+
+    @staticmethod
+    def _describe(kwargs):
+        return (f"{kwargs.get('user', '?')}@{kwargs.get('host', '?')}:"
+                f"{kwargs.get('port', 3306)}/{kwargs.get('database', kwargs.get('db', ''))}")
+
+    @property
+    def opened(self):
+        return len(self._created) + self._connecting
+
+    def checkout(self):
+        """Borrow a healthy connection, opening one if the pool allows it."""
+        deadline = None
+        while True:
+            with self._cond:
+                entry = None
+                if self._idle:
+                    entry = self._idle.pop()  # most recently used first
+                elif self.opened < self.size + self.max_overflow:
+                    self._connecting += 1  # reserve a slot while connecting
+                else:
+                    if deadline is None:
+                        deadline = time.monotonic() + self.timeout
+                        self.waits += 1
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {self.timeout}s waiting for a connection from pool {self.name} "
+                            f"({self.opened} open)")
+                    wait_started = time.monotonic()
+                    self._cond.wait(remaining)
+                    self.wait_seconds += time.monotonic() - wait_started
+                    continue
+
+            if entry is None:
+                return self._open_reserved()
+
+            raw, created_at, returned_at = entry
+            now = time.monotonic()
+            if self.recycle and now - created_at > self.recycle:
+                self._discard(raw)
+                continue
+            if now - returned_at > self.ping_after:
+                try:
+                    _ping(raw)
+                except Exception as e:
+                    self.health_check_failures += 1
+                    logger.warning(f"Discarding stale connection from pool {self.name}: {e}")
+                    self._discard(raw)
+                    continue
+            with self._cond:
+                self.checkouts += 1
+            return PooledConnection(self, raw)
+
+    def _open_reserved(self):
+        try:
+            raw = self.connect_fn(**self.connect_kwargs)
+        except Exception:
+            with self._cond:
+                self._connecting -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._connecting -= 1
+            self._created[id(raw)] = time.monotonic()
+            self.connects += 1
+            self.checkouts += 1
+        return PooledConnection(self, raw)
+
+    def _checkin(self, raw, autocommit_changed, abandoned=False):
+        try:
+            _reset(raw, self.autocommit, autocommit_changed)
+        except Exception as e:
+            logger.warning(f"Discarding connection that could not be reset ({self.name}): {e}")
+            self._discard(raw)
+            return
+        with self._cond:
+            if id(raw) not in self._created:
+                # Pool was disposed while this connection was out
+                _close_quietly(raw)
+                return
+            if len(self._idle) >= self.size:
+                del self._created[id(raw)]
+                self._cond.notify()
+                _close_quietly(raw)
+                return
+            self._idle.append((raw, self._created[id(raw)], time.monotonic()))
+            self._cond.notify()
+        if abandoned:
+            logger.debug(f"Connection returned to pool {self.name} by garbage collection")
+
+    def _discard(self, raw):
+        _close_quietly(raw)
+        with self._cond:
+            self._created.pop(id(raw), None)
+            self.discarded += 1
+            self._cond.notify()
+
+    def dispose(self, close=True):
+        """Drop every idle connection; connections in use are closed when returned."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._created.clear()
+            self._cond.notify_all()
+        if close:
+            for raw, _, _ in idle:
+                _close_quietly(raw)
+
+    def stats(self):
+        with self._cond:
+            opened = len(self._created)
+            return {
+                'name': self.name,
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': opened,
+                'in_use': opened - len(self._idle),
+                'idle': len(self._idle),
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'waits': self.waits,
+                'wait_seconds': round(self.wait_seconds, 3),
+                'timeouts': self.timeouts,
+                'health_check_failures': self.health_check_failures,
+                'discarded': self.discarded,
+            }
+
+
+_pools = {}
+_engines = {}
+_registry_lock = threading.Lock()
+
+
+def _pool_key(driver, kwargs):
+    return (driver,) + tuple(sorted((k, repr(v)) for k, v in kwargs.items()))
+
+
+def get_pool(connect_fn=_mysql_connector_connect, driver='mysql.connector', **connect_kwargs):
+    """Return the shared pool for this driver + connection config, creating it on first use."""
+    key = _pool_key(driver, connect_kwargs)
+    pool = _pools.get(key)
+    if pool is None:
+        with _registry_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(connect_kwargs, connect_fn=connect_fn)
+                _pools[key] = pool
+                logger.info(f"MySQL pool created | driver={driver} | {pool.name} | "
+                            f"size={pool.size} | max_overflow={pool.max_overflow}")
+    return pool
+
+
+def connect(**connect_kwargs):
+    """Pooled drop-in for mysql.connector.connect(**config)."""
+    return get_pool(_mysql_connector_connect, 'mysql.connector', **connect_kwargs).checkout()
+
+
+def connect_pymysql(**connect_kwargs):
+    """Pooled drop-in for pymysql.connect(**config)."""
+    return get_pool(_pymysql_connect, 'pymysql', **connect_kwargs).checkout()
+
+
+def get_engine(database_url, **engine_kwargs):
+    """Shared SQLAlchemy engine per URL, sized like the connector pools."""
+    key = (database_url,) + tuple(sorted((k, repr(v)) for k, v in engine_kwargs.items()))
+    engine = _engines.get(key)
+    if engine is None:
+        with _registry_lock:
+            engine = _engines.get(key)
+            if engine is None:
+                from sqlalchemy import create_engine
+                options = {
+                    'pool_size': POOL_SIZE,
+                    'max_overflow': POOL_MAX_OVERFLOW,
+                    'pool_timeout': POOL_TIMEOUT,
+                    'pool_recycle': int(POOL_RECYCLE),
+                    'pool_pre_ping': True,
+                }
+                options.update(engine_kwargs)
+                engine = create_engine(database_url, **options)
+                _engines[key] = engine
+    return engine
+
+
+def pool_stats():
+    """Snapshot of every shared pool for /health and monitoring."""
+    with _registry_lock:
+        pools = list(_pools.items())
+        engines = list(_engines.values())
+    stats = {'pools': [], 'engines': []}
+    for key, pool in pools:
+        entry = pool.stats()
+        entry['driver'] = key[0]
+        stats['pools'].append(entry)
+    for engine in engines:
+        pool = engine.pool
+        entry = {'name': repr(engine.url), 'status': pool.status()}
+        for attr in ('size', 'checkedout', 'checkedin', 'overflow'):
+            if hasattr(pool, attr):
+                entry['in_use' if attr == 'checkedout' else attr] = getattr(pool, attr)()
+        stats['engines'].append(entry)
+    return stats
+
+
+def dispose_all():
+    """Close every pooled connection (registered with atexit)."""
+    with _registry_lock:
+        pools = list(_pools.values())
+        engines = list(_engines.values())
+    for pool in pools:
+        pool.dispose()
+    for engine in engines:
+        engine.dispose()
+
+
+def _after_fork_in_child():
+    # Sockets inherited from the parent must not be reused by a forked worker
+    for pool in list(_pools.values()):
+        pool.dispose(close=False)
+    for engine in list(_engines.values()):
+        engine.dispose(close=False)
+
+
+atexit.register(dispose_all)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -10,6 +10,7 @@ Covers
 - ml_expert_decisions: creates if missing; adds commonly referenced columns (is_correction, feedback_context, ml_prediction, expert_decision, feedback_timestamp, fluorophore, sample_name, expert_user, decision_reason, improvement_score, teaching_outcome).
 - ml_prediction_tracking: creates if missing.
 - ml_model_versions, ml_model_performance: delegates to initialize_mysql_tables if available.
+- well_results: adds the curve_data BLOB used by QPCR_CURVE_STORAGE=packed.
 
 Notes
 - Uses MySQL 8.0 ADD COLUMN IF NOT EXISTS to be idempotent.
@@ -164,6 +165,21 @@ def ensure_model_version_tables(cursor):
     """)
 
 
+def ensure_well_curve_storage(cursor):
+    # Packed curve arrays (see curve_codec.py); only once well_results exists
+    if not _exec(cursor, """
+        SELECT
+            SUM(TABLE_NAME = 'well_results'),
+            SUM(TABLE_NAME = 'well_results' AND COLUMN_NAME = 'curve_data')
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE();
+    """):
+        return
+    table_exists, column_exists = cursor.fetchone()
+    if table_exists and not column_exists:
+        _exec(cursor, "ALTER TABLE well_results ADD COLUMN curve_data BLOB NULL;")
+
+
 def ensure_mysql_schema(verbose: bool = False):
     conn = _connect()
     if not conn:
@@ -175,6 +191,7 @@ def ensure_mysql_schema(verbose: bool = False):
         ensure_model_version_tables(cur)
         ensure_ml_prediction_tracking(cur)
         ensure_ml_expert_decisions(cur)
+        ensure_well_curve_storage(cur)
         try:
             conn.commit()
         except Exception:
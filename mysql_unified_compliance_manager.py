@@ -4,7 +4,7 @@ Tracks only compliance requirements that can be satisfied by running the qPCR an
 Focus on auto-trackable requirements that demonstrate real software validation
 """
 
-import mysql.connector
+import mysql_pool
 import json
 import hashlib
 import datetime
@@ -12,6 +12,90 @@ from typing import Dict, List, Optional, Any, Tuple
 import logging
 from software_compliance_requirements import SOFTWARE_TRACKABLE_REQUIREMENTS
 
+
+def evidence_dedup_key(requirement_id: str, event_data: dict, evidence_hash: str) -> str:
+    """
+    Value of compliance_evidence.dedup_key (UNIQUE): analysis evidence counts once
+    per requirement + file + fluorophore, anything else once per evidence hash.
+    """
+    if event_data.get('filename') and event_data.get('fluorophore'):
+        parts = ['file', requirement_id, event_data['filename'], event_data['fluorophore']]
+    else:
+        parts = ['hash', requirement_id, evidence_hash]
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def ensure_evidence_dedup_key(conn, logger=None) -> bool:
+    """
+    Add compliance_evidence.dedup_key (with its UNIQUE key) to tables created
+    before it existed. Returns True if it did.
+
+    Existing rows are keyed by migrate_evidence_dedup_keys.py, which resumes
+    from the rows still without a key, so an interrupted backfill is finished
+    by running it again.
+    """
+    logger = logger or logging.getLogger(__name__)
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'compliance_evidence' AND COLUMN_NAME = 'dedup_key'
+        ''')
+        if cursor.fetchone()[0]:
+            return False
+        cursor.execute('''
+            ALTER TABLE compliance_evidence
+            ADD COLUMN dedup_key CHAR(64) NULL,
+            ADD UNIQUE KEY uq_evidence_dedup (dedup_key)
+        ''')
+        conn.commit()
+        logger.warning("Added compliance_evidence.dedup_key; run migrate_evidence_dedup_keys.py to key existing rows")
+        return True
+    finally:
+        cursor.close()
+
+
+def backfill_evidence_dedup_keys(conn, batch_size: int = 1000, logger=None) -> Tuple[int, int]:
+    """
+    Fill dedup_key for compliance_evidence rows written before the column existed.
+    The oldest row of each duplicate group gets the key; later duplicates stay NULL.
+
+    Returns (rows_keyed, duplicates_left_null).
+    """
+    logger = logger or logging.getLogger(__name__)
+    cursor = conn.cursor()
+    keyed = duplicates = 0
+    last_id = 0
+    try:
+        while True:
+            cursor.execute('''
+                SELECT id, requirement_id, evidence_data, evidence_hash FROM compliance_evidence
+                WHERE id > %s AND dedup_key IS NULL ORDER BY id LIMIT %s
+            ''', (last_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            for evidence_id, requirement_id, evidence_data, evidence_hash in rows:
+                try:
+                    event_data = json.loads(evidence_data) if isinstance(evidence_data, (str, bytes)) else (evidence_data or {})
+                except ValueError:
+                    event_data = {}
+                if not isinstance(event_data, dict):
+                    event_data = {}
+                # UPDATE IGNORE leaves a duplicate NULL instead of failing on the unique key
+                cursor.execute('UPDATE IGNORE compliance_evidence SET dedup_key = %s WHERE id = %s',
+                               (evidence_dedup_key(requirement_id, event_data, evidence_hash), evidence_id))
+                if cursor.rowcount:
+                    keyed += 1
+                else:
+                    duplicates += 1
+            conn.commit()
+            last_id = rows[-1][0]
+            logger.info(f"Evidence dedup backfill: {keyed} keyed, {duplicates} duplicates (through id {last_id})")
+    finally:
+        cursor.close()
+    return keyed, duplicates
+
 class MySQLUnifiedComplianceManager:
     def __init__(self, mysql_config: dict):
         """
@@ -74,7 +158,7 @@ class MySQLUnifiedComplianceManager:
         config = self.mysql_config.copy()
         if 'charset' not in config:
             config['charset'] = 'utf8mb4'
-        return mysql.connector.connect(**config)
+        return mysql_pool.connect(**config)
 
     def initialize_tables(self):
         """Create MySQL tables for unified compliance tracking"""
@@ -141,12 +225,15 @@ class MySQLUnifiedComplianceManager:
                         created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                         validated_at DATETIME NULL,
                         validator_id VARCHAR(100),
+                        dedup_key CHAR(64) NULL,
                         INDEX idx_requirement_id (requirement_id),
                         INDEX idx_event_id (event_id),
                         INDEX idx_evidence_type (evidence_type),
-                        INDEX idx_validation_status (validation_status)
+                        INDEX idx_validation_status (validation_status),
+                        UNIQUE KEY uq_evidence_dedup (dedup_key)
                     )
                 ''')
+                ensure_evidence_dedup_key(conn, logger=self.logger)
                 
                 # Add foreign key constraint separately to handle dependency issues
                 try:
@@ -258,36 +345,10 @@ class MySQLUnifiedComplianceManager:
 
     def log_compliance_event(self, event_type: str, event_data: dict, user_id: str = 'system', session_id: str = None):
         """Log a compliance-relevant event"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # Create compliance hash for integrity
-            event_str = f"{event_type}:{json.dumps(event_data, sort_keys=True)}:{user_id}:{datetime.datetime.now().isoformat()}"
-            compliance_hash = hashlib.sha256(event_str.encode()).hexdigest()
-            
-            cursor.execute('''
-                INSERT INTO unified_compliance_events 
-                (event_type, event_data, user_id, session_id, compliance_hash)
-                VALUES (%s, %s, %s, %s, %s)
-            ''', (event_type, json.dumps(event_data), user_id, session_id, compliance_hash))
-            
-            event_id = cursor.lastrowid
-            conn.commit()
-            
-            # Process compliance requirements triggered by this event
-            self._process_compliance_requirements(event_type, event_data, event_id)
-            
-            self.logger.info(f"Logged compliance event: {event_type} for user {user_id}")
-            return event_id
-            
-        except Exception as e:
-            self.logger.error(f"Error logging compliance event: {e}")
-            conn.rollback()
-            raise
-        finally:
-            cursor.close()
-            conn.close()
+        event = {'event_type': event_type, 'event_data': event_data, 'user_id': user_id, 'session_id': session_id}
+        event_id = self.track_compliance_events([event])[0]
+        self.logger.info(f"Logged compliance event: {event_type} for user {user_id}")
+        return event_id
 
     def track_compliance_event(self, event_type: str, event_data: dict, user_id: str = 'system', session_id: str = None):
         """
@@ -296,132 +357,143 @@ class MySQLUnifiedComplianceManager:
         """
         return self.log_compliance_event(event_type, event_data, user_id, session_id)
 
-    def _process_compliance_requirements(self, event_type: str, event_data: dict, event_id: int):
-        """Process compliance requirements triggered by an event"""
-        if event_type not in self.event_to_requirements_map:
-            return
-        
-        triggered_requirements = self.event_to_requirements_map[event_type]
-        
-        for requirement_id in triggered_requirements:
-            if requirement_id in self.compliance_requirements:
-                self._update_requirement_status(requirement_id, event_data, event_id)
-                self._create_compliance_evidence(requirement_id, event_id, event_data)
+    def track_compliance_events(self, events: List[dict]) -> List[int]:
+        """
+        Log a batch of events in one transaction on one connection: a multi-row
+        INSERT for the events, one for their new evidence, and one aggregated
+        evidence_count update per triggered requirement.
 
-    def _update_requirement_status(self, requirement_id: str, event_data: dict, event_id: int):
-        """Update compliance requirement status"""
+        events: [{'event_type': str, 'event_data': dict, 'user_id': str, 'session_id': str}, ...]
+        Returns the new event ids, in order. Raises (after rollback) if the batch fails.
+        """
+        if not events:
+            return []
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            # Check if requirement tracking record exists
-            cursor.execute('''
-                SELECT id, evidence_count, compliance_status 
-                FROM compliance_requirements_tracking 
-                WHERE requirement_id = %s
-            ''', (requirement_id,))
-            
-            result = cursor.fetchone()
-            requirement_spec = self.compliance_requirements[requirement_id]
-            
-            if result:
-                # Update existing record
-                tracking_id, evidence_count, current_status = result
-                new_evidence_count = evidence_count + 1
-                
-                # Calculate compliance percentage based on evidence
-                compliance_percentage = min(100.0, (new_evidence_count / 10) * 100)  # Simple calculation
-                
-                # Update status based on evidence
-                new_status = 'in_progress' if compliance_percentage < 100 else 'completed'
-                
-                cursor.execute('''
-                    UPDATE compliance_requirements_tracking 
-                    SET evidence_count = %s, compliance_percentage = %s, 
-                        compliance_status = %s, last_evidence_timestamp = %s,
-                        updated_at = %s
-                    WHERE id = %s
-                ''', (new_evidence_count, compliance_percentage, new_status, 
-                         datetime.datetime.now(), datetime.datetime.now(), tracking_id))
-                
-            else:
-                # Create new tracking record
-                cursor.execute('''
-                    INSERT INTO compliance_requirements_tracking 
-                    (requirement_id, requirement_category, evidence_count, 
-                     compliance_percentage, compliance_status, last_evidence_timestamp,
-                     validation_criteria)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                ''', (requirement_id, requirement_spec['category'], 1, 10.0, 'in_progress',
-                      datetime.datetime.now(), json.dumps(requirement_spec.get('validation_criteria', {}))))
-            
+            rows = []
+            for event in events:
+                event_type = event['event_type']
+                event_data = event.get('event_data') or {}
+                user_id = event.get('user_id') or 'system'
+                # Create compliance hash for integrity
+                event_str = f"{event_type}:{json.dumps(event_data, sort_keys=True)}:{user_id}:{datetime.datetime.now().isoformat()}"
+                compliance_hash = hashlib.sha256(event_str.encode()).hexdigest()
+                rows.append((event_type, json.dumps(event_data), user_id, event.get('session_id'), compliance_hash))
+            
+            cursor.execute(f'''
+                INSERT INTO unified_compliance_events 
+                (event_type, event_data, user_id, session_id, compliance_hash)
+                VALUES {', '.join(['(%s, %s, %s, %s, %s)'] * len(rows))}
+            ''', [value for row in rows for value in row])
+            event_ids = self._inserted_event_ids(cursor, cursor.lastrowid, [row[4] for row in rows])
+            
+            # Process compliance requirements triggered by these events
+            counts = {}
+            evidence = []
+            for event, event_id in zip(events, event_ids):
+                event_data = event.get('event_data') or {}
+                for requirement_id in self.event_to_requirements_map.get(event['event_type'], []):
+                    if requirement_id in self.compliance_requirements:
+                        counts[requirement_id] = counts.get(requirement_id, 0) + 1
+                        evidence.append(self._evidence_row(requirement_id, event_id, event_data))
+            
+            self._apply_requirement_counts(cursor, counts)
+            self._insert_new_evidence(cursor, evidence)
             conn.commit()
+            self.logger.debug(f"Logged {len(rows)} compliance events, {len(counts)} requirements touched")
+            return event_ids
             
         except Exception as e:
-            self.logger.error(f"Error updating requirement status: {e}")
+            self.logger.error(f"Error logging compliance events: {e}")
             conn.rollback()
+            raise
         finally:
             cursor.close()
             conn.close()
 
-    def _create_compliance_evidence(self, requirement_id: str, event_id: int, event_data: dict):
-        """Create compliance evidence record with smart deduplication"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def _inserted_event_ids(self, cursor, first_id: int, hashes: List[str]) -> List[int]:
+        """Ids of the rows of one multi-row INSERT, matched back to the rows by compliance hash"""
+        # Ids within one statement increase in row order but need not be consecutive
+        distinct = sorted(set(hashes))
+        cursor.execute(f'''
+            SELECT id, compliance_hash FROM unified_compliance_events
+            WHERE id >= %s AND compliance_hash IN ({', '.join(['%s'] * len(distinct))})
+            ORDER BY id
+        ''', [first_id] + distinct)
+        ids_by_hash = {}
+        for event_id, compliance_hash in cursor.fetchall():
+            ids_by_hash.setdefault(compliance_hash, []).append(event_id)
+        return [ids_by_hash[compliance_hash].pop(0) for compliance_hash in hashes]
+
+    def _evidence_row(self, requirement_id: str, event_id: int, event_data: dict) -> tuple:
+        """Evidence record for one triggered requirement, with its deduplication key"""
+        requirement_spec = self.compliance_requirements[requirement_id]
+        evidence_type = requirement_spec['evidence_types'][0] if requirement_spec['evidence_types'] else 'general_evidence'
         
-        try:
-            requirement_spec = self.compliance_requirements[requirement_id]
-            evidence_type = requirement_spec['evidence_types'][0] if requirement_spec['evidence_types'] else 'general_evidence'
-            
-            # Create evidence hash for deduplication
-            evidence_str = f"{requirement_id}:{event_id}:{json.dumps(event_data, sort_keys=True)}"
-            evidence_hash = hashlib.sha256(evidence_str.encode()).hexdigest()
-            
-            # Smart deduplication: for analysis events, check for same file + fluorophore
-            if event_data.get('filename') and event_data.get('fluorophore'):
-                # Check if we already have evidence for this file + fluorophore combination
-                cursor.execute('''
-                    SELECT COUNT(*) FROM compliance_evidence ce
-                    JOIN unified_compliance_events uce ON ce.event_id = uce.id
-                    WHERE ce.requirement_id = %s 
-                    AND JSON_EXTRACT(uce.event_data, '$.filename') = %s
-                    AND JSON_EXTRACT(uce.event_data, '$.fluorophore') = %s
-                ''', (requirement_id, event_data['filename'], event_data['fluorophore']))
-                
-                existing_file_count = cursor.fetchone()[0]
-                
-                if existing_file_count > 0:
-                    self.logger.debug(f"Evidence already exists for {requirement_id} with file {event_data['filename']} + {event_data['fluorophore']}")
-                    return  # Skip duplicate file analysis
-            else:
-                # Fallback to hash-based deduplication for non-analysis events
-                cursor.execute('''
-                    SELECT COUNT(*) FROM compliance_evidence 
-                    WHERE requirement_id = %s AND evidence_hash = %s
-                ''', (requirement_id, evidence_hash))
-                
-                existing_count = cursor.fetchone()[0]
-                
-                if existing_count > 0:
-                    self.logger.debug(f"Evidence already exists for {requirement_id} with hash {evidence_hash[:16]}...")
-                    return  # Skip duplicate evidence
-            
-            # Insert new evidence record
-            cursor.execute('''
-                INSERT INTO compliance_evidence 
-                (requirement_id, event_id, evidence_type, evidence_data, evidence_hash)
-                VALUES (%s, %s, %s, %s, %s)
-            ''', (requirement_id, event_id, evidence_type, json.dumps(event_data), evidence_hash))
-            
-            conn.commit()
-            self.logger.debug(f"Created new evidence for {requirement_id}")
-            
-        except Exception as e:
-            self.logger.error(f"Error creating compliance evidence: {e}")
-            conn.rollback()
-        finally:
-            cursor.close()
-            conn.close()
+        # Create evidence hash for deduplication
+        evidence_str = f"{requirement_id}:{event_id}:{json.dumps(event_data, sort_keys=True)}"
+        evidence_hash = hashlib.sha256(evidence_str.encode()).hexdigest()
+        
+        # Smart deduplication: analysis events count once per file + fluorophore,
+        # everything else falls back to the evidence hash (enforced by uq_evidence_dedup)
+        dedup_key = evidence_dedup_key(requirement_id, event_data, evidence_hash)
+        return (requirement_id, event_id, evidence_type, json.dumps(event_data), evidence_hash, dedup_key)
+
+    def _insert_new_evidence(self, cursor, evidence: List[tuple]):
+        """Insert evidence rows; rows whose dedup_key is already on record (or repeated) are skipped"""
+        if not evidence:
+            return
+        cursor.execute(f'''
+            INSERT INTO compliance_evidence 
+            (requirement_id, event_id, evidence_type, evidence_data, evidence_hash, dedup_key)
+            VALUES {', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(evidence))}
+            ON DUPLICATE KEY UPDATE id = id
+        ''', [value for row in evidence for value in row])
+        self.logger.debug(f"Offered {len(evidence)} evidence records, {cursor.rowcount} new")
+
+    def _apply_requirement_counts(self, cursor, counts: Dict[str, int]):
+        """Add per-requirement evidence counts from a batch and refresh percentage/status"""
+        if not counts:
+            return
+        now = datetime.datetime.now()
+        requirement_ids = list(counts)
+        cursor.execute(f'''
+            SELECT DISTINCT requirement_id FROM compliance_requirements_tracking
+            WHERE requirement_id IN ({', '.join(['%s'] * len(requirement_ids))})
+        ''', requirement_ids)
+        existing = [row[0] for row in cursor.fetchall()]
+        
+        if existing:
+            # MySQL applies SET assignments left to right, so percentage and status
+            # see the incremented evidence_count (10 pieces of evidence = 100%)
+            cursor.execute(f'''
+                UPDATE compliance_requirements_tracking 
+                SET evidence_count = evidence_count + CASE requirement_id
+                        {' '.join(['WHEN %s THEN %s'] * len(existing))} ELSE 0 END,
+                    compliance_percentage = LEAST(100.0, evidence_count * 10),
+                    compliance_status = IF(evidence_count * 10 < 100, 'in_progress', 'completed'),
+                    last_evidence_timestamp = %s, updated_at = %s
+                WHERE requirement_id IN ({', '.join(['%s'] * len(existing))})
+            ''', [value for rid in existing for value in (rid, counts[rid])] + [now, now] + existing)
+        
+        missing = [rid for rid in requirement_ids if rid not in set(existing)]
+        if missing:
+            # Create new tracking records
+            rows = []
+            for rid in missing:
+                percentage = min(100.0, counts[rid] * 10.0)
+                rows.append((rid, self.compliance_requirements[rid]['category'], counts[rid], percentage,
+                             'in_progress' if percentage < 100 else 'completed', now,
+                             json.dumps(self.compliance_requirements[rid].get('validation_criteria', {}))))
+            cursor.execute(f'''
+                INSERT INTO compliance_requirements_tracking 
+                (requirement_id, requirement_category, evidence_count, 
+                 compliance_percentage, compliance_status, last_evidence_timestamp,
+                 validation_criteria)
+                VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(rows))}
+            ''', [value for row in rows for value in row])
 
     def validate_system_compliance(self) -> Dict[str, Any]:
         """Run lightweight system validation and return a structured summary used by the dashboard.
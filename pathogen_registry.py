@@ -0,0 +1,183 @@
+"""
+Compiled pathogen metadata: fixed thresholds, target names, H/M/L control
+concentrations and the PATHOGEN_LIBRARY from static/pathogen_library.js.
+
+These used to be rebuilt or re-read where they were used: the threshold
+table was built per well, the target mapping per lookup, the control
+concentrations were loaded separately by config_loader, and the JS library
+was regex-parsed on demand. Now:
+
+    - PathogenRegistry compiles every source once into read-only dicts keyed
+      by (test_code, normalized channel), so a lookup is one dict access.
+      Channel aliases (TexasRed, CY5) resolve to the same key as
+      'Texas Red' and 'Cy5'.
+    - get_registry() returns the current registry and recompiles it when
+      config/concentration_controls.json or static/pathogen_library.js has a
+      new mtime. Mtimes are checked at most every
+      QPCR_PATHOGEN_REGISTRY_CHECK_SECONDS (default 2).
+    - get_fixed_threshold, get_pathogen_target, get_control_concentrations
+      and get_pathogen_library are the lookups used by the analyzer, CalcJ,
+      threshold recalculation and the ML config.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from types import MappingProxyType
+
+from config_loader import CONTROLS_PATH, load_concentration_controls
+from log_utils import get_logger
+from pathogen_targets import get_pathogen_mapping
+
+logger = get_logger("pathogen_registry")
+
+PATHOGEN_LIBRARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'pathogen_library.js')
+CHECK_SECONDS = float(os.environ.get('QPCR_PATHOGEN_REGISTRY_CHECK_SECONDS', '2'))
+
+CHANNEL_ALIASES = {'TexasRed': 'Texas Red', 'CY5': 'Cy5'}
+
+# Pathogen-specific fixed threshold values in RFU (matching threshold_strategies.js)
+PATHOGEN_FIXED_THRESHOLDS = {
+    "BVAB": {
+        "FAM": 250, "HEX": 250, "Cy5": 250
+    },
+    "BVPanelPCR1": {
+        "FAM": 200, "HEX": 250, "Texas Red": 150, "Cy5": 200
+    },
+    "BVPanelPCR2": {
+        "FAM": 350, "HEX": 350, "Texas Red": 200, "Cy5": 350
+    },
+    "BVPanelPCR3": {
+        "CY5": 100, "Cy5": 100, "FAM": 100, "HEX": 100, "Texas Red": 100
+    },
+    "Calb": { "HEX": 150 },
+    "Cglab": { "FAM": 150 },
+    "CHVIC": { "FAM": 250 },
+    "Ckru": { "FAM": 280 },
+    "Cpara": { "FAM": 200 },
+    "Ctrach": { "FAM": 150 },
+    "Ctrop": { "FAM": 200 },
+    "Efaecalis": { "FAM": 200 },
+    "FLUA": { "FAM": 265 },
+    "FLUB": { "Cy5": 225 },
+    "GBS": { "FAM": 300 },
+    "Lacto": { "FAM": 150 },
+    "Mgen": { "FAM": 500 },
+    "Ngon": { "HEX": 200 },
+    "NOV": { "FAM": 500 },
+    "Saureus": { "FAM": 250 },
+    "Tvag": { "FAM": 250 }
+}
+
+_NO_CONTROLS = MappingProxyType({})
+
+
+def normalize_channel(channel):
+    """Canonical channel name ('TexasRed' -> 'Texas Red', 'CY5' -> 'Cy5')"""
+    return CHANNEL_ALIASES.get(channel, channel)
+
+
+def parse_pathogen_library(js_path):
+    """Load the PATHOGEN_LIBRARY object from a JS file by stripping comments and JSON-parsing (None if unreadable)."""
+    try:
+        if not js_path or not os.path.exists(js_path):
+            return None
+        with open(js_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        # Remove /* ... */ block comments
+        content = re.sub(r"/\*.*?\*/", "", content, flags=re.DOTALL)
+        # Remove // line comments (not robust for // inside strings; acceptable for our file)
+        content = re.sub(r"(^|\s)//.*$", "", content, flags=re.MULTILINE)
+
+        # Extract the object literal assigned to PATHOGEN_LIBRARY
+        m = re.search(r"const\s+PATHOGEN_LIBRARY\s*=\s*({[\s\S]*?});", content)
+        if not m:
+            return None
+
+        # JSON parse (keys/values are already quoted in our JS)
+        data = json.loads(m.group(1))
+        return {str(k): v for k, v in data.items()}
+    except Exception as e:
+        logger.debug(f"PATHOGEN_LIBRARY parse error: {e}")
+        return None
+
+
+def _index(nested, convert=None):
+    """{test_code: {channel: value}} -> read-only {(test_code, normalized channel): value}"""
+    index = {}
+    for test_code, channels in nested.items():
+        if not isinstance(channels, dict):
+            continue
+        for channel, value in channels.items():
+            index.setdefault((test_code, normalize_channel(channel)), convert(value) if convert else value)
+    return MappingProxyType(index)
+
+
+class PathogenRegistry:
+    """Read-only pathogen metadata compiled from every source at one point in time."""
+
+    def __init__(self, controls, library, mtimes=None):
+        self.thresholds = _index(PATHOGEN_FIXED_THRESHOLDS, float)
+        self.targets = _index(get_pathogen_mapping())
+        self.controls = _index(controls, lambda values: MappingProxyType(dict(values)))
+        self.library = MappingProxyType({test_code: MappingProxyType(dict(channels))
+                                         for test_code, channels in (library or {}).items()
+                                         if isinstance(channels, dict)})
+        self.mtimes = mtimes  # (controls, library) file mtimes this registry was compiled from
+
+
+_registry = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_registry():
+    """Current PathogenRegistry, recompiled when a source file has changed on disk."""
+    global _registry, _checked_at
+    registry = _registry
+    if registry is not None and time.monotonic() - _checked_at < CHECK_SECONDS:
+        return registry
+    with _lock:
+        if _registry is not None and time.monotonic() - _checked_at < CHECK_SECONDS:
+            return _registry
+        # Mtimes before reading: a write during the load just triggers another reload
+        mtimes = (_mtime(CONTROLS_PATH), _mtime(PATHOGEN_LIBRARY_PATH))
+        if _registry is None or mtimes != _registry.mtimes:
+            _registry = PathogenRegistry(load_concentration_controls(CONTROLS_PATH),
+                                         parse_pathogen_library(PATHOGEN_LIBRARY_PATH), mtimes)
+            logger.info(f"Pathogen registry compiled: {len(_registry.thresholds)} thresholds, "
+                        f"{len(_registry.targets)} targets, {len(_registry.controls)} control sets, "
+                        f"{len(_registry.library)} library tests")
+        _checked_at = time.monotonic()
+        return _registry
+
+
+def get_fixed_threshold(test_code, channel):
+    """Fixed threshold in RFU for a test/channel, or None if not defined"""
+    return get_registry().thresholds.get((test_code, normalize_channel(channel)))
+
+
+def get_pathogen_target(test_code, fluorophore):
+    """Get pathogen target for a given test code and fluorophore"""
+    # Fallback to fluorophore name if no mapping found
+    return get_registry().targets.get((test_code, normalize_channel(fluorophore)), fluorophore)
+
+
+def get_control_concentrations(test_code, channel):
+    """Read-only {'H': conc, 'M': conc, 'L': conc} for a test/channel (empty if not configured)"""
+    return get_registry().controls.get((test_code, normalize_channel(channel)), _NO_CONTROLS)
+
+
+def get_pathogen_library():
+    """Read-only PATHOGEN_LIBRARY from static/pathogen_library.js: {test_code: {channel: target}}"""
+    return get_registry().library
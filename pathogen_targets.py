@@ -0,0 +1,101 @@
+"""
+Pathogen target names per test code and channel.
+
+Lives outside app.py so the analyzer (batch_analyze_wells) can label wells
+without importing the Flask app and its MySQL setup. Lookups go through the
+indexed copy compiled by pathogen_registry.
+"""
+
+
+def get_pathogen_mapping():
+    """Centralized pathogen mapping that matches pathogen_library.js"""
+    return {
+        "Lacto": {
+            "Cy5": "Lactobacillus jenseni",
+            "FAM": "Lactobacillus gasseri", 
+            "HEX": "Lactobacillus iners",
+            "Texas Red": "Lactobacillus crispatus"
+        },
+        "Calb": {
+            "HEX": "Candida albicans"
+        },
+        "Ctrach": {
+            "FAM": "Chlamydia trachomatis"
+        },
+        "Ngon": {
+            "HEX": "Neisseria gonhorrea"
+        },
+        "Tvag": {
+            "FAM": "Trichomonas vaginalis"
+        },
+        "Cglab": {
+            "FAM": "Candida glabrata"
+        },
+        "Cpara": {
+            "FAM": "Candida parapsilosis"
+        },
+        "Ctrop": {
+            "FAM": "Candida tropicalis"
+        },
+        "Gvag": {
+            "FAM": "Gardnerella vaginalis"
+        },
+        "BVAB2": {
+            "FAM": "BVAB2"
+        },
+        "CHVIC": {
+            "FAM": "CHVIC"
+        },
+        "AtopVag": {
+            "FAM": "Atopobium vaginae"
+        },
+        "Megasphaera": {
+            "FAM": "Megasphaera1",
+            "HEX": "Megasphaera2"
+        },
+        "BVPanelPCR1": {
+            "FAM": "Bacteroides fragilis",
+            "HEX": "Mobiluncus curtisii",
+            "Texas Red": "Streptococcus anginosus",
+            "Cy5": "Sneathia sanguinegens"
+        },
+        "BVPanelPCR2": {
+            "FAM": "Atopobium vaginae",
+            "HEX": "Mobiluncus mulieris",
+            "Texas Red": "Megasphaera type 2",
+            "Cy5": "Megasphaera type 1"
+        },
+        "BVPanelPCR3": {
+            "FAM": "Gardnerella vaginalis",
+            "HEX": "Lactobacillus acidophilus",
+            "Texas Red": "Prevotella bivia",
+            "Cy5": "Bifidobacterium breve"
+        },
+        "BVPanelPCR4": {
+            "FAM": "Gardnerella vaginalis",
+            "HEX": "Lactobacillus acidophilus",
+            "Texas Red": "Prevotella bivia",
+            "Cy5": "Bifidobacterium breve"
+        },
+        "BVAB": {
+            "FAM": "BVAB2",
+            "HEX": "BVAB1", 
+            "Cy5": "BVAB3"
+        },
+        "Mgen": {
+            "FAM": "Mycoplasma genitalium"
+        },
+        "Upar": {
+            "FAM": "Ureaplasma parvum"
+        },
+        "Uure": {
+            "FAM": "Ureaplasma urealyticum"
+        }
+        # Add more mappings as needed from pathogen_library.js
+    }
+
+
+def get_pathogen_target(test_code, fluorophore):
+    """Get pathogen target for a given test code and fluorophore (compiled lookup in pathogen_registry)"""
+    from pathogen_registry import get_pathogen_target as registry_target
+    return registry_target(test_code, fluorophore)
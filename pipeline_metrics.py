@@ -0,0 +1,172 @@
+"""
+Stage timing for the analysis pipeline.
+
+Code wraps a stage in ``with span('sigmoid_fit'):`` (or decorates it with
+``@timed('ml_prediction')``) and the elapsed time lands in a per-process
+histogram, labelled with the stage and a scope: 'request' for stages that run
+once per /analyze call, 'well' for stages that run once per well. /metrics
+renders all histograms in Prometheus text format.
+
+Spans inside an active request (begin_request()/end_request()) also add up
+per stage for that request, which /analyze can return in an
+X-Analysis-Timing header. Work handed to worker processes is timed in those
+processes and does not show up here.
+
+Configuration:
+    QPCR_METRICS_ENABLED   0 turns all spans into no-ops (default 1)
+    QPCR_TIMING_HEADER     1 always sends X-Analysis-Timing; otherwise only when
+                           the request carries an X-Analysis-Timing header (default 0)
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+METRICS_ENABLED = os.environ.get('QPCR_METRICS_ENABLED', '1') != '0'
+TIMING_HEADER = os.environ.get('QPCR_TIMING_HEADER', '0') == '1'
+
+# Seconds; per-well stages sit at the low end, whole requests at the high end
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_request_timings = ContextVar('qpcr_request_timings', default=None)
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            running += count
+            yield bound, running
+
+
+class MetricsRegistry:
+    """Thread-safe histograms keyed by (stage, scope)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, scope='request'):
+        with self._lock:
+            histogram = self._histograms.get((stage, scope))
+            if histogram is None:
+                histogram = self._histograms[(stage, scope)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def snapshot(self):
+        """{(stage, scope): (count, total_seconds)}"""
+        with self._lock:
+            return {key: (h.count, h.total) for key, h in self._histograms.items()}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render_prometheus(self):
+        lines = ['# HELP qpcr_stage_seconds Time spent in analysis pipeline stages.',
+                 '# TYPE qpcr_stage_seconds histogram']
+        with self._lock:
+            for (stage, scope), histogram in sorted(self._histograms.items()):
+                labels = f'stage="{stage}",scope="{scope}"'
+                for bound, count in histogram.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'qpcr_stage_seconds_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f'qpcr_stage_seconds_sum{{{labels}}} {histogram.total:.6f}')
+                lines.append(f'qpcr_stage_seconds_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+def record(stage, seconds, scope='request'):
+    """Record an externally measured duration (histogram + current request totals)."""
+    if not METRICS_ENABLED:
+        return
+    metrics.observe(stage, seconds, scope)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def span(stage, scope='request'):
+    """Time the enclosed block as ``stage``."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started, scope)
+
+
+def timed(stage, scope='request'):
+    """Decorator form of span()."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage, scope):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def begin_request():
+    """Start collecting per-stage totals for the current request; returns a token for end_request."""
+    return _request_timings.set({})
+
+
+def end_request(token):
+    """Stop collecting and return {stage: seconds} for the request."""
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    return timings
+
+
+def timing_header(timings):
+    """Server-Timing style header value: 'stage;dur=12.3, ...' in milliseconds."""
+    return ', '.join(f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in timings.items())
+
+
+def request_timing(stage):
+    """
+    Flask view decorator: time the whole request as ``stage``, collect its spans and
+    add the X-Analysis-Timing header when QPCR_TIMING_HEADER is set or the client asks for it.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import make_response, request
+
+            token = begin_request()
+            started = time.perf_counter()
+            try:
+                response = make_response(view(*args, **kwargs))
+            finally:
+                record(stage, time.perf_counter() - started)
+                timings = end_request(token)
+            if TIMING_HEADER or request.headers.get('X-Analysis-Timing'):
+                response.headers['X-Analysis-Timing'] = timing_header(timings)
+            return response
+        return wrapper
+    return decorator
@@ -1,18 +1,44 @@
 import numpy as np
 from scipy.optimize import curve_fit
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend for Railway deployment
-import matplotlib.pyplot as plt
 from sklearn.metrics import r2_score
 from log_utils import get_logger
 
 logger = get_logger("qpcr_analyzer")
+import atexit
+import copy
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import pandas as pd
 import warnings
 from curve_classification import classify_curve
+from batch_sigmoid_fit import fit_wells_batch
+from analysis_cache import analysis_cache, make_well_key
+from cqj_calcj_utils import calculate_cqj_batch
+from pipeline_metrics import record, span
+from well_trace import trace, tracer, well_scope
+from pathogen_registry import get_fixed_threshold, get_pathogen_target, normalize_channel
+from training_store import DEFAULT_LOG_PATH as ML_TRAINING_LOG
 
 warnings.filterwarnings('ignore')
 
+# Part of every analysis cache key - bump whenever analyze_curve_quality or
+# detect_curve_anomalies change what they return for the same input
+ANALYZER_VERSION = '2.1.0'
+
+# Set QPCR_BATCH_FIT=0 to force the per-well curve_fit path
+BATCH_FIT_ENABLED = os.environ.get('QPCR_BATCH_FIT', '1') != '0'
+
+# Parallel first pass for batch_analyze_wells: worker process count (0/1 = serial)
+# and the smallest plate worth shipping to the pool
+ANALYSIS_WORKERS = int(os.environ.get('QPCR_ANALYSIS_WORKERS', '0'))
+PARALLEL_MIN_WELLS = int(os.environ.get('QPCR_PARALLEL_MIN_WELLS', '48'))
+# Workers are recycled when any of these change on disk
+ML_ARTIFACT_FILES = ('ml_curve_classifier.pkl', 'ml_pathogen_models.pkl', ML_TRAINING_LOG)
+
 
 def get_pathogen_threshold(well_data, L=None, B=None):
     """
@@ -27,61 +53,24 @@ def get_pathogen_threshold(well_data, L=None, B=None):
     Returns:
         float | None: Threshold value in RFU, or None if not defined for this test/channel
     """
-    # Pathogen-specific fixed threshold values (matching threshold_strategies.js)
-    PATHOGEN_FIXED_THRESHOLDS = {
-        "BVAB": { 
-            "FAM": 250, "HEX": 250, "Cy5": 250 
-        },
-        "BVPanelPCR1": {
-            "FAM": 200, "HEX": 250, "Texas Red": 150, "Cy5": 200
-        },
-        "BVPanelPCR2": {
-            "FAM": 350, "HEX": 350, "Texas Red": 200, "Cy5": 350
-        },
-        "BVPanelPCR3": { 
-            "CY5": 100, "Cy5": 100, "FAM": 100, "HEX": 100, "Texas Red": 100
-        },
-        "Calb": { "HEX": 150 },
-        "Cglab": { "FAM": 150 },
-        "CHVIC": { "FAM": 250 },
-        "Ckru": { "FAM": 280 },
-        "Cpara": { "FAM": 200 },
-        "Ctrach": { "FAM": 150 },
-        "Ctrop": { "FAM": 200 },
-        "Efaecalis": { "FAM": 200 },
-        "FLUA": { "FAM": 265 },
-        "FLUB": { "Cy5": 225 },
-        "GBS": { "FAM": 300 },
-        "Lacto": { "FAM": 150 },
-        "Mgen": { "FAM": 500 },
-        "Ngon": { "HEX": 200 },
-        "NOV": { "FAM": 500 },
-        "Saureus": { "FAM": 250 },
-        "Tvag": { "FAM": 250 }
-    }
-    
     # Get test code and fluorophore from well data
     test_code = well_data.get('test_code') if well_data else None
     fluorophore = well_data.get('fluorophore') if well_data else None
     # Normalize common channel aliases
-    if fluorophore == 'TexasRed':
-        fluorophore = 'Texas Red'
-    if fluorophore == 'CY5':
-        fluorophore = 'Cy5'
+    fluorophore = normalize_channel(fluorophore)
     
-    print(f"🔍 get_pathogen_threshold DEBUG: well_data keys: {list(well_data.keys()) if well_data else 'None'}")
-    print(f"🔍 get_pathogen_threshold DEBUG: test_code='{test_code}', fluorophore='{fluorophore}'")
+    trace('threshold', "test_code='{test_code}', fluorophore='{fluorophore}'", test_code=test_code, fluorophore=fluorophore)
     
     # Try to get pathogen-specific threshold
-    if test_code and fluorophore and test_code in PATHOGEN_FIXED_THRESHOLDS:
-        pathogen_thresholds = PATHOGEN_FIXED_THRESHOLDS[test_code]
-        if fluorophore in pathogen_thresholds:
-            threshold_value = pathogen_thresholds[fluorophore]
-            print(f"🎯 Using pathogen-specific threshold: {test_code} {fluorophore} = {threshold_value} RFU")
-            return float(threshold_value)
+    threshold_value = get_fixed_threshold(test_code, fluorophore) if test_code and fluorophore else None
+    if threshold_value is not None:
+        trace('threshold', "Using pathogen-specific threshold: {test_code} {fluorophore} = {threshold} RFU",
+              test_code=test_code, fluorophore=fluorophore, threshold=threshold_value)
+        return threshold_value
 
     # Strict mode: no fallback. If mapping is missing, return None and let caller decide.
-    print(f"⚠️ No pathogen/channel threshold mapping for test_code={test_code or 'unknown'}, fluorophore={fluorophore or 'unknown'} — returning None (strict)")
+    trace('threshold', "No pathogen/channel threshold mapping for test_code={test_code}, fluorophore={fluorophore} - returning None (strict)",
+          test_code=test_code or 'unknown', fluorophore=fluorophore or 'unknown')
     return None
 
 
@@ -214,9 +203,11 @@ def check_signal_to_noise(rfu, min_snr=3.0):
     
     # Debug output for SNR calculation issues (including baseline-subtracted data)
     if snr <= 0:
-        print(f"🔍 SNR Debug: baseline_mean={baseline_mean:.2f}, baseline_std={baseline_std:.4f}, "
-              f"signal_level={signal_level:.2f}, amplitude={amplitude:.2f}, calculated_snr={snr:.2f}")
-        print(f"   Note: For baseline-subtracted data, negative baseline_mean is normal")
+        # For baseline-subtracted data, negative baseline_mean is normal
+        trace('snr', "baseline_mean={baseline_mean:.2f}, baseline_std={baseline_std:.4f}, signal_level={signal_level:.2f}, "
+                     "amplitude={amplitude:.2f}, calculated_snr={snr:.2f}",
+              baseline_mean=baseline_mean, baseline_std=baseline_std, signal_level=signal_level,
+              amplitude=amplitude, snr=snr)
 
     return {
         'baseline_mean': baseline_mean,
@@ -245,12 +236,16 @@ def check_exponential_growth(rfu, min_max_growth_rate=5.0):
     }
 
 
-def analyze_curve_quality(well_id, data, experiment_name, test_code=None):
+def analyze_curve_quality(well_id, data, experiment_name, test_code=None, precomputed_fit=None):
     """
     Enhanced curve quality analysis with integrated classification and ML integration.
     Returns comprehensive analysis including quality metrics and curve classification.
+
+    precomputed_fit: optional (popt, pcov) from batch_sigmoid_fit.fit_wells_batch();
+    when given, the per-well curve_fit is skipped.
     """
-    print(f"🔍 FUNCTION CALLED: analyze_curve_quality for well {well_id}, experiment {experiment_name}, test_code={test_code}")
+    trace('curve_quality', "analyze_curve_quality: experiment {experiment}, test_code={test_code}",
+          well=well_id, experiment=experiment_name, test_code=test_code)
     try:
         # Extract cycles and rfu from data
         cycles = data['cycles']
@@ -313,16 +308,19 @@ def analyze_curve_quality(well_id, data, experiment_name, test_code=None):
              np.max(rfu)]  # Upper bounds
         )
 
-        # Fit sigmoid with bounds
-        popt, pcov = curve_fit(
-            sigmoid,
-            cycles,
-            rfu,
-            p0=[L_guess, k_guess, x0_guess, B_guess],
-            bounds=bounds,
-            maxfev=5000,
-            method='trf'
-        )
+        # Fit sigmoid with bounds (reuse the plate-wide batched fit when available)
+        if precomputed_fit is not None:
+            popt, pcov = precomputed_fit
+        else:
+            popt, pcov = curve_fit(
+                sigmoid,
+                cycles,
+                rfu,
+                p0=[L_guess, k_guess, x0_guess, B_guess],
+                bounds=bounds,
+                maxfev=5000,
+                method='trf'
+            )
 
         # Calculate fit quality
         fit_rfu = sigmoid(cycles, *popt)
@@ -337,7 +335,9 @@ def analyze_curve_quality(well_id, data, experiment_name, test_code=None):
 
         # Determine threshold from pathogen-specific config (mirrors frontend strategies)
         threshold_value = get_pathogen_threshold(well_data, L, B)
-        print(f"🔧 Threshold selected: {threshold_value} RFU (test_code={well_data.get('test_code')}, fluorophore={well_data.get('fluorophore')})")
+        trace('curve_quality', "Threshold selected: {threshold} RFU (test_code={test_code}, fluorophore={fluorophore})",
+              well=well_id, threshold=threshold_value, test_code=well_data.get('test_code'),
+              fluorophore=well_data.get('fluorophore'))
 
         # Calculate additional steepness focusing on post-cycle 8 exponential phase
         post_cycle8_mask = cycles >= 8
@@ -473,6 +473,10 @@ def analyze_curve_quality(well_id, data, experiment_name, test_code=None):
         }
 
         if plot:
+            import matplotlib
+            matplotlib.use('Agg')  # Use non-interactive backend for Railway deployment
+            import matplotlib.pyplot as plt
+
             plt.figure(figsize=(15, 10))
 
             # Main plot - curve fitting
@@ -598,15 +602,429 @@ Growth: {growth_check['max_growth_rate']:.1f} (≥{min_growth_rate}: {growth_che
         return {'error': str(e), 'is_good_scurve': False}
 
 
-def batch_analyze_wells(data_dict, **quality_filter_params):
-    """Analyze multiple wells/samples for S-curve patterns with quality filters"""
+def _rule_based_after_ml_failure(well_id, analysis):
+    """Rule-based classification used when the ML path raises for a well."""
+    logger.info("Falling back to rule-based classification")
+    # FALLBACK TO RULE-BASED CLASSIFICATION
+    analysis['curve_classification'] = classify_curve(
+        analysis.get('r2_score', 0),
+        analysis.get('steepness', 0),
+        analysis.get('quality_filters', {}).get('snr_check', {}).get('snr', 0),
+        analysis.get('midpoint', 50),
+        analysis.get('baseline', 100),
+        amplitude=analysis.get('amplitude', 0),
+        cq_value=analysis.get('cq_value'),
+        vendor_cq_value=analysis.get('cq_value')
+    )
+    # Mark as rule-based method
+    analysis['curve_classification']['method'] = 'Rule-based (ML failed)'
+    logger.info(f"Rule-based Fallback Result | well={well_id} | class={analysis['curve_classification'].get('classification')}")
+
+
+def _prepare_well_first_pass(well_id, data, precomputed_fit=None, cached_analysis=None):
+    """
+    First part of the per-well stage: channel resolution, curve fit and anomalies.
+    CQJ is then computed for all prepared wells at once (see _analyze_wells_first_pass).
+
+    cached_analysis: fit + anomaly result from the analysis cache; when given,
+    analyze_curve_quality and detect_curve_anomalies are skipped.
+
+    Returns:
+        state dict consumed by _classify_well_first_pass and _finish_well_first_pass
+    """
+    cycles = data['cycles']
+    rfu = data['rfu']
+
+    # Ensure fluorophore/channel is present for each well
+    channel_name = data.get('fluorophore')
+    logger.debug(f"Channel Detection - Well: {well_id}, Original fluorophore: {channel_name}, Keys: {list(data.keys())}")
+    
+    if not channel_name:
+        # Extract fluorophore from well_id if available (e.g., "A1_HEX" -> "HEX")
+        if '_' in well_id and len(well_id.split('_')) >= 2:
+            potential_fluorophore = well_id.split('_')[-1]
+            # Validate it's a known fluorophore
+            if potential_fluorophore in ['FAM', 'HEX', 'Texas Red', 'Cy5', 'TexasRed']:
+                channel_name = potential_fluorophore
+                logger.debug(f"Extracted channel from well_id: {channel_name}")
+            else:
+                channel_name = 'FAM'  # Default to FAM instead of Unknown
+                logger.debug(f"Invalid potential fluorophore from well_id: {potential_fluorophore}, defaulting to FAM")
+        else:
+            channel_name = 'FAM'  # Default to FAM for single-channel analysis
+            logger.debug(f"No valid fluorophore pattern in well_id: {well_id}, defaulting to FAM")
+        data['fluorophore'] = channel_name
+    
+    logger.debug(f"Final channel_name for {well_id}: {channel_name}")
+
+    cache_entry = None
+    ml_request = None
+    if cached_analysis is not None:
+        analysis = cached_analysis
+    else:
+        # Pass quality filter parameters AND well data to analysis for pathogen-specific thresholds
+        with span('curve_quality', scope='well'), well_scope(well_id):
+            analysis = analyze_curve_quality(well_id, data, "batch_experiment", data.get('test_code'),
+                                             precomputed_fit=precomputed_fit)
+
+        # Add anomaly detection
+        with span('anomaly_detection', scope='well'):
+            anomalies = detect_curve_anomalies(cycles, rfu)
+        analysis['anomalies'] = anomalies
+
+        # Ensure raw data is always present even if curve analysis failed
+        # This guarantees downstream storage/visualization has RFU/cycle arrays
+        try:
+            if not isinstance(analysis.get('raw_cycles'), list) or not analysis.get('raw_cycles'):
+                analysis['raw_cycles'] = [float(x) for x in cycles] if isinstance(cycles, (list, tuple)) else []
+            if not isinstance(analysis.get('raw_rfu'), list) or not analysis.get('raw_rfu'):
+                analysis['raw_rfu'] = [float(x) for x in rfu] if isinstance(rfu, (list, tuple)) else []
+        except Exception:
+            # Best-effort; leave empty lists on failure
+            analysis.setdefault('raw_cycles', [])
+            analysis.setdefault('raw_rfu', [])
+
+        if analysis_cache.enabled:
+            cache_entry = copy.deepcopy(analysis)
+
+    return {
+        'well_id': well_id,
+        'data': data,
+        'analysis': analysis,
+        'channel_name': channel_name,
+        'cache_entry': cache_entry,
+        'cqj': None,
+        'ml_request': None
+    }
+
+
+def _classify_well_first_pass(state):
+    """
+    Second part of the per-well stage: REDO pre-check and the metrics the ML
+    classifier needs, using the CQJ already in state['cqj']. ML itself runs
+    batched over all wells (see _analyze_wells_first_pass).
+
+    Sets state['ml_request'] when the well still needs an ML classification.
+    """
+    well_id = state['well_id']
+    data = state['data']
+    analysis = state['analysis']
+    cycles = data['cycles']
+    rfu = data['rfu']
+    ml_request = None
+
+    # Add curve classification - ML ENABLED WITH CONFIDENCE SAFEGUARDS + RULE-BASED FALLBACK
+    if 'error' in analysis:
+        analysis['curve_classification'] = {
+            'classification': 'No Data',
+            'reason': analysis.get('error', 'Invalid or missing data'),
+            'confidence': 0.1,  # Very low confidence for error cases
+            'review_flag': True,
+            'method': 'Error'
+        }
+    else:
+        # TRY ML CLASSIFICATION WITH CONFIDENCE SAFEGUARDS FIRST
+        # --- Early REDO pre-check using vendor Cq (before ML) ---
+        already_classified = False
+        try:
+            vendor_cq = data.get('cq_value') or analysis.get('cq_value')
+            r2_score_val = analysis.get('r2_score', 1.0)
+
+            # CQJ (None without a threshold) so the REDO rule can consider CQJ presence
+            cqj_for_redo = state['cqj']
+
+            # Persist a targeted debug entry for observability
+            logger.info(f"REDO pre-check probe | well={well_id} | R2={r2_score_val} | vendor_cq={vendor_cq} | cqj={cqj_for_redo}")
+
+            # Apply REDO pre-check when R2 is low and either vendor Cq or CQJ is present
+            if r2_score_val < 0.75 and (vendor_cq is not None or cqj_for_redo is not None):
+                with well_scope(well_id):
+                    redo_probe = classify_curve(
+                        r2_score_val,
+                        analysis.get('steepness', 0),
+                        analysis.get('quality_filters', {}).get('snr_check', {}).get('snr', 0),
+                        analysis.get('midpoint', 50),
+                        analysis.get('baseline', 100),
+                        amplitude=analysis.get('amplitude', 0),
+                        cq_value=cqj_for_redo,
+                        vendor_cq_value=vendor_cq
+                    )
+                if redo_probe and redo_probe.get('classification') == 'REDO':
+                    analysis['curve_classification'] = redo_probe
+                    analysis['curve_classification']['method'] = 'Rule-based (REDO pre-check)'
+                    already_classified = True
+                    logger.warning(f"REDO pre-check applied | well={well_id} | reason={redo_probe.get('reason')}")
+        except Exception as _e:
+            # Non-fatal; continue to ML
+            logger.exception(f"REDO pre-check exception | well={well_id}")
+
+        try:
+            # Get pathogen from test_code if available
+            pathogen = None
+            test_code = data.get('test_code', None)
+            if test_code:
+                pathogen = test_code
+            
+            # Prepare comprehensive metrics for ML classifier (30+ metrics)
+            ml_metrics = analysis.copy()
+            # Add CQJ value if we have a threshold
+            if analysis.get('threshold_value') is not None:
+                ml_metrics['cqj'] = state['cqj']
+            
+            if not already_classified:
+                logger.info(f"ML Analysis: Queued for ML classification | well={well_id} | metrics={len(ml_metrics)}")
+                ml_request = {'rfu': rfu, 'cycles': cycles, 'metrics': ml_metrics, 'pathogen': pathogen}
+            
+        except Exception as e:
+            logger.exception(f"ML Failed | well={well_id}")
+            _rule_based_after_ml_failure(well_id, analysis)
+
+    state['ml_request'] = ml_request
+
+
+def _finish_well_first_pass(state):
+    """
+    Last part of the per-well stage: CQJ assignment and pathogen (test_code) resolution.
+
+    Returns:
+        (analysis, resolved_test_code, cache_entry) - resolved_test_code is None
+        when CalcJ cannot be attempted; cache_entry is the freshly computed
+        fit + anomaly result to store (None on a cache hit)
+    """
+    well_id = state['well_id']
+    data = state['data']
+    analysis = state['analysis']
+    channel_name = state['channel_name']
+
+    # --- Per-channel CQJ/CalcJ integration (dict, robust) ---
+    # Prepare well dict for CQJ/CalcJ utils
+    well_for_cqj = {
+        'raw_cycles': analysis.get('raw_cycles'),
+        'raw_rfu': analysis.get('raw_rfu'),
+        'amplitude': analysis.get('amplitude')
+    }
+    threshold = analysis.get('threshold_value')
+    cqj_val = state['cqj']
+
+    # Store CQJ first (needed for CalcJ calculation)
+    analysis['cqj'] = {channel_name: cqj_val}
+    logger.debug(f"CQJ assignment | well={well_id} | channel={channel_name} | cqj={cqj_val}")
+    # CalcJ itself needs every well's CQJ, so it is left to the control pass in
+    # batch_analyze_wells; only the pathogen context is resolved here
+    analysis['calcj'] = {channel_name: None}  # Placeholder
+
+    test_code = data.get('test_code', None)
+    resolved_test_code = None
+    if threshold is not None and cqj_val is not None:
+        try:
+            # Use existing dynamic test code extraction (no hard-coded values)
+            if not test_code:
+                # Import the ML pathogen extraction function for dynamic extraction
+                from ml_curve_classifier import extract_pathogen_from_well_data
+
+                # Prepare well data for pathogen extraction
+                well_data_with_context = dict(well_for_cqj)
+                well_data_with_context.update({
+                    'experiment_pattern': data.get('experiment_pattern', ''),
+                    'fluorophore': channel_name,
+                    'channel': channel_name,
+                    'current_experiment_pattern': data.get('experiment_pattern', ''),
+                    'extracted_test_code': data.get('extracted_test_code', '')
+                })
+
+                # Extract test code dynamically using existing ML function
+                extracted_pathogen = extract_pathogen_from_well_data(well_data_with_context)
+                if extracted_pathogen and extracted_pathogen != 'Unknown':
+                    test_code = extracted_pathogen
+                    trace('calcj', "Dynamically extracted test_code='{test_code}' using ML pathogen extraction",
+                          well=well_id, test_code=test_code)
+                else:
+                    # Fallback: Extract from experiment pattern if ML extraction fails
+                    experiment_pattern = data.get('experiment_pattern', '')
+                    if experiment_pattern:
+                        # Use the same extraction logic as the existing pathogen detection
+                        if experiment_pattern.startswith('Ac') and len(experiment_pattern) > 2:
+                            test_code = experiment_pattern[2:].split('_')[0]  # Remove 'Ac' prefix
+                        else:
+                            test_code = experiment_pattern.split('_')[0]
+                        trace('calcj', "Extracted test_code='{test_code}' from experiment_pattern='{pattern}' (ML fallback)",
+                              well=well_id, test_code=test_code, pattern=experiment_pattern)
+                    else:
+                        test_code = None
+                        trace('calcj', "No test_code found - cannot calculate CalcJ without pathogen context", well=well_id)
+
+            if test_code:
+                resolved_test_code = test_code
+            else:
+                trace('calcj', "CALCJ SKIPPED - NO TEST CODE (cannot determine pathogen context)", well=well_id)
+        except Exception as e:
+            trace('calcj', "CALCJ TEST CODE ERROR: {error}", well=well_id, error=e)
+    else:
+        trace('calcj', "CALCJ SKIPPED: threshold={threshold}, cqj_val={cqj}", well=well_id, threshold=threshold, cqj=cqj_val)
+
+    return analysis, resolved_test_code, state['cache_entry']
+
+
+def _analyze_wells_first_pass(items):
+    """
+    Per-well stage of batch_analyze_wells for a list of wells: prepare each well,
+    compute every well's CQJ in one vectorized pass (reused by the REDO pre-check,
+    the ML metrics and the stored result), classify all ML candidates with one
+    MLCurveClassifier.predict_batch call, then resolve test codes. Reads no well
+    outside ``items``, so shards can run in worker processes; the control-based
+    CalcJ pass runs after the merge.
+
+    Args:
+        items: [(well_id, data, precomputed_fit, cached_analysis), ...]
+
+    Returns:
+        [(well_id, (analysis, resolved_test_code, cache_entry)), ...]
+    """
+    states = [_prepare_well_first_pass(well_id, data, fit, cached) for well_id, data, fit, cached in items]
+
+    analyses = [state['analysis'] for state in states]
+    cqj_values = calculate_cqj_batch(analyses, [analysis.get('threshold_value') for analysis in analyses])
+    for state, cqj_val in zip(states, cqj_values):
+        state['cqj'] = cqj_val
+        _classify_well_first_pass(state)
+
+    ml_requests = {state['well_id']: state['ml_request'] for state in states if state['ml_request'] is not None}
+    if ml_requests:
+        by_well = {state['well_id']: state for state in states}
+        try:
+            from ml_curve_classifier import ml_classifier
+            ml_results = ml_classifier.predict_batch(ml_requests)
+            for well_id, ml_result in ml_results.items():
+                by_well[well_id]['analysis']['curve_classification'] = ml_result
+                logger.info(f"ML Result | well={well_id} | class={ml_result.get('classification')} | method={ml_result.get('method')} | conf={ml_result.get('confidence', 'N/A')}")
+        except Exception:
+            logger.exception(f"ML Failed | batch of {len(ml_requests)} wells")
+            for well_id in ml_requests:
+                _rule_based_after_ml_failure(well_id, by_well[well_id]['analysis'])
+
+    return [(state['well_id'], _finish_well_first_pass(state)) for state in states]
+
+
+_analysis_pool = None
+_analysis_pool_key = None
+_analysis_pool_lock = threading.Lock()
+
+
+def _model_artifact_stamp():
+    """mtimes of the files a worker's classifier was loaded from."""
+    stamp = []
+    for path in ML_ARTIFACT_FILES:
+        try:
+            stamp.append(os.path.getmtime(path))
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def _init_analysis_worker():
+    """Warm a pool worker: load the classifier before the first shard arrives (a no-op when forked after preload)."""
+    from ml_curve_classifier import preload
+    preload()
+
+
+def _first_pass_shard(shard):
+    """Pool task: analyze one shard, then write its buffered ML audit rows (workers skip atexit)."""
+    try:
+        return _analyze_wells_first_pass(shard)
+    finally:
+        try:
+            from ml_validation_tracker import ml_tracker
+            ml_tracker.flush_predictions()
+        except Exception:
+            logger.exception("Could not flush ML prediction tracking in analysis worker")
+
+
+def get_analysis_pool(workers):
+    """
+    Return the shared process pool, recreating it when the worker count changes
+    or the on-disk model/training data is newer than what the workers loaded.
+    """
+    global _analysis_pool, _analysis_pool_key
+    key = (workers, _model_artifact_stamp())
+    with _analysis_pool_lock:
+        if _analysis_pool is not None and _analysis_pool_key != key:
+            _analysis_pool.shutdown(wait=False, cancel_futures=True)
+            _analysis_pool = None
+        if _analysis_pool is None:
+            # fork shares the already-imported modules with the workers; spawn would
+            # re-import app.py (and its DB setup) in every child
+            context = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else None
+            if context is not None:
+                # Load the model once here so the forked workers share its pages
+                from ml_curve_classifier import preload
+                preload()
+            _analysis_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_analysis_worker
+            )
+            _analysis_pool_key = key
+            logger.info(f"Analysis process pool started | workers={workers}")
+        return _analysis_pool
+
+
+def shutdown_analysis_pool():
+    """Stop the analysis workers (registered with atexit)."""
+    global _analysis_pool, _analysis_pool_key
+    with _analysis_pool_lock:
+        if _analysis_pool is not None:
+            _analysis_pool.shutdown(wait=True, cancel_futures=True)
+            _analysis_pool = None
+            _analysis_pool_key = None
+
+
+atexit.register(shutdown_analysis_pool)
+
+
+def _run_first_pass(data_dict, batch_fits, cached_analyses, workers=None):
+    """
+    Run _analyze_wells_first_pass over every well, sharded across the process pool
+    when parallel mode is enabled and the plate is large enough.
+
+    Returns:
+        {well_id: (analysis, resolved_test_code, cache_entry)}
+    """
+    workers = ANALYSIS_WORKERS if workers is None else int(workers)
+    items = [(well_id, data, batch_fits.get(well_id), cached_analyses.get(well_id))
+             for well_id, data in data_dict.items()]
+
+    # Worker processes have their own trace buffers, so tracing keeps the first pass in-process
+    if workers > 1 and len(items) >= PARALLEL_MIN_WELLS and not tracer.enabled:
+        # Contiguous shards, a few per worker so one slow shard does not stall the rest
+        shard_size = max(1, -(-len(items) // (workers * 4)))
+        shards = [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+        try:
+            pool = get_analysis_pool(workers)
+            first_pass = {}
+            for shard_result in pool.map(_first_pass_shard, shards):
+                first_pass.update(shard_result)
+            logger.info(f"Parallel first pass | wells={len(items)} | workers={workers} | shards={len(shards)}")
+            return first_pass
+        except BrokenProcessPool:
+            logger.exception("Analysis process pool broke; rerunning first pass serially")
+            shutdown_analysis_pool()
+        except Exception:
+            logger.exception("Parallel first pass failed; rerunning serially")
+
+    return dict(_analyze_wells_first_pass(items))
+
+
+def batch_analyze_wells(data_dict, parallel_workers=None, **quality_filter_params):
+    """
+    Analyze multiple wells/samples for S-curve patterns with quality filters.
+
+    parallel_workers: process count for the per-well first pass (defaults to
+    QPCR_ANALYSIS_WORKERS; 0 or 1 runs serially). Output is identical either way.
+    """
     results = {}
     good_curves = []
     cycle_info = None
 
-    # --- Import new CQJ/CalcJ utils ---
-    from cqj_calcj_utils import calculate_cqj as py_cqj
-
     # Pre-populate all well data for control detection in CalcJ calculation
     # This ensures control wells are available regardless of processing order
     all_well_results_for_calcj = {}
@@ -637,31 +1055,46 @@ def batch_analyze_wells(data_dict, **quality_filter_params):
             'experiment_pattern': data.get('experiment_pattern', '')
         }
 
+    # Wells already analyzed with identical content skip fitting and anomaly detection
+    cache_keys = {}
+    cached_analyses = {}
+    if analysis_cache.enabled:
+        for well_id, data in data_dict.items():
+            try:
+                key = make_well_key(data['cycles'], data['rfu'], data.get('test_code'),
+                                    all_well_results_for_calcj[well_id]['channel'], ANALYZER_VERSION)
+            except (KeyError, TypeError, ValueError):
+                continue
+            cache_keys[well_id] = key
+            cached = analysis_cache.get(key)
+            if cached is not None:
+                cached_analyses[well_id] = cached
+        logger.info(f"Analysis cache | hits={len(cached_analyses)}/{len(data_dict)} wells")
+
+    # Fit all remaining wells in one vectorized pass; wells that do not
+    # converge there fall back to the per-well curve_fit in analyze_curve_quality
+    batch_fits = {}
+    if BATCH_FIT_ENABLED:
+        wells_to_fit = {well_id: data for well_id, data in data_dict.items() if well_id not in cached_analyses}
+        try:
+            with span('sigmoid_fit_batch'):
+                batch_fits = fit_wells_batch(wells_to_fit)
+            logger.info(f"Batch sigmoid fit | converged={len(batch_fits)}/{len(wells_to_fit)} wells")
+        except Exception:
+            logger.exception("Batch sigmoid fit failed; using per-well curve_fit")
+            batch_fits = {}
+
+    with span('first_pass'):
+        first_pass = _run_first_pass(data_dict, batch_fits, cached_analyses, parallel_workers)
+
+    # Merge per-well results in input order so the control pass sees the same
+    # wells regardless of how the first pass was scheduled
     for well_id, data in data_dict.items():
         cycles = data['cycles']
-        rfu = data['rfu']
-
-        # Ensure fluorophore/channel is present for each well
-        channel_name = data.get('fluorophore')
-        logger.debug(f"Channel Detection - Well: {well_id}, Original fluorophore: {channel_name}, Keys: {list(data.keys())}")
-        
-        if not channel_name:
-            # Extract fluorophore from well_id if available (e.g., "A1_HEX" -> "HEX")
-            if '_' in well_id and len(well_id.split('_')) >= 2:
-                potential_fluorophore = well_id.split('_')[-1]
-                # Validate it's a known fluorophore
-                if potential_fluorophore in ['FAM', 'HEX', 'Texas Red', 'Cy5', 'TexasRed']:
-                    channel_name = potential_fluorophore
-                    logger.debug(f"Extracted channel from well_id: {channel_name}")
-                else:
-                    channel_name = 'FAM'  # Default to FAM instead of Unknown
-                    logger.debug(f"Invalid potential fluorophore from well_id: {potential_fluorophore}, defaulting to FAM")
-            else:
-                channel_name = 'FAM'  # Default to FAM for single-channel analysis
-                logger.debug(f"No valid fluorophore pattern in well_id: {well_id}, defaulting to FAM")
+        meta = all_well_results_for_calcj[well_id]
+        channel_name = meta['channel']
+        if not data.get('fluorophore'):
             data['fluorophore'] = channel_name
-        
-        logger.debug(f"Final channel_name for {well_id}: {channel_name}")
 
         # Store cycle info from first well - convert to Python types
         if cycle_info is None and len(cycles) > 0:
@@ -671,242 +1104,28 @@ def batch_analyze_wells(data_dict, **quality_filter_params):
                 'count': int(len(cycles))
             }
 
-        # Pass quality filter parameters AND well data to analysis for pathogen-specific thresholds
-        analysis = analyze_curve_quality(well_id, data, "batch_experiment", data.get('test_code'))
+        analysis, resolved_test_code, cache_entry = first_pass[well_id]
+        if cache_entry is not None and well_id in cache_keys:
+            analysis_cache.put(cache_keys[well_id], cache_entry)
 
-        # Add anomaly detection
-        anomalies = detect_curve_anomalies(cycles, rfu)
-        analysis['anomalies'] = anomalies
+        # Update the pre-populated well data with actual CQJ value and pathogen context
+        meta['cqj_value'] = analysis['cqj'][channel_name]
+        if resolved_test_code:
+            meta['test_code'] = resolved_test_code
+        logger.debug(f"CQJ update | well={well_id} updated with CQJ={meta['cqj_value']}")
 
-        # Ensure raw data is always present even if curve analysis failed
-        # This guarantees downstream storage/visualization has RFU/cycle arrays
-        try:
-            if not isinstance(analysis.get('raw_cycles'), list) or not analysis.get('raw_cycles'):
-                analysis['raw_cycles'] = [float(x) for x in cycles] if isinstance(cycles, (list, tuple)) else []
-            if not isinstance(analysis.get('raw_rfu'), list) or not analysis.get('raw_rfu'):
-                analysis['raw_rfu'] = [float(x) for x in rfu] if isinstance(rfu, (list, tuple)) else []
-        except Exception:
-            # Best-effort; leave empty lists on failure
-            analysis.setdefault('raw_cycles', [])
-            analysis.setdefault('raw_rfu', [])
-        # Add curve classification - ML ENABLED WITH CONFIDENCE SAFEGUARDS + RULE-BASED FALLBACK
-        if 'error' in analysis:
-            analysis['curve_classification'] = {
-                'classification': 'No Data',
-                'reason': analysis.get('error', 'Invalid or missing data'),
-                'confidence': 0.1,  # Very low confidence for error cases
-                'review_flag': True,
-                'method': 'Error'
-            }
-        else:
-            # TRY ML CLASSIFICATION WITH CONFIDENCE SAFEGUARDS FIRST
-            # --- Early REDO pre-check using vendor Cq (before ML) ---
-            already_classified = False
-            try:
-                vendor_cq = data.get('cq_value') or analysis.get('cq_value')
-                r2_score_val = analysis.get('r2_score', 1.0)
-
-                # Compute a quick CQJ if a threshold is known so the REDO rule can consider CQJ presence
-                cqj_for_redo = None
-                threshold_for_redo = analysis.get('threshold_value')
-                if threshold_for_redo is not None:
-                    well_for_cqj_quick = {
-                        'raw_cycles': analysis.get('raw_cycles'),
-                        'raw_rfu': analysis.get('raw_rfu'),
-                        'cycles': cycles,
-                        'rfu': rfu
-                    }
-                    try:
-                        cqj_for_redo = py_cqj(well_for_cqj_quick, threshold_for_redo)
-                    except Exception:
-                        cqj_for_redo = None
-
-                # Persist a targeted debug entry for observability
-                logger.info(f"REDO pre-check probe | well={well_id} | R2={r2_score_val} | vendor_cq={vendor_cq} | cqj={cqj_for_redo}")
-
-                # Apply REDO pre-check when R2 is low and either vendor Cq or CQJ is present
-                if r2_score_val < 0.75 and (vendor_cq is not None or cqj_for_redo is not None):
-                    redo_probe = classify_curve(
-                        r2_score_val,
-                        analysis.get('steepness', 0),
-                        analysis.get('quality_filters', {}).get('snr_check', {}).get('snr', 0),
-                        analysis.get('midpoint', 50),
-                        analysis.get('baseline', 100),
-                        amplitude=analysis.get('amplitude', 0),
-                        cq_value=cqj_for_redo,
-                        vendor_cq_value=vendor_cq
-                    )
-                    if redo_probe and redo_probe.get('classification') == 'REDO':
-                        analysis['curve_classification'] = redo_probe
-                        analysis['curve_classification']['method'] = 'Rule-based (REDO pre-check)'
-                        already_classified = True
-                        logger.warning(f"REDO pre-check applied | well={well_id} | reason={redo_probe.get('reason')}")
-            except Exception as _e:
-                # Non-fatal; continue to ML
-                logger.exception(f"REDO pre-check exception | well={well_id}")
-
-            try:
-                from ml_curve_classifier import ml_classifier
-                
-                # Get pathogen from test_code if available
-                pathogen = None
-                test_code = data.get('test_code', None)
-                if test_code:
-                    pathogen = test_code
-                
-                # Prepare comprehensive metrics for ML classifier (30+ metrics)
-                ml_metrics = analysis.copy()
-                # Add CQJ value if we have a threshold
-                threshold = analysis.get('threshold_value')
-                if threshold is not None:
-                    well_for_cqj = {
-                        'raw_cycles': analysis.get('raw_cycles'),
-                        'raw_rfu': analysis.get('raw_rfu'),
-                        'cycles': cycles,
-                        'rfu': rfu
-                    }
-                    cqj_val = py_cqj(well_for_cqj, threshold)
-                    ml_metrics['cqj'] = cqj_val
-                
-                if not already_classified:
-                    logger.info(f"ML Analysis: Attempting ML classification | well={well_id} | metrics={len(ml_metrics)}")
-                    ml_result = ml_classifier.predict_classification(
-                        rfu, cycles, ml_metrics, pathogen, well_id
-                    )
-                    analysis['curve_classification'] = ml_result
-                    logger.info(f"ML Result | well={well_id} | class={ml_result.get('classification')} | method={ml_result.get('method')} | conf={ml_result.get('confidence', 'N/A')}")
-                
-            except Exception as e:
-                logger.exception(f"ML Failed | well={well_id}")
-                logger.info("Falling back to rule-based classification")
-                # FALLBACK TO RULE-BASED CLASSIFICATION
-                analysis['curve_classification'] = classify_curve(
-                    analysis.get('r2_score', 0),
-                    analysis.get('steepness', 0),
-                    analysis.get('quality_filters', {}).get('snr_check', {}).get('snr', 0),
-                    analysis.get('midpoint', 50),
-                    analysis.get('baseline', 100),
-                    amplitude=analysis.get('amplitude', 0),
-                    cq_value=analysis.get('cq_value'),
-                    vendor_cq_value=analysis.get('cq_value')
-                )
-                # Mark as rule-based method
-                analysis['curve_classification']['method'] = 'Rule-based (ML failed)'
-                logger.info(f"Rule-based Fallback Result | well={well_id} | class={analysis['curve_classification'].get('classification')}")
-
-        # --- Per-channel CQJ/CalcJ integration (dict, robust) ---
-        # Prepare well dict for CQJ/CalcJ utils
-        well_for_cqj = {
-            'raw_cycles': analysis.get('raw_cycles'),
-            'raw_rfu': analysis.get('raw_rfu'),
-            'amplitude': analysis.get('amplitude')
-        }
-        threshold = analysis.get('threshold_value')
-        cqj_val = py_cqj(well_for_cqj, threshold) if threshold is not None else None
-
-        # Store CQJ first (needed for CalcJ calculation)
-        analysis['cqj'] = {channel_name: cqj_val}
-        logger.debug(f"CQJ assignment | well={well_id} | channel={channel_name} | cqj={cqj_val}")
-
-        # Update the pre-populated well data with actual CQJ value
-        if well_id in all_well_results_for_calcj:
-            all_well_results_for_calcj[well_id]['cqj_value'] = cqj_val
-            logger.debug(f"CQJ update | well={well_id} updated with CQJ={cqj_val}")
-
-        # CalcJ calculation will be done after test_code extraction
-        analysis['calcj'] = {channel_name: None}  # Placeholder
-
-        from app import get_pathogen_target
         test_code = data.get('test_code', None)
         analysis['pathogen_target'] = get_pathogen_target(test_code, channel_name) if test_code else channel_name
 
-        # CalcJ calculation using control-based standard curve method (same as frontend)
-        from cqj_calcj_utils import calculate_calcj_with_controls
-        if threshold is not None and cqj_val is not None:
-            try:
-                # Use existing dynamic test code extraction (no hard-coded values)
-                if not test_code:
-                    # Import the ML pathogen extraction function for dynamic extraction
-                    from ml_curve_classifier import extract_pathogen_from_well_data
-                    
-                    # Prepare well data for pathogen extraction
-                    well_data_with_context = dict(well_for_cqj)
-                    well_data_with_context.update({
-                        'experiment_pattern': data.get('experiment_pattern', ''),
-                        'fluorophore': channel_name,
-                        'channel': channel_name,
-                        'current_experiment_pattern': data.get('experiment_pattern', ''),
-                        'extracted_test_code': data.get('extracted_test_code', '')
-                    })
-                    
-                    # Extract test code dynamically using existing ML function
-                    extracted_pathogen = extract_pathogen_from_well_data(well_data_with_context)
-                    if extracted_pathogen and extracted_pathogen != 'Unknown':
-                        test_code = extracted_pathogen
-                        print(f"🔍 CALCJ: Dynamically extracted test_code='{test_code}' using ML pathogen extraction")
-                    else:
-                        # Fallback: Extract from experiment pattern if ML extraction fails
-                        experiment_pattern = data.get('experiment_pattern', '')
-                        if experiment_pattern:
-                            # Use the same extraction logic as the existing pathogen detection
-                            if experiment_pattern.startswith('Ac') and len(experiment_pattern) > 2:
-                                test_code = experiment_pattern[2:].split('_')[0]  # Remove 'Ac' prefix
-                            else:
-                                test_code = experiment_pattern.split('_')[0]
-                            print(f"🔍 CALCJ: Extracted test_code='{test_code}' from experiment_pattern='{experiment_pattern}' (ML fallback)")
-                        else:
-                            test_code = None
-                            print(f"🔍 CALCJ: No test_code found - cannot calculate CalcJ without pathogen context")
-                
-                # Only proceed if we have a valid test_code
-                if test_code:
-                    # Prepare well data with CQJ value
-                    well_data_for_calcj = dict(well_for_cqj)
-                    well_data_for_calcj['cqj_value'] = cqj_val
-                    
-                    # Update test_code in pre-populated well data
-                    if well_id in all_well_results_for_calcj:
-                        all_well_results_for_calcj[well_id]['test_code'] = test_code
-                    
-                    # Use control-based standard curve calculation with actual well data
-                    calcj_result = calculate_calcj_with_controls(
-                        well_data_for_calcj, 
-                        threshold, 
-                        all_well_results_for_calcj,  # Pass actual well results instead of {}
-                        test_code, 
-                        channel_name
-                    )
-                    
-                    if calcj_result and isinstance(calcj_result, dict):
-                        calcj_val = calcj_result.get('calcj_value')
-                        calcj_method = calcj_result.get('method', 'control_based')
-                        print(f"🔍 CALCJ STANDARD-CURVE: well={well_id}, calcj_val={calcj_val}, method={calcj_method}, test_code={test_code}")
-                    else:
-                        calcj_val = None
-                        print(f"🔍 CALCJ STANDARD-CURVE FAILED: well={well_id}, result={calcj_result}")
-                else:
-                    calcj_val = None
-                    print(f"🔍 CALCJ SKIPPED - NO TEST CODE: well={well_id} (cannot determine pathogen context)")
-                    
-            except Exception as e:
-                calcj_val = None
-                print(f"🔍 CALCJ STANDARD-CURVE ERROR: well={well_id}, error={e}")
-            
-            analysis['calcj'][channel_name] = calcj_val
-        else:
-            calcj_val = None
-            print(f"🔍 CALCJ SKIPPED: well={well_id}, threshold={threshold}, cqj_val={cqj_val}")
-            analysis['calcj'][channel_name] = calcj_val
-
-        print(f"🔍 CALCJ FINAL: well={well_id}, channel_name='{channel_name}', calcj_val={analysis['calcj'][channel_name]}")
-
         results[well_id] = analysis
 
         if analysis.get('is_good_scurve', False):
             good_curves.append(well_id)
 
+
     # SECOND PASS: CalcJ calculation after all CQJ values are computed
     # Relax gating: attempt CalcJ and let the utility handle insufficient controls
+    calcj_pass_started = time.perf_counter()
     for well_id, analysis in results.items():
         # Skip if this well is a control (CalcJ for controls is handled as fixed in utils if invoked)
         sample_name = all_well_results_for_calcj.get(well_id, {}).get('sample_name', '')
@@ -977,6 +1196,7 @@ def batch_analyze_wells(data_dict, **quality_filter_params):
                 analysis['calcj'][channel_name] = 'N/A'
         except Exception:
             pass
+    record('calcj_pass', time.perf_counter() - calcj_pass_started)
 
     # Final enforcement of display rules across all wells (in case CalcJ wasn't attempted)
     for well_id, analysis in results.items():
@@ -0,0 +1,227 @@
+"""
+Background retraining for the ML curve classifier.
+
+Expert feedback used to retrain in the request thread, so the expert waited
+for a RandomForest fit, cross-validation, joblib.dump and the tracker writes.
+add_training_sample now submits a job here and returns:
+
+    - There is one job per model: the general model, or one pathogen's model.
+      Feedback that arrives while that job is still queued joins it.
+      Feedback that arrives while it runs queues a single follow-up, so a
+      burst of submissions costs at most two fits.
+    - A scheduler thread starts each job QPCR_ML_RETRAIN_DELAY seconds after
+      it was queued and snapshots the training data at that point. The fit
+      runs in a forked worker process, outside the web process's GIL.
+    - The fitted model is installed with one attribute swap
+      (MLCurveClassifier.install_general_model / install_pathogen_model)
+      and saved as the next artifact version. Predictions keep using the
+      previous model until then.
+    - Status of queued, running and recent jobs is served by
+      /api/ml-retrain-jobs.
+
+Configuration:
+    QPCR_ML_RETRAIN_MODE      background (default), or sync to retrain in the caller as before
+    QPCR_ML_RETRAIN_DELAY     seconds a queued job waits for more feedback (default 2)
+    QPCR_ML_RETRAIN_HISTORY   finished jobs kept for the status API (default 50)
+"""
+
+import multiprocessing as mp
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from log_utils import get_logger
+from pipeline_metrics import record
+
+logger = get_logger("retrain_queue")
+
+RETRAIN_MODE = os.environ.get('QPCR_ML_RETRAIN_MODE', 'background').lower()
+RETRAIN_DELAY = float(os.environ.get('QPCR_ML_RETRAIN_DELAY', '2'))
+RETRAIN_HISTORY = int(os.environ.get('QPCR_ML_RETRAIN_HISTORY', '50'))
+RETRAIN_MODES = ('background', 'sync')
+
+
+class RetrainJob:
+    """One queued/running/finished retrain of the general model (pathogen None) or a pathogen model."""
+
+    def __init__(self, classifier, pathogen, reason, run_after):
+        self.id = uuid.uuid4().hex[:12]
+        self.classifier = classifier
+        self.pathogen = pathogen
+        self.reason = reason
+        self.requests = 1
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.run_after = run_after
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'model': 'general' if self.pathogen is None else 'pathogen',
+            'pathogen': self.pathogen,
+            'status': self.status,
+            'reason': self.reason,
+            'requests': self.requests,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+class RetrainQueue:
+    """Coalescing retrain jobs run one at a time by a scheduler thread."""
+
+    def __init__(self, mode=RETRAIN_MODE, delay=RETRAIN_DELAY, history=RETRAIN_HISTORY):
+        if mode not in RETRAIN_MODES:
+            logger.warning(f"Unknown QPCR_ML_RETRAIN_MODE '{mode}', using background")
+            mode = 'background'
+        self.mode = mode
+        self.delay = delay
+        self.history = history
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()  # pathogen (None = general) -> queued job
+        self._running = None
+        self._jobs = OrderedDict()  # job id -> job, oldest first
+        self._thread = None
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def submit(self, classifier, pathogen=None, reason=''):
+        """
+        Ask for a retrain of the general model (pathogen None) or one pathogen's model.
+        Joins the queued job for that model if there is one. In sync mode the retrain runs now.
+
+        Returns:
+            the job's status dict
+        """
+        if self.mode == 'sync':
+            job = RetrainJob(classifier, pathogen, reason, time.time())
+            with self._cond:
+                self._remember(job)
+            self._execute(job, fit=None)
+            return job.to_dict()
+
+        with self._cond:
+            job = self._pending.get(pathogen)
+            if job is not None:
+                job.requests += 1
+                job.reason = reason
+                return job.to_dict()
+            job = RetrainJob(classifier, pathogen, reason, time.time() + self.delay)
+            self._pending[pathogen] = job
+            self._remember(job)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='ml-retrain', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+            return job.to_dict()
+
+    def get(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job has finished (or timeout); returns its status dict."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            job = self._jobs.get(job_id)
+            while job is not None and job.status in ('queued', 'running'):
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return job.to_dict() if job else None
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                'mode': self.mode,
+                'delay_seconds': self.delay,
+                'running': self._running.to_dict() if self._running else None,
+                'queued': [job.to_dict() for job in self._pending.values()],
+                'recent': [job.to_dict() for job in reversed(self._jobs.values())
+                           if job.status not in ('queued', 'running')]
+            }
+
+    def _remember(self, job):
+        self._jobs[job.id] = job
+        finished = [job_id for job_id, known in self._jobs.items() if known.status not in ('queued', 'running')]
+        for job_id in finished[:max(len(finished) - self.history, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    job = next(iter(self._pending.values()), None)
+                    if job is None:
+                        self._cond.wait()
+                        continue
+                    wait = job.run_after - time.time()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                del self._pending[job.pathogen]
+                self._running = job
+            try:
+                self._execute(job, fit=self._fit_in_worker)
+            finally:
+                with self._cond:
+                    self._running = None
+                    self._cond.notify_all()
+
+    def _execute(self, job, fit):
+        job.status = 'running'
+        job.started_at = time.time()
+        classifier = job.classifier
+        try:
+            if job.pathogen is None:
+                trained = classifier.retrain_model(fit=fit)
+            else:
+                trained = classifier.retrain_pathogen_model(job.pathogen, fit=fit)
+            job.result = classifier.last_retrain if trained else None
+            job.status = 'succeeded' if trained else 'skipped'
+            logger.info(f"ML retrain {job.id} {job.status} | model={job.pathogen or 'general'} | "
+                        f"requests={job.requests} | result={job.result}")
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            logger.error(f"ML retrain {job.id} failed | model={job.pathogen or 'general'} | {e}")
+        finally:
+            job.finished_at = time.time()
+            record('ml_retrain', job.finished_at - job.started_at, scope='job')
+            with self._cond:
+                self._cond.notify_all()
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None and 'fork' in mp.get_all_start_methods():
+                # fork, like the analysis pool: spawn would re-import app.py in the child
+                self._executor = ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context('fork'))
+            return self._executor
+
+    def _fit_in_worker(self, function, *args):
+        """Run a fit function in the worker process (in this thread where fork is unavailable)."""
+        executor = self._get_executor()
+        if executor is None:
+            return function(*args)
+        try:
+            return executor.submit(function, *args).result()
+        except BrokenProcessPool:
+            with self._executor_lock:
+                self._executor = None
+            raise
+
+
+retrain_queue = RetrainQueue()
@@ -1,27 +1,46 @@
 """
 Safe Compliance Tracker
 Non-blocking compliance tracking that prevents database conflicts and system failures
+
+Queued events are drained in batches (up to QPCR_COMPLIANCE_BATCH_SIZE events,
+collected for at most QPCR_COMPLIANCE_FLUSH_SECONDS) and written by one
+long-lived MySQLUnifiedComplianceManager, so the table DDL runs once and each
+batch costs a single connection and transaction.
 """
 
 import logging
+import os
 import threading
 import queue
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+COMPLIANCE_BATCH_SIZE = int(os.environ.get('QPCR_COMPLIANCE_BATCH_SIZE', '100'))
+COMPLIANCE_FLUSH_SECONDS = float(os.environ.get('QPCR_COMPLIANCE_FLUSH_SECONDS', '0.5'))
+
 class SafeComplianceTracker:
     """
     Thread-safe, non-blocking compliance tracker that queues events
     and processes them asynchronously to prevent database conflicts
     """
     
-    def __init__(self, max_queue_size: int = 1000):
+    def __init__(self, max_queue_size: int = 1000, batch_size: int = COMPLIANCE_BATCH_SIZE,
+                 flush_interval: float = COMPLIANCE_FLUSH_SECONDS, manager_factory=None):
         self.max_queue_size = max_queue_size
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
         self.event_queue = queue.Queue(maxsize=max_queue_size)
         self.ml_queue = queue.Queue(maxsize=max_queue_size)
         self.logger = logging.getLogger(__name__)
         self.running = True
+        self._manager_factory = manager_factory or self._default_manager
+        self._manager = None
+        self._manager_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self.events_written = 0
+        self.batches_written = 0
+        self.events_to_fallback_log = 0
         
         # Start background processing threads
         self._start_processors()
@@ -44,89 +63,78 @@ class SafeComplianceTracker:
     
     def _process_compliance_events(self):
         """Background thread to process regular compliance events"""
-        while self.running:
-            try:
-                # Get event from queue with timeout
-                event = self.event_queue.get(timeout=1.0)
-                self._safe_process_event(event)
-                self.event_queue.task_done()
-            except queue.Empty:
-                continue
-            except Exception as e:
-                self.logger.error(f"Error processing compliance event: {e}")
+        self._drain(self.event_queue, 'compliance')
     
     def _process_ml_events(self):
         """Background thread to process ML compliance events"""
-        while self.running:
-            try:
-                # Get event from queue with timeout
-                event = self.ml_queue.get(timeout=1.0)
-                self._safe_process_ml_event(event)
-                self.ml_queue.task_done()
-            except queue.Empty:
+        self._drain(self.ml_queue, 'ML compliance')
+    
+    def _drain(self, event_queue: queue.Queue, kind: str):
+        """Write events from ``event_queue`` in batches until shutdown and the queue is empty"""
+        while self.running or not event_queue.empty():
+            batch = self._next_batch(event_queue)
+            if not batch:
                 continue
+            try:
+                self._safe_process_batch(batch, kind)
             except Exception as e:
-                self.logger.error(f"Error processing ML compliance event: {e}")
+                self.logger.error(f"Error processing {kind} events: {e}")
+            finally:
+                for _ in batch:
+                    event_queue.task_done()
     
-    def _safe_process_event(self, event: Dict[str, Any]):
-        """Safely process a compliance event with error handling"""
+    def _next_batch(self, event_queue: queue.Queue) -> List[Dict[str, Any]]:
+        """Wait up to 1s for an event, then collect more for up to flush_interval"""
         try:
-            # Try to use the MySQL unified compliance manager if available
+            batch = [event_queue.get(timeout=1.0)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
             try:
-                from mysql_unified_compliance_manager import MySQLUnifiedComplianceManager
-                import os
-                # Get MySQL config from environment variables (same as app.py)
-                mysql_config = {
-                    'host': os.environ.get('MYSQL_HOST', '127.0.0.1'),
-                    'port': int(os.environ.get('MYSQL_PORT', 3306)),
-                    'user': os.environ.get('MYSQL_USER', 'qpcr_user'),
-                    'password': os.environ.get('MYSQL_PASSWORD', 'qpcr_password'),
-                    'database': os.environ.get('MYSQL_DATABASE', 'qpcr_analysis'),
-                    'charset': 'utf8mb4'
-                }
-                manager = MySQLUnifiedComplianceManager(mysql_config)
-                manager.track_compliance_event(
-                    event_type=event['event_type'],
-                    event_data=event['event_data'],
-                    user_id=event.get('user_id', 'user')
-                )
-                self.logger.info(f"✓ Processed compliance event: {event['event_type']}")
-            except Exception as db_error:
-                # If database fails, just log the event
-                self.logger.warning(f"Database unavailable, logging event: {event['event_type']} - {db_error}")
-                self._log_compliance_event(event)
-        except Exception as e:
-            self.logger.error(f"Failed to process compliance event: {e}")
+                batch.append(event_queue.get(timeout=remaining) if remaining > 0 else event_queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    @staticmethod
+    def _default_manager():
+        from mysql_unified_compliance_manager import MySQLUnifiedComplianceManager
+        # Get MySQL config from environment variables (same as app.py)
+        mysql_config = {
+            'host': os.environ.get('MYSQL_HOST', '127.0.0.1'),
+            'port': int(os.environ.get('MYSQL_PORT', 3306)),
+            'user': os.environ.get('MYSQL_USER', 'qpcr_user'),
+            'password': os.environ.get('MYSQL_PASSWORD', 'qpcr_password'),
+            'database': os.environ.get('MYSQL_DATABASE', 'qpcr_analysis'),
+            'charset': 'utf8mb4'
+        }
+        return MySQLUnifiedComplianceManager(mysql_config)
     
-    def _safe_process_ml_event(self, event: Dict[str, Any]):
-        """Safely process an ML compliance event with error handling"""
+    def _get_manager(self):
+        """The shared compliance manager, created (tables initialized) on first use"""
+        with self._manager_lock:
+            if self._manager is None:
+                self._manager = self._manager_factory()
+            return self._manager
+    
+    def _safe_process_batch(self, events: List[Dict[str, Any]], kind: str = 'compliance'):
+        """Write a batch of events in one transaction; log them to file if the database fails"""
+        fallback = self._log_ml_event if kind.startswith('ML') else self._log_compliance_event
         try:
-            # Try to use the MySQL unified compliance manager if available
-            try:
-                from mysql_unified_compliance_manager import MySQLUnifiedComplianceManager
-                import os
-                # Get MySQL config from environment variables (same as app.py)
-                mysql_config = {
-                    'host': os.environ.get('MYSQL_HOST', '127.0.0.1'),
-                    'port': int(os.environ.get('MYSQL_PORT', 3306)),
-                    'user': os.environ.get('MYSQL_USER', 'qpcr_user'),
-                    'password': os.environ.get('MYSQL_PASSWORD', 'qpcr_password'),
-                    'database': os.environ.get('MYSQL_DATABASE', 'qpcr_analysis'),
-                    'charset': 'utf8mb4'
-                }
-                manager = MySQLUnifiedComplianceManager(mysql_config)
-                manager.track_compliance_event(
-                    event_type=event['event_type'],
-                    event_data=event['event_data'],
-                    user_id=event.get('user_id', 'user')
-                )
-                self.logger.info(f"✓ Processed ML compliance event: {event['event_type']}")
-            except Exception as db_error:
-                # If database fails, just log the event
-                self.logger.warning(f"Database unavailable, logging ML event: {event['event_type']} - {db_error}")
-                self._log_ml_event(event)
-        except Exception as e:
-            self.logger.error(f"Failed to process ML compliance event: {e}")
+            with self._write_lock:
+                manager = self._get_manager()
+                manager.track_compliance_events(events)
+            self.events_written += len(events)
+            self.batches_written += 1
+            self.logger.info(f"✓ Processed {len(events)} {kind} events: {', '.join(sorted({e['event_type'] for e in events}))}")
+        except Exception as db_error:
+            # If database fails, just log the events
+            self.logger.warning(f"Database unavailable, logging {len(events)} {kind} events - {db_error}")
+            for event in events:
+                fallback(event)
+            self.events_to_fallback_log += len(events)
     
     def _log_compliance_event(self, event: Dict[str, Any]):
         """Log compliance event to file when database is unavailable"""
@@ -194,11 +202,20 @@ class SafeComplianceTracker:
             self.logger.error(f"Error queuing ML compliance event: {e}")
             return False
     
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queued': self.event_queue.qsize(),
+            'ml_queued': self.ml_queue.qsize(),
+            'events_written': self.events_written,
+            'batches_written': self.batches_written,
+            'events_to_fallback_log': self.events_to_fallback_log,
+        }
+    
     def shutdown(self):
         """Gracefully shutdown the tracker"""
         self.running = False
         
-        # Wait for queues to empty
+        # The processor threads drain what is queued before exiting
         try:
             self.event_queue.join()
             self.ml_queue.join()
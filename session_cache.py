@@ -0,0 +1,160 @@
+"""
+In-process cache of validated login sessions.
+
+UnifiedAuthManager.validate_session runs on every protected request. With
+this cache a session that was validated within the last QPCR_SESSION_CACHE_TTL
+seconds is answered from memory, and its last_activity touch is queued
+instead of written inline. An ActivityWriter thread flushes the queued
+session ids every QPCR_SESSION_ACTIVITY_FLUSH_SECONDS with one UPDATE.
+
+Entries never outlive the session's own expires_at. logout_user and role
+changes invalidate them in this process; other worker processes notice
+within the TTL, so keep it short (0 disables caching).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from log_utils import get_logger
+
+logger = get_logger("session_cache")
+
+SESSION_CACHE_TTL = float(os.environ.get('QPCR_SESSION_CACHE_TTL', '30'))
+SESSION_CACHE_MAX = int(os.environ.get('QPCR_SESSION_CACHE_MAX', '10000'))
+ACTIVITY_FLUSH_SECONDS = float(os.environ.get('QPCR_SESSION_ACTIVITY_FLUSH_SECONDS', '60'))
+
+
+class SessionValidationCache:
+    """Thread-safe TTL/LRU map of session_id -> validated user data."""
+
+    def __init__(self, ttl=SESSION_CACHE_TTL, max_entries=SESSION_CACHE_MAX, clock=time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()  # session_id -> (valid_until, user_data)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, session_id):
+        """Copy of the cached user data, or None when absent or stale."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(session_id)
+                self.hits += 1
+                return dict(entry[1])
+            if entry is not None:
+                del self._entries[session_id]
+            self.misses += 1
+            return None
+
+    def put(self, session_id, user_data, expires_at=None):
+        """Cache ``user_data`` for the TTL, but never past ``expires_at`` (epoch seconds)."""
+        if not self.enabled:
+            return
+        valid_until = self._clock() + self.ttl
+        if expires_at is not None:
+            valid_until = min(valid_until, expires_at)
+        with self._lock:
+            self._entries[session_id] = (valid_until, dict(user_data))
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def invalidate_user(self, user_id=None, username=None):
+        """Drop every cached session of a user (matched by user_id or username)."""
+        with self._lock:
+            stale = [sid for sid, (_, data) in self._entries.items()
+                     if (user_id is not None and data.get('user_id') == user_id)
+                     or (username is not None and data.get('username') == username)]
+            for sid in stale:
+                del self._entries[sid]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'ttl_seconds': self.ttl,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+class ActivityWriter:
+    """Coalesces last_activity touches into one periodic batched UPDATE."""
+
+    def __init__(self, connect, flush_interval=ACTIVITY_FLUSH_SECONDS):
+        self._connect = connect
+        self.flush_interval = flush_interval
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.flushes = 0
+        self.rows_touched = 0
+
+    def touch(self, session_id):
+        with self._lock:
+            self._pending.add(session_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="session-activity-writer", daemon=True)
+                self._thread.start()
+
+    def discard(self, session_id):
+        with self._lock:
+            self._pending.discard(session_id)
+
+    def _run(self):
+        while not self._wake.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Write all pending touches now; returns the number of sessions flushed."""
+        with self._lock:
+            session_ids, self._pending = list(self._pending), set()
+        if not session_ids:
+            return 0
+        connection = None
+        cursor = None
+        try:
+            connection = self._connect()
+            cursor = connection.cursor()
+            placeholders = ', '.join(['%s'] * len(session_ids))
+            cursor.execute(f"""
+                UPDATE user_sessions
+                SET last_activity = CURRENT_TIMESTAMP
+                WHERE session_id IN ({placeholders})
+            """, session_ids)
+            connection.commit()
+            self.flushes += 1
+            self.rows_touched += len(session_ids)
+            return len(session_ids)
+        except Exception as e:
+            logger.warning(f"Could not flush last_activity for {len(session_ids)} sessions: {e}")
+            with self._lock:
+                self._pending.update(session_ids)
+            return 0
+        finally:
+            for resource in (cursor, connection):
+                try:
+                    if resource is not None:
+                        resource.close()
+                except Exception:
+                    pass
+
+    def stop(self):
+        """Stop the background thread after a final flush."""
+        self._wake.set()
+        self.flush()
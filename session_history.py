@@ -0,0 +1,172 @@
+"""
+Paginated session history queries for GET /sessions.
+
+A page of analysis_sessions and the summary columns of their wells are
+fetched with one joined query; curve arrays (raw_cycles, raw_rfu,
+fitted_curve, ...) are only loaded for a single session on request via
+fetch_session_wells().
+
+Pages are keyed on (upload_timestamp DESC, id DESC). The cursor handed to the
+client is an opaque token encoding the last session of the page.
+"""
+
+import base64
+import json
+import os
+from datetime import datetime
+
+from curve_codec import decode_curve_columns
+
+DEFAULT_PAGE_SIZE = int(os.environ.get('QPCR_SESSIONS_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.environ.get('QPCR_SESSIONS_MAX_PAGE_SIZE', '500'))
+
+SESSION_COLUMNS = ('id', 'filename', 'upload_timestamp', 'total_wells', 'good_curves',
+                   'success_rate', 'cycle_count', 'cycle_min', 'cycle_max', 'pathogen_breakdown')
+
+# Enough per well for the history table (positive rates, control checks)
+WELL_SUMMARY_COLUMNS = ('well_id', 'sample_name', 'fluorophore', 'amplitude', 'is_good_scurve',
+                        'r2_score', 'steepness', 'midpoint', 'baseline', 'cq_value',
+                        'curve_classification', 'threshold_value', 'cqj', 'calcj')
+
+WELL_CURVE_COLUMNS = ('raw_cycles', 'raw_rfu', 'fitted_curve', 'curve_data', 'fit_parameters',
+                      'parameter_errors', 'anomalies', 'thresholds')
+
+_JSON_LIST_FIELDS = ('raw_cycles', 'raw_rfu', 'fitted_curve', 'fit_parameters', 'parameter_errors', 'anomalies')
+_JSON_DICT_FIELDS = ('curve_classification', 'thresholds', 'cqj', 'calcj')
+
+
+class InvalidCursor(ValueError):
+    """Raised for a malformed pagination cursor."""
+
+
+def encode_cursor(session_row):
+    ts = session_row.get('upload_timestamp')
+    payload = [ts.isoformat() if ts else None, session_row['id']]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        ts, session_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(ts) if ts else None), int(session_id)
+    except Exception as e:
+        raise InvalidCursor(f'Invalid cursor: {cursor}') from e
+
+
+def parse_page_size(value):
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(value), MAX_PAGE_SIZE))
+
+
+def parse_well_row(row):
+    """Well row -> dict as served by /sessions (JSON columns decoded, coordinate added)."""
+    well_dict = dict(row)
+    well_id = well_dict['well_id']
+    well_dict['coordinate'] = well_id.split('_')[0] if '_' in well_id else well_id
+    if 'curve_data' in well_dict:
+        # Packed rows (QPCR_CURVE_STORAGE=packed) keep the arrays in one blob
+        well_dict.update(decode_curve_columns(well_dict, well_dict.pop('curve_data')))
+
+    for field in _JSON_LIST_FIELDS + _JSON_DICT_FIELDS:
+        if isinstance(well_dict.get(field), str):
+            try:
+                well_dict[field] = json.loads(well_dict[field])
+            except (json.JSONDecodeError, TypeError):
+                well_dict[field] = [] if field in _JSON_LIST_FIELDS else {}
+    return well_dict
+
+
+def session_summary(session):
+    upload_timestamp = session['upload_timestamp']
+    return {
+        'id': session['id'],
+        'filename': session['filename'],
+        'display_name': session['filename'],  # Add display_name for frontend compatibility
+        'upload_timestamp': upload_timestamp.isoformat() if upload_timestamp else None,
+        'total_wells': session['total_wells'] or 0,
+        'good_curves': session['good_curves'] or 0,
+        'success_rate': session['success_rate'] or 0.0,
+        'cycle_count': session['cycle_count'] or 0,
+        'cycle_min': session['cycle_min'] or 0,
+        'cycle_max': session['cycle_max'] or 0,
+        'pathogen_breakdown': session['pathogen_breakdown'] or '',
+    }
+
+
+def _page_filter(after):
+    """WHERE clause selecting sessions that sort after the cursor position."""
+    if after is None:
+        return '', ()
+    ts, session_id = after
+    if ts is None:
+        # NULL timestamps sort last under DESC, so only lower ids remain
+        return 'WHERE upload_timestamp IS NULL AND id < %s', (session_id,)
+    return ('WHERE (upload_timestamp < %s OR (upload_timestamp = %s AND id < %s) '
+            'OR upload_timestamp IS NULL)', (ts, ts, session_id))
+
+
+def fetch_session_page(cursor, limit=DEFAULT_PAGE_SIZE, after=None, include_wells=True):
+    """
+    Fetch one page of sessions (newest first) with a dict cursor.
+
+    Args:
+        cursor: DB-API cursor returning dict rows (mysql.connector dictionary=True)
+        limit: sessions per page
+        after: decoded cursor (upload_timestamp, id) of the previous page's last session
+        include_wells: attach summary well rows (individual_results / well_results)
+
+    Returns:
+        (sessions, next_cursor) - next_cursor is None on the last page
+    """
+    where, params = _page_filter(after)
+    page_sql = (f"SELECT {', '.join(SESSION_COLUMNS)} FROM analysis_sessions {where} "
+                f"ORDER BY upload_timestamp DESC, id DESC LIMIT %s")
+    params = params + (limit + 1,)
+
+    if include_wells:
+        session_cols = ', '.join(f's.{c}' for c in SESSION_COLUMNS)
+        well_cols = ', '.join(f'w.{c} AS w_{c}' for c in WELL_SUMMARY_COLUMNS)
+        cursor.execute(f"""
+            SELECT {session_cols}, {well_cols}
+            FROM ({page_sql}) s
+            LEFT JOIN well_results w ON w.session_id = s.id
+            ORDER BY s.upload_timestamp DESC, s.id DESC, w.id
+        """, params)
+    else:
+        cursor.execute(page_sql, params)
+    rows = cursor.fetchall()
+
+    sessions = []
+    by_id = {}
+    for row in rows:
+        session = by_id.get(row['id'])
+        if session is None:
+            session = session_summary(row)
+            session['_row'] = row
+            if include_wells:
+                session['individual_results'] = {}
+                session['well_results'] = []  # Add for frontend compatibility
+            by_id[row['id']] = session
+            sessions.append(session)
+        if include_wells and row.get('w_well_id') is not None:
+            well = parse_well_row({c: row[f'w_{c}'] for c in WELL_SUMMARY_COLUMNS})
+            session['individual_results'][well['well_id']] = well
+            session['well_results'].append(well)
+
+    next_cursor = None
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        next_cursor = encode_cursor(sessions[-1]['_row'])
+    for session in sessions:
+        del session['_row']
+    return sessions, next_cursor
+
+
+def fetch_session_wells(cursor, session_id):
+    """All wells of one session including curve arrays, in storage order."""
+    columns = ', '.join(WELL_SUMMARY_COLUMNS + WELL_CURVE_COLUMNS)
+    cursor.execute(f"SELECT {columns} FROM well_results WHERE session_id = %s ORDER BY id",
+                   (session_id,))
+    return [parse_well_row(row) for row in cursor.fetchall()]
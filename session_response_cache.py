@@ -0,0 +1,165 @@
+"""
+Conditional GET and a response cache for single-session payloads.
+
+GET /sessions/<id> and /sessions/<id>/wells used to load every well, decode
+every JSON column and serialize the result on each request, although a saved
+session rarely changes. Now:
+
+    - Every write to a session's wells or metadata bumps its row in
+      session_content_versions (bump_session_version) inside the writing
+      transaction. All worker processes see the new version.
+    - A request first reads the session's content token: its version plus
+      upload_timestamp, one primary-key join. The ETag is derived from the
+      token, so an If-None-Match that still matches gets a 304 without
+      loading the session.
+    - Serialized response bodies are kept per (endpoint, session id, token)
+      in a per-process LRU bounded by QPCR_SESSION_RESPONSE_CACHE_MB
+      (default 64, 0 disables the LRU but keeps ETags).
+
+A deleted session has no token, so it is never served from the cache.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from flask import current_app, jsonify, request
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from log_utils import get_logger
+from models import db, AnalysisSession, SessionContentVersion
+
+logger = get_logger("session_response_cache")
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get('QPCR_SESSION_RESPONSE_CACHE_MB', '64')) * 1024 * 1024)
+
+# DB-API variant of the version bump for callers on a raw mysql connection
+BUMP_VERSION_SQL = ("INSERT INTO session_content_versions (session_id, version) VALUES (%s, 1) "
+                    "ON DUPLICATE KEY UPDATE version = version + 1")
+
+
+class SessionResponseCache:
+    """Thread-safe LRU of serialized JSON bodies, bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (endpoint, session_id, token) -> bytes
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.not_modified = 0
+        self.misses = 0
+
+    @staticmethod
+    def etag(endpoint, session_id, token):
+        return f"{endpoint}-{session_id}-{token}"
+
+    def lookup(self, endpoint, session_id, token):
+        """
+        Response for a request that can be answered without loading the session:
+        304 when If-None-Match carries the current ETag, 200 from a cached body,
+        otherwise None.
+        """
+        if token is None:
+            return None
+        etag = self.etag(endpoint, session_id, token)
+        if etag in request.if_none_match:
+            with self._lock:
+                self.not_modified += 1
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        key = (endpoint, session_id, token)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return self._response(body, etag)
+
+    def respond(self, endpoint, session_id, token, payload):
+        """jsonify(payload), with an ETag and kept in the LRU when the session had a token."""
+        response = jsonify(payload)
+        if token is None:
+            return response
+        body = response.get_data()
+        if 0 < len(body) <= self.max_bytes:
+            key = (endpoint, session_id, token)
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = body
+                    self._bytes += len(body)
+                    while self._bytes > self.max_bytes:
+                        _, evicted = self._entries.popitem(last=False)
+                        self._bytes -= len(evicted)
+        response.set_etag(self.etag(endpoint, session_id, token))
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def _response(self, body, etag):
+        response = current_app.response_class(body, mimetype=current_app.json.mimetype)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    def invalidate(self, session_id=None):
+        """Drop this process's entries for one session (None: all); other processes miss on the new token."""
+        with self._lock:
+            for key in [key for key in self._entries if session_id is None or key[1] == session_id]:
+                self._bytes -= len(self._entries.pop(key))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'not_modified': self.not_modified,
+                'misses': self.misses,
+            }
+
+
+session_responses = SessionResponseCache()
+
+
+def session_content_token(session_id):
+    """'<version>.<upload timestamp>' for an existing session, None if it is missing or the lookup fails."""
+    try:
+        row = (db.session.query(AnalysisSession.upload_timestamp, SessionContentVersion.version)
+               .outerjoin(SessionContentVersion, SessionContentVersion.session_id == AnalysisSession.id)
+               .filter(AnalysisSession.id == session_id).first())
+    except Exception as e:
+        logger.warning(f"Session {session_id} content version lookup failed, serving uncached: {e}")
+        db.session.rollback()
+        return None
+    if row is None:
+        return None
+    uploaded = row.upload_timestamp.strftime('%Y%m%d%H%M%S%f') if row.upload_timestamp else '0'
+    return f"{row.version or 0}.{uploaded}"
+
+
+def bump_session_version(session_id, cursor=None):
+    """
+    Mark a session's content as changed, inside the caller's transaction: on
+    ``cursor`` (raw mysql connection) or on db.session. The caller commits.
+    """
+    if session_id is None:
+        return
+    session_id = int(session_id)
+    if cursor is not None:
+        cursor.execute(BUMP_VERSION_SQL, (session_id,))
+    else:
+        bumped = SessionContentVersion.version + 1
+        if db.session.get_bind().dialect.name == 'sqlite':  # test databases
+            statement = sqlite_insert(SessionContentVersion).values(session_id=session_id, version=1)
+            statement = statement.on_conflict_do_update(index_elements=['session_id'], set_={'version': bumped})
+        else:
+            statement = mysql_insert(SessionContentVersion).values(session_id=session_id, version=1)
+            statement = statement.on_duplicate_key_update(version=bumped)
+        db.session.execute(statement)
+    session_responses.invalidate(session_id)
@@ -37,6 +37,14 @@ def set_training_enabled_by_default():
         """)
         print("✅ Table default updated to TRUE")
         
+        # Change counter polled by MLConfigManager (DDL commits implicitly, so before the updates)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ml_config_version (
+                id TINYINT PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0
+            ) ENGINE=InnoDB
+        """)
+        
         # Step 2: Enable training for all existing pathogen-fluorophore combinations
         print("🔄 Enabling training for existing pathogen combinations...")
         cursor.execute("""
@@ -85,6 +93,12 @@ def set_training_enabled_by_default():
         
         print(f"✅ Processed {len(common_combinations)} common pathogen-fluorophore combinations")
         
+        # Bump the config version in the same transaction so running apps reload their snapshot
+        cursor.execute("""
+            INSERT INTO ml_config_version (id, version) VALUES (1, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+        """)
+        
         # Step 4: Verify the changes
         print("🔍 Verifying changes...")
         cursor.execute("""
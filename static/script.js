@@ -2857,20 +2857,40 @@ async function analyzeSingleChannel(data, fluorophore, experimentPattern) {
         // Skip backend channel marking since polling removed
         // console.log(`🔍 SINGLE-CHANNEL - Analyzing ${fluorophore} channel`);
         
-        // Prepare data for backend analysis
-        const analysisData = prepareAnalysisData(data);
-        
-        // Convert samplesData back to CSV string for backend SQL integration
-        let samplesDataCsv = null;
-        if (samplesData && samplesData.data) {
-            // Convert array of arrays back to CSV string
-            samplesDataCsv = samplesData.data.map(row => row.join(',')).join('\n');
-        }
-        
-        const payload = {
-            analysis_data: analysisData,
-            samples_data: samplesDataCsv
+        // Upload the original CFX files when available; the server parses them (/analyze/upload).
+        // Otherwise fall back to the client-parsed JSON payload for /analyze.
+        const amplificationFile = amplificationFiles[fluorophore]?.file;
+        let analyzeUrl = '/analyze';
+        let requestBody;
+        const requestHeaders = {
+            'X-Filename': amplificationFiles[fluorophore]?.fileName || `${fluorophore}.csv`,
+            'X-Fluorophore': fluorophore,
+            'X-Timestamp': new Date().toISOString() // Help backend track timing
         };
+        if (amplificationFile) {
+            analyzeUrl = '/analyze/upload';
+            requestBody = new FormData();
+            requestBody.append('amplification', amplificationFile);
+            if (samplesData && samplesData.file) {
+                requestBody.append('summary', samplesData.file);
+            }
+        } else {
+            // Prepare data for backend analysis
+            const analysisData = prepareAnalysisData(data);
+            
+            // Convert samplesData back to CSV string for backend SQL integration
+            let samplesDataCsv = null;
+            if (samplesData && samplesData.data) {
+                // Convert array of arrays back to CSV string
+                samplesDataCsv = samplesData.data.map(row => row.join(',')).join('\n');
+            }
+            
+            requestHeaders['Content-Type'] = 'application/json';
+            requestBody = JSON.stringify({
+                analysis_data: analysisData,
+                samples_data: samplesDataCsv
+            });
+        }
         
         // console.log(`🔍 SINGLE-CHANNEL - Sending ${fluorophore} data to backend`, {
             // analysisDataLength: Object.keys(analysisData || {}).length,
@@ -2932,15 +2952,10 @@ async function analyzeSingleChannel(data, fluorophore, experimentPattern) {
                 }
             }, 1000);
             
-            const response = await fetch('/analyze', {
+            const response = await fetch(analyzeUrl, {
                 method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'X-Filename': amplificationFiles[fluorophore]?.fileName || `${fluorophore}.csv`,
-                    'X-Fluorophore': fluorophore,
-                    'X-Timestamp': new Date().toISOString() // Help backend track timing
-                },
-                body: JSON.stringify(payload),
+                headers: requestHeaders,
+                body: requestBody,
                 signal: controller.signal,
                 credentials: 'same-origin' // Ensure session cookies are sent
             });
@@ -8332,6 +8347,75 @@ async function saveCombinedSession(filename, combinedResults, fluorophores = [])
     }
 }
 
+// Session history pages shown so far (newest first); "Load more" appends the next page
+const sessionHistoryState = { sessions: [], total: 0, nextCursor: null };
+
+// A stored pathogen_breakdown is usable unless it names Unknown or fluorophores instead of targets
+function hasUsablePathogenBreakdown(breakdown) {
+    if (!breakdown || breakdown.includes('Unknown')) return false;
+    return !['FAM:', 'HEX:', 'Cy5:', 'Texas Red:'].some(key => breakdown.includes(key));
+}
+
+// Fetch one page of the session history (session rows only, no wells). Legacy sessions
+// whose stored breakdown is unusable get their summary wells so it can be recalculated.
+async function fetchSessionHistory(fetchFn = fetch, { cursor = null, limit = null } = {}) {
+    const params = new URLSearchParams({ wells: 'none' });
+    if (cursor) params.set('cursor', cursor);
+    if (limit) params.set('limit', limit);
+    const response = await fetchFn(`/sessions?${params}`);
+    const page = await response.json();
+
+    const legacy = (page.sessions || []).filter(s => s.total_wells > 0 && !hasUsablePathogenBreakdown(s.pathogen_breakdown));
+    if (legacy.length > 0) {
+        params.set('wells', 'summary');
+        const summaryResponse = await fetchFn(`/sessions?${params}`);
+        const summaryPage = await summaryResponse.json();
+        const byId = new Map((summaryPage.sessions || []).map(s => [s.id, s]));
+        legacy.forEach(session => {
+            const summary = byId.get(session.id);
+            if (summary) {
+                session.well_results = summary.well_results;
+                session.individual_results = summary.individual_results;
+            }
+        });
+    }
+    return page;
+}
+
+// Id of the most recently uploaded session, or null when there is none
+async function fetchLatestSessionId(fetchFn = fetch) {
+    const page = await fetchSessionHistory(fetchFn, { limit: 1 });
+    return page.sessions && page.sessions.length > 0 ? page.sessions[0].id : null;
+}
+
+// Record a fetched history page; the first page resets the list
+function storeSessionHistoryPage(page, append = false) {
+    sessionHistoryState.sessions = append ? sessionHistoryState.sessions.concat(page.sessions) : [...page.sessions];
+    sessionHistoryState.total = page.total;
+    sessionHistoryState.nextCursor = page.next_cursor || null;
+    return sessionHistoryState.sessions;
+}
+
+async function loadMoreSessionHistory() {
+    if (!sessionHistoryState.nextCursor) return;
+    try {
+        const page = await fetchSessionHistory(authenticatedFetch, { cursor: sessionHistoryState.nextCursor });
+        if (!page.sessions) return;
+        const sessions = storeSessionHistoryPage(page, true);
+        displayAnalysisHistory(sessions);
+        validateAndUpdateUI(sessions);
+    } catch (error) {
+        // console.error('Error loading more history:', error);
+    }
+}
+
+// Load one session's wells including raw/fitted curve arrays
+async function fetchSessionWells(sessionId, fetchFn = fetch) {
+    const response = await fetchFn(`/sessions/${sessionId}/wells`);
+    const data = await response.json();
+    return data.individual_results || {};
+}
+
 function getLocalAnalysisHistory() {
     try {
         return JSON.parse(localStorage.getItem('qpcrAnalysisHistory') || '[]');
@@ -8343,19 +8427,21 @@ function getLocalAnalysisHistory() {
 async function loadAnalysisHistory() {
     try {
         // Try to load from server first
-        const response = await authenticatedFetch('/sessions');
-        const data = await response.json();
+        const data = await fetchSessionHistory(authenticatedFetch);
         
         if (data.sessions && data.sessions.length > 0) {
+            storeSessionHistoryPage(data);
             displayAnalysisHistory(data.sessions);
             // Always validate channel completeness and update UI after loading history
             validateAndUpdateUI(data.sessions);
             // --- Patch: If a session is loaded, ensure chart and selectors are initialized ---
-            // Find the most recent session with individual_results
-            const latestSession = data.sessions.find(s => s.individual_results && Object.keys(s.individual_results).length > 0);
+            // Find the most recent session with wells (pages are newest first)
+            const latestSession = data.sessions.find(s => s.total_wells > 0);
             if (latestSession) {
                 // 🛡️ PROTECTED: Only auto-load if not in fresh analysis mode
                 if (!window.freshAnalysisMode) {
+                    // History pages carry no wells; load this session's wells and curves
+                    latestSession.individual_results = await fetchSessionWells(latestSession.id, authenticatedFetch);
                     // Set current session ID for threshold updates
                     window.currentSessionId = latestSession.id;
                     // console.log(`🔍 SESSION-ID - Set current session ID: ${latestSession.id}`);
@@ -8400,10 +8486,10 @@ async function loadAnalysisHistory() {
 async function loadAnalysisHistoryOnly() {
     try {
         // Try to load from server first
-        const response = await fetch('/sessions');
-        const data = await response.json();
+        const data = await fetchSessionHistory();
         
         if (data.sessions && data.sessions.length > 0) {
+            storeSessionHistoryPage(data);
             displayAnalysisHistory(data.sessions);
             // Always validate channel completeness and update UI after loading history
             validateAndUpdateUI(data.sessions);
@@ -8712,8 +8798,7 @@ async function updatePathogenChannelStatusInBreakdown() {
         }
         
         // Fallback to database sessions check for loaded sessions
-        const response = await fetch('/sessions');
-        const data = await response.json();
+        const data = await fetchSessionHistory();
         
         if (data.sessions && data.sessions.length > 0) {
             // Filter sessions to only current experiment pattern to prevent mixing data
@@ -9055,14 +9140,18 @@ function createCombinedSession(experimentPattern, sessions) {
     // Calculate pathogen breakdown
     const pathogenBreakdown = calculatePathogenBreakdownFromSessions(sessions);
     
+    // History pages carry no wells; fall back to the stored session totals
+    const combinedWells = allWellResults.length || sessions.reduce((sum, s) => sum + (s.total_wells || 0), 0);
+    const combinedGood = allWellResults.length ? totalPositive : sessions.reduce((sum, s) => sum + (s.good_curves || 0), 0);
+    
     // Create combined session object
     return {
         id: `combined_${actualExperimentPattern}`,
         filename: actualExperimentPattern,  // Use recovered experiment pattern
         upload_timestamp: sortedSessions[0].upload_timestamp,
-        total_wells: allWellResults.length,
-        good_curves: totalPositive,
-        success_rate: allWellResults.length > 0 ? (totalPositive / allWellResults.length) * 100 : 0,
+        total_wells: combinedWells,
+        good_curves: combinedGood,
+        success_rate: combinedWells > 0 ? (combinedGood / combinedWells) * 100 : 0,
         cycle_min: Math.min(...sessions.map(s => s.cycle_min).filter(c => c)),
         cycle_max: Math.max(...sessions.map(s => s.cycle_max).filter(c => c)),
         cycle_count: sessions[0].cycle_count,
@@ -9161,6 +9250,12 @@ function calculatePathogenBreakdownFromSessions(sessions) {
             return;
         }
         
+        // Without wells (history pages) use the breakdown stored with the session
+        if (!session.well_results && hasUsablePathogenBreakdown(session.pathogen_breakdown)) {
+            fluorophoreStats[fluorophore] = session.pathogen_breakdown;
+            return;
+        }
+        
         let positive = 0;
         let total = 0; // Count only non-control wells
         
@@ -9228,12 +9323,7 @@ function calculatePositiveRate(session) {
     // console.log('🔍 HISTORY DEBUG - Session well_results length:', session.well_results?.length || 0);
 
     // Check if stored pathogen breakdown contains "Unknown" OR fluorophore names instead of pathogen targets
-    const hasUnknown = session.pathogen_breakdown && session.pathogen_breakdown.includes('Unknown');
-    const hasFluorophoreNames = session.pathogen_breakdown && 
-        (session.pathogen_breakdown.includes('FAM:') || session.pathogen_breakdown.includes('HEX:') || 
-         session.pathogen_breakdown.includes('Cy5:') || session.pathogen_breakdown.includes('Texas Red:'));
-
-    if (session.pathogen_breakdown && !hasUnknown && !hasFluorophoreNames) {
+    if (hasUsablePathogenBreakdown(session.pathogen_breakdown)) {
         // console.log('🔍 HISTORY DEBUG - Using valid stored pathogen_breakdown:', session.pathogen_breakdown);
         return session.pathogen_breakdown;
     }
@@ -9558,6 +9648,10 @@ function displayAnalysisHistory(sessions) {
                 `).join('')}
             </tbody>
         </table>
+        ${sessionHistoryState.nextCursor ? `
+        <div class="history-load-more" style="text-align: center; margin-top: 10px;">
+            <button onclick="loadMoreSessionHistory()" class="btn-small btn-primary">Load more (${sessionHistoryState.sessions.length} of ${sessionHistoryState.total})</button>
+        </div>` : ''}
     `;
     
     historyContent.innerHTML = tableHtml;
@@ -11041,10 +11135,7 @@ async function ensureAllExperimentStatistics() {
         // console.log('Checking for missing experiment statistics...');
         
         // Get all sessions to identify complete experiments
-        const sessionsResponse = await fetch('/sessions');
-        if (!sessionsResponse.ok) return;
-        
-        const sessionsData = await sessionsResponse.json();
+        const sessionsData = await fetchSessionHistory();
         const sessions = sessionsData.sessions || [];
         
         // Group sessions by experiment pattern to find complete experiments
@@ -13942,6 +14033,30 @@ function navigateModal(direction) {
     }
 }
 
+async function loadWellTrace(wellKey, container) {
+    if (!wellKey || !container) return;
+    try {
+        const response = await fetch(`/api/wells/${encodeURIComponent(wellKey)}/trace`);
+        if (!response.ok) return;  // tracing disabled on the server
+        const payload = await response.json();
+        const trace = (payload.traces || [])[0];
+        if (!trace || !trace.events.length || window.currentModalWellKey !== wellKey) return;
+
+        const details = document.createElement('details');
+        details.className = 'modal-well-trace';
+        const summary = document.createElement('summary');
+        summary.textContent = `Analysis trace (${trace.events.length} events, ${trace.session || 'unsaved'})`;
+        const log = document.createElement('pre');
+        log.textContent = trace.events.map(event => `[${event.source}] ${event.message}`).join('\n');
+        details.appendChild(summary);
+        details.appendChild(log);
+        container.querySelectorAll('.modal-well-trace').forEach(old => old.remove());
+        container.appendChild(details);
+    } catch (error) {
+        console.warn('Could not load well trace:', error);
+    }
+}
+
 function updateModalDetails(wellResult) {
     const modalDetails = document.getElementById('modalDetails');
     
@@ -14183,6 +14298,9 @@ function updateModalDetails(wellResult) {
         </div>
     `;
     
+    // Backend debug trace for this well (only when the server runs with QPCR_WELL_TRACE=1)
+    loadWellTrace(window.currentModalWellKey || wellResult.well_id, modalDetails);
+    
     // Update ML feedback interface with current well data
     if (window.mlFeedbackInterface) {
         // Prepare well data for ML interface
@@ -15630,10 +15748,9 @@ document.addEventListener('DOMContentLoaded', function() {
             // If still no session, try to get the latest session
             if (!window.currentSessionId) {
                 try {
-                    const response = await fetch('/sessions');
-                    const data = await response.json();
-                    if (data.sessions && data.sessions.length > 0) {
-                        window.currentSessionId = data.sessions[data.sessions.length - 1].id;
+                    const latestId = await fetchLatestSessionId();
+                    if (latestId) {
+                        window.currentSessionId = latestId;
                         console.log(`🔧 Using latest session ID: ${window.currentSessionId}`);
                     }
                 } catch (e) {
@@ -15685,10 +15802,9 @@ document.addEventListener('DOMContentLoaded', function() {
             // If still no session, try to get the latest session
             if (!window.currentSessionId) {
                 try {
-                    const response = await fetch('/sessions');
-                    const data = await response.json();
-                    if (data.sessions && data.sessions.length > 0) {
-                        window.currentSessionId = data.sessions[data.sessions.length - 1].id;
+                    const latestId = await fetchLatestSessionId();
+                    if (latestId) {
+                        window.currentSessionId = latestId;
                         console.log(`🔧 Using latest session ID for confirmation: ${window.currentSessionId}`);
                     }
                 } catch (e) {
@@ -0,0 +1,167 @@
+"""
+Synthetic CFX plates for benchmarks and tests.
+
+generate_plate() builds a reproducible (seeded) 96- or 384-well run with one
+to four channels. Every channel has the same sample layout:
+
+    - H/M/L standard controls and an NTC in the first column, duplicated in
+      the last column, named like the lab's controls (H-<test>-1, NTC-1, ...)
+    - patient wells with a mix of curve kinds per channel: clear positives,
+      negatives (baseline noise), noisy/spiky curves and late (Cq > 33) curves
+
+The plate can be handed to the analyzer directly (analysis_data) or written
+out as the CFX Manager exports the app ingests: one "Quantification
+Amplification Results" CSV per channel plus a "Quantification Summary" CSV
+with sample names and Cq values.
+"""
+
+import io
+
+import numpy as np
+
+CHANNELS = ('FAM', 'HEX', 'Texas Red', 'Cy5')
+TEST_CODE = 'BVPanelPCR3'  # fixed thresholds and H/M/L concentrations for all four channels
+PLATE_SHAPES = {96: ('ABCDEFGH', 12), 384: ('ABCDEFGHIJKLMNOP', 24)}
+
+CURVE_KINDS = ('positive', 'negative', 'noisy', 'late')
+CURVE_MIX = (0.35, 0.40, 0.15, 0.10)
+
+# Control midpoints (cycles) roughly 7 cycles apart like the 1e8/1e6/1e4 standards
+CONTROL_MIDPOINTS = {'H': 16.0, 'M': 23.0, 'L': 30.0}
+
+
+def _sigmoid(cycles, amplitude, steepness, midpoint, baseline):
+    return amplitude / (1 + np.exp(-steepness * (cycles - midpoint))) + baseline
+
+
+class SyntheticPlate:
+    """One synthetic CFX run: RFU per channel as (n_cycles, n_wells) arrays plus the sample sheet."""
+
+    def __init__(self, test_code, run_id, wells, channels, cycles, rfu, samples, kinds, cq):
+        self.test_code = test_code
+        self.run_id = run_id
+        self.wells = wells        # ['A1', 'A2', ...] in column order of the export
+        self.channels = channels  # ('FAM', ...)
+        self.cycles = cycles      # (n_cycles,) float64
+        self.rfu = rfu            # {channel: (n_cycles, n_wells) float64}
+        self.samples = samples    # {well: sample name}
+        self.kinds = kinds        # {channel: {well: 'H'/'M'/'L'/'NTC' or a CURVE_KINDS entry}}
+        self.cq = cq              # {channel: {well: instrument Cq or None}}
+
+    @property
+    def experiment(self):
+        return f"Ac{self.test_code}_{self.run_id}_CFX000000"
+
+    def filename(self, channel):
+        """Amplification export name, parsed by extract_test_code_from_filename like a real upload."""
+        return f"{self.experiment} -  Quantification Amplification Results_{channel}.csv"
+
+    def summary_filename(self):
+        return f"{self.experiment}_Quantification_Summary_0.csv"
+
+    def analysis_data(self, channel):
+        """{well: {'cycles': [...], 'rfu': [...]}} - the /analyze 'analysis_data' payload for one channel."""
+        cycles = self.cycles.tolist()
+        rfu = self.rfu[channel]
+        return {well: {'cycles': list(cycles), 'rfu': rfu[:, i].tolist()} for i, well in enumerate(self.wells)}
+
+    def amplification_csv(self, channel):
+        """CFX "Quantification Amplification Results" CSV text for one channel."""
+        out = io.StringIO()
+        out.write(',Cycle,' + ','.join(self.wells) + '\n')
+        rfu = self.rfu[channel]
+        for row, cycle in enumerate(self.cycles):
+            out.write(f',{int(cycle)},' + ','.join(repr(float(v)) for v in rfu[row]) + '\n')
+        return out.getvalue()
+
+    def summary_csv(self):
+        """CFX "Quantification Summary" CSV text (Well, Fluor, Sample, Cq) for every channel."""
+        out = io.StringIO()
+        out.write(',Well,Fluor,Target,Content,Sample,Cq,SQ\n')
+        for channel in self.channels:
+            for well in self.wells:
+                padded = f"{well[0]}{int(well[1:]):02d}"
+                kind = self.kinds[channel][well]
+                content = 'NTC' if kind == 'NTC' else ('Std' if kind in CONTROL_MIDPOINTS else 'Unkn')
+                cq = self.cq[channel][well]
+                out.write(f",{padded},{channel},,{content},{self.samples[well]},"
+                          f"{'NaN' if cq is None else f'{cq:.2f}'},NaN\n")
+        return out.getvalue()
+
+
+def _curve(rng, cycles, kind):
+    """RFU for one well of the given kind, and the Cq an instrument would report (None when negative)."""
+    n = len(cycles)
+    if kind in CONTROL_MIDPOINTS:
+        amplitude, steepness, midpoint = rng.uniform(4000, 6000), rng.uniform(0.7, 0.9), CONTROL_MIDPOINTS[kind]
+        midpoint += rng.normal(0, 0.3)
+        noise = 8.0
+    elif kind == 'positive':
+        amplitude, steepness, midpoint, noise = rng.uniform(1500, 8000), rng.uniform(0.5, 0.9), rng.uniform(17, 30), 12.0
+    elif kind == 'late':
+        amplitude, steepness, midpoint, noise = rng.uniform(400, 1500), rng.uniform(0.4, 0.7), rng.uniform(33, 38), 12.0
+    elif kind == 'noisy':
+        amplitude, steepness, midpoint, noise = rng.uniform(300, 1500), rng.uniform(0.3, 0.6), rng.uniform(20, 32), \
+            rng.uniform(60, 120)
+    else:  # negative and NTC: baseline-subtracted noise with a little drift
+        rfu = rng.normal(0, 10, n) + rng.uniform(-0.3, 0.3) * (cycles - cycles[0])
+        return rfu, None
+
+    rfu = _sigmoid(cycles, amplitude, steepness, midpoint, rng.uniform(-20, 20)) + rng.normal(0, noise, n)
+    if kind == 'noisy':
+        spikes = rng.choice(n, size=3, replace=False)
+        rfu[spikes] += rng.normal(0, 4 * noise, 3)
+    cq = midpoint - 2.0 / steepness
+    return rfu, (round(cq, 2) if cq < cycles[-1] else None)
+
+
+def generate_plate(wells=96, channels=1, cycles=40, seed=0, test_code=TEST_CODE):
+    """
+    Build a synthetic plate.
+
+    Args:
+        wells: 96 or 384
+        channels: number of channels (1-4, taken from CHANNELS in order) or a sequence of channel names
+        cycles: number of PCR cycles
+        seed: RNG seed; the same arguments always give the same plate
+    """
+    if wells not in PLATE_SHAPES:
+        raise ValueError(f"wells must be one of {sorted(PLATE_SHAPES)}, got {wells}")
+    if isinstance(channels, int):
+        if not 1 <= channels <= len(CHANNELS):
+            raise ValueError(f"channels must be 1-{len(CHANNELS)}, got {channels}")
+        channels = CHANNELS[:channels]
+    channels = tuple(channels)
+
+    rng = np.random.default_rng(seed)
+    rows, columns = PLATE_SHAPES[wells]
+    well_ids = [f"{row}{column}" for row in rows for column in range(1, columns + 1)]
+    cycle_values = np.arange(1, cycles + 1, dtype=float)
+
+    # Controls down the first and last column; everything else is a patient sample
+    controls = {}
+    for column in (1, columns):
+        for row, control in zip(rows, ('H', 'M', 'L', 'NTC')):
+            controls[f"{row}{column}"] = control
+    samples = {}
+    replicate = {}
+    for well in well_ids:
+        control = controls.get(well)
+        if control:
+            replicate[control] = replicate.get(control, 0) + 1
+            samples[well] = f"NTC-{replicate[control]}" if control == 'NTC' else \
+                f"{control}-{test_code}-{replicate[control]}"
+        else:
+            samples[well] = f"SYN{seed:03d}-{len(samples) + 1:04d}"
+
+    rfu, kinds, cq = {}, {}, {}
+    for channel in channels:
+        matrix = np.empty((cycles, wells))
+        kinds[channel], cq[channel] = {}, {}
+        for index, well in enumerate(well_ids):
+            kind = controls.get(well) or CURVE_KINDS[rng.choice(len(CURVE_KINDS), p=CURVE_MIX)]
+            matrix[:, index], cq[channel][well] = _curve(rng, cycle_values, kind)
+            kinds[channel][well] = kind
+        rfu[channel] = matrix
+
+    return SyntheticPlate(test_code, f"SYN{seed:04d}", well_ids, channels, cycle_values, rfu, samples, kinds, cq)
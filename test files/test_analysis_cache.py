@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test the content-addressed analysis result cache
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_cache import AnalysisResultCache, make_well_key
+
+
+def test_key_depends_on_content_and_context():
+    cycles = list(range(1, 41))
+    rfu = [float(i) for i in range(40)]
+    key = make_well_key(cycles, rfu, 'Cglab', 'FAM', '1')
+
+    assert key == make_well_key(cycles, list(rfu), 'Cglab', 'FAM', '1')
+    assert key != make_well_key(cycles, rfu[:-1] + [0.5], 'Cglab', 'FAM', '1')
+    assert key != make_well_key(cycles, rfu, 'Ngon', 'FAM', '1')
+    assert key != make_well_key(cycles, rfu, 'Cglab', 'HEX', '1')
+    assert key != make_well_key(cycles, rfu, 'Cglab', 'FAM', '2')
+
+
+def test_memory_lru_returns_copies_and_evicts():
+    cache = AnalysisResultCache(max_entries=2, disk_dir=None)
+    cache.put('a', {'r2_score': 0.99, 'anomalies': []})
+    cache.put('b', {'r2_score': 0.5})
+
+    hit = cache.get('a')
+    hit['anomalies'].append('mutated')
+    assert cache.get('a')['anomalies'] == []
+
+    cache.put('c', {'r2_score': 0.1})  # evicts 'b', the least recently used
+    assert cache.get('b') is None
+    stats = cache.stats()
+    assert stats['hits'] == 2 and stats['misses'] == 1 and stats['evictions'] == 1
+
+
+def test_disk_tier_survives_new_instance_and_is_trimmed():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AnalysisResultCache(max_entries=10, disk_dir=tmp, disk_max_bytes=4096)
+        for i in range(20):
+            cache.put(f'k{i}', {'raw_rfu': [float(i)] * 50})
+
+        assert cache.stats()['disk_bytes'] <= 4096
+        assert cache.stats()['disk_evictions'] > 0
+
+        fresh = AnalysisResultCache(max_entries=10, disk_dir=tmp, disk_max_bytes=4096)
+        assert fresh.get('k19') == {'raw_rfu': [19.0] * 50}
+        assert fresh.stats()['disk_hits'] == 1
+
+
+if __name__ == '__main__':
+    test_key_depends_on_content_and_context()
+    test_memory_lru_returns_copies_and_evicts()
+    test_disk_tier_survives_new_instance_and_is_trimmed()
+    print("Analysis cache tests: PASSED")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Check the vectorized plate fit against the per-well curve_fit path
+"""
+import os
+import sys
+
+import numpy as np
+from scipy.optimize import curve_fit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_sigmoid_fit import fit_sigmoid_batch, fit_wells_batch, initial_guess_and_bounds
+from qpcr_analyzer import sigmoid
+
+
+def _synthetic_plate(n_wells=48, seed=0):
+    rng = np.random.default_rng(seed)
+    cycles = np.arange(1, 41, dtype=float)
+    rows = []
+    for i in range(n_wells):
+        if i % 4 == 3:
+            rows.append(rng.normal(0, 10, len(cycles)))  # negative / noise-only well
+        else:
+            rows.append(sigmoid(cycles, rng.uniform(500, 5000), rng.uniform(0.3, 1.2),
+                                rng.uniform(15, 35), rng.uniform(-20, 50))
+                        + rng.normal(0, 10, len(cycles)))
+    return cycles, np.vstack(rows)
+
+
+def test_batch_fit_matches_curve_fit():
+    cycles, rfu = _synthetic_plate()
+    result = fit_sigmoid_batch(cycles, rfu)
+    p0, lower, upper = initial_guess_and_bounds(cycles, rfu)
+
+    converged = np.flatnonzero(result['converged'])
+    assert len(converged) >= 30
+
+    for i in converged:
+        popt, pcov = curve_fit(sigmoid, cycles, rfu[i], p0=p0[i], bounds=(lower[i], upper[i]),
+                               maxfev=5000, method='trf')
+        scale = np.abs(popt)
+        scale[3] = np.ptp(rfu[i])
+        assert np.all(np.abs(result['popt'][i] - popt) <= 1e-3 * scale)
+
+        fit = sigmoid(cycles, *popt)
+        r2 = 1 - np.sum((rfu[i] - fit) ** 2) / np.sum((rfu[i] - rfu[i].mean()) ** 2)
+        assert abs(result['r2'][i] - r2) <= 1e-6
+
+        perr = np.sqrt(np.diag(pcov))
+        assert np.all(np.abs(result['perr'][i] - perr) <= 1e-2 * perr)
+
+
+def test_fit_wells_batch_skips_unusable_wells():
+    cycles, rfu = _synthetic_plate(n_wells=4)
+    data = {f'A{i + 1}': {'cycles': list(cycles), 'rfu': list(rfu[i])} for i in range(4)}
+    data['B1'] = {'cycles': [1, 2, 3], 'rfu': [0, 0, 0]}
+    data['B2'] = {'cycles': list(cycles), 'rfu': [5.0] * len(cycles)}
+
+    fits = fit_wells_batch(data)
+
+    assert 'B1' not in fits and 'B2' not in fits
+    for well_id, (popt, pcov) in fits.items():
+        assert popt.shape == (4,) and pcov.shape == (4, 4)
+
+
+if __name__ == '__main__':
+    test_batch_fit_matches_curve_fit()
+    test_fit_wells_batch_skips_unusable_wells()
+    print("Batch sigmoid fit tests: PASSED")
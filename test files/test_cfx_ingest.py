@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test server-side parsing of uploaded CFX amplification and summary CSVs
+"""
+import gzip
+import io
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cfx_ingest import CFXParseError, parse_amplification_csv, parse_summary_csv, read_upload
+
+AMPLIFICATION = os.path.join(ROOT, 'test_files',
+                             'AcBVPanelPCR3_2576724_CFX366953 -  Quantification Amplification Results_Texas Red.csv')
+SUMMARY = os.path.join(ROOT, 'test_files', 'AcBVPanelPCR3_2576724_CFX366953_Quantification_Summary_0.csv')
+
+
+def _client_parse(text):
+    """What prepareAnalysisData() in static/script.js sends for the same file."""
+    rows = [line.split(',') for line in text.splitlines()]
+    cycle_col = next(i for i, h in enumerate(rows[0]) if 'cycle' in h.lower())
+    wells = {}
+    for col, header in enumerate(rows[0]):
+        if col == cycle_col or not header or header[0] not in 'ABCDEFGHIJKLMNOP' or not header[1:].isdigit():
+            continue
+        pairs = [(float(r[cycle_col]), float(r[col])) for r in rows[1:] if len(r) > col and r[cycle_col] and r[col]]
+        if pairs:
+            wells[header] = {'cycles': [c for c, _ in pairs], 'rfu': [v for _, v in pairs]}
+    return wells
+
+
+def test_amplification_matches_client_parser_and_accepts_gzip():
+    with open(AMPLIFICATION, 'rb') as f:
+        raw = f.read()
+    plate = parse_amplification_csv(io.BytesIO(raw))
+    wells = plate.to_wells()
+    assert wells == _client_parse(raw.decode())
+    assert plate.rfu.shape == (len(plate.cycles), len(plate.wells)) and 'A1' in wells
+    assert parse_amplification_csv(gzip.compress(raw)).to_wells() == wells
+
+
+def test_summary_and_errors():
+    with open(SUMMARY, 'rb') as f:
+        frame = parse_summary_csv(f)
+    assert list(frame.columns[1:3]) == ['Well', 'Fluor'] and frame.iloc[0, 1] == 'A01'
+    with pytest.raises(CFXParseError):
+        parse_amplification_csv(b'Well,Sample\nA1,x\n')
+    with pytest.raises(CFXParseError):
+        read_upload(io.BytesIO(gzip.compress(b'x' * 5000)), limit=1000)
+
+
+if __name__ == '__main__':
+    test_amplification_matches_client_parser_and_accepts_gzip()
+    test_summary_and_errors()
+    print("CFX ingest tests: PASSED")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test that queued compliance events are written in batches by one long-lived manager
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql_unified_compliance_manager import MySQLUnifiedComplianceManager
+from safe_compliance_tracker import SafeComplianceTracker
+
+
+class _RecordingManager:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def track_compliance_events(self, events):
+        if self.fail:
+            raise ConnectionError('database down')
+        self.batches.append([e['event_type'] for e in events])
+        return list(range(len(events)))
+
+
+def _tracker(manager, **kwargs):
+    created = []
+
+    def factory():
+        created.append(manager)
+        return manager
+
+    return SafeComplianceTracker(manager_factory=factory, flush_interval=0.2, **kwargs), created
+
+
+def test_events_of_one_request_share_a_batch_and_manager():
+    manager = _RecordingManager()
+    tracker, created = _tracker(manager)
+    for event_type in ('FILE_UPLOADED', 'CALCULATION_PERFORMED', 'ANALYSIS_COMPLETED', 'CONTROL_ANALYZED'):
+        assert tracker.track_event_safe(event_type, {'filename': 'run.csv'})
+    tracker.event_queue.join()
+    assert manager.batches == [['FILE_UPLOADED', 'CALCULATION_PERFORMED', 'ANALYSIS_COMPLETED', 'CONTROL_ANALYZED']]
+
+    tracker.track_ml_event_safe('ML_PREDICTION_MADE', {'well': 'A1'})
+    tracker.ml_queue.join()
+    assert len(created) == 1 and tracker.stats()['batches_written'] == 2
+    tracker.shutdown()
+
+
+def test_batch_size_limit_and_fallback_log():
+    manager = _RecordingManager(fail=True)
+    tracker, _ = _tracker(manager, batch_size=2)
+    fallback = []
+    tracker._log_compliance_event = fallback.append
+    for i in range(3):
+        tracker.track_event_safe('DATA_EXPORTED', {'n': i})
+    tracker.event_queue.join()
+    assert [e['event_data']['n'] for e in fallback] == [0, 1, 2]
+    assert tracker.stats()['events_to_fallback_log'] == 3 and tracker.stats()['batches_written'] == 0
+    tracker.shutdown()
+
+
+class _IdCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, sql, params):
+        self.params = params
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_inserted_ids_follow_row_order_for_repeated_hashes():
+    manager = MySQLUnifiedComplianceManager.__new__(MySQLUnifiedComplianceManager)
+    cursor = _IdCursor([(10, 'a'), (12, 'b'), (13, 'a')])  # id 11 taken by another writer
+    assert manager._inserted_event_ids(cursor, 10, ['a', 'b', 'a']) == [10, 12, 13]
+    assert cursor.params == [10, 'a', 'b']
+
+
+if __name__ == '__main__':
+    test_events_of_one_request_share_a_batch_and_manager()
+    test_batch_size_limit_and_fallback_log()
+    test_inserted_ids_follow_row_order_for_repeated_hashes()
+    print("Compliance batch writer tests: PASSED")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test calculate_cqj_batch against the per-well calculate_cqj, including the cycle-5 rules
+"""
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cqj_calcj_utils import calculate_cqj, calculate_cqj_batch
+
+
+def test_batch_matches_per_well_rules():
+    cycles = [float(c) for c in range(1, 11)]
+    wells = [
+        {'raw_cycles': cycles, 'raw_rfu': [0, 0, 0, 0, 0, 0, 5, 15, 30, 40]},      # normal crossing
+        {'raw_cycles': cycles, 'raw_rfu': [0, 0, 0, 0, 5, 20, 30, 40, 50, 60]},    # crossing at cycle 5
+        {'raw_cycles': cycles, 'raw_rfu': [20, 20, 20, 20, 20, 20, 25, 30, 30, 30]},  # above since start
+        {'raw_cycles': cycles, 'raw_rfu': [0, 0, 0, 0, 0, 10, 10, 10, 10, 10]},    # flat at threshold
+        {'raw_cycles': cycles, 'raw_rfu': [1] * 10},                               # never crosses
+        {'raw_cycles': cycles[:4], 'raw_rfu': [1, 2, 3, 40]},                      # too short
+        {'raw_cycles': cycles, 'raw_rfu': [0, 0, 0, 0, 0, None, 5, 15, 30, 40]},   # missing value
+        {'raw_cycles': [], 'raw_rfu': []},
+    ]
+    thresholds = [10, 10, 10, 10, 10, 10, 10, 10]
+    got = calculate_cqj_batch(wells, thresholds)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i, well in enumerate(wells):
+            if i != 6:  # calculate_cqj cannot compare None
+                assert got[i] == calculate_cqj(well, thresholds[i]), i
+    assert got[0] == 7.5 and got[1] == 5.0 + (10 - 5) / 15
+    assert got[6] == 7.5
+
+
+def test_per_well_thresholds_and_missing_threshold():
+    cycles = [float(c) for c in range(1, 21)]
+    rfu = [float(c * c) for c in range(1, 21)]
+    wells = [{'raw_cycles': cycles, 'raw_rfu': rfu}] * 3
+    got = calculate_cqj_batch(wells, [100.0, 200.0, None])
+    assert got[0] == 10.0 and 14.0 < got[1] < 15.0 and got[2] is None
+    assert calculate_cqj_batch([], []) == []
+
+
+if __name__ == '__main__':
+    test_batch_matches_per_well_rules()
+    test_per_well_thresholds_and_missing_threshold()
+    print("CQJ batch tests: PASSED")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test packed curve storage round trips and the JSON/blob precedence rules
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from curve_codec import CurveCodecError, decode_curve_columns, pack_curves, unpack_curves
+
+
+def test_round_trip_with_missing_values():
+    blob = pack_curves({'raw_cycles': list(range(1, 41)), 'raw_rfu': [100.25, None, float('nan'), 3e4],
+                        'fitted_curve': json.dumps([1.5, 2.5])})
+    curves = unpack_curves(blob)
+    assert curves['raw_cycles'] == [float(c) for c in range(1, 41)]
+    assert curves['raw_rfu'] == [100.25, None, None, 3e4]
+    assert curves['fitted_curve'] == [1.5, 2.5]
+
+
+def test_json_columns_take_precedence_over_blob():
+    blob = pack_curves({'raw_cycles': [1, 2], 'raw_rfu': [5, 6], 'fitted_curve': [7, 8]})
+    curves = decode_curve_columns({'raw_cycles': None, 'raw_rfu': '[9, 10]', 'fitted_curve': None}, blob)
+    assert curves == {'raw_cycles': [1.0, 2.0], 'raw_rfu': [9, 10], 'fitted_curve': [7.0, 8.0]}
+
+    legacy = decode_curve_columns({'raw_cycles': '[1, 2]', 'raw_rfu': 'not json', 'fitted_curve': None}, None)
+    assert legacy == {'raw_cycles': [1, 2], 'raw_rfu': [], 'fitted_curve': []}
+
+
+def test_corrupt_blob():
+    blob = pack_curves({'raw_rfu': [1.0, 2.0]})
+    for bad in (blob[:-3], b'XX' + blob[2:], blob[:3]):
+        try:
+            unpack_curves(bad)
+            assert False, 'expected CurveCodecError'
+        except CurveCodecError:
+            pass
+    assert decode_curve_columns({}, blob[:-3])['raw_rfu'] == []
+
+
+if __name__ == '__main__':
+    test_round_trip_with_missing_values()
+    test_json_columns_take_precedence_over_blob()
+    test_corrupt_blob()
+    print("Curve codec tests: PASSED")
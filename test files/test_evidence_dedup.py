@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test compliance evidence dedup keys and the one-time backfill of existing rows
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql_unified_compliance_manager import (backfill_evidence_dedup_keys, ensure_evidence_dedup_key,
+                                              evidence_dedup_key)
+
+
+def test_key_per_file_and_fluorophore_or_hash():
+    run_fam = {'filename': 'run.csv', 'fluorophore': 'FAM', 'wells': 96}
+    assert evidence_dedup_key('CFR_11_10_A', run_fam, 'h1') == \
+        evidence_dedup_key('CFR_11_10_A', dict(run_fam, wells=48), 'h2')
+    assert evidence_dedup_key('CFR_11_10_A', run_fam, 'h1') != \
+        evidence_dedup_key('CFR_11_10_A', dict(run_fam, fluorophore='HEX'), 'h1')
+    assert evidence_dedup_key('CFR_11_10_A', run_fam, 'h1') != evidence_dedup_key('CFR_11_10_C', run_fam, 'h1')
+    assert evidence_dedup_key('ACCESS_LOGGING', {'user': 'a'}, 'h1') != \
+        evidence_dedup_key('ACCESS_LOGGING', {'user': 'a'}, 'h2')
+
+
+class _EvidenceTable:
+    """compliance_evidence rows behind a cursor that enforces the unique dedup_key."""
+
+    def __init__(self, rows):
+        self.rows = rows  # id -> [requirement_id, evidence_data, evidence_hash, dedup_key]
+        self.commits = 0
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+    def execute(self, sql, params):
+        if sql.strip().startswith('SELECT'):
+            last_id, limit = params
+            ids = sorted(i for i, row in self.rows.items() if i > last_id and row[3] is None)[:limit]
+            self._result = [(i, *self.rows[i][:3]) for i in ids]
+        else:
+            key, evidence_id = params
+            taken = any(row[3] == key for row in self.rows.values())
+            self.rowcount = 0 if taken else 1
+            if not taken:
+                self.rows[evidence_id][3] = key
+
+    def fetchall(self):
+        return self._result
+
+
+def test_backfill_keys_oldest_row_of_each_duplicate_group():
+    analysis = json.dumps({'filename': 'run.csv', 'fluorophore': 'FAM'})
+    table = _EvidenceTable({
+        1: ['CFR_11_10_A', analysis, 'h1', None],
+        2: ['CFR_11_10_A', analysis, 'h2', None],       # same file + fluorophore as row 1
+        3: ['ACCESS_LOGGING', '{"user": "a"}', 'h3', None],
+        4: ['ACCESS_LOGGING', 'not json', 'h4', None],
+    })
+    keyed, duplicates = backfill_evidence_dedup_keys(table, batch_size=3)
+    assert (keyed, duplicates) == (3, 1)
+    assert table.rows[2][3] is None and all(table.rows[i][3] for i in (1, 3, 4))
+    assert table.commits == 2
+
+
+class _SchemaConnection:
+    """Connection that answers the dedup_key column check and records the other statements."""
+
+    def __init__(self, has_column):
+        self.has_column = has_column
+        self.statements = []
+        self.commits = 0
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+    def execute(self, sql, params=None):
+        if 'information_schema' not in sql:
+            self.statements.append(' '.join(sql.split()))
+
+    def fetchone(self):
+        return (int(self.has_column),)
+
+
+def test_ensure_adds_column_and_leaves_backfill_to_migration():
+    conn = _SchemaConnection(has_column=False)
+    assert ensure_evidence_dedup_key(conn) is True
+    assert len(conn.statements) == 1 and conn.statements[0].startswith('ALTER TABLE compliance_evidence')
+    assert conn.commits == 1
+
+    conn = _SchemaConnection(has_column=True)
+    assert ensure_evidence_dedup_key(conn) is False
+    assert conn.statements == [] and conn.commits == 0
+
+
+if __name__ == '__main__':
+    test_key_per_file_and_fluorophore_or_hash()
+    test_backfill_keys_oldest_row_of_each_duplicate_group()
+    test_ensure_adds_column_and_leaves_backfill_to_migration()
+    print("Evidence dedup tests: PASSED")
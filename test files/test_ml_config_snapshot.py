@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the in-memory ML config snapshot and its version-driven refresh
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_config_manager import MLConfigSnapshot, VersionedSnapshotCache
+
+PATHOGEN_ROWS = [
+    {'pathogen_code': 'Cglab', 'fluorophore': 'FAM', 'ml_enabled': 1, 'confidence_threshold': 0.7},
+    {'pathogen_code': 'Ngon', 'fluorophore': 'FAM', 'ml_enabled': 0, 'confidence_threshold': 0.7},
+    {'pathogen_code': 'Ngon', 'fluorophore': 'HEX', 'ml_enabled': 1, 'confidence_threshold': 0.8},
+]
+SYSTEM_ROWS = [
+    {'config_key': 'ml_global_enabled', 'config_value': 'true', 'data_type': 'string'},
+    {'config_key': 'min_training_examples', 'config_value': '10', 'data_type': 'integer'},
+    {'config_key': 'ml_default_enabled', 'config_value': 'Yes', 'data_type': 'boolean'},
+    {'config_key': 'thresholds', 'config_value': '{"FAM": 0.5}', 'data_type': 'json'},
+]
+
+
+def test_snapshot_lookups():
+    snapshot = MLConfigSnapshot(3, PATHOGEN_ROWS, SYSTEM_ROWS)
+    assert snapshot.is_ml_enabled('Cglab', 'FAM') and not snapshot.is_ml_enabled('Ngon', 'FAM')
+    assert snapshot.is_ml_enabled('Ngon', 'HEX') and not snapshot.is_ml_enabled('Ngon', 'Cy5')
+    assert not snapshot.is_ml_enabled('Unknown', 'FAM') and not snapshot.is_ml_enabled('Ngon')
+    assert [row['fluorophore'] for row in snapshot.pathogen_configs('Ngon')] == ['FAM', 'HEX']
+    assert snapshot.pathogen_configs('Ngon', 'HEX')[0]['confidence_threshold'] == 0.8
+    assert [(row['pathogen_code'], row['fluorophore']) for row in snapshot.enabled_configs()] == [
+        ('Cglab', 'FAM'), ('Ngon', 'HEX')]
+
+    assert snapshot.system_value('ml_global_enabled') == 'true'
+    assert snapshot.system_value('min_training_examples') == 10
+    assert snapshot.system_value('ml_default_enabled') is True
+    assert snapshot.system_value('missing', 'fallback') == 'fallback'
+
+    # Callers get copies, so they cannot change the shared snapshot
+    snapshot.system_value('thresholds')['FAM'] = 0.9
+    snapshot.all_configs()[0]['ml_enabled'] = 0
+    assert snapshot.system_value('thresholds') == {'FAM': 0.5} and snapshot.is_ml_enabled('Cglab', 'FAM')
+
+
+def test_cache_reloads_only_when_version_moves():
+    state = {'version': 1, 'now': 0.0, 'loads': 0, 'polls': 0}
+
+    def load():
+        state['loads'] += 1
+        return MLConfigSnapshot(state['version'], PATHOGEN_ROWS, SYSTEM_ROWS)
+
+    def read_version():
+        state['polls'] += 1
+        if state['version'] is None:
+            raise ConnectionError('database down')
+        return state['version']
+
+    cache = VersionedSnapshotCache(load, read_version, poll_seconds=1.0, clock=lambda: state['now'])
+    first = cache.get()
+    assert cache.get() is first and (state['loads'], state['polls']) == (1, 0)
+
+    state['now'] = 1.5  # poll interval elapsed, version unchanged
+    assert cache.get() is first and (state['loads'], state['polls']) == (1, 1)
+
+    state['version'] = 2  # another worker wrote; noticed on the next poll
+    assert cache.get() is first
+    state['now'] = 3.0
+    second = cache.get()
+    assert second.version == 2 and state['loads'] == 2
+
+    cache.invalidate()  # this process wrote; reload without waiting for a poll
+    assert cache.get() is not second and state['loads'] == 3
+
+    state['version'] = None
+    state['now'] = 5.0
+    assert cache.get().version == 2  # poll failure keeps the snapshot in hand
+
+    # Nothing to fall back on: the caller sees the error
+    with pytest.raises(ConnectionError):
+        VersionedSnapshotCache(read_version, read_version).get()
+
+
+if __name__ == '__main__':
+    test_snapshot_lookups()
+    test_cache_reloads_only_when_version_moves()
+    print("ML config snapshot tests: PASSED")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test deferred loading of the shared ML classifier and memory-mapped model files
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ml_curve_classifier import LazyMLClassifier, MLCurveClassifier
+
+
+def test_import_does_not_load_sklearn_or_model():
+    script = ("import sys, ml_curve_classifier as m; "
+              "print(m.ml_classifier.loaded, 'sklearn.ensemble' in sys.modules)")
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True,
+                            check=True).stdout.split()
+    assert output == ['False', 'False']
+
+
+def test_lazy_classifier_loads_once_on_first_use():
+    built = []
+    seen = []
+
+    def loader():
+        built.append(1)
+        classifier = MLCurveClassifier()
+        classifier.training_data = [{'well_id': 'A1'}]
+        return classifier
+
+    lazy = LazyMLClassifier(loader)
+    lazy.when_loaded(lambda classifier: seen.append(len(classifier.training_data)))
+    assert not lazy.loaded and built == []
+
+    assert len(lazy.training_data) == 1 and lazy.model_trained is False
+    lazy.model_trained = True
+    assert lazy.load().model_trained is True and built == [1] and seen == [1]
+
+    lazy.when_loaded(lambda classifier: seen.append('late'))
+    assert seen == [1, 'late']
+
+
+def test_saved_model_round_trips_memory_mapped():
+    rng = np.random.default_rng(0)
+    trained = MLCurveClassifier()
+    X = rng.normal(size=(60, len(trained.feature_names)))
+    y = np.array(['POSITIVE', 'NEGATIVE'] * 30)
+    trained.scaler.fit(X)
+    trained.model.fit(trained.scaler.transform(X), y)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            trained.save_model()
+            trained.save_model()  # replaces the file rather than rewriting it in place
+            assert os.listdir(workdir) == ['ml_curve_classifier.pkl']
+
+            loaded = MLCurveClassifier()
+            assert loaded.load_model() and loaded.model_trained
+            assert isinstance(loaded.scaler.mean_, np.memmap)
+            assert np.array_equal(loaded.model.predict_proba(loaded.scaler.transform(X)),
+                                  trained.model.predict_proba(trained.scaler.transform(X)))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    test_import_does_not_load_sklearn_or_model()
+    test_lazy_classifier_loads_once_on_first_use()
+    test_saved_model_round_trips_memory_mapped()
+    print("ML lazy loading tests: PASSED")
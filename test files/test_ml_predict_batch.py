@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Check that batched ML inference gives the same answers as per-well prediction
+"""
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ml_validation_tracker
+from ml_curve_classifier import MLCurveClassifier
+
+
+def _sigmoid(x, L, k, x0, B):
+    return L / (1 + np.exp(-k * (x - x0))) + B
+
+
+def _wells(n=24, seed=0):
+    rng = np.random.default_rng(seed)
+    cycles = np.arange(1, 41, dtype=float)
+    wells = {}
+    for i in range(n):
+        amplitude = rng.uniform(50, 3000)
+        rfu = _sigmoid(cycles, amplitude, rng.uniform(0.3, 1.0), rng.uniform(18, 32), 0) + rng.normal(0, 10, 40)
+        wells[f'A{i + 1}'] = {
+            'rfu': list(rfu),
+            'cycles': list(cycles),
+            'metrics': {'r2_score': rng.uniform(0.2, 0.99), 'amplitude': amplitude, 'snr': rng.uniform(1, 20),
+                        'steepness': 0.0, 'midpoint': 25.0, 'baseline': 0.0, 'cqj': 20.0},
+            'pathogen': 'Cglab'
+        }
+    return wells
+
+
+def _trained_classifier(wells):
+    classifier = MLCurveClassifier()
+    with contextlib.redirect_stdout(io.StringIO()):
+        X = np.array([[f[name] for name in classifier.feature_names] for f in
+                      (classifier.extract_advanced_features(w['rfu'], w['cycles'], w['metrics'])
+                       for w in wells.values())])
+    y = np.random.default_rng(1).choice(['NEGATIVE', 'POSITIVE', 'SUSPICIOUS'], len(X))
+    classifier.scaler = StandardScaler().fit(X)
+    classifier.model = RandomForestClassifier(n_estimators=5, random_state=0).fit(classifier.scaler.transform(X), y)
+    classifier.model_trained = True
+    classifier.pathogen_models = {}
+    classifier.training_data = [{}] * 120
+    return classifier
+
+
+def test_predict_batch_matches_predict_classification(monkeypatch):
+    monkeypatch.setattr(ml_validation_tracker.ml_tracker, 'track_model_prediction', lambda **kwargs: None)
+    wells = _wells()
+    classifier = _trained_classifier(wells)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        single = {well_id: classifier.predict_classification(w['rfu'], w['cycles'], w['metrics'], w['pathogen'], well_id)
+                  for well_id, w in wells.items()}
+        batch = classifier.predict_batch(wells)
+
+    assert list(batch) == list(wells)
+    assert batch == single
+    assert any(r['method'].startswith('ML') for r in batch.values())
+
+
+def test_predict_batch_falls_back_when_model_fails(monkeypatch):
+    monkeypatch.setattr(ml_validation_tracker.ml_tracker, 'track_model_prediction', lambda **kwargs: None)
+    wells = _wells(n=4)
+    classifier = _trained_classifier(wells)
+    classifier.scaler = None  # transform raises for the whole group
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        batch = classifier.predict_batch(wells)
+        expected = {well_id: classifier.fallback_classification(w['metrics']) for well_id, w in wells.items()}
+
+    assert batch == expected
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
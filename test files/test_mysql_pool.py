@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test the shared connection pool's checkout, overflow, timeout and health-check logic
+"""
+import gc
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql_pool import ConnectionPool, PoolTimeoutError
+
+
+class _FakeConnection:
+    """Records what the pool does to a connection (mysql.connector-like API)."""
+
+    def __init__(self):
+        self.in_transaction = False
+        self.alive = True
+        self.closed = False
+        self.rollbacks = 0
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise OSError('server has gone away')
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+def _pool(**kwargs):
+    opened = []
+
+    def connect(**_):
+        conn = _FakeConnection()
+        opened.append(conn)
+        return conn
+
+    options = dict(size=1, max_overflow=1, timeout=0.2, ping_after=0, recycle=0)
+    options.update(kwargs)
+    return ConnectionPool({'host': 'db', 'user': 'qpcr'}, connect_fn=connect, **options), opened
+
+
+def test_connections_are_reused_and_rolled_back():
+    pool, opened = _pool()
+    conn = pool.checkout()
+    conn.in_transaction = True
+    conn.close()
+    assert opened[0].rollbacks == 1 and not opened[0].closed
+
+    with pool.checkout() as again:
+        assert again._raw is opened[0]
+    assert len(opened) == 1
+    assert pool.stats()['checkouts'] == 2 and pool.stats()['in_use'] == 0
+
+
+def test_overflow_is_closed_and_exhausted_pool_times_out():
+    pool, opened = _pool()
+    first, second = pool.checkout(), pool.checkout()
+    try:
+        pool.checkout()
+        assert False, 'expected a pool timeout'
+    except PoolTimeoutError:
+        pass
+    assert pool.stats()['timeouts'] == 1 and pool.stats()['waits'] == 1
+
+    first.close()
+    second.close()  # beyond the pool size: closed instead of kept
+    assert opened[1].closed and pool.stats()['idle'] == 1
+
+
+def test_waiter_gets_returned_connection():
+    pool, opened = _pool(max_overflow=0, timeout=5)
+    held = pool.checkout()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.checkout()))
+    waiter.start()
+    threading.Timer(0.05, held.close).start()
+    waiter.join(2)
+    assert got and got[0]._raw is opened[0]
+    assert pool.stats()['waits'] == 1 and pool.stats()['timeouts'] == 0
+
+
+def test_dead_and_abandoned_connections():
+    pool, opened = _pool()
+    pool.checkout().close()
+    opened[0].alive = False
+
+    conn = pool.checkout()  # stale connection fails its ping and is replaced
+    assert conn._raw is opened[1] and opened[0].closed
+    assert pool.stats()['health_check_failures'] == 1
+
+    del conn
+    gc.collect()  # dropped without close(): still returned to the pool
+    assert pool.stats()['in_use'] == 0 and pool.stats()['idle'] == 1
+
+
+if __name__ == '__main__':
+    test_connections_are_reused_and_rolled_back()
+    test_overflow_is_closed_and_exhausted_pool_times_out()
+    test_waiter_gets_returned_connection()
+    test_dead_and_abandoned_connections()
+    print("MySQL pool tests: PASSED")
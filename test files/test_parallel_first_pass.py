@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test that the process-pool first pass of batch_analyze_wells matches the serial run
+"""
+import copy
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qpcr_analyzer
+from analysis_cache import AnalysisResultCache
+from benchmark_pipeline import analyzer_input
+from synthetic_plate import generate_plate
+
+COMPARED_FIELDS = ('is_good_scurve', 'r2_score', 'amplitude', 'cqj', 'calcj', 'curve_classification')
+
+
+def _plate_rows():
+    """Rows A-B of a synthetic plate: H/M controls plus positive, negative, noisy and late curves."""
+    wells = analyzer_input(generate_plate(96, 1, seed=1), 'FAM')
+    return {well: data for well, data in wells.items() if well[0] in 'AB'}
+
+
+def _analyze(data, workers):
+    results = qpcr_analyzer.batch_analyze_wells(copy.deepcopy(data), parallel_workers=workers)
+    return {well: {field: result.get(field) for field in COMPARED_FIELDS}
+            for well, result in results['individual_results'].items()}
+
+
+@pytest.fixture(scope='module')
+def plate():
+    return _plate_rows()
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    # A cache hit would let the second run skip the first pass entirely
+    monkeypatch.setattr(qpcr_analyzer, 'analysis_cache', AnalysisResultCache(max_entries=0, disk_dir=None))
+    monkeypatch.setattr(qpcr_analyzer, 'PARALLEL_MIN_WELLS', 1)
+    yield
+    qpcr_analyzer.shutdown_analysis_pool()
+
+
+def test_parallel_first_pass_matches_serial(plate):
+    serial = _analyze(plate, 0)
+    parallel = _analyze(plate, 2)
+    assert list(parallel) == list(serial)
+    assert parallel == serial
+    assert any(result['is_good_scurve'] for result in serial.values())
+
+
+def test_falls_back_to_serial_when_pool_cannot_start(plate, monkeypatch):
+    calls = []
+
+    def no_pool(workers):
+        calls.append(workers)
+        raise OSError("cannot fork")
+
+    monkeypatch.setattr(qpcr_analyzer, 'get_analysis_pool', no_pool)
+    assert _analyze(plate, 2) == _analyze(plate, 0)
+    assert calls == [2]
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
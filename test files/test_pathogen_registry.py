@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test the compiled pathogen registry: channel normalization, lookups and mtime reload
+"""
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pathogen_registry
+from pathogen_registry import (get_control_concentrations, get_fixed_threshold, get_pathogen_library,
+                               get_pathogen_target, normalize_channel)
+from qpcr_analyzer import get_pathogen_threshold
+
+
+def test_lookups_normalize_channel_aliases():
+    assert normalize_channel('TexasRed') == 'Texas Red' and normalize_channel('CY5') == 'Cy5'
+    assert get_fixed_threshold('BVPanelPCR1', 'TexasRed') == 150.0
+    assert get_pathogen_threshold({'test_code': 'BVPanelPCR3', 'fluorophore': 'CY5'}) == 100.0
+    assert get_pathogen_threshold({'test_code': 'Cglab', 'fluorophore': 'HEX'}) is None
+
+    assert get_pathogen_target('Lacto', 'TexasRed') == 'Lactobacillus crispatus'
+    assert get_pathogen_target('Unknown', 'FAM') == 'FAM'
+
+    assert get_control_concentrations('BVPanelPCR2', 'TexasRed') == get_control_concentrations('BVPanelPCR2',
+                                                                                                'Texas Red')
+    assert get_control_concentrations('Cglab', 'FAM')['H'] == 1e7
+    assert not get_control_concentrations('Cglab', 'Cy5')
+    assert get_pathogen_library()['Calb']['HEX'] == 'Candida albicans'
+
+
+def test_registry_recompiles_when_a_source_changes():
+    saved = (pathogen_registry.CONTROLS_PATH, pathogen_registry.PATHOGEN_LIBRARY_PATH,
+             pathogen_registry.CHECK_SECONDS, pathogen_registry._registry)
+    with tempfile.TemporaryDirectory() as workdir:
+        controls_path = os.path.join(workdir, 'controls.json')
+        library_path = os.path.join(workdir, 'library.js')
+        with open(controls_path, 'w') as f:
+            json.dump({'controls': {'Cglab': {'FAM': {'H': 1e7, 'M': 1e5, 'L': 1e3}}}}, f)
+        with open(library_path, 'w') as f:
+            f.write('// library\nconst PATHOGEN_LIBRARY = {"Cglab": {"FAM": "Candida glabrata"}};\n')
+        pathogen_registry.CONTROLS_PATH = controls_path
+        pathogen_registry.PATHOGEN_LIBRARY_PATH = library_path
+        pathogen_registry.CHECK_SECONDS = 0
+        pathogen_registry._registry = None
+        try:
+            first = pathogen_registry.get_registry()
+            assert pathogen_registry.get_registry() is first
+            assert get_control_concentrations('Cglab', 'FAM')['H'] == 1e7
+            assert dict(get_pathogen_library()) == {'Cglab': {'FAM': 'Candida glabrata'}}
+
+            with open(controls_path, 'w') as f:
+                json.dump({'controls': {'Cglab': {'FAM': {'H': 2e7, 'M': 2e5, 'L': 2e3}}}}, f)
+            os.utime(controls_path, ns=(0, os.stat(controls_path).st_mtime_ns + 1_000_000))
+            assert get_control_concentrations('Cglab', 'FAM')['H'] == 2e7
+            assert pathogen_registry.get_registry() is not first
+        finally:
+            (pathogen_registry.CONTROLS_PATH, pathogen_registry.PATHOGEN_LIBRARY_PATH,
+             pathogen_registry.CHECK_SECONDS, pathogen_registry._registry) = saved
+
+
+if __name__ == '__main__':
+    test_lookups_normalize_channel_aliases()
+    test_registry_recompiles_when_a_source_changes()
+    print("Pathogen registry tests: PASSED")
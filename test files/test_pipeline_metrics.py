@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test pipeline stage timing: spans, per-request totals, /metrics text and the timing header
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+
+from pipeline_metrics import MetricsRegistry, metrics, request_timing, span, timed
+
+
+def test_histogram_buckets_render_as_prometheus_text():
+    registry = MetricsRegistry(buckets=(0.01, 0.1))
+    for seconds in (0.005, 0.05, 0.05, 3.0):
+        registry.observe('curve_quality', seconds, scope='well')
+    text = registry.render_prometheus()
+    assert 'qpcr_stage_seconds_bucket{stage="curve_quality",scope="well",le="0.01"} 1' in text
+    assert 'qpcr_stage_seconds_bucket{stage="curve_quality",scope="well",le="0.1"} 3' in text
+    assert 'qpcr_stage_seconds_bucket{stage="curve_quality",scope="well",le="+Inf"} 4' in text
+    assert 'qpcr_stage_seconds_count{stage="curve_quality",scope="well"} 4' in text
+
+
+def test_request_spans_feed_header_and_global_histograms():
+    metrics.reset()
+
+    @timed('cqj_batch')
+    def kernel():
+        return 1
+
+    app = Flask(__name__)
+
+    @app.route('/analyze', methods=['POST'])
+    @request_timing('analyze_request')
+    def analyze():
+        with span('validate'):
+            pass
+        for _ in range(3):
+            with span('anomaly_detection', scope='well'):
+                kernel()
+        return jsonify({'success': True})
+
+    client = app.test_client()
+    response = client.post('/analyze', headers={'X-Analysis-Timing': '1'})
+    stages = [part.split(';')[0] for part in response.headers['X-Analysis-Timing'].split(', ')]
+    assert stages == ['validate', 'cqj_batch', 'anomaly_detection', 'analyze_request']
+    assert 'X-Analysis-Timing' not in client.post('/analyze').headers
+
+    snapshot = metrics.snapshot()
+    assert snapshot[('anomaly_detection', 'well')][0] == 6
+    assert snapshot[('analyze_request', 'request')][0] == 2
+
+    with span('outside_request'):
+        pass
+    assert metrics.snapshot()[('outside_request', 'request')][0] == 1
+
+
+if __name__ == '__main__':
+    test_histogram_buckets_render_as_prometheus_text()
+    test_request_spans_feed_header_and_global_histograms()
+    print("Pipeline metrics tests: PASSED")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test the buffered ml_prediction_tracking writer against a throwaway SQLite table
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ml_validation_tracker
+from ml_validation_tracker import PredictionTrackingWriter
+
+
+def _writer(**kwargs):
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE ml_prediction_tracking (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, performance_id INT, well_id TEXT,
+                pathogen_code TEXT, ml_prediction TEXT, ml_confidence REAL, model_version_used TEXT,
+                feature_data TEXT, prediction_timestamp DATETIME, final_classification TEXT)
+        """))
+    writer = PredictionTrackingWriter(engine, **kwargs)
+    writer._table_ready = True  # the MySQL DDL is not valid SQLite
+    return engine, writer
+
+
+def _row(i):
+    return {'performance_id': 1, 'well_id': f'A{i}', 'pathogen_code': 'Cglab', 'ml_prediction': 'NEGATIVE',
+            'ml_confidence': 0.9, 'model_version_used': 'general_1.0', 'feature_data': '{}',
+            'prediction_timestamp': datetime.now(), 'final_classification': 'NEGATIVE'}
+
+
+def _count(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM ml_prediction_tracking")).scalar()
+
+
+def test_rows_are_written_in_batches_and_flushed_on_close():
+    engine, writer = _writer(batch_size=10, flush_interval=60)
+    for i in range(25):
+        writer.submit(_row(i))
+
+    deadline = time.time() + 5
+    while _count(engine) < 20 and time.time() < deadline:
+        time.sleep(0.01)
+    assert _count(engine) == 20  # two full batches; the last 5 wait for a trigger
+
+    writer.close()
+    assert _count(engine) == 25
+    assert writer.stats()['batches_written'] == 3
+
+
+def test_full_queue_writes_inline_and_failed_batches_are_retried():
+    engine, writer = _writer(batch_size=100, flush_interval=60, max_queue=2)
+    writer._ensure_started = lambda: None  # no background thread: the queue fills up
+    for i in range(5):
+        writer.submit(_row(i))
+    assert writer.stats()['inline_writes'] == 3 and _count(engine) == 3
+
+    writer._table_ready = False  # DDL fails on SQLite, so the next batch is kept for retry
+    writer.flush()
+    assert _count(engine) == 3 and writer.stats()['pending_retry'] == 2
+
+    writer._table_ready = True
+    writer.flush()
+    assert _count(engine) == 5 and writer.stats()['rows_dropped'] == 0
+
+
+def test_ensure_table_creates_table_before_first_write():
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    mysql_ddl = ml_validation_tracker.PREDICTION_TRACKING_DDL
+    ml_validation_tracker.PREDICTION_TRACKING_DDL = """
+        CREATE TABLE IF NOT EXISTS ml_prediction_tracking (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, performance_id INT, well_id TEXT,
+            pathogen_code TEXT, ml_prediction TEXT, ml_confidence REAL, model_version_used TEXT,
+            feature_data TEXT, prediction_timestamp DATETIME, final_classification TEXT)
+    """
+    try:
+        writer = PredictionTrackingWriter(engine)
+        writer.ensure_table()
+    finally:
+        ml_validation_tracker.PREDICTION_TRACKING_DDL = mysql_ddl
+    assert _count(engine) == 0 and writer._table_ready
+    writer.submit(_row(0))
+    writer.close()
+    assert _count(engine) == 1
+
+
+if __name__ == '__main__':
+    test_rows_are_written_in_batches_and_flushed_on_close()
+    test_full_queue_writes_inline_and_failed_batches_are_retried()
+    test_ensure_table_creates_table_before_first_write()
+    print("Prediction tracking writer tests: PASSED")
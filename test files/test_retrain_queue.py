@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test background ML retraining: coalescing, job status and the model swap
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_curve_classifier import MLCurveClassifier
+from retrain_queue import RetrainQueue
+
+
+class _SlowClassifier:
+    """Counts retrains; each one blocks until released so jobs can pile up behind it."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.retrains = []
+        self.last_retrain = None
+
+    def retrain_model(self, fit=None):
+        self.release.wait(5)
+        self.retrains.append('general')
+        self.last_retrain = {'model': 'general'}
+        return True
+
+    def retrain_pathogen_model(self, pathogen, fit=None):
+        self.retrains.append(pathogen)
+        return False
+
+
+def test_bursts_coalesce_into_one_job_per_model():
+    queue = RetrainQueue(mode='background', delay=0.05)
+    classifier = _SlowClassifier()
+    first = [queue.submit(classifier, None, f"sample {i}") for i in range(5)]
+    assert len({job['id'] for job in first}) == 1 and first[-1]['requests'] == 5
+    pathogen_job = queue.submit(classifier, 'Cglab', 'initial_pathogen_model')
+
+    while queue.snapshot()['running'] is None:
+        threading.Event().wait(0.01)
+    follow_up = [queue.submit(classifier, None, 'while running') for _ in range(3)]
+    assert follow_up[0]['id'] != first[0]['id'] and follow_up[-1]['requests'] == 3
+
+    classifier.release.set()
+    assert queue.wait(follow_up[0]['id'], timeout=10)['status'] == 'succeeded'
+    assert queue.wait(pathogen_job['id'], timeout=10)['status'] == 'skipped'
+    assert sorted(classifier.retrains, key=str) == ['Cglab', 'general', 'general']
+    assert queue.get(first[0]['id'])['result'] == {'model': 'general'}
+    assert [job['status'] for job in queue.snapshot()['recent']] == ['succeeded', 'skipped', 'succeeded']
+
+
+def test_background_fit_swaps_model_and_bumps_artifact_version():
+    rng = np.random.default_rng(0)
+    classifier = MLCurveClassifier()
+    names = classifier.feature_names
+    classifier.training_data = [{
+        'sample_identifier': f'S{i}', 'pathogen': 'Cglab', 'expert_classification': label,
+        'features': {name: float(value) for name, value in zip(names, rng.normal(loc=3 * (label == 'POSITIVE'),
+                                                                                 size=len(names)))}
+    } for i, label in enumerate(['POSITIVE', 'NEGATIVE'] * 15)]
+    previous = classifier.model
+    queue = RetrainQueue(mode='background', delay=0)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                job = queue.submit(classifier, None, 'test')
+                done = queue.wait(job['id'], timeout=60)
+                pathogen_done = queue.wait(queue.submit(classifier, 'Cglab', 'test')['id'], timeout=60)
+            assert done['status'] == 'succeeded', done
+            assert pathogen_done['status'] == 'succeeded', pathogen_done
+            assert classifier.model is not previous and classifier.model_trained
+            assert done['result']['artifact_version'] == 1 and pathogen_done['result']['artifact_version'] == 2
+            assert 'Cglab' in classifier.pathogen_models
+
+            reloaded = MLCurveClassifier()
+            reloaded.load_model()
+            reloaded.load_pathogen_models()
+            assert reloaded.artifact_version == 2
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    test_bursts_coalesce_into_one_job_per_model()
+    test_background_fit_swaps_model_and_bumps_artifact_version()
+    print("Retrain queue tests: PASSED")
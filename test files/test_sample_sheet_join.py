@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test the in-memory sample sheet join that runs before curve analysis
+"""
+import io
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cfx_ingest import parse_summary_csv
+from sql_integration import attach_sample_sheet, sample_sheet
+
+SUMMARY = os.path.join(ROOT, 'test_files', 'AcBVPanelPCR3_2576724_CFX366953_Quantification_Summary_0.csv')
+
+
+def test_sheet_from_cfx_summary():
+    with open(SUMMARY, 'rb') as f:
+        frame = parse_summary_csv(f)
+    sheet = sample_sheet(frame, 'Cy5')
+    cy5_rows = frame[frame['Fluor'] == 'Cy5']
+    assert len(sheet) == cy5_rows['Well'].nunique()
+    assert sheet['A1'] == {'sample_name': '13979631-1-2576724', 'cq_value': None}
+    assert sample_sheet(frame, 'Unknown') == {}
+
+
+def test_join_attaches_names_and_cq_before_analysis():
+    frame = pd.read_csv(io.StringIO(
+        ",Well,Fluor,Target,Content,Sample,Cq\n"
+        ",A01,FAM,,Std,H-Ctrach-1,15.123456\n"
+        ",A02,FAM,,Unkn,,NaN\n"
+        ",A01,HEX,,Unkn,Patient 9,30.5\n"
+        ",B12,FAM,,Unkn,Patient 3,27.25\n"))
+    sheet = sample_sheet(frame, 'FAM')
+    assert sheet == {'A1': {'sample_name': 'H-Ctrach-1', 'cq_value': 15.1235},
+                     'A2': {'sample_name': None, 'cq_value': None},
+                     'B12': {'sample_name': 'Patient 3', 'cq_value': 27.25}}
+
+    wells = {'A1_FAM': {'cycles': [1], 'rfu': [1]},
+             'A2_FAM': {'cycles': [1], 'rfu': [1], 'sample_name': 'client name'},
+             'B12': {'cycles': [1], 'rfu': [1]},
+             'C1': {'cycles': [1], 'rfu': [1]}}
+    assert attach_sample_sheet(wells, sheet, 'FAM') == 3
+    assert wells['A1_FAM']['sample_name'] == 'H-Ctrach-1' and wells['A1_FAM']['cq_value'] == 15.1235
+    assert wells['A2_FAM']['sample_name'] == 'client name' and 'cq_value' not in wells['A2_FAM']
+    assert wells['B12']['cq_value'] == 27.25 and 'sample_name' not in wells['C1']
+
+
+if __name__ == '__main__':
+    test_sheet_from_cfx_summary()
+    test_join_attaches_names_and_cq_before_analysis()
+    print("Sample sheet join tests: PASSED")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test the session validation cache and batched last_activity writes
+"""
+import datetime
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql_pool
+from session_cache import ActivityWriter, SessionValidationCache
+from unified_auth_manager import UnifiedAuthManager
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_expiry_and_user_invalidation():
+    clock = _Clock()
+    cache = SessionValidationCache(ttl=30, max_entries=2, clock=clock)
+    cache.put('s1', {'user_id': 'u1', 'username': 'ann'})
+    cache.put('s2', {'user_id': 'u2', 'username': 'bob'}, expires_at=clock.now + 5)
+    assert cache.get('s1')['username'] == 'ann'
+    clock.now += 10
+    assert cache.get('s2') is None  # never served past the session's expires_at
+    assert cache.get('s1') is not None
+    clock.now += 25
+    assert cache.get('s1') is None
+
+    cache.put('s3', {'user_id': 'u1', 'username': 'ann'})
+    cache.put('s4', {'user_id': 'u1', 'username': 'ann'})
+    cache.put('s5', {'user_id': 'u2', 'username': 'bob'})
+    assert cache.get('s3') is None  # LRU bound of two entries
+    assert cache.invalidate_user(username='ann') == 1 and cache.get('s5') is not None
+
+
+class _Cursor:
+    def __init__(self, db):
+        self.db = db
+
+    def execute(self, sql, params):
+        self.db.statements.append((' '.join(sql.split()), list(params)))
+
+    def fetchone(self):
+        return self.db.session_row
+
+    def close(self):
+        pass
+
+
+class _Connection:
+    def __init__(self, session_row=None):
+        self.statements = []
+        self.commits = 0
+        self.session_row = session_row
+
+    def cursor(self, dictionary=False):
+        return _Cursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+def test_activity_writer_coalesces_touches():
+    conn = _Connection()
+    writer = ActivityWriter(lambda: conn, flush_interval=3600)
+    for session_id in ('a', 'b', 'a', 'a'):
+        writer.touch(session_id)
+    writer.discard('b')
+    assert writer.flush() == 1 and writer.flush() == 0
+    sql, params = conn.statements[0]
+    assert sql.startswith('UPDATE user_sessions SET last_activity') and params == ['a']
+    writer.stop()
+
+
+def test_validate_session_hits_database_once(monkeypatch):
+    conn = _Connection({'session_id': 's1', 'user_id': 'u1', 'username': 'ann', 'role': 'viewer',
+                        'auth_method': 'local', 'entra_oid': None, 'tenant_id': None,
+                        'expires_at': datetime.datetime.now() + datetime.timedelta(hours=1)})
+    monkeypatch.setattr(mysql_pool, 'connect', lambda **kwargs: conn)
+    manager = UnifiedAuthManager.__new__(UnifiedAuthManager)
+    manager.mysql_config = {}
+    manager.session_cache = SessionValidationCache(ttl=30)
+    manager.activity_writer = ActivityWriter(lambda: conn, flush_interval=3600)
+
+    for _ in range(5):
+        assert manager.validate_session('s1')['role'] == 'viewer'
+    assert len(conn.statements) == 1 and conn.commits == 0
+
+    assert manager.update_user_role('ann', 'qc_technician')
+    conn.session_row['role'] = 'qc_technician'
+    assert manager.validate_session('s1')['role'] == 'qc_technician'
+
+    conn.session_row = None
+    assert manager.logout_user('s1')
+    assert manager.session_cache.get('s1') is None
+    manager.activity_writer.stop()
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test paginated session history queries against an in-memory SQLite copy of the tables
+"""
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from curve_codec import pack_curves
+from session_history import decode_cursor, fetch_session_page, fetch_session_wells
+
+
+class _DictCursor:
+    """Minimal mysql.connector dictionary-cursor look-alike over sqlite3."""
+
+    def __init__(self, conn):
+        self._cursor = conn.cursor()
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace('%s', '?'), params)
+
+    def fetchall(self):
+        names = [d[0] for d in self._cursor.description]
+        return [dict(zip(names, row)) for row in self._cursor.fetchall()]
+
+
+def _database():
+    conn = sqlite3.connect(':memory:', detect_types=sqlite3.PARSE_DECLTYPES)
+    conn.executescript("""
+        CREATE TABLE analysis_sessions (
+            id INTEGER PRIMARY KEY, filename TEXT, upload_timestamp TIMESTAMP, total_wells INT,
+            good_curves INT, success_rate REAL, cycle_count INT, cycle_min INT, cycle_max INT,
+            pathogen_breakdown TEXT);
+        CREATE TABLE well_results (
+            id INTEGER PRIMARY KEY, session_id INT, well_id TEXT, sample_name TEXT, fluorophore TEXT,
+            amplitude REAL, is_good_scurve INT, r2_score REAL, steepness REAL, midpoint REAL,
+            baseline REAL, cq_value REAL, curve_classification TEXT, threshold_value REAL, cqj TEXT,
+            calcj TEXT, raw_cycles TEXT, raw_rfu TEXT, fitted_curve TEXT, fit_parameters TEXT,
+            parameter_errors TEXT, anomalies TEXT, thresholds TEXT, curve_data BLOB);
+    """)
+    start = datetime(2025, 1, 1)
+    for session_id in range(1, 8):
+        # Two sessions share a timestamp and one has none, to exercise the tie-breaks
+        ts = None if session_id == 7 else start + timedelta(hours=min(session_id, 5))
+        conn.execute("INSERT INTO analysis_sessions VALUES (?, ?, ?, 2, 1, 50.0, 40, 1, 40, '')",
+                     (session_id, f'run_{session_id}.csv', ts))
+        for well in ('A1_FAM', 'A2_FAM'):
+            conn.execute("""INSERT INTO well_results (session_id, well_id, sample_name, fluorophore,
+                            curve_classification, raw_rfu, raw_cycles) VALUES (?, ?, 'S1', 'FAM', ?, ?, ?)""",
+                         (session_id, well, json.dumps({'classification': 'NEGATIVE'}),
+                          json.dumps([1.0, 2.0]), json.dumps([1, 2])))
+    # A packed row (QPCR_CURVE_STORAGE=packed) whose JSON columns are NULL
+    conn.execute("""INSERT INTO well_results (session_id, well_id, curve_data) VALUES (3, 'B1_HEX', ?)""",
+                 (pack_curves({'raw_cycles': [1, 2], 'raw_rfu': [3.5, None]}),))
+    return conn
+
+
+def test_pages_cover_every_session_once_in_order():
+    cursor = _DictCursor(_database())
+    seen = []
+    after = None
+    while True:
+        sessions, next_cursor = fetch_session_page(cursor, limit=3, after=after)
+        seen.extend(s['id'] for s in sessions)
+        for session in sessions:
+            assert list(session['individual_results'])[:2] == ['A1_FAM', 'A2_FAM']
+            well = session['individual_results']['A1_FAM']
+            assert well['curve_classification'] == {'classification': 'NEGATIVE'}
+            assert well['coordinate'] == 'A1' and 'raw_rfu' not in well
+        if next_cursor is None:
+            break
+        after = decode_cursor(next_cursor)
+
+    assert seen == [6, 5, 4, 3, 2, 1, 7]
+
+
+def test_summary_only_page_and_per_session_curves():
+    cursor = _DictCursor(_database())
+    sessions, next_cursor = fetch_session_page(cursor, limit=10, include_wells=False)
+    assert len(sessions) == 7 and next_cursor is None
+    assert 'individual_results' not in sessions[0]
+
+    wells = fetch_session_wells(cursor, 3)
+    assert [w['well_id'] for w in wells] == ['A1_FAM', 'A2_FAM', 'B1_HEX']
+    assert wells[0]['raw_rfu'] == [1.0, 2.0] and wells[0]['raw_cycles'] == [1, 2]
+    assert wells[2]['raw_rfu'] == [3.5, None] and wells[2]['raw_cycles'] == [1.0, 2.0]
+    assert wells[2]['fitted_curve'] == [] and 'curve_data' not in wells[2]
+
+
+if __name__ == '__main__':
+    test_pages_cover_every_session_once_in_order()
+    test_summary_only_page_and_per_session_curves()
+    print("Session history tests: PASSED")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test ETag/If-None-Match handling and the versioned session response cache
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from models import db, AnalysisSession, WellResult
+from session_response_cache import SessionResponseCache, bump_session_version, session_content_token
+from well_persistence import save_well_rows, well_row
+
+
+def _app(responses, builds):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    @app.route('/sessions/<int:session_id>')
+    def session_details(session_id):
+        token = session_content_token(session_id)
+        cached = responses.lookup('detail', session_id, token)
+        if cached is not None:
+            return cached
+        builds.append(session_id)
+        session = AnalysisSession.query.get_or_404(session_id)
+        wells = WellResult.query.filter_by(session_id=session_id).order_by(WellResult.well_id).all()
+        return responses.respond('detail', session_id, token, {
+            'session': session.to_dict(),
+            'wells': [{'well_id': w.well_id, 'amplitude': w.amplitude} for w in wells]
+        })
+
+    return app
+
+
+def _save(session_id, amplitude):
+    rows = [well_row(f'A{i}_FAM', {'sample_name': f'S{i}', 'amplitude': amplitude, 'is_good_scurve': True},
+                     'Cglab', 'FAM') for i in range(1, 4)]
+    save_well_rows(session_id, rows)
+    db.session.commit()
+
+
+def test_conditional_get_follows_content_version():
+    responses = SessionResponseCache()
+    builds = []
+    app = _app(responses, builds)
+    with app.app_context():
+        db.create_all()
+        session = AnalysisSession(filename='run.csv', total_wells=3, good_curves=3, success_rate=1.0)
+        db.session.add(session)
+        db.session.commit()
+        _save(session.id, 500.0)
+        session_id = session.id
+
+    client = app.test_client()
+    first = client.get(f'/sessions/{session_id}')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.json['wells'][0]['amplitude'] == 500.0
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    again = client.get(f'/sessions/{session_id}')
+    assert again.data == first.data and again.headers['ETag'] == etag and builds == [session_id]
+    assert client.get(f'/sessions/{session_id}', headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        _save(session_id, 900.0)  # a re-save bumps the version
+    changed = client.get(f'/sessions/{session_id}', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+    assert changed.json['wells'][0]['amplitude'] == 900.0 and len(builds) == 2
+
+    with app.app_context():
+        bump_session_version(session_id)
+        db.session.commit()
+    assert client.get(f'/sessions/{session_id}', headers={'If-None-Match': changed.headers['ETag']}).status_code == 200
+
+    with app.app_context():
+        db.session.delete(db.session.get(AnalysisSession, session_id))
+        db.session.commit()
+    assert client.get(f'/sessions/{session_id}', headers={'If-None-Match': etag}).status_code == 404
+    assert responses.stats()['not_modified'] == 1 and responses.stats()['hits'] == 1
+
+
+def test_lru_is_bounded_by_body_bytes():
+    responses = SessionResponseCache(max_bytes=250)
+    app = Flask(__name__)
+    with app.test_request_context('/'):
+        for session_id in range(3):
+            responses.respond('detail', session_id, '1.0', {'padding': 'x' * 80})
+        stats = responses.stats()
+        assert stats['entries'] == 2 and stats['bytes'] <= 250
+        assert responses.lookup('detail', 0, '1.0') is None  # oldest evicted
+        assert responses.lookup('detail', 2, '1.0').status_code == 200
+
+        responses.invalidate(2)
+        assert responses.lookup('detail', 2, '1.0') is None and responses.stats()['entries'] == 1
+        assert 'ETag' not in responses.respond('detail', 5, None, {}).headers  # no token, no caching
+
+
+if __name__ == '__main__':
+    test_conditional_get_follows_content_version()
+    test_lru_is_bounded_by_body_bytes()
+    print("Session response cache tests: PASSED")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test the synthetic plate generator and the benchmark baseline comparison
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmark_pipeline import analyzer_input, compare
+from cfx_ingest import parse_amplification_csv
+from synthetic_plate import generate_plate
+
+
+def test_plate_is_reproducible_with_controls_in_outer_columns():
+    plate = generate_plate(96, 2, seed=3)
+    again = generate_plate(96, 2, seed=3)
+    assert plate.channels == ('FAM', 'HEX') and len(plate.wells) == 96
+    assert all(np.array_equal(plate.rfu[ch], again.rfu[ch]) for ch in plate.channels)
+    assert not np.array_equal(plate.rfu['FAM'], generate_plate(96, 2, seed=4).rfu['FAM'])
+    assert plate.samples['A1'] == 'H-BVPanelPCR3-1' and plate.samples['D12'] == 'NTC-2'
+    assert plate.kinds['HEX']['C1'] == 'L' and plate.cq['FAM']['D1'] is None
+    assert len(generate_plate(384).wells) == 384
+
+
+def test_exports_round_trip_through_ingest():
+    plate = generate_plate(96, 1, seed=0)
+    parsed = parse_amplification_csv(plate.amplification_csv('FAM').encode()).to_wells()
+    assert parsed == plate.analysis_data('FAM')
+
+    data = analyzer_input(plate, 'FAM')
+    assert data['A1']['sample_name'] == 'H-BVPanelPCR3-1'
+    assert data['A1']['test_code'] == 'BVPanelPCR3' and data['A1']['fluorophore'] == 'FAM'
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {'results': {'a': {'min_s': 1.0}, 'b': {'min_s': 1.0}, 'gone': {'min_s': 1.0}}}
+    report = {'results': {'a': {'min_s': 1.2}, 'b': {'min_s': 1.5}, 'new': {'min_s': 9.0}}}
+    rows = compare(report, baseline, 0.25)
+    assert [(stage, regressed) for stage, _, _, _, regressed in rows] == [('a', False), ('b', True)]
+
+
+if __name__ == '__main__':
+    test_plate_is_reproducible_with_controls_in_outer_columns()
+    test_exports_round_trip_through_ingest()
+    test_compare_flags_regressions_beyond_tolerance()
+    print("Synthetic plate tests: PASSED")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test the vectorized CQJ kernel and the cached session recalculation behind /threshold/manual
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from cqj_calcj_utils import (calculate_calcj_with_controls, calculate_cqj, calculate_cqj_matrix,
+                             stack_curves)
+from models import db, AnalysisSession, WellResult
+from threshold_backend import recalculate_session_cqj_calcj
+from threshold_recalc import recalc_contexts, recalculate_channel
+
+
+def _quiet(fn, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args)
+
+
+def test_matrix_matches_per_well_cqj():
+    rng = np.random.default_rng(7)
+    rfu_lists, cycle_lists, thresholds = [], [], []
+    for _ in range(500):
+        n = int(rng.integers(0, 45))
+        rfu = np.round(rng.uniform(0, 100, n)).tolist()
+        if rng.random() < 0.4:
+            rfu.sort()
+        rfu_lists.append(rfu)
+        cycle_lists.append(list(range(1, n + 1)))
+        thresholds.append(float(rng.uniform(0, 100)))
+    rfu_lists.append([1.0] * 10)
+    cycle_lists.append(list(range(1, 9)))  # mismatched lengths: rejected
+    thresholds.append(0.5)
+
+    rfu, cycles, lengths = stack_curves(rfu_lists, cycle_lists)
+    got = calculate_cqj_matrix(rfu, cycles, np.array(thresholds), lengths)
+    for i, (r, c, t) in enumerate(zip(rfu_lists, cycle_lists, thresholds)):
+        expected = _quiet(calculate_cqj, {'raw_rfu': r, 'raw_cycles': c}, t)
+        if expected is None:
+            assert np.isnan(got[i]), i
+        else:
+            assert abs(got[i] - expected) < 1e-9, i
+
+
+def _curve(midpoint, cycles=40):
+    x = np.arange(1, cycles + 1, dtype=float)
+    return x.tolist(), (1000 / (1 + np.exp(-(x - midpoint))) + 10).tolist()
+
+
+def _app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+
+def test_session_recalculation_writes_only_changed_rows():
+    app = _app()
+    with app.app_context():
+        db.create_all()
+        session = AnalysisSession(filename='AcCtrach_run.csv', total_wells=5, good_curves=5, success_rate=100.0)
+        db.session.add(session)
+        db.session.flush()
+        wells = [('A1_FAM', 'H-Ctrach', 15), ('A2_FAM', 'L-Ctrach', 28), ('A3_FAM', 'Patient 1', 22),
+                 ('A4_FAM', 'Patient 2', 60), ('A1_HEX', 'H-Ctrach', 18)]
+        for well_id, sample, midpoint in wells:
+            cycles, rfu = _curve(midpoint)
+            well = WellResult(session_id=session.id, well_id=well_id, sample_name=sample,
+                              fluorophore=well_id.split('_')[1], is_good_scurve=True,
+                              cqj=json.dumps({'FAM': 1.0}), calcj=json.dumps({}))
+            well.set_curve_arrays(cycles, rfu, [])
+            db.session.add(well)
+        db.session.commit()
+
+        recalc_contexts.invalidate()
+        results = _quiet(recalculate_session_cqj_calcj, session.id, 'FAM', 'linear', 200.0, 'AcCtrach_P1')
+        assert sorted(results) == ['A1_FAM', 'A2_FAM', 'A3_FAM', 'A4_FAM']
+
+        # Same answers as the per-well functions over the channel's wells
+        all_wells = {}
+        for well in WellResult.query.filter_by(fluorophore='FAM'):
+            curves = well.curve_arrays()
+            data = {'well_id': well.well_id, 'sample_name': well.sample_name,
+                    'raw_rfu': curves['raw_rfu'], 'raw_cycles': curves['raw_cycles']}
+            data['cqj_value'] = _quiet(calculate_cqj, data, 200.0)
+            all_wells[well.well_id] = data
+        for well_id, data in all_wells.items():
+            assert abs(results[well_id]['cqj_value'] - data['cqj_value']) < 1e-6 if data['cqj_value'] else \
+                results[well_id]['cqj_value'] is None
+            if data['cqj_value'] is not None:
+                expected = _quiet(calculate_calcj_with_controls, data, 200.0, all_wells, 'Ctrach', 'FAM')
+                assert results[well_id]['calcj_value'] == expected['calcj_value'] or \
+                    abs(results[well_id]['calcj_value'] - expected['calcj_value']) < 1e-6 * expected['calcj_value']
+        assert results['A4_FAM']['calcj_value'] == 'N/A'  # never crosses within 40 cycles
+
+        stored = WellResult.query.filter_by(well_id='A3_FAM').one()
+        assert json.loads(stored.cqj) == {'FAM': 1.0, 'manual': results['A3_FAM']['cqj_value']}
+        hex_well = WellResult.query.filter_by(well_id='A1_HEX').one()
+        assert json.loads(hex_well.cqj) == {'FAM': 1.0}
+
+        # Dragging back to the same threshold reuses the parsed curves and writes nothing
+        _, updates = _quiet(recalculate_channel, session.id, 'FAM', 200.0, 'Ctrach')
+        assert updates == []
+        assert recalc_contexts.stats()['hits'] == 1
+
+
+if __name__ == '__main__':
+    test_matrix_matches_per_well_cqj()
+    test_session_recalculation_writes_only_changed_rows()
+    print("Threshold recalculation tests: PASSED")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test the append-only training sample log and the incremental training matrix
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import training_store
+from ml_curve_classifier import MLCurveClassifier
+from training_store import TrainingMatrix, TrainingSampleStore
+
+
+def _sample(identifier, label='POSITIVE', pathogen='Cglab', amplitude=100.0):
+    return {'sample_identifier': identifier, 'pathogen': pathogen, 'expert_classification': label,
+            'features': {'amplitude': np.float64(amplitude), 'cqj': {'FAM': None}}}
+
+
+def test_log_replays_appends_and_replacements():
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'training.jsonl')
+        legacy = os.path.join(workdir, 'training.json')
+        with open(legacy, 'w') as f:
+            json.dump([_sample('A', amplitude=1.0) | {'features': {'amplitude': 1.0}}], f)
+
+        store = TrainingSampleStore(path, legacy)
+        assert [s['sample_identifier'] for s in store.load()] == ['A']  # imported from the legacy file
+        store.append(_sample('B'))
+        store.append(_sample('A', label='NEGATIVE'), replaces='A')
+        with open(path, 'a') as f:
+            f.write('{"truncated": ')  # a write cut off by a crash
+
+        reloaded = TrainingSampleStore(path, legacy)
+        samples = reloaded.load()
+        assert [(s['sample_identifier'], s['expert_classification']) for s in samples] == [('B', 'POSITIVE'),
+                                                                                         ('A', 'NEGATIVE')]
+        assert samples[0]['features'] == {'amplitude': 100.0, 'cqj': {'FAM': None}}
+        assert reloaded.dead_records == 2
+
+
+def test_compaction_keeps_only_live_samples():
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'training.jsonl')
+        store = TrainingSampleStore(path, os.path.join(workdir, 'missing.json'))
+        assert store.load() == []
+        for i in range(training_store.COMPACT_MIN_DEAD):
+            store.append(_sample('A', amplitude=i), replaces='A' if i else None)
+        store.record_dead(2 * (training_store.COMPACT_MIN_DEAD - 1))
+        assert store.needs_compaction(1)
+
+        assert len(store.compact()) == 1 and store.dead_records == 0
+        with open(path) as f:
+            assert len(f.readlines()) == 1
+        assert store.load()[0]['features']['amplitude'] == training_store.COMPACT_MIN_DEAD - 1
+
+
+def test_matrix_only_vectorizes_new_samples():
+    calls = []
+
+    def vectorize(sample):
+        calls.append(sample['sample_identifier'])
+        return [sample['features']['amplitude']], sample['expert_classification']
+
+    matrix = TrainingMatrix(vectorize, 1)
+    samples = [_sample(f'S{i}', amplitude=i, pathogen='Cglab' if i % 2 else 'Ngon') for i in range(100)]
+    samples.append(_sample('unlabelled', label=None))
+    X, y = matrix.sync(samples)
+    assert X.shape == (100, 1) and list(X[:3, 0]) == [0.0, 1.0, 2.0]
+
+    samples.append(_sample('S100', amplitude=100))
+    X, y = matrix.sync(samples)
+    assert calls[-1] == 'S100' and len(calls) == 102 and X[-1, 0] == 100.0
+    assert matrix.pathogens['Cglab'] == 52 and matrix.identifiers['unlabelled'] == 1
+    assert matrix.pathogen_rows('Ngon').sum() == 50 and matrix.pathogen_rows('Cglab').sum() == 51
+
+    matrix.sync(samples[:10])
+    assert len(calls) == 112  # a different list rebuilds
+
+
+def test_classifier_matrix_matches_feature_conversion():
+    classifier = MLCurveClassifier()
+    classifier.training_data = [_sample('A'), {**_sample('B'), 'features': {'r2_score': 0.9, 'snr': '2.5'}}]
+    X, y = classifier.training_matrix()
+    names = classifier.feature_names
+    assert list(y) == ['POSITIVE', 'POSITIVE']
+    assert X[0, names.index('amplitude')] == 100.0 and X[0, names.index('cqj')] == -1.0
+    assert X[1, names.index('r2')] == 0.9 and X[1, names.index('snr')] == 2.5 and X[1, names.index('calcj')] == 0.0
+
+
+def test_pathogen_rows_stay_aligned_with_a_concurrent_add():
+    classifier = MLCurveClassifier()
+    classifier.training_data = [_sample(f'C{i}', amplitude=i) for i in range(12)] + [_sample('N0', pathogen='Ngon')]
+    classifier.training_matrix()
+    matrix = classifier._training_matrix
+    sync, pathogen_rows = matrix.sync, matrix.pathogen_rows
+    added = []
+
+    def add_sample():
+        # What add_training_sample does from a request thread
+        classifier.training_data.append(_sample('C_new', amplitude=99.0))
+        classifier.training_matrix()
+        added.append(True)
+
+    def racing_sync(samples):
+        result = sync(samples)
+        if not hasattr(racing_sync, 'thread'):  # the add's own sync must not race again
+            racing_sync.thread = threading.Thread(target=add_sample)
+            racing_sync.thread.start()
+        return result
+
+    def late_pathogen_rows(pathogen):
+        racing_sync.thread.join(timeout=0.5)  # lets the add finish unless the lock is still held
+        return pathogen_rows(pathogen)
+
+    matrix.sync, matrix.pathogen_rows = racing_sync, late_pathogen_rows
+    fitted = []
+    classifier.install_pathogen_model = lambda *args: None
+    classifier.retrain_pathogen_model('Cglab', fit=lambda fn, pathogen, X, y: fitted.append((X, y)) or (None, None, 1.0))
+    racing_sync.thread.join()
+    matrix.sync, matrix.pathogen_rows = sync, pathogen_rows
+
+    X, y = fitted[0]
+    assert added and X.shape[0] == len(y) == 12
+    assert list(X[:, classifier.feature_names.index('amplitude')]) == [float(i) for i in range(12)]
+
+
+if __name__ == '__main__':
+    test_log_replays_appends_and_replacements()
+    test_compaction_keeps_only_live_samples()
+    test_matrix_only_vectorizes_new_samples()
+    test_classifier_matrix_matches_feature_conversion()
+    test_pathogen_rows_stay_aligned_with_a_concurrent_add()
+    print("Training store tests: PASSED")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test bulk well persistence: replace and upsert modes keyed on (session_id, well_id)
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from flask import Flask
+
+from models import db, AnalysisSession, WellResult
+from threshold_recalc import recalculate_channel
+from well_persistence import save_well_rows, well_row
+
+
+def _app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+
+def _well(sample, amplitude, **extra):
+    data = {'sample_name': sample, 'amplitude': amplitude, 'is_good_scurve': True, 'r2_score': 0.99,
+            'raw_cycles': [1, 2, 3], 'raw_rfu': [10.0, 20.0, 400.0], 'fitted_curve': [9.0, 21.0, 399.0],
+            'anomalies': ['None'], 'cqj': {'FAM': 24.5}, 'cq_value': '', 'threshold_value': 'bad'}
+    data.update(extra)
+    return data
+
+
+def test_row_matches_model_columns():
+    row = well_row('A1_FAM', _well('Patient 1', 800, fluorophore='HEX'), 'Ctrach', 'FAM')
+    assert set(row) <= set(WellResult.__table__.columns.keys())
+    assert row['fluorophore'] == 'FAM' and row['cq_value'] is None and row['threshold_value'] is None
+    assert json.loads(row['cqj']) == {'FAM': 24.5} and json.loads(row['raw_rfu']) == [10.0, 20.0, 400.0]
+    assert json.loads(row['curve_classification']) == {'class': 'N/A'} and row['test_code'] == 'Ctrach'
+
+
+def test_upsert_keeps_matching_rows_and_replace_rewrites():
+    app = _app()
+    with app.app_context():
+        db.create_all()
+        session = AnalysisSession(filename='AcCtrach_run.csv', total_wells=3, good_curves=3, success_rate=100.0)
+        db.session.add(session)
+        db.session.flush()
+
+        first = [well_row(f'{w}_FAM', _well(f'Patient {w}', 100), 'Ctrach') for w in ('A1', 'A2', 'A3')]
+        stats = save_well_rows(session.id, first, mode='upsert')
+        db.session.commit()
+        assert (stats['inserted'], stats['updated'], stats['deleted']) == (3, 0, 0)
+        ids = dict(db.session.query(WellResult.well_id, WellResult.id))
+
+        second = [well_row(f'{w}_FAM', _well(f'Patient {w}', 900), 'Ctrach') for w in ('A1', 'A2', 'B1')]
+        stats = save_well_rows(session.id, second, mode='upsert')
+        db.session.commit()
+        assert (stats['inserted'], stats['updated'], stats['deleted']) == (1, 2, 1)
+        rows = {w.well_id: w for w in WellResult.query.filter_by(session_id=session.id)}
+        assert sorted(rows) == ['A1_FAM', 'A2_FAM', 'B1_FAM']
+        assert rows['A1_FAM'].id == ids['A1_FAM'] and rows['A1_FAM'].amplitude == 900
+        assert rows['B1_FAM'].curve_arrays()['raw_rfu'] == [10.0, 20.0, 400.0]
+
+        stats = save_well_rows(session.id, second[:1], mode='replace')
+        db.session.commit()
+        assert (stats['inserted'], stats['deleted']) == (1, 3) and stats['rows_per_sec'] > 0
+        assert [w.well_id for w in WellResult.query.filter_by(session_id=session.id)] == ['A1_FAM']
+
+
+def _sigmoid_well(midpoint):
+    x = np.arange(1, 41, dtype=float)
+    return _well('Patient 1', 1000, raw_cycles=x.tolist(), raw_rfu=(1000 / (1 + np.exp(-(x - midpoint))) + 10).tolist(),
+                 cqj=json.dumps({'FAM': 1.0}), calcj=json.dumps({}))
+
+
+def test_resave_invalidates_recalc_context():
+    app = _app()
+    with app.app_context():
+        db.create_all()
+        session = AnalysisSession(filename='AcCtrach_run.csv', total_wells=1, good_curves=1, success_rate=100.0)
+        db.session.add(session)
+        db.session.flush()
+
+        save_well_rows(session.id, [well_row('A1_FAM', _sigmoid_well(20), 'Ctrach', 'FAM')], mode='upsert')
+        db.session.commit()
+        results, _ = recalculate_channel(session.id, 'FAM', 510.0, 'Ctrach')
+        assert abs(results['A1_FAM']['cqj_value'] - 20) < 0.1
+
+        save_well_rows(session.id, [well_row('A1_FAM', _sigmoid_well(30), 'Ctrach', 'FAM')], mode='upsert')
+        db.session.commit()
+        results, _ = recalculate_channel(session.id, 'FAM', 510.0, 'Ctrach')
+        assert abs(results['A1_FAM']['cqj_value'] - 30) < 0.1
+
+
+if __name__ == '__main__':
+    test_row_matches_model_columns()
+    test_upsert_keeps_matching_rows_and_replace_rewrites()
+    test_resave_invalidates_recalc_context()
+    print("Well persistence tests: PASSED")
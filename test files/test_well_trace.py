@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test the per-well debug trace buffer that replaced the hot-path debug prints
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cqj_calcj_utils import calculate_cqj
+from curve_classification import classify_curve
+from ml_curve_classifier import MLCurveClassifier, extract_pathogen_from_well_data
+from well_trace import WellTraceBuffer, trace, trace_session, tracer, well_scope
+
+
+def test_disabled_trace_records_nothing():
+    tracer.clear()
+    tracer.enabled = False
+    trace('cqj', "CQJ={cqj:.2f}", well='A1', cqj=None)  # would not even format
+    with trace_session('run.csv', 'FAM'), well_scope('A1'):
+        classify_curve(0.99, 0.5, 10, 20, 0, amplitude=1000)
+    assert tracer.stats()['events'] == 0
+
+
+def test_untrained_ml_path_writes_nothing_to_stdout(capsys):
+    tracer.enabled = False
+    classifier = MLCurveClassifier()
+    classifier.model_trained = False
+    classifier.training_data = []
+    cycles = list(range(1, 41))
+    wells = {f'A{i}': {'rfu': [float(c * i) for c in cycles], 'cycles': cycles,
+                       'metrics': {'r2_score': 0.9, 'amplitude': 40.0 * i, 'snr': 5.0}} for i in range(1, 4)}
+    classifier.predict_batch(wells, pathogen='Cglab')
+    extract_pathogen_from_well_data({'well_id': 'A1', 'raw_rfu': [1.0] * 40, 'raw_cycles': cycles})
+    assert capsys.readouterr().out == ''
+
+
+def test_events_keyed_by_session_channel_and_well():
+    tracer.clear()
+    tracer.enabled = True
+    try:
+        well = {'well_id': 'B2', 'raw_cycles': list(range(1, 11)), 'raw_rfu': [0, 0, 0, 0, 0, 0, 10, 20, 30, 40]}
+        with trace_session('AcCglab_run.csv', 'FAM'):
+            calculate_cqj(well, 15)
+            with well_scope('B2'):
+                classify_curve(0.99, 0.5, 10, 20, 0, amplitude=1000)
+                trace('ml', "amplitude={amplitude:.2f}", amplitude='N/A')
+        with trace_session('AcCglab_run_HEX.csv', 'HEX'):
+            trace('cqj', "other channel", well='B2')
+
+        fam = tracer.lookup('B2_FAM')
+        assert [t['session'] for t in fam] == ['AcCglab_run.csv']
+        messages = [e['message'] for e in fam[0]['events']]
+        assert messages[0] == 'CQJ=7.50 (threshold crossing between cycles 7-8)'
+        assert messages[1].startswith('Input: amp=1000')
+        assert messages[-1].startswith('amplitude={amplitude:.2f}')  # mismatched template shown raw
+        assert len(tracer.lookup('B2')) == 2 and tracer.lookup('B2', session='missing') == []
+
+        tracer.rename_session('AcCglab_run.csv', '42')
+        assert tracer.lookup('B2_FAM')[0]['session'] == '42'
+    finally:
+        tracer.enabled = False
+        tracer.clear()
+
+
+def test_buffer_bounds():
+    buffer = WellTraceBuffer(enabled=True, events_per_well=3, max_wells=2)
+    for i in range(5):
+        buffer.add('cqj', "event {i}", {'i': i}, well='A1')
+    buffer.add('cqj', "b", {}, well='B1')
+    buffer.add('cqj', "c", {}, well='C1')
+    assert buffer.lookup('A1') == []  # least recently traced well dropped
+    assert buffer.stats()['wells'] == 2
+
+    buffer = WellTraceBuffer(enabled=True, events_per_well=3, max_wells=2)
+    for i in range(5):
+        buffer.add('cqj', "event {i}", {'i': i}, well='A1')
+    assert [e['message'] for e in buffer.lookup('A1')[0]['events']] == ['event 2', 'event 3', 'event 4']
+
+
+if __name__ == '__main__':
+    test_disabled_trace_records_nothing()
+    test_events_keyed_by_session_channel_and_well()
+    test_buffer_bounds()
+    print("Well trace tests: PASSED")
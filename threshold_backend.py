@@ -6,8 +6,9 @@ Separate from main app.py to maintain clean architecture
 
 from flask import request, jsonify
 from models import db, AnalysisSession, WellResult
-from cqj_calcj_utils import calculate_cqj, calculate_calcj_with_controls
-import json
+from cqj_calcj_utils import calculate_cqj
+from session_response_cache import bump_session_version
+from threshold_recalc import invalidate_session, recalculate_channel
 import traceback
 
 
@@ -26,13 +27,14 @@ def create_threshold_routes(app):
             debug_info = []
             
             for well in wells:
+                curves = well.curve_arrays()
                 well_data = {
                     'well_id': well.well_id,
                     'fluorophore': well.fluorophore,
                     'amplitude': well.amplitude,
                     'baseline': well.baseline,
-                    'raw_rfu': json.loads(well.raw_rfu) if well.raw_rfu else [],
-                    'raw_cycles': json.loads(well.raw_cycles) if well.raw_cycles else []
+                    'raw_rfu': curves['raw_rfu'],
+                    'raw_cycles': curves['raw_cycles']
                 }
                 
                 debug_info.append({
@@ -44,10 +46,10 @@ def create_threshold_routes(app):
                     'well_data_well_id_type': type(well_data.get('well_id')).__name__,
                     'fluorophore': well.fluorophore,
                     'sample_name': well.sample_name,
-                    'has_raw_rfu': bool(well.raw_rfu),
-                    'has_raw_cycles': bool(well.raw_cycles),
-                    'raw_rfu_length': len(json.loads(well.raw_rfu)) if well.raw_rfu else 0,
-                    'raw_cycles_length': len(json.loads(well.raw_cycles)) if well.raw_cycles else 0
+                    'has_raw_rfu': bool(curves['raw_rfu']),
+                    'has_raw_cycles': bool(curves['raw_cycles']),
+                    'raw_rfu_length': len(curves['raw_rfu']),
+                    'raw_cycles_length': len(curves['raw_cycles'])
                 })
             
             return jsonify({
@@ -69,13 +71,14 @@ def create_threshold_routes(app):
                 return jsonify({'error': f'Well {well_id} not found in session {session_id}'}), 404
             
             # Create well_data exactly as done in threshold update
+            curves = well.curve_arrays()
             well_data = {
                 'well_id': well.well_id,
                 'fluorophore': well.fluorophore,
                 'amplitude': well.amplitude,
                 'baseline': well.baseline,
-                'raw_rfu': json.loads(well.raw_rfu) if well.raw_rfu else [],
-                'raw_cycles': json.loads(well.raw_cycles) if well.raw_cycles else []
+                'raw_rfu': curves['raw_rfu'],
+                'raw_cycles': curves['raw_cycles']
             }
             
             # Test with a sample threshold
@@ -244,41 +247,15 @@ def recalculate_session_cqj_calcj(session_id, channel, scale, threshold_value, e
     """
     Recalculate CQJ/CalcJ values for all wells in a session with the new threshold
     Returns dict of updated well results
+
+    Parsed curves are kept per session between calls (see threshold_recalc), and
+    only rows whose cqj/calcj JSON changed are written, in one bulk UPDATE.
     """
     updated_results = {}
     
     try:
         print(f"[RECALC-CQJ] Starting recalculation for session {session_id}, channel {channel}")
         
-        # Get session from database
-        session = AnalysisSession.query.get(session_id)
-        if not session:
-            print(f"[RECALC-CQJ] Session {session_id} not found")
-            return updated_results
-        
-        # Get all wells for this session and prepare them for control-based calculation
-        wells = WellResult.query.filter_by(session_id=session_id).all()
-        if not wells:
-            print(f"[RECALC-CQJ] No wells found for session {session_id}")
-            return updated_results
-        
-        print(f"[RECALC-CQJ] Found {len(wells)} wells in session")
-        
-        # Prepare all well results for control detection (similar to frontend)
-        all_well_results = {}
-        for well in wells:
-            well_data = {
-                'well_id': well.well_id,
-                'sample_name': well.sample_name or '',
-                'fluorophore': well.fluorophore,
-                'amplitude': well.amplitude,
-                'baseline': well.baseline,
-                'raw_rfu': json.loads(well.raw_rfu) if well.raw_rfu else [],
-                'raw_cycles': json.loads(well.raw_cycles) if well.raw_cycles else [],
-                'cqj_value': well.cqj_value
-            }
-            all_well_results[well.well_id] = well_data
-        
         # Extract test code from experiment pattern (same logic as frontend)
         test_code = 'Unknown'
         if experiment_pattern:
@@ -288,87 +265,31 @@ def recalculate_session_cqj_calcj(session_id, channel, scale, threshold_value, e
         
         print(f"[RECALC-CQJ] Using test_code: {test_code} for control-based calculations")
         
-        # Debug: Show all wells in session
-        for well in wells:
-            print(f"[RECALC-CQJ] Available well: {well.well_id}, fluorophore: {well.fluorophore}, sample_name: {well.sample_name or 'None'}")
-        
-        # Process each well
-        for well in wells:
-            try:
-                # Parse well data
-                well_data = all_well_results[well.well_id]
-                
-                # Only recalculate for wells matching the channel
-                if well_data['fluorophore'] != channel:
-                    print(f"[RECALC-CQJ] Skipping well {well.well_id}: fluorophore '{well_data['fluorophore']}' != channel '{channel}'")
-                    continue
-                
-                print(f"[RECALC-CQJ] Processing well {well.well_id} for channel {channel}")
-                
-                # Calculate new CQJ first
-                new_cqj = calculate_cqj(well_data, threshold_value)
-                
-                # Update CQJ in the well_data for CalcJ calculation
-                well_data['cqj_value'] = new_cqj
-                all_well_results[well.well_id]['cqj_value'] = new_cqj
-                
-                # Calculate CalcJ using control-based method (same as frontend)
-                if new_cqj is None:
-                    new_calcj_result = {'calcj_value': 'N/A', 'method': 'no_threshold_crossing'}
-                else:
-                    new_calcj_result = calculate_calcj_with_controls(
-                        well_data, threshold_value, all_well_results, test_code, channel
-                    )
-                
-                # Prepare result for database update
-                recalc_result = {
-                    'cqj_value': new_cqj,
-                    'calcj_value': new_calcj_result['calcj_value'],
-                    'calcj_method': new_calcj_result['method'],
-                    'cqj': {'manual': new_cqj},
-                    'calcj': {'manual': new_calcj_result['calcj_value']}
-                }
-                
-                print(f"[RECALC-CQJ] Calculation result for {well.well_id}: CQJ={new_cqj}, CalcJ={new_calcj_result['calcj_value']} (method: {new_calcj_result['method']})")
-                
-                if recalc_result:
-                    # Update well in database
-                    well.cqj_value = recalc_result.get('cqj_value')
-                    well.calcj_value = recalc_result.get('calcj_value')
-                    
-                    # Update JSON fields if they exist
-                    if well.cqj and recalc_result.get('cqj'):
-                        cqj_data = json.loads(well.cqj) if isinstance(well.cqj, str) else well.cqj
-                        cqj_data.update(recalc_result['cqj'])
-                        well.cqj = json.dumps(cqj_data)
-                    
-                    if well.calcj and recalc_result.get('calcj'):
-                        calcj_data = json.loads(well.calcj) if isinstance(well.calcj, str) else well.calcj
-                        calcj_data.update(recalc_result['calcj'])
-                        well.calcj = json.dumps(calcj_data)
-                    
-                    # Prepare result for frontend
-                    updated_results[well.well_id] = {
-                        'cqj_value': recalc_result.get('cqj_value'),
-                        'calcj_value': recalc_result.get('calcj_value'),
-                        'threshold_value': threshold_value,
-                        'fluorophore': channel,
-                        'scale': scale
-                    }
-                    
-                    print(f"[RECALC-CQJ] Updated {well.well_id}: CQJ={recalc_result.get('cqj_value')}, CalcJ={recalc_result.get('calcj_value')}")
-                
-            except Exception as well_error:
-                print(f"[RECALC-CQJ] Error processing well {well.well_id}: {well_error}")
-                continue
+        results, updates = recalculate_channel(session_id, channel, threshold_value, test_code)
+        if not results:
+            print(f"[RECALC-CQJ] No {channel} wells found for session {session_id}")
+            return updated_results
         
-        # Commit all changes
+        if updates:
+            db.session.bulk_update_mappings(WellResult, updates)
+            bump_session_version(session_id)
         db.session.commit()
-        print(f"[RECALC-CQJ] Successfully updated {len(updated_results)} wells")
+        
+        for well_id, result in results.items():
+            updated_results[well_id] = {
+                'cqj_value': result['cqj_value'],
+                'calcj_value': result['calcj_value'],
+                'threshold_value': threshold_value,
+                'fluorophore': channel,
+                'scale': scale
+            }
+        print(f"[RECALC-CQJ] Recalculated {len(results)} wells, wrote {len(updates)} changed rows")
         
     except Exception as e:
         print(f"[RECALC-CQJ] Error during recalculation: {e}")
         traceback.print_exc()
         db.session.rollback()
+        invalidate_session(session_id)
+        updated_results = {}
     
     return updated_results
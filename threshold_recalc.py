@@ -0,0 +1,205 @@
+"""
+Session-scoped state for repeated manual-threshold recalculation.
+
+Dragging the threshold slider calls /threshold/manual many times for the same
+session and channel. A SessionRecalcContext keeps the parsed curve matrix and
+the control type of every well of a channel, so each call is one vectorized
+crossing search (cqj_calcj_utils.calculate_cqj_matrix), one standard curve
+and one bulk UPDATE of the cqj/calcj columns that actually changed.
+
+Contexts live in a small per-process LRU (QPCR_RECALC_CONTEXT_SESSIONS,
+0 disables it). Each call re-reads the cheap id/cqj/calcj columns, so added
+or deleted wells rebuild the context; in-place edits of curves or sample
+names go through invalidate_session(), with QPCR_RECALC_CONTEXT_TTL as the
+backstop for other worker processes.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from curve_codec import decode_curve_columns
+from cqj_calcj_utils import (calcj_from_standard_curve, calculate_cqj_matrix, control_standard_curve,
+                             determine_control_type_python, stack_curves)
+from log_utils import get_logger
+from models import db, WellResult
+from pathogen_registry import get_control_concentrations
+
+logger = get_logger("threshold_recalc")
+
+CONTEXT_SESSIONS = int(os.environ.get('QPCR_RECALC_CONTEXT_SESSIONS', '8'))
+CONTEXT_TTL_SECONDS = float(os.environ.get('QPCR_RECALC_CONTEXT_TTL', '300'))
+
+
+class ChannelCurves:
+    """Wells of one fluorophore channel with their curves stacked into matrices."""
+
+    def __init__(self, wells):
+        self.ids = [w['id'] for w in wells]
+        self.well_ids = [w['well_id'] for w in wells]
+        self.control_types = [determine_control_type_python(w['well_id'], w) for w in wells]
+        self.rfu, self.cycles, self.lengths = stack_curves([w['raw_rfu'] for w in wells],
+                                                           [w['raw_cycles'] for w in wells])
+
+    def cqj(self, threshold):
+        """CQJ per well (None where the curve never crosses)."""
+        values = calculate_cqj_matrix(self.rfu, self.cycles, threshold, self.lengths)
+        return [None if np.isnan(v) else float(v) for v in values]
+
+
+class SessionRecalcContext:
+    """Parsed curves of one session, split by channel on first use."""
+
+    def __init__(self, session_id, row_ids):
+        self.session_id = session_id
+        self.row_ids = frozenset(row_ids)
+        self.created = time.monotonic()
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def matches(self, row_ids):
+        return (self.row_ids == frozenset(row_ids)
+                and time.monotonic() - self.created < CONTEXT_TTL_SECONDS)
+
+    def channel(self, channel):
+        with self._lock:
+            curves = self._channels.get(channel)
+            if curves is None:
+                curves = self._channels[channel] = ChannelCurves(self._load_channel(channel))
+            return curves
+
+    def _load_channel(self, channel):
+        rows = (db.session.query(WellResult.id, WellResult.well_id, WellResult.sample_name,
+                                 WellResult.raw_cycles, WellResult.raw_rfu, WellResult.curve_data)
+                .filter_by(session_id=self.session_id, fluorophore=channel)
+                .order_by(WellResult.id).all())
+        wells = []
+        for row in rows:
+            curves = decode_curve_columns({'raw_cycles': row.raw_cycles, 'raw_rfu': row.raw_rfu,
+                                           'fitted_curve': '[]'}, row.curve_data)
+            wells.append({
+                'id': row.id,
+                'well_id': row.well_id,
+                'sample_name': row.sample_name or '',
+                'raw_rfu': curves['raw_rfu'],
+                'raw_cycles': curves['raw_cycles'],
+            })
+        logger.info(f"Loaded {len(wells)} {channel} wells of session {self.session_id} for recalculation")
+        return wells
+
+
+class RecalcContextCache:
+    """Thread-safe LRU of SessionRecalcContext by session id."""
+
+    def __init__(self, max_sessions=CONTEXT_SESSIONS):
+        self.max_sessions = max_sessions
+        self._contexts = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id, row_ids):
+        """Context for ``session_id`` whose well_results rows are exactly ``row_ids``."""
+        with self._lock:
+            context = self._contexts.get(session_id)
+            if context is not None and context.matches(row_ids):
+                self._contexts.move_to_end(session_id)
+                self.hits += 1
+                return context
+            self.misses += 1
+
+        context = SessionRecalcContext(session_id, row_ids)
+        if self.max_sessions > 0:
+            with self._lock:
+                self._contexts[session_id] = context
+                self._contexts.move_to_end(session_id)
+                while len(self._contexts) > self.max_sessions:
+                    self._contexts.popitem(last=False)
+        return context
+
+    def invalidate(self, session_id=None):
+        with self._lock:
+            if session_id is None:
+                self._contexts.clear()
+            else:
+                self._contexts.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {'sessions': len(self._contexts), 'max_sessions': self.max_sessions,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+recalc_contexts = RecalcContextCache()
+
+
+def invalidate_session(session_id=None):
+    """Drop cached curves after well rows of a session are edited in place (None: all sessions)."""
+    recalc_contexts.invalidate(session_id)
+
+
+def _merge_manual(column_value, manual_value):
+    """Old JSON column -> new JSON with {'manual': value} merged in, or None to leave it alone."""
+    if not column_value:
+        return None
+    try:
+        data = json.loads(column_value) if isinstance(column_value, str) else dict(column_value)
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    data['manual'] = manual_value
+    return json.dumps(data)
+
+
+def recalculate_channel(session_id, channel, threshold_value, test_code):
+    """
+    New CQJ/CalcJ for every ``channel`` well of a session at ``threshold_value``.
+
+    Returns:
+        (results, updates) - results maps well_id to cqj_value/calcj_value/calcj_method,
+        updates are {'id', 'cqj', 'calcj'} mappings for rows whose columns changed
+    """
+    current = (db.session.query(WellResult.id, WellResult.cqj, WellResult.calcj)
+               .filter_by(session_id=session_id).all())
+    if not current:
+        return {}, []
+    stored = {row.id: row for row in current}
+
+    curves = recalc_contexts.get(session_id, stored.keys()).channel(channel)
+    cqj_values = curves.cqj(threshold_value)
+
+    conc_values = get_control_concentrations(test_code, channel)
+    control_cqj = {'H': [], 'M': [], 'L': []}
+    for control_type, cqj in zip(curves.control_types, cqj_values):
+        if control_type in control_cqj and cqj is not None:
+            control_cqj[control_type].append(cqj)
+    standard_curve = (control_standard_curve(control_cqj, conc_values, test_code, f'{channel} channel')
+                      if conc_values else {'calcj_value': None, 'method': 'no_controls_available'})
+
+    results = {}
+    updates = []
+    for pk, well_id, control_type, cqj in zip(curves.ids, curves.well_ids, curves.control_types, cqj_values):
+        if cqj is None:
+            calcj = {'calcj_value': 'N/A', 'method': 'no_threshold_crossing'}
+        elif control_type in ('H', 'M', 'L'):
+            fixed_value = conc_values.get(control_type)
+            calcj = ({'calcj_value': fixed_value,
+                      'method': f'fixed_{control_type.lower()}_control_backend_centralized'}
+                     if fixed_value else {'calcj_value': None, 'method': 'missing_control_config'})
+        else:
+            calcj = calcj_from_standard_curve(standard_curve, cqj, well_id)
+        results[well_id] = {'cqj_value': cqj, 'calcj_value': calcj['calcj_value'], 'calcj_method': calcj['method']}
+
+        row = stored[pk]
+        new_cqj = _merge_manual(row.cqj, cqj)
+        new_calcj = _merge_manual(row.calcj, calcj['calcj_value'])
+        if (new_cqj is not None and new_cqj != row.cqj) or (new_calcj is not None and new_calcj != row.calcj):
+            updates.append({'id': pk,
+                            'cqj': row.cqj if new_cqj is None else new_cqj,
+                            'calcj': row.calcj if new_calcj is None else new_calcj})
+    return results, updates
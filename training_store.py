@@ -0,0 +1,207 @@
+"""
+Append-only storage for ML expert-feedback training samples.
+
+MLCurveClassifier used to rewrite all of ml_training_data.json (indented)
+on every feedback submission and rebuild the feature matrix from the sample
+dicts on every retrain, so both got slower as the dataset grew. Now:
+
+    - TrainingSampleStore keeps the samples as a JSON Lines log
+      (ml_training_data.jsonl). Adding a sample appends one line. A sample
+      that replaces earlier feedback for the same sample identifier is
+      preceded by a {"_remove": identifier} line. The log is compacted
+      (rewritten with only the live samples) once dead lines outnumber live
+      ones. The first load imports the legacy ml_training_data.json.
+    - TrainingMatrix keeps the feature matrix and labels for a sample list
+      and only vectorizes samples appended since the last retrain.
+"""
+
+import json
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+
+from log_utils import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends from a single process only
+    fcntl = None
+
+logger = get_logger("training_store")
+
+DEFAULT_LOG_PATH = os.environ.get('QPCR_ML_TRAINING_LOG', 'ml_training_data.jsonl')
+LEGACY_JSON_PATH = 'ml_training_data.json'
+# Compaction waits for at least this many dead lines, so small logs are never rewritten
+COMPACT_MIN_DEAD = 256
+
+
+def to_json_compatible(sample):
+    """Copy of a sample dict with numpy scalars/arrays (top level and one dict level down) made JSON-serializable."""
+    def convert(value):
+        if hasattr(value, 'item') and not isinstance(value, np.ndarray):  # numpy scalar
+            return value.item()
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        return value
+
+    return {key: ({k: convert(v) for k, v in value.items()} if isinstance(value, dict) else convert(value))
+            for key, value in sample.items()}
+
+
+class TrainingSampleStore:
+    """JSON Lines log of training samples; see the module docstring for the record format."""
+
+    def __init__(self, path=DEFAULT_LOG_PATH, legacy_path=LEGACY_JSON_PATH):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.dead_records = 0
+        self._lock = threading.Lock()
+
+    def _locked(self, f, exclusive=True):
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _replay(self, f):
+        samples = []
+        identifiers = Counter()
+        dead = 0
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping unreadable training log line {line_number} in {self.path}")
+                continue
+            if '_remove' in record:
+                identifier = record['_remove']
+                dead += 1
+                if identifiers.get(identifier):
+                    removed = len(samples)
+                    samples = [s for s in samples if s.get('sample_identifier') != identifier]
+                    dead += removed - len(samples)
+                    del identifiers[identifier]
+            else:
+                samples.append(record)
+                identifiers[record.get('sample_identifier')] += 1
+        return samples, dead
+
+    def load(self):
+        """Replay the log into the list of live samples (importing the legacy JSON file on first use)."""
+        with self._lock:
+            if not os.path.exists(self.path):
+                if not os.path.exists(self.legacy_path):
+                    self.dead_records = 0
+                    return []
+                with open(self.legacy_path, 'r') as f:
+                    samples = json.load(f)
+                self._rewrite(samples)
+                logger.info(f"Imported {len(samples)} training samples from {self.legacy_path} into {self.path}")
+                return samples
+            with open(self.path, 'r') as f:
+                self._locked(f, exclusive=False)
+                samples, self.dead_records = self._replay(f)
+            return samples
+
+    def append(self, sample, replaces=None):
+        """Append one sample; ``replaces`` first removes every earlier sample with that identifier."""
+        lines = []
+        if replaces is not None:
+            lines.append(json.dumps({'_remove': replaces}) + '\n')
+        lines.append(json.dumps(to_json_compatible(sample)) + '\n')
+        with self._lock:
+            while True:
+                with open(self.path, 'a') as f:
+                    self._locked(f)
+                    # Another process may have compacted (renamed a new log into place) while we waited
+                    if os.path.exists(self.path) and os.fstat(f.fileno()).st_ino != os.stat(self.path).st_ino:
+                        continue
+                    f.write(''.join(lines))
+                    f.flush()
+                    return
+
+    def record_dead(self, count):
+        """Count log lines a caller knows became dead (a tombstone plus the samples it removed)."""
+        self.dead_records += count
+
+    def needs_compaction(self, live_count):
+        return self.dead_records >= COMPACT_MIN_DEAD and self.dead_records > live_count
+
+    def compact(self):
+        """Rewrite the log from its own replay, so appends from other processes are kept. Returns the live samples."""
+        with self._lock:
+            with open(self.path, 'r+') as f:
+                self._locked(f)
+                samples, _ = self._replay(f)
+                self._rewrite(samples)
+            logger.info(f"Compacted {self.path} to {len(samples)} training samples")
+            return samples
+
+    def rewrite(self, samples):
+        """Replace the whole log with ``samples``."""
+        with self._lock:
+            self._rewrite(samples)
+
+    def _rewrite(self, samples):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            for sample in samples:
+                f.write(json.dumps(to_json_compatible(sample)) + '\n')
+        os.replace(tmp_path, self.path)
+        self.dead_records = 0
+
+
+class TrainingMatrix:
+    """
+    Feature matrix and labels for a list of training samples, extended incrementally.
+
+    ``vectorize(sample)`` returns (feature_vector, label). Rows are cached for one list
+    object: samples appended to it since the last sync are vectorized, anything else
+    (a different list, or a shorter one) rebuilds from scratch. Samples without a
+    string label get no row.
+    """
+
+    def __init__(self, vectorize, n_features):
+        self.vectorize = vectorize
+        self.n_features = n_features
+        self._reset(None)
+
+    def _reset(self, samples):
+        self._source = samples
+        self._synced = 0
+        self._rows = 0
+        self._X = np.empty((64, self.n_features), dtype=np.float64)
+        self._labels = []
+        self._pathogens = []
+        self.identifiers = Counter()  # sample_identifier -> samples, labelled or not
+        self.pathogens = Counter()    # str(pathogen) -> samples, labelled or not
+
+    def sync(self, samples):
+        """Bring the cache up to date with ``samples``; returns (X, y) views of the labelled rows."""
+        if samples is not self._source or len(samples) < self._synced:
+            self._reset(samples)
+        for sample in samples[self._synced:]:
+            pathogen = sample.get('pathogen')
+            pathogen = str(pathogen) if pathogen is not None else None
+            self.identifiers[sample.get('sample_identifier')] += 1
+            if pathogen is not None:
+                self.pathogens[pathogen] += 1
+            vector, label = self.vectorize(sample)
+            if label is None or not isinstance(label, str):
+                continue
+            if self._rows == len(self._X):
+                grown = np.empty((2 * len(self._X), self.n_features), dtype=np.float64)
+                grown[:self._rows] = self._X[:self._rows]
+                self._X = grown
+            self._X[self._rows] = vector
+            self._labels.append(label)
+            self._pathogens.append(pathogen)
+            self._rows += 1
+        self._synced = len(samples)
+        return self._X[:self._rows], np.array(self._labels)
+
+    def pathogen_rows(self, pathogen):
+        """Boolean mask over the synced rows whose sample pathogen matches."""
+        return np.array(self._pathogens, dtype=object) == str(pathogen)
@@ -4,18 +4,20 @@ Supports both Entra ID (Azure AD) OAuth and local database authentication
 Provides fallback authentication and role-based access control
 """
 
+import atexit
 import hashlib
 import secrets
 import datetime
 import logging
 from typing import Dict, List, Optional, Tuple
-import mysql.connector
+import mysql_pool
 from mysql.connector import Error
 import os
 from functools import wraps
 from flask import session, request, redirect, url_for, jsonify
 
 from entra_auth import EntraAuthManager
+from session_cache import ActivityWriter, SessionValidationCache
 
 logger = logging.getLogger(__name__)
 
@@ -135,6 +137,11 @@ class UnifiedAuthManager:
         # Session timeout configuration (configurable for dev/prod)
         self.session_timeout_hours = int(os.getenv('SESSION_TIMEOUT_HOURS', '2'))  # Default 2 hours for security
         
+        # Validated sessions are served from memory; last_activity is written in batches
+        self.session_cache = SessionValidationCache()
+        self.activity_writer = ActivityWriter(lambda: mysql_pool.connect(**self.mysql_config))
+        atexit.register(self.activity_writer.stop)
+        
         # Initialize database tables
         self._initialize_auth_tables()
 
@@ -228,7 +235,7 @@ class UnifiedAuthManager:
         """Initialize authentication-related database tables"""
         connection = None
         try:
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor()
             
             # User sessions table
@@ -304,7 +311,7 @@ class UnifiedAuthManager:
         """Ensure backdoor admin user exists for emergency access"""
         connection = None
         try:
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor()
             
             # Check if backdoor user exists
@@ -366,7 +373,7 @@ class UnifiedAuthManager:
                 logger.warning("Local authentication attempted but backdoor is disabled")
                 return None
 
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor(dictionary=True)
 
             # Get user from local database
@@ -507,7 +514,7 @@ class UnifiedAuthManager:
             session_id = secrets.token_urlsafe(64)
             expires_at = datetime.datetime.now() + datetime.timedelta(hours=self.session_timeout_hours)
             
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor()
             
             # Clean up expired sessions first
@@ -556,10 +563,15 @@ class UnifiedAuthManager:
     
     def validate_session(self, session_id: str) -> Optional[Dict]:
         """Validate user session and return user data"""
+        cached = self.session_cache.get(session_id)
+        if cached is not None:
+            self.activity_writer.touch(session_id)
+            return cached
+        
         connection = None
         cursor = None
         try:
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor(dictionary=True)
             
             cursor.execute("""
@@ -573,16 +585,7 @@ class UnifiedAuthManager:
             if not session:
                 return None
             
-            # Update last activity
-            cursor.execute("""
-                UPDATE user_sessions 
-                SET last_activity = CURRENT_TIMESTAMP 
-                WHERE session_id = %s
-            """, (session_id,))
-            
-            connection.commit()
-            
-            return {
+            user_data = {
                 'session_id': session['session_id'],
                 'user_id': session['user_id'],
                 'username': session['username'],
@@ -592,6 +595,10 @@ class UnifiedAuthManager:
                 'auth_method': session['auth_method'],
                 'expires_at': session['expires_at'].isoformat()
             }
+            self.session_cache.put(session_id, user_data, session['expires_at'].timestamp())
+            # Update last activity (written by the batched activity writer)
+            self.activity_writer.touch(session_id)
+            return user_data
             
         except Error as e:
             logger.error(f"Error validating session: {e}")
@@ -610,10 +617,12 @@ class UnifiedAuthManager:
     
     def logout_user(self, session_id: str) -> bool:
         """Logout user and cleanup session"""
+        self.session_cache.invalidate(session_id)
+        self.activity_writer.discard(session_id)
         connection = None
         cursor = None
         try:
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor()
             
             # Get session info for logging
@@ -644,7 +653,38 @@ class UnifiedAuthManager:
                     connection.close()
             except Exception:
                 pass
-    
+
+    def update_user_role(self, username: str, role: str) -> bool:
+        """Change a local user's role and apply it to their active sessions"""
+        if role not in self.ROLES:
+            logger.error(f"Unknown role: {role}")
+            return False
+        connection = None
+        cursor = None
+        try:
+            connection = mysql_pool.connect(**self.mysql_config)
+            cursor = connection.cursor()
+            cursor.execute("UPDATE local_users SET role = %s WHERE username = %s", (role, username))
+            cursor.execute("UPDATE user_sessions SET role = %s WHERE username = %s", (role, username))
+            connection.commit()
+            return True
+
+        except Error as e:
+            logger.error(f"Error updating role for {username}: {e}")
+            return False
+        finally:
+            self.session_cache.invalidate_user(username=username)
+            try:
+                if cursor is not None:
+                    cursor.close()
+            except Exception:
+                pass
+            try:
+                if connection is not None and getattr(connection, 'is_connected', lambda: False)():
+                    connection.close()
+            except Exception:
+                pass
+
     def _hash_password(self, password: str, salt: str) -> str:
         """Hash password with salt using PBKDF2"""
         return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000).hex()
@@ -671,7 +711,7 @@ class UnifiedAuthManager:
                     details.setdefault('endpoint', getattr(_flask_request, 'endpoint', None))
             except Exception:
                 pass
-            connection = mysql.connector.connect(**self.mysql_config)
+            connection = mysql_pool.connect(**self.mysql_config)
             cursor = connection.cursor()
             
             cursor.execute("""
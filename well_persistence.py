@@ -0,0 +1,157 @@
+"""
+Bulk persistence of well_results rows for saved analysis sessions.
+
+save_individual_channel_session and save_combined_session used to build one
+WellResult ORM object per well and flush them through the unit of work. They
+now turn each well into a plain column dict with well_row() and hand the
+whole plate to save_well_rows(), which writes it with executemany-style bulk
+INSERT/UPDATE statements inside the caller's transaction.
+
+QPCR_WELL_SAVE_MODE selects how an existing session is overwritten:
+    upsert   (default) update rows matched on (session_id, well_id), insert new
+             wells and delete only wells missing from the new results
+    replace  delete every row of the session and insert the new ones
+"""
+
+import json
+import os
+import time
+
+from sqlalchemy import insert, update
+
+from curve_codec import encode_curve_columns
+from log_utils import get_logger
+from models import db, WellResult
+from session_response_cache import bump_session_version
+from threshold_recalc import invalidate_session
+
+logger = get_logger("well_persistence")
+
+WELL_SAVE_MODE = os.environ.get('QPCR_WELL_SAVE_MODE', 'upsert').lower()
+SAVE_MODES = ('upsert', 'replace')
+
+
+def safe_json_dumps(value, default=None):
+    """Helper function to safely serialize to JSON, avoiding double-encoding"""
+    if value is None:
+        return None
+    # If already a string, assume it's already JSON-encoded
+    if isinstance(value, str):
+        try:
+            # Validate it's valid JSON
+            json.loads(value)
+            return value
+        except (json.JSONDecodeError, TypeError):
+            # If not valid JSON, treat as a raw string and encode it
+            return json.dumps(value)
+    # Otherwise, serialize the object/list to JSON
+    return json.dumps(value if value is not None else default)
+
+
+def _float(value):
+    return float(value) if value is not None else None
+
+
+def well_row(well_key, well_data, test_code, fluorophore=None):
+    """
+    Column values of one well_results row (without session_id).
+
+    ``fluorophore`` takes priority over the well's own fluorophore field.
+    Raises ValueError/TypeError for non-numeric metrics, like the ORM path did.
+    """
+    cq_value = well_data.get('cq_value')
+    threshold_value = well_data.get('threshold_value')
+    try:
+        threshold_value = float(threshold_value) if threshold_value is not None else None
+    except (ValueError, TypeError):
+        threshold_value = None
+    final_fluorophore = fluorophore or well_data.get('fluorophore')
+    curve_classification = well_data.get('curve_classification')
+    if curve_classification is None:
+        curve_classification = {'class': 'N/A'}
+
+    row = {
+        'well_id': str(well_key),
+        'fluorophore': str(final_fluorophore) if final_fluorophore else None,
+        'is_good_scurve': bool(well_data.get('is_good_scurve', False)),
+        'r2_score': _float(well_data.get('r2_score')),
+        'rmse': _float(well_data.get('rmse')),
+        'amplitude': _float(well_data.get('amplitude')),
+        'steepness': _float(well_data.get('steepness')),
+        'midpoint': _float(well_data.get('midpoint')),
+        'baseline': _float(well_data.get('baseline')),
+        'data_points': int(well_data['data_points']) if well_data.get('data_points') is not None else None,
+        'cycle_range': _float(well_data.get('cycle_range')),
+        'fit_parameters': safe_json_dumps(well_data.get('fit_parameters'), []),
+        'parameter_errors': safe_json_dumps(well_data.get('parameter_errors'), []),
+        'anomalies': safe_json_dumps(well_data.get('anomalies'), []),
+        'sample_name': str(well_data['sample_name']) if well_data.get('sample_name') else None,
+        'cq_value': float(cq_value) if cq_value is not None and cq_value != '' else None,
+        'threshold_value': threshold_value,
+        'thresholds': safe_json_dumps(well_data.get('thresholds'), {}),
+        'curve_classification': safe_json_dumps(curve_classification, {'class': 'N/A'}),
+        'cqj': safe_json_dumps(well_data.get('cqj'), {}),
+        'calcj': safe_json_dumps(well_data.get('calcj'), {}),
+        'test_code': test_code,
+    }
+    # Persist raw data; gracefully fallback to alternate keys
+    raw_cycles = well_data.get('raw_cycles') or well_data.get('cycles') or well_data.get('x_data')
+    raw_rfu = well_data.get('raw_rfu') or well_data.get('rfu') or well_data.get('y_data')
+    row.update(encode_curve_columns(raw_cycles, raw_rfu, well_data.get('fitted_curve'),
+                                    dumps=lambda value: safe_json_dumps(value, [])))
+    return row
+
+
+def save_well_rows(session_id, rows, mode=None):
+    """
+    Write the well rows of one session in bulk; the caller commits.
+
+    Returns:
+        dict with mode, inserted, updated, deleted, seconds and rows_per_sec
+    """
+    mode = (mode or WELL_SAVE_MODE).lower()
+    if mode not in SAVE_MODES:
+        raise ValueError(f"Unknown well save mode '{mode}' (expected one of {SAVE_MODES})")
+    started = time.perf_counter()
+    rows = [dict(row, session_id=session_id) for row in rows]
+
+    inserts, updates, stale_ids = rows, [], []
+    if mode == 'replace':
+        deleted = WellResult.query.filter_by(session_id=session_id).delete(synchronize_session=False)
+    else:
+        existing = {}
+        for pk, well_id in (db.session.query(WellResult.id, WellResult.well_id)
+                            .filter_by(session_id=session_id).order_by(WellResult.id)):
+            existing.setdefault(well_id, []).append(pk)
+        inserts = []
+        for row in rows:
+            ids = existing.get(row['well_id'])
+            if ids:
+                updates.append(dict(row, id=ids.pop(0)))
+            else:
+                inserts.append(row)
+        stale_ids = [pk for ids in existing.values() for pk in ids]
+        deleted = 0
+        if stale_ids:
+            deleted = (WellResult.query.filter(WellResult.id.in_(stale_ids))
+                       .delete(synchronize_session=False))
+
+    if inserts:
+        db.session.execute(insert(WellResult), inserts)
+    if updates:
+        db.session.execute(update(WellResult), updates)
+    bump_session_version(session_id)
+    # Upserted rows keep their ids, so the recalc context cannot notice new curves on its own
+    invalidate_session(session_id)
+
+    seconds = time.perf_counter() - started
+    stats = {
+        'mode': mode,
+        'inserted': len(inserts),
+        'updated': len(updates),
+        'deleted': deleted,
+        'seconds': round(seconds, 4),
+        'rows_per_sec': round(len(rows) / seconds, 1) if seconds > 0 else None,
+    }
+    logger.info(f"Saved {len(rows)} wells for session {session_id}: {stats}")
+    return stats
@@ -0,0 +1,173 @@
+"""
+Per-well debug trace for the analysis pipeline.
+
+The curve, threshold, CQJ/CalcJ and ML helpers used to print several debug
+lines per well, which on a full plate meant megabytes of synchronous stdout
+per /analyze call. They now call ``trace(source, message, **fields)``
+instead. With tracing off (the default) that returns immediately: the
+message is a str.format template and is only rendered when a trace is read
+back, so a disabled call costs one attribute check.
+
+With tracing on, events go into a bounded in-memory buffer: the last
+``events_per_well`` events for each (session, channel, well), and at most
+``max_wells`` wells overall (least recently traced wells are dropped first).
+The session and channel come from ``trace_session()`` around an analysis
+run; the well comes from the ``well=`` argument or an enclosing
+``well_scope()``. /api/wells/<well_key>/trace reads the buffer for the
+curve modal.
+
+Configuration:
+    QPCR_WELL_TRACE            1 enables tracing (default 0)
+    QPCR_WELL_TRACE_EVENTS     events kept per well (default 200)
+    QPCR_WELL_TRACE_WELLS      wells kept across all sessions (default 4096)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+
+TRACE_ENABLED = os.environ.get('QPCR_WELL_TRACE', '0') == '1'
+TRACE_EVENTS_PER_WELL = int(os.environ.get('QPCR_WELL_TRACE_EVENTS', '200'))
+TRACE_MAX_WELLS = int(os.environ.get('QPCR_WELL_TRACE_WELLS', '4096'))
+
+_session = ContextVar('qpcr_trace_session', default=(None, None))
+_well = ContextVar('qpcr_trace_well', default=None)
+
+
+def format_event(message, fields):
+    """Render a trace message template; a template that does not fit its fields is shown with them raw."""
+    try:
+        return message.format(**fields)
+    except (KeyError, IndexError, ValueError, TypeError):
+        return f"{message} {fields}"
+
+
+class WellTraceBuffer:
+    """Ring buffers of trace events keyed by (session, channel, well)."""
+
+    def __init__(self, enabled=TRACE_ENABLED, events_per_well=TRACE_EVENTS_PER_WELL, max_wells=TRACE_MAX_WELLS):
+        self.enabled = enabled
+        self.events_per_well = events_per_well
+        self.max_wells = max_wells
+        self._wells = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, source, message, fields, well=None):
+        session, channel = _session.get()
+        key = (session, channel, well if well is not None else _well.get())
+        event = (time.time(), source, message, fields)
+        with self._lock:
+            events = self._wells.get(key)
+            if events is None:
+                events = self._wells[key] = deque(maxlen=self.events_per_well)
+                while len(self._wells) > self.max_wells:
+                    self._wells.popitem(last=False)
+            else:
+                self._wells.move_to_end(key)
+            events.append(event)
+
+    def lookup(self, well_key, session=None):
+        """
+        Traces for a well as the results table names it ("A1" or "A1_FAM").
+
+        The analyzer traces plain well ids within a channel's session, so "A1_FAM"
+        also matches well "A1" traced under channel FAM. Most recently traced first.
+
+        Returns:
+            [{'session', 'channel', 'well', 'events': [{'time', 'source', 'message'}, ...]}, ...]
+        """
+        base, _, suffix = str(well_key).partition('_')
+        with self._lock:
+            matches = [(key, list(events)) for key, events in self._wells.items()
+                       if (session is None or key[0] == session)
+                       and (key[2] == well_key or (key[2] == base and (not suffix or key[1] in (None, suffix))))]
+        return [{
+            'session': key[0],
+            'channel': key[1],
+            'well': key[2],
+            'events': [{'time': ts, 'source': source, 'message': format_event(message, fields)}
+                       for ts, source, message, fields in events]
+        } for key, events in reversed(matches)]
+
+    def rename_session(self, old_session, new_session):
+        """Re-key a session's traces, e.g. from the upload filename to the saved session id."""
+        with self._lock:
+            for key in [key for key in self._wells if key[0] == old_session]:
+                self._wells[(new_session, key[1], key[2])] = self._wells.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._wells.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'wells': len(self._wells),
+                'events': sum(len(events) for events in self._wells.values()),
+                'events_per_well': self.events_per_well,
+                'max_wells': self.max_wells
+            }
+
+
+tracer = WellTraceBuffer()
+
+
+def trace(source, message, well=None, **fields):
+    """
+    Record a debug event for the current well. ``message`` is a str.format template
+    over ``fields``; nothing is formatted or stored while tracing is off.
+    """
+    if tracer.enabled:
+        tracer.add(source, message, fields, well)
+
+
+class _Scope:
+    __slots__ = ('_var', '_value', '_token')
+
+    def __init__(self, var, value):
+        self._var = var
+        self._value = value
+        self._token = None
+
+    def __enter__(self):
+        self._token = self._var.set(self._value)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._var.reset(self._token)
+        return False
+
+
+class _NoScope:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SCOPE = _NoScope()
+
+
+def trace_session(session, channel=None):
+    """Context manager: trace events inside belong to this session (and channel)."""
+    return _Scope(_session, (session, channel)) if tracer.enabled else _NO_SCOPE
+
+
+def well_scope(well_id):
+    """
+    Context manager: trace events inside without an explicit well= belong to this well.
+    A None well_id keeps the enclosing scope.
+    """
+    return _Scope(_well, well_id) if tracer.enabled and well_id is not None else _NO_SCOPE
+
+
+def scalar_fields(values):
+    """The scalar entries of a metrics dict, for tracing it without its RFU/cycle arrays."""
+    return {key: value for key, value in values.items()
+            if value is None or isinstance(value, (str, int, float, bool))}